@@ -6,6 +6,9 @@ This file marks the v1 API directory as a Python package.
 
 from flask import Blueprint
 
+from backend.src.utils.metrics import metrics
+from backend.src.services.call_resilience import circuit_breaker_snapshot
+
 from backend.src.api.v1.auth import auth_bp
 from backend.src.api.v1.employees import employees_bp
 from backend.src.api.v1.bot import bot_bp
@@ -31,3 +34,11 @@ def version():
         "deprecated": False,
         "documentation": "/docs/api/v1"
     }
+
+@v1_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Return a snapshot of the in-process service metrics"""
+    return {
+        "metrics": metrics.snapshot(),
+        "circuit_breakers": circuit_breaker_snapshot()
+    }
@@ -5,62 +5,53 @@ These endpoints handle WhatsApp webhook interactions via Twilio.
 """
 
 from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 import os
 import secrets
 import string
 from datetime import datetime, timedelta
-from twilio.rest import Client
 import re
 import json
-import google.generativeai as genai
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from google.api_core import exceptions as google_exceptions
-import google.generativeai as genai
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 from ...utils.audit_logger import audit_decorator, log_audit_event
-from ...utils.error_handler import api_route_wrapper, BadRequestError, ServerError
-from ...models.models import User, KeywordStat, Message, CheckIn
-from ...services import queue_sentiment_analysis
+from ...utils.auth import hr_required
+from ...utils.error_handler import api_route_wrapper, BadRequestError, NotFoundError, ServerError, UnauthorizedError
+from ...models.models import db, User, Message, CheckIn, BroadcastJob
+from ...services import queue_sentiment_analysis, queue_conversation_summary, queue_keyword_extraction
+from ...services.inbound_worker import init_inbound_workers, enqueue_inbound_message
+from ...services.sender_dispatcher import sender_locks
+from ...services.idempotency import get_idempotency_guard
+from ...services.user_state_cache import get_user_state_cache
+from ...services.rate_limiter import get_message_rate_limiter
+from ...services.outbound_sender import get_outbound_sender
+from ...services.reply_streaming import stream_reply
+from ...services.gemini_client import get_gemini_client
+from ...services.sentiment_analysis import get_sentiment_service
+from ...services.broadcast import FILTER_FIELDS, DEFAULT_INVITATION, filter_users, start_broadcast
+from ...services.check_in_scheduler import DEFAULT_WINDOW, get_check_in_scheduler, schedule_check_ins
+from ...services.delivery_status import get_delivery_recorder, get_delivery_stats
+from ...services.message_templates import TemplateNotFoundError, TemplateParameterError, get_template_registry
+from ...services.call_resilience import CircuitOpenError, CallTimeoutError
+from ...services.conversation_context import build_conversation_context
+from ...services.conversation_store import (
+    append_turns, ROLE_USER, ROLE_AI, ROLE_SESSION
+)
 from ...services.check_in_flow import handle_check_in_response, handle_timeout_checks
 
 # Create a Blueprint for the bot API
 bot_bp = Blueprint('bot_api_v1', __name__)
 
 # Constants
-MAX_MESSAGES_PER_DAY = 50
 INACTIVITY_THRESHOLD = timedelta(hours=1)
 
-# Initialize Twilio client
-account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-twilio_whatsapp_number = os.getenv('TWILIO_WHATSAPP_NUMBER')
-client = Client(account_sid, auth_token)
-
-# Initialize Gemini AI
-try:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-    model = genai.GenerativeModel("gemini-1.5-flash-002")
-except Exception as e:
-    current_app.logger.error(f"Failed to initialize Gemini AI: {str(e)}")
-
 def generate_access_code(length=8):
     """Generate a random access code for user authentication"""
     alphabet = string.ascii_uppercase + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
-def is_over_message_limit(user):
-    """Check if a user has exceeded their daily message limit"""
-    # Reset message count if last message was more than 24 hours ago
-    if user.last_message_time and (datetime.utcnow() - user.last_message_time) > timedelta(hours=24):
-        user.message_count = 0
-        return False
-    
-    # Check if user has exceeded message limit
-    return user.message_count >= MAX_MESSAGES_PER_DAY
-
 def update_message_count(user):
-    """Update the message count for a user"""
+    """Update the message count for a user (limits are enforced by the rate limiter)"""
     # If last message was more than 24 hours ago, reset count
     if user.last_message_time and (datetime.utcnow() - user.last_message_time) > timedelta(hours=24):
         user.message_count = 1
@@ -69,47 +60,99 @@ def update_message_count(user):
     
     user.last_message_time = datetime.utcnow()
 
-def get_response(user_input, conversation_history):
+def get_response(user_id, context, user_input):
     """Get a response from the Gemini AI model"""
-    # System prompt is defined in app.py
-    system_prompt = current_app.config.get('SYSTEM_PROMPT', "")
-    
     try:
-        chat = model.start_chat(history=[])
-        response = chat.send_message(f"{conversation_history}\nUser: {user_input}")
-        return response.text
-    except google_exceptions.InternalServerError:
-        # Fallback response if model has an error
+        return get_gemini_client(current_app._get_current_object()).reply(user_id, context, user_input)
+    except (google_exceptions.InternalServerError, CircuitOpenError, CallTimeoutError) as e:
+        # Fallback response if model has an error, is too slow or keeps failing
+        current_app.logger.warning(f"Model unavailable: {str(e)}")
         return "I'm having trouble processing your request right now. Could you please try again in a moment?"
     except Exception as e:
         current_app.logger.error(f"Error getting model response: {str(e)}")
         return "I'm sorry, I'm experiencing some technical difficulties. Please try again later."
 
+def get_response_stream(user_id, context, user_input):
+    """Stream a response from the Gemini AI model, yielding text as it is generated"""
+    return get_gemini_client(current_app._get_current_object()).reply_stream(user_id, context, user_input)
+
+def stream_response(sender, user_id, context, user_input):
+    """
+    Stream a Gemini reply to the user, sending each WhatsApp chunk as soon as
+    a sentence boundary near the size limit is reached.
+    
+    Falls back to the non-streaming path if the stream fails before anything
+    has been sent.
+    
+    Args:
+        sender: Recipient phone number
+        user_id: ID of the user
+        context: Conversation context of the turn
+        user_input: The user's message
+        
+    Returns:
+        Tuple of (reply text, list of Twilio message SIDs)
+    """
+    outbound = get_outbound_sender(current_app._get_current_object())
+    futures = []
+    
+    try:
+        ai_response = stream_reply(
+            get_response_stream(user_id, context, user_input),
+            lambda chunk: futures.append(outbound.send(sender, chunk))
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error streaming model response: {str(e)}")
+        if futures:
+            # Part of the reply has already been delivered; close it off rather than repeat it
+            ai_response = "I'm sorry, I lost my train of thought there. Could you say that again?"
+            futures.append(outbound.send(sender, ai_response))
+        else:
+            ai_response = None
+    
+    if not futures:
+        ai_response = get_response(user_id, context, user_input)
+        futures.append(outbound.send(sender, split_message(ai_response)))
+    
+    timeout = current_app.config.get('TWILIO_SEND_TIMEOUT', 60)
+    message_sids = [sid for future in futures for sid in future.result(timeout=timeout)]
+    return ai_response, message_sids
+
 def split_message(message, limit=1600):
     """Split a message into chunks if it exceeds the character limit"""
     return [message[i:i+limit] for i in range(0, len(message), limit)]
 
-def get_recent_conversation_history(conversation_history, max_exchanges=10):
-    """Get the most recent conversation exchanges"""
-    if not conversation_history:
-        return ""
+def send_whatsapp_message(to, body, category='reply'):
+    """
+    Send a WhatsApp message through the pooled, rate-limited outbound sender.
     
-    exchanges = conversation_history.split('\n\n')
-    return '\n\n'.join(exchanges[-max_exchanges:])
+    Long bodies are split into WhatsApp-sized chunks that are delivered in order.
+    
+    Args:
+        to: Recipient number, with or without the whatsapp: prefix
+        body: Message text
+        category: What the message is, recorded with its delivery status
+        
+    Returns:
+        List of Twilio message SIDs, one per chunk
+    """
+    outbound = get_outbound_sender(current_app._get_current_object())
+    future = outbound.send(to, split_message(body), category=category)
+    return future.result(timeout=current_app.config.get('TWILIO_SEND_TIMEOUT', 60))
 
-def extract_keywords(text):
-    """Extract keywords from text for sentiment analysis"""
-    try:
-        # Tokenize and remove stopwords
-        tokens = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        keywords = [word for word in tokens if word.isalpha() and word not in stop_words and len(word) > 3]
+def complete_turn(to, body):
+    """
+    Commit everything a bot turn added in one transaction, then send the reply
+    
+    Args:
+        to: Recipient phone number (without the whatsapp: prefix)
+        body: Reply text
         
-        # Get the most common keywords
-        return list(set(keywords))
-    except Exception as e:
-        current_app.logger.error(f"Error extracting keywords: {str(e)}")
-        return []
+    Returns:
+        List of Twilio message SIDs, one per chunk
+    """
+    db.session.commit()
+    return send_whatsapp_message(to, body)
 
 @bot_bp.route('/bot', methods=['POST'])
 @api_route_wrapper
@@ -124,34 +167,83 @@ def bot():
         "To": "whatsapp:+0987654321"
     }
     
+    When BOT_PROCESSING_MODE is 'async' the message is stored and acknowledged
+    immediately, and a background worker runs the pipeline and sends the reply.
+    
+    Deliveries are deduplicated on MessageSid, so a Twilio retry of a message
+    that is already being processed or was processed returns immediately.
+    
     Returns:
-        Twilio-compatible XML response
+        JSON with processing status
     """
+    # Extract message content and sender information
+    incoming_msg = request.form.get('Body', '').strip()
+    sender = request.form.get('From', '')
+    
+    if not incoming_msg or not sender:
+        raise BadRequestError("Missing required parameters")
+    
+    # Remove 'whatsapp:' prefix if present
+    if sender.startswith('whatsapp:'):
+        sender = sender[9:]
+    
+    app = current_app._get_current_object()
+    message_sid = request.form.get('MessageSid')
+    
+    # Drop Twilio retries before they reach Gemini, the database or Twilio
+    guard = get_idempotency_guard(app)
+    if message_sid and not guard.claim(message_sid):
+        return {"status": "duplicate", "message": "Message already received"}
+    
+    if current_app.config.get('BOT_PROCESSING_MODE') == 'async':
+        init_inbound_workers(app, process_incoming_message)
+        enqueue_inbound_message(sender, incoming_msg, message_sid)
+        return {"status": "accepted", "message": "Message queued for processing"}
+    
+    # Process on this request thread, one message at a time per phone number
     try:
-        # Get the database instance from the app
-        db = current_app.extensions['sqlalchemy'].db
-        
-        # Extract message content and sender information
-        incoming_msg = request.form.get('Body', '').strip()
-        sender = request.form.get('From', '')
-        
-        if not incoming_msg or not sender:
-            raise BadRequestError("Missing required parameters")
-        
-        # Remove 'whatsapp:' prefix if present
-        if sender.startswith('whatsapp:'):
-            sender = sender[9:]
+        with sender_locks.hold(sender):
+            return process_incoming_message(sender, incoming_msg)
+    except Exception:
+        # Let a redelivery of this message be processed again
+        if message_sid:
+            guard.release(message_sid)
+        raise
+
+def process_incoming_message(sender, incoming_msg):
+    """
+    Run the bot pipeline for one inbound WhatsApp message and send the reply.
+    
+    This is called inline by the webhook, or by a background worker when the
+    webhook runs in acknowledge-then-process mode. Every row the turn writes
+    (user updates, messages, turns, keywords, check-in state, audit events)
+    is committed in a single transaction before the reply is sent.
+    
+    Args:
+        sender: Sender phone number (without the whatsapp: prefix)
+        incoming_msg: Message text
         
+    Returns:
+        Dict with processing status
+    """
+    try:
         # Log the incoming message (anonymized)
         log_audit_event(
             user_id="anonymized", 
             action="receive_message", 
             target="whatsapp_bot",
-            details={"message_length": len(incoming_msg)}
+            details={"message_length": len(incoming_msg)},
+            commit=False
         )
         
-        # Find or create user
-        user = db.session.query(User).filter_by(phone_number=sender).first()
+        # Onboarded users are answered from the state cache without a query
+        user_states = get_user_state_cache(current_app._get_current_object())
+        user = user_states.get(sender)
+        if user is None:
+            # Find or create user. No row lock: it would be held through the
+            # Gemini call and block the counter flush, and within this process
+            # the sender lock (or dispatcher shard) already serializes the sender
+            user = db.session.query(User).filter_by(phone_number=sender).first()
         
         # New user flow
         if not user:
@@ -165,7 +257,6 @@ def bot():
                 message_count=0
             )
             db.session.add(user)
-            db.session.commit()
             
             # Send welcome message with access code
             response_message = (
@@ -173,12 +264,8 @@ def bot():
                 "Please enter this code to verify your identity."
             )
             
-            # Send response via Twilio
-            message = client.messages.create(
-                from_=f'whatsapp:{twilio_whatsapp_number}',
-                body=response_message,
-                to=f'whatsapp:{sender}'
-            )
+            # Commit the turn, then send the response via Twilio
+            complete_turn(sender, response_message)
             
             return {"status": "success", "message": "Welcome message sent"}
         
@@ -187,7 +274,6 @@ def bot():
             if incoming_msg == user.access_code:
                 user.is_authenticated = True
                 user.authentication_time = datetime.utcnow()
-                db.session.commit()
                 
                 # Send consent message
                 response_message = (
@@ -197,12 +283,8 @@ def bot():
                     "'I consent to Manobal using my anonymized conversation data for mental health insights.'"
                 )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "User authenticated"}
             else:
@@ -212,20 +294,15 @@ def bot():
                     "Please enter this code to verify your identity."
                 )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "Authentication failed"}
         
         # Consent flow for authenticated users
         if not user.consent_given:
-            if "I consent" in incoming_msg.lower():
+            if "i consent" in incoming_msg.lower():
                 user.consent_given = True
-                db.session.commit()
                 
                 # Ask for location and department
                 response_message = (
@@ -235,12 +312,8 @@ def bot():
                     "For example: 'Department: Engineering, Location: Remote'"
                 )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "Consent received"}
             else:
@@ -250,12 +323,8 @@ def bot():
                     "'I consent to Manobal using my anonymized conversation data for mental health insights.'"
                 )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "Consent reminder sent"}
         
@@ -271,7 +340,6 @@ def bot():
                 if loc_match:
                     user.location = loc_match.group(1).strip()
                 
-                db.session.commit()
                 
                 # Check if we still need more info
                 if not user.department or not user.location:
@@ -290,7 +358,6 @@ def bot():
                 else:
                     # Start the conversation
                     user.conversation_started = True
-                    db.session.commit()
                     
                     response_message = (
                         f"Thank you for providing your information. Now I'm ready to chat with you! "
@@ -298,12 +365,8 @@ def bot():
                         "to begin a structured check-in process."
                     )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "User information updated"}
             else:
@@ -315,33 +378,36 @@ def bot():
                     "For example: 'Department: Engineering, Location: Remote'"
                 )
                 
-                # Send response via Twilio
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=response_message,
-                    to=f'whatsapp:{sender}'
-                )
+                # Commit the turn, then send the response via Twilio
+                complete_turn(sender, response_message)
                 
                 return {"status": "success", "message": "Format clarification sent"}
         
-        # Check if user has exceeded message limit
-        if is_over_message_limit(user):
-            response_message = (
-                "You've reached the maximum number of messages for today. "
-                "Please try again tomorrow."
-            )
+        # Onboarding is complete; from here on the cached state stands in for the row
+        if isinstance(user, User):
+            user = user_states.put_user(user)
+        
+        # Check the daily and per-minute message limits
+        limit_result = get_message_rate_limiter(current_app._get_current_object()).hit(user.id)
+        if not limit_result.allowed:
+            if limit_result.limit.name == 'minute':
+                response_message = (
+                    "You're sending messages a little too quickly. "
+                    "Please wait a minute and try again."
+                )
+            else:
+                response_message = (
+                    "You've reached the maximum number of messages for today. "
+                    "Please try again later."
+                )
             
-            # Send response via Twilio
-            message = client.messages.create(
-                from_=f'whatsapp:{twilio_whatsapp_number}',
-                body=response_message,
-                to=f'whatsapp:{sender}'
-            )
+            # Commit the turn, then send the response via Twilio
+            complete_turn(sender, response_message)
             
             return {"status": "success", "message": "Message limit reached"}
             
         # Process check-in flow if user has started a check-in
-        check_in_result = handle_check_in_response(user.id, incoming_msg)
+        check_in_result = handle_check_in_response(user.id, incoming_msg, commit=False)
         if check_in_result['response_text']:
             # Handle structured check-in flow
             response_message = check_in_result['response_text']
@@ -367,65 +433,73 @@ def bot():
                 timestamp=datetime.utcnow()
             )
             db.session.add(ai_message)
-            db.session.commit()
-            
-            # Queue sentiment analysis for the message if appropriate
-            if check_in_result['check_in'] and check_in_result['check_in'].state == 'completed':
-                # Extract all text from the check-in for sentiment analysis
-                check_in = check_in_result['check_in']
-                combined_text = f"{check_in.mood_description or ''} {check_in.stress_factors or ''} {check_in.qualitative_feedback or ''}"
-                if combined_text.strip():
-                    queue_sentiment_analysis(user_message.id, user.id, combined_text)
-            else:
-                queue_sentiment_analysis(user_message.id, user.id)
-            
-            # Split response if it's too long for WhatsApp
-            response_chunks = split_message(response_message)
-            
-            # Send response via Twilio
-            for chunk in response_chunks:
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body=chunk,
-                    to=f'whatsapp:{sender}'
-                )
             
             # Log the response (anonymized)
             log_audit_event(
                 user_id="anonymized", 
                 action="send_response", 
                 target="whatsapp_bot",
-                details={"message_length": len(response_message), "chunks": len(response_chunks)}
+                details={"message_length": len(response_message), "chunks": len(split_message(response_message))},
+                commit=False
             )
             
+            # Read what the sentiment task needs before the commit expires the
+            # objects; the flush assigns the message ID within the same transaction
+            db.session.flush()
+            user_message_id, user_id = user_message.id, user.id
+            check_in = check_in_result['check_in']
+            check_in_completed = bool(check_in and check_in.state == 'completed')
+            if check_in_completed:
+                # Extract all text from the check-in for sentiment analysis
+                combined_text = f"{check_in.mood_description or ''} {check_in.stress_factors or ''} {check_in.qualitative_feedback or ''}"
+            
+            # Commit the turn, then send the response via Twilio (split into
+            # WhatsApp-sized chunks, delivered in order)
+            complete_turn(sender, response_message)
+            
+            # Queue sentiment analysis for the message if appropriate
+            if check_in_completed:
+                if combined_text.strip():
+                    queue_sentiment_analysis(user_message_id, user_id, combined_text)
+            else:
+                queue_sentiment_analysis(user_message_id, user_id)
+            
             return {"status": "success", "message": "Check-in response sent"}
         
         # Normal conversation flow
-        # Get conversation history or initialize it
-        conversation_history = user.conversation_history or ""
+        # Running summary plus the recent turns that fit the token budget; the
+        # latest turn number comes with it, so appending needs no further reads
+        context = build_conversation_context(user.id)
+        last_turn_no = context.last_turn_no
+        if context.fold_through_turn_no:
+            # Older turns fell out of the window; fold them into the summary off the request path
+            queue_conversation_summary(user.id, context.fold_through_turn_no)
+        new_turns = []
         
         # Check if this is a new conversation after inactivity
         if user.last_message_time and (datetime.utcnow() - user.last_message_time) > INACTIVITY_THRESHOLD:
             # Add a separator in the conversation history
-            if conversation_history:
-                conversation_history += "\n\n--- New Session ---\n\n"
+            if context.has_history:
+                new_turns.append((ROLE_SESSION, ''))
         
         # Add user message to history
-        if conversation_history:
-            conversation_history += f"\nUser: {incoming_msg}"
-        else:
-            conversation_history = f"User: {incoming_msg}"
+        new_turns.append((ROLE_USER, incoming_msg))
         
-        # Get AI response
-        recent_history = get_recent_conversation_history(conversation_history)
-        ai_response = get_response(incoming_msg, recent_history)
+        # Get AI response from the user's chat session (its native history mirrors the context)
+        if current_app.config.get('BOT_STREAMING_REPLIES', False):
+            # Deliver the reply chunk by chunk while it is still being generated
+            ai_response, message_sids = stream_response(sender, user.id, context, incoming_msg)
+        else:
+            ai_response = get_response(user.id, context, incoming_msg)
+            message_sids = None
         
         # Add AI response to history
-        conversation_history += f"\nAI: {ai_response}"
+        new_turns.append((ROLE_AI, ai_response))
+        append_turns(user.id, last_turn_no, new_turns)
         
-        # Update user record
-        user.conversation_history = conversation_history
+        # Update the message counters (written behind in batches)
         update_message_count(user)
+        user_states.record_message(user)
         
         # Save user message to the database
         user_message = Message(
@@ -437,23 +511,6 @@ def bot():
             timestamp=datetime.utcnow()
         )
         db.session.add(user_message)
-        db.session.commit()
-        
-        # Queue sentiment analysis for the message
-        queue_sentiment_analysis(user_message.id, user.id)
-        
-        # Extract and store keywords for sentiment analysis
-        keywords = extract_keywords(incoming_msg)
-        
-        for keyword in keywords:
-            keyword_stat = KeywordStat(
-                user_id=user.id,
-                department=user.department or "Unknown",
-                location=user.location or "Unknown",
-                keyword=keyword,
-                count=1
-            )
-            db.session.add(keyword_stat)
         
         # Save AI response as a message
         ai_message = Message(
@@ -465,39 +522,46 @@ def bot():
             timestamp=datetime.utcnow()
         )
         db.session.add(ai_message)
-        db.session.commit()
-        
-        # Split response if it's too long for WhatsApp
-        response_chunks = split_message(ai_response)
-        
-        # Send response via Twilio
-        for chunk in response_chunks:
-            message = client.messages.create(
-                from_=f'whatsapp:{twilio_whatsapp_number}',
-                body=chunk,
-                to=f'whatsapp:{sender}'
-            )
         
         # Log the response (anonymized)
         log_audit_event(
             user_id="anonymized", 
             action="send_response", 
             target="whatsapp_bot",
-            details={"message_length": len(ai_response), "chunks": len(response_chunks)}
+            details={
+                "message_length": len(ai_response),
+                "chunks": len(message_sids) if message_sids is not None else len(split_message(ai_response))
+            },
+            commit=False
         )
         
+        # The flush assigns the message ID within the turn's transaction, so it
+        # can be read without a refresh after the commit
+        db.session.flush()
+        user_message_id, user_id = user_message.id, user.id
+        department, location = user.department, user.location
+        
+        if message_sids is None:
+            # Commit the turn, then send the response via Twilio (split into
+            # WhatsApp-sized chunks, delivered in order)
+            complete_turn(sender, ai_response)
+        else:
+            # Already delivered while streaming; just commit the turn
+            db.session.commit()
+        
+        # Queue sentiment analysis and keyword extraction for the message
+        queue_sentiment_analysis(user_message_id, user_id)
+        queue_keyword_extraction(incoming_msg, department, location)
+        
         return {"status": "success", "message": "Response sent"}
     
     except Exception as e:
         current_app.logger.error(f"Error in bot webhook: {str(e)}")
+        # Nothing from a failed turn is kept
+        db.session.rollback()
         # Return a safe response even on error
         try:
-            if 'sender' in locals() and 'twilio_whatsapp_number' in locals():
-                message = client.messages.create(
-                    from_=f'whatsapp:{twilio_whatsapp_number}',
-                    body="I'm having trouble processing your message. Please try again later.",
-                    to=f'whatsapp:{sender}'
-                )
+            send_whatsapp_message(sender, "I'm having trouble processing your message. Please try again later.")
         except:
             pass
         
@@ -555,15 +619,11 @@ def send_message():
             
         # Send message via Twilio
         try:
-            message = client.messages.create(
-                from_=f'whatsapp:{twilio_whatsapp_number}',
-                body=message_content,
-                to=phone_number
-            )
+            message_sids = send_whatsapp_message(phone_number, message_content)
             
             return {
                 "status": "success",
-                "message_id": message.sid
+                "message_id": message_sids[0]
             }
         except Exception as e:
             current_app.logger.error(f"Error sending WhatsApp message: {str(e)}")
@@ -574,6 +634,174 @@ def send_message():
         current_app.logger.error(f"Error in send message: {str(e)}")
         raise
 
+@bot_bp.route('/broadcast', methods=['POST'])
+@jwt_required()
+@hr_required
+@api_route_wrapper
+@audit_decorator
+def broadcast():
+    """
+    Send a message, by default a check-in invitation, to many employees.
+    
+    Recipients are selected by a filter or given as a list. The sends run in
+    the background; poll GET /broadcast/<job_id> for progress.
+    
+    Request Body:
+    {
+        "filter": {"department": "Engineering", "location": "Remote", "status": "active"},
+        "message": "Optional text (defaults to a check-in invitation)"
+    }
+    or
+    {
+        "recipients": ["whatsapp:+1234567890", "+1987654321"],
+        "message": "Optional text"
+    }
+    Instead of "message", "template" names a registered template, with
+    optional shared "parameters"; name, department and location are filled
+    in per recipient.
+    
+    Returns:
+        JSON with the job ID and number of recipients (202 Accepted)
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        raise BadRequestError("Missing request body")
+    
+    criteria = data.get('filter')
+    recipients = data.get('recipients')
+    if (criteria is None) == (recipients is None):
+        raise BadRequestError("Provide either a filter or a recipients list")
+    
+    if criteria is not None:
+        if not isinstance(criteria, dict) or not criteria:
+            raise BadRequestError(f"Filter must select on at least one of: {', '.join(FILTER_FIELDS)}")
+        unknown = sorted(set(criteria) - set(FILTER_FIELDS))
+        if unknown:
+            raise BadRequestError(f"Unknown filter fields: {', '.join(unknown)}")
+    else:
+        max_recipients = current_app.config.get('BROADCAST_MAX_RECIPIENTS', 10000)
+        if not isinstance(recipients, list) or not all(isinstance(r, str) for r in recipients):
+            raise BadRequestError("Recipients must be a list of phone numbers")
+        if not recipients or len(recipients) > max_recipients:
+            raise BadRequestError(f"Recipients list must have between 1 and {max_recipients} numbers")
+    
+    template_name = data.get('template')
+    parameters = data.get('parameters')
+    if parameters is not None and not isinstance(parameters, dict):
+        raise BadRequestError("Parameters must be an object")
+    
+    message_content = data.get('message') or DEFAULT_INVITATION
+    try:
+        job = start_broadcast(current_app._get_current_object(), message_content,
+                              criteria=criteria, recipients=recipients,
+                              template=template_name, parameters=parameters)
+    except TemplateNotFoundError:
+        raise BadRequestError(f"Template '{template_name}' not found")
+    except TemplateParameterError as e:
+        raise BadRequestError(str(e))
+    
+    return jsonify({
+        "success": True,
+        "data": {"job_id": job.id, "status": job.status, "total": job.total}
+    }), 202
+
+@bot_bp.route('/broadcast/<int:job_id>', methods=['GET'])
+@jwt_required()
+@hr_required
+@api_route_wrapper
+def broadcast_status(job_id):
+    """
+    Get the progress of a broadcast job.
+    
+    Returns:
+        JSON with the job status, sent/failed/pending counters and delivery stats
+    """
+    job = db.session.get(BroadcastJob, job_id)
+    if not job:
+        raise NotFoundError(f"Broadcast job {job_id} not found")
+    result = job.to_dict()
+    result['delivery'] = get_delivery_stats(broadcast_job_id=job_id)
+    return result
+
+@bot_bp.route('/check-in-schedules', methods=['POST'])
+@jwt_required()
+@hr_required
+@api_route_wrapper
+@audit_decorator
+def create_check_in_schedules():
+    """
+    Schedule proactive check-in invitations for many users.
+    
+    Each user is invited every `cadence_days` at a random time inside the
+    local-time window; the first invitations are spread over the first
+    cadence period. Existing schedules of the selected users are replaced.
+    
+    Request Body:
+    {
+        "filter": {"department": "Engineering"},   (or "user_ids": [1, 2, 3])
+        "cadence_days": 7,
+        "timezone": "Asia/Kolkata",
+        "window_start": "10:00",
+        "window_end": "16:00"
+    }
+    
+    Returns:
+        JSON with the number of schedules written
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        raise BadRequestError("Missing request body")
+    
+    criteria = data.get('filter')
+    user_ids = data.get('user_ids')
+    if (criteria is None) == (user_ids is None):
+        raise BadRequestError("Provide either a filter or a user_ids list")
+    if criteria is not None:
+        if not isinstance(criteria, dict) or not criteria or set(criteria) - set(FILTER_FIELDS):
+            raise BadRequestError(f"Filter must select on some of: {', '.join(FILTER_FIELDS)}")
+        user_ids = [user_id for (user_id,) in filter_users(criteria, User.id)]
+    elif not isinstance(user_ids, list) or not all(isinstance(u, int) for u in user_ids):
+        raise BadRequestError("user_ids must be a list of user IDs")
+    
+    cadence_days = data.get('cadence_days', 7)
+    if not isinstance(cadence_days, int) or not 1 <= cadence_days <= 90:
+        raise BadRequestError("cadence_days must be between 1 and 90")
+    tz_name = data.get('timezone', 'UTC')
+    try:
+        ZoneInfo(tz_name)
+        window_start, window_end = (
+            datetime.strptime(data[key], '%H:%M').time() if data.get(key) else default
+            for key, default in zip(('window_start', 'window_end'), DEFAULT_WINDOW)
+        )
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise BadRequestError("timezone must be an IANA name and the window times HH:MM")
+    if window_start == window_end:
+        raise BadRequestError("window_start and window_end must differ")
+    
+    count = schedule_check_ins(user_ids, cadence_days=cadence_days, timezone=tz_name,
+                               window_start=window_start, window_end=window_end)
+    return {"scheduled": count}
+
+@bot_bp.route('/check-in-schedules/tick', methods=['POST'])
+@api_route_wrapper
+def check_in_schedules_tick():
+    """
+    Send the check-in invitations that are due.
+    
+    For deployments that tick from a scheduled task instead of running the
+    scheduler thread (CHECK_IN_SCHEDULER_ENABLED). The task must send
+    CHECK_IN_TICK_TOKEN in the X-Tick-Token header; without a configured
+    token the endpoint is disabled.
+    
+    Returns:
+        JSON with the number of due, invited and skipped schedules
+    """
+    expected_token = current_app.config.get('CHECK_IN_TICK_TOKEN')
+    if not expected_token or not secrets.compare_digest(request.headers.get('X-Tick-Token', ''), expected_token):
+        raise UnauthorizedError("Invalid tick token")
+    
+    return get_check_in_scheduler(current_app._get_current_object()).run_due()
+
 @bot_bp.route('/status', methods=['POST'])
 @api_route_wrapper
 def message_status():
@@ -581,6 +809,7 @@ def message_status():
     Handle message status updates from WhatsApp.
     
     This endpoint receives status updates from Twilio about message delivery.
+    Updates are buffered and written to the outbound message table in batches.
     
     Returns:
         JSON with status
@@ -593,10 +822,10 @@ def message_status():
         if not message_sid or not message_status:
             raise BadRequestError("Missing required fields: MessageSid, MessageStatus")
         
-        # Log status update
-        current_app.logger.info(f"Message {message_sid} status: {message_status}")
-        
-        # In a real implementation, you'd update the message status in your database
+        current_app.logger.debug(f"Message {message_sid} status: {message_status}")
+        get_delivery_recorder(current_app._get_current_object()).record_status(
+            message_sid, message_status, request.form.get('ErrorCode')
+        )
         
         return {
             "status": "success",
@@ -608,6 +837,37 @@ def message_status():
         current_app.logger.error(f"Error processing status update: {str(e)}")
         raise
 
+@bot_bp.route('/hume-callback', methods=['POST'])
+@api_route_wrapper
+def hume_callback():
+    """
+    Handle Hume batch job completion callbacks.
+    
+    Used when SENTIMENT_CALLBACK_URL points here. The callback wakes the
+    sentiment job parked in this process; a job parked in another process
+    falls back to polling after SENTIMENT_CALLBACK_TIMEOUT_SECONDS.
+    
+    Returns:
+        JSON with status and whether a parked job was woken
+    """
+    # Callbacks are refused outright unless a token is configured
+    expected_token = current_app.config.get('SENTIMENT_CALLBACK_TOKEN')
+    if not expected_token or not secrets.compare_digest(request.args.get('token', ''), expected_token):
+        raise UnauthorizedError("Invalid callback token")
+    
+    data = request.get_json(silent=True) or {}
+    job_id = data.get('job_id')
+    if not job_id:
+        raise BadRequestError("Missing required field: job_id")
+    
+    parked = get_sentiment_service(current_app._get_current_object()).complete_job(str(job_id), data)
+    current_app.logger.debug(f"Hume job {job_id} callback, parked here: {parked}")
+    
+    return {
+        "status": "success",
+        "parked": parked
+    }
+
 @bot_bp.route('/template', methods=['POST'])
 @api_route_wrapper
 @audit_decorator("send", "whatsapp_template")
@@ -645,34 +905,31 @@ def send_template():
         if not phone_number.startswith('whatsapp:'):
             phone_number = f'whatsapp:{phone_number}'
             
-        # In a real implementation, you'd format the template with parameters
-        # and send it via Twilio's API
-        
-        # Placeholder for template implementation
-        template_message = f"This is a template message: {template_name}"
+        if not isinstance(parameters, dict):
+            raise BadRequestError("Parameters must be an object")
         
-        if parameters:
-            # Simple parameter replacement
-            for key, value in parameters.items():
-                template_message = template_message.replace(f"{{{key}}}", str(value))
+        # Render the precompiled template
+        registry = get_template_registry(current_app._get_current_object())
+        try:
+            template_message = registry.render(template_name, parameters)
+        except TemplateNotFoundError:
+            raise NotFoundError(f"Template '{template_name}' not found")
+        except TemplateParameterError as e:
+            raise BadRequestError(str(e))
         
         # Send message via Twilio
         try:
-            message = client.messages.create(
-                from_=f'whatsapp:{twilio_whatsapp_number}',
-                body=template_message,
-                to=phone_number
-            )
+            message_sids = send_whatsapp_message(phone_number, template_message, category='template')
             
             return {
                 "status": "success",
                 "template_name": template_name,
-                "message_id": message.sid
+                "message_id": message_sids[0]
             }
         except Exception as e:
             current_app.logger.error(f"Error sending template: {str(e)}")
             raise ServerError("Failed to send template message")
-    except BadRequestError:
+    except (BadRequestError, NotFoundError):
         raise
     except Exception as e:
         current_app.logger.error(f"Error in send template: {str(e)}")
@@ -9,12 +9,14 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 import random
-from sqlalchemy import func, and_, desc, text
+from sqlalchemy import func, and_, text
 import string
 
 from ...utils.audit_logger import audit_decorator
 from ...utils.error_handler import api_route_wrapper, NotFoundError, BadRequestError
-from ...models.models import User, KeywordStat
+from ...models.models import User
+from ...services.keyword_rollup import get_top_keywords
+from ...services.delivery_status import get_delivery_stats
 
 # Create a Blueprint for the dashboard API
 dashboard_bp = Blueprint('dashboard_api_v1', __name__)
@@ -211,36 +213,33 @@ def get_keyword_stats():
     Query Parameters:
         department (str, optional): Filter by department
         location (str, optional): Filter by location
+        start_date (str, optional): Start date in YYYY-MM-DD format
+        end_date (str, optional): End date in YYYY-MM-DD format
         
     Returns:
         JSON with keyword statistics.
     """
     try:
-        # Get database connection from app
-        db = current_app.extensions['sqlalchemy'].db
-        
         # Get filter parameters
         department = request.args.get('department')
         location = request.args.get('location')
-        
-        # Query for keyword stats
-        query = db.session.query(
-            KeywordStat.keyword,
-            func.sum(KeywordStat.count).label('total_count')
+        try:
+            start_date = request.args.get('start_date')
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end_date = request.args.get('end_date')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            raise BadRequestError("Dates must be in YYYY-MM-DD format")
+        
+        # Top keywords from the daily rollup
+        result = get_top_keywords(
+            department=department,
+            location=location,
+            start_date=start_date,
+            end_date=end_date,
+            limit=20
         )
         
-        # Apply filters
-        if department:
-            query = query.filter(KeywordStat.department == department)
-        if location:
-            query = query.filter(KeywordStat.location == location)
-        
-        # Group and order results
-        result = query.group_by(KeywordStat.keyword)\
-                     .order_by(desc('total_count'))\
-                     .limit(20)\
-                     .all()
-        
         # Format response
         stats = [
             {
@@ -251,10 +250,43 @@ def get_keyword_stats():
         ]
         
         return stats
+    except BadRequestError:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error getting keyword stats: {str(e)}")
         raise
 
+@dashboard_bp.route('/delivery-stats', methods=['GET'])
+@api_route_wrapper
+@audit_decorator
+def get_delivery_stats_endpoint():
+    """
+    Get delivery and failure rates of outbound WhatsApp messages.
+    
+    Query Parameters:
+        start_date (str, optional): Start date in YYYY-MM-DD format
+        end_date (str, optional): End date in YYYY-MM-DD format (inclusive)
+        category (str, optional): Message category, e.g. reply or broadcast
+        broadcast_job_id (int, optional): Only messages of this broadcast job
+        
+    Returns:
+        JSON with message counts per status and delivery/failure rates.
+    """
+    try:
+        start_date = request.args.get('start_date')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end_date = request.args.get('end_date')
+        end_date = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    except ValueError:
+        raise BadRequestError("Dates must be in YYYY-MM-DD format")
+    
+    return get_delivery_stats(
+        start_date=start_date,
+        end_date=end_date,
+        category=request.args.get('category'),
+        broadcast_job_id=request.args.get('broadcast_job_id', type=int)
+    )
+
 @dashboard_bp.route('/sentiment-trends', methods=['GET'])
 @api_route_wrapper
 @audit_decorator("access", "sentiment_trends")
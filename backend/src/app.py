@@ -25,6 +25,9 @@ from backend.src.models.models import db
 from backend.src.api import init_app  # Import the API init_app function
 from backend.src.utils.auth import init_jwt
 from backend.src.utils.errors import init_error_handlers
+from backend.src.services import init_async_worker
+from backend.src.services.gemini_client import get_gemini_client
+from backend.src.services.check_in_scheduler import get_check_in_scheduler
 
 # Set up logging early
 def setup_logging(app):
@@ -67,6 +70,10 @@ def create_app(config=None):
     if config:
         app.config.update(config)
     
+    # Hume callbacks wake parked sentiment jobs, so they must carry a token
+    if app.config.get('SENTIMENT_CALLBACK_URL') and not app.config.get('SENTIMENT_CALLBACK_TOKEN'):
+        raise RuntimeError("SENTIMENT_CALLBACK_TOKEN must be set when SENTIMENT_CALLBACK_URL is")
+    
     # Initialize extensions
     db.init_app(app)
     init_jwt(app)
@@ -77,6 +84,17 @@ def create_app(config=None):
     # Initialize API routes
     init_app(app)  # Use the new init_app function
     
+    # Start the background worker (sentiment analysis, conversation summaries)
+    init_async_worker(app)
+    
+    # Open the Gemini connection in the background so the first reply does not pay for it
+    if app.config.get('GEMINI_WARM_UP'):
+        get_gemini_client(app).start_warm_up()
+    
+    # Send scheduled check-in invitations from this process
+    if app.config.get('CHECK_IN_SCHEDULER_ENABLED'):
+        get_check_in_scheduler(app).start()
+    
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     def health_check():
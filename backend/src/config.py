@@ -50,9 +50,129 @@ class Config:
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+    TWILIO_WHATSAPP_NUMBER = os.getenv('TWILIO_WHATSAPP_NUMBER')
+    
+    # Outbound WhatsApp delivery settings
+    TWILIO_SEND_WORKERS = int(os.getenv('TWILIO_SEND_WORKERS', '8'))  # Concurrent sends / pooled HTTP sessions
+    TWILIO_SEND_RATE = float(os.getenv('TWILIO_SEND_RATE', '80'))  # Messages per second per sender number
+    TWILIO_SEND_BURST = float(os.getenv('TWILIO_SEND_BURST', '80'))
+    TWILIO_SEND_MAX_ATTEMPTS = int(os.getenv('TWILIO_SEND_MAX_ATTEMPTS', '4'))
+    TWILIO_SEND_TIMEOUT = float(os.getenv('TWILIO_SEND_TIMEOUT', '60'))  # Seconds to wait for a reply to be delivered
+    # Bulk broadcasts: sends queued at once per job, seconds between progress
+    # updates, and the largest explicit recipient list accepted
+    BROADCAST_MAX_IN_FLIGHT = int(os.getenv('BROADCAST_MAX_IN_FLIGHT', '50'))
+    BROADCAST_PROGRESS_INTERVAL = float(os.getenv('BROADCAST_PROGRESS_INTERVAL', '1.0'))
+    BROADCAST_MAX_RECIPIENTS = int(os.getenv('BROADCAST_MAX_RECIPIENTS', '10000'))
+    # Delivery status tracking: the URL Twilio posts status callbacks to (usually
+    # <public base>/api/v1/bot/status), and how often buffered sends and
+    # callbacks are written in batches
+    TWILIO_STATUS_CALLBACK_URL = os.getenv('TWILIO_STATUS_CALLBACK_URL')
+    DELIVERY_STATUS_FLUSH_INTERVAL = float(os.getenv('DELIVERY_STATUS_FLUSH_INTERVAL', '0.25'))
+    DELIVERY_STATUS_MAX_BATCH = int(os.getenv('DELIVERY_STATUS_MAX_BATCH', '1000'))
+    # Proactive check-ins: run the scheduler thread in this process (or tick
+    # from cron through /api/v1/bot/check-in-schedules/tick instead), seconds
+    # between ticks, due schedules per transaction, and how long an
+    # invitation's check-in stays open
+    CHECK_IN_SCHEDULER_ENABLED = os.getenv('CHECK_IN_SCHEDULER_ENABLED', 'false').lower() == 'true'
+    CHECK_IN_SCHEDULER_INTERVAL = float(os.getenv('CHECK_IN_SCHEDULER_INTERVAL', '60'))
+    CHECK_IN_SCHEDULER_BATCH_SIZE = int(os.getenv('CHECK_IN_SCHEDULER_BATCH_SIZE', '500'))
+    # Shared secret a scheduled task sends (X-Tick-Token) to POST /bot/check-in-schedules/tick
+    CHECK_IN_TICK_TOKEN = os.getenv('CHECK_IN_TICK_TOKEN')
+    CHECK_IN_INVITATION_EXPIRY_HOURS = float(os.getenv('CHECK_IN_INVITATION_EXPIRY_HOURS', '12'))
+    # Directory of *.json WhatsApp message templates (defaults to backend/src/message_templates)
+    WHATSAPP_TEMPLATES_DIR = os.getenv('WHATSAPP_TEMPLATES_DIR')
+    # Send Twilio API requests here instead, e.g. the local stand-in in scripts/loadtest
+    TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL')
+    
+    # WhatsApp bot processing settings
+    # 'sync' runs the pipeline inside the webhook request; 'async' stores the
+    # message, acknowledges it immediately and processes it in background workers
+    BOT_PROCESSING_MODE = os.getenv('BOT_PROCESSING_MODE', 'sync')
+    # Seconds after the inbound workers start before messages a previous process left unprocessed are replayed
+    INBOUND_REPLAY_DELAY_SECONDS = int(os.getenv('INBOUND_REPLAY_DELAY_SECONDS', '60'))
+    # Unprocessed inbound messages older than this are not replayed
+    INBOUND_REPLAY_MAX_AGE_MINUTES = int(os.getenv('INBOUND_REPLAY_MAX_AGE_MINUTES', '60'))
+    BOT_WORKER_COUNT = int(os.getenv('BOT_WORKER_COUNT', '4'))
+    # Stream Gemini replies and send each WhatsApp chunk as soon as it is ready
+    BOT_STREAMING_REPLIES = os.getenv('BOT_STREAMING_REPLIES', 'false').lower() == 'true'
+    # Approximate token budget for the conversation context sent to Gemini; older
+    # turns are folded into a running summary once this many are left out
+    BOT_CONTEXT_TOKEN_BUDGET = int(os.getenv('BOT_CONTEXT_TOKEN_BUDGET', '1500'))
+    BOT_SUMMARY_MIN_TURNS = int(os.getenv('BOT_SUMMARY_MIN_TURNS', '6'))
+    # Recent Twilio MessageSids kept in memory to drop webhook retries without a DB lookup
+    WEBHOOK_IDEMPOTENCY_CACHE_SIZE = int(os.getenv('WEBHOOK_IDEMPOTENCY_CACHE_SIZE', '10000'))
+    # Seconds an onboarded user's cached state is trusted, and how often the
+    # per-message counters (message_count, last_message_time) are written behind
+    BOT_USER_CACHE_TTL = float(os.getenv('BOT_USER_CACHE_TTL', '300'))
+    BOT_COUNTER_FLUSH_INTERVAL = float(os.getenv('BOT_COUNTER_FLUSH_INTERVAL', '5'))
+    # Per-user message limits (sliding window). The 'sqlite' backend shares them
+    # across all worker processes on the host; 'memory' keeps them per process
+    MAX_DAILY_MESSAGES = int(os.getenv('MAX_DAILY_MESSAGES', '50'))
+    BOT_MESSAGES_PER_MINUTE = int(os.getenv('BOT_MESSAGES_PER_MINUTE', '10'))
+    BOT_RATE_LIMIT_BACKEND = os.getenv('BOT_RATE_LIMIT_BACKEND', 'memory')
+    BOT_RATE_LIMIT_PATH = os.getenv('BOT_RATE_LIMIT_PATH')  # Defaults to instance/rate_limits.db
     
     # Google API settings
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash-002')
+    # Model that folds old turns into the running conversation summary
+    GEMINI_SUMMARY_MODEL = os.getenv('GEMINI_SUMMARY_MODEL', GEMINI_MODEL)
+    # Send Gemini API requests here instead, e.g. the local stand-in in scripts/loadtest
+    GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+    # Live per-user chat sessions: at most this many, holding at most this many
+    # characters of history in total, dropped after this many idle seconds
+    GEMINI_MAX_SESSIONS = int(os.getenv('GEMINI_MAX_SESSIONS', '1000'))
+    GEMINI_SESSION_MAX_CHARS = int(os.getenv('GEMINI_SESSION_MAX_CHARS', '20000000'))
+    GEMINI_SESSION_IDLE_TIMEOUT = float(os.getenv('GEMINI_SESSION_IDLE_TIMEOUT', '900'))
+    # Open the Gemini connection in the background at startup instead of on the first message
+    GEMINI_WARM_UP = os.getenv('GEMINI_WARM_UP', 'false').lower() == 'true'
+    # Seconds a reply (or the first streamed chunk) may take before the canned reply is sent
+    GEMINI_CALL_DEADLINE = float(os.getenv('GEMINI_CALL_DEADLINE', '20'))
+    # Consecutive failures that open the circuit, and seconds before a probe call is let through
+    GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', '5'))
+    GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', '30'))
+    # Start a second attempt when a reply takes longer than the recent p95 (at least this many seconds)
+    GEMINI_HEDGE = os.getenv('GEMINI_HEDGE', 'false').lower() == 'true'
+    GEMINI_HEDGE_MIN_DELAY = float(os.getenv('GEMINI_HEDGE_MIN_DELAY', '1.0'))
+    
+    # Hume sentiment analysis: one pooled client per process, with at most
+    # SENTIMENT_MAX_CONNECTIONS connections kept alive for SENTIMENT_KEEPALIVE_SECONDS
+    HUME_API_KEY = os.getenv('HUME_API_KEY')
+    HUME_API_URL = os.getenv('HUME_API_URL')
+    SENTIMENT_HTTP2 = os.getenv('SENTIMENT_HTTP2', 'true').lower() == 'true'
+    SENTIMENT_MAX_CONNECTIONS = int(os.getenv('SENTIMENT_MAX_CONNECTIONS', '20'))
+    SENTIMENT_KEEPALIVE_SECONDS = float(os.getenv('SENTIMENT_KEEPALIVE_SECONDS', '30'))
+    SENTIMENT_REQUEST_TIMEOUT = float(os.getenv('SENTIMENT_REQUEST_TIMEOUT', '30'))
+    # Texts are sent as one Hume job once SENTIMENT_BATCH_SIZE are queued or the
+    # oldest has waited SENTIMENT_BATCH_WAIT_MS; a size of 1 sends one job per text
+    SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', '20'))
+    SENTIMENT_BATCH_WAIT_MS = int(os.getenv('SENTIMENT_BATCH_WAIT_MS', '250'))
+    # Hume jobs are first polled at the median recent job duration (at least
+    # SENTIMENT_POLL_INITIAL_SECONDS), then at doubling delays up to SENTIMENT_POLL_MAX_SECONDS
+    SENTIMENT_POLL_INITIAL_SECONDS = float(os.getenv('SENTIMENT_POLL_INITIAL_SECONDS', '0.25'))
+    SENTIMENT_POLL_MAX_SECONDS = float(os.getenv('SENTIMENT_POLL_MAX_SECONDS', '8'))
+    SENTIMENT_POLL_DEADLINE_SECONDS = float(os.getenv('SENTIMENT_POLL_DEADLINE_SECONDS', '60'))
+    # With a callback URL (pointing at /api/v1/bot/hume-callback), jobs wait for Hume's
+    # completion callback instead of polling; SENTIMENT_CALLBACK_TOKEN is required with it and must match its ?token=
+    SENTIMENT_CALLBACK_URL = os.getenv('SENTIMENT_CALLBACK_URL')
+    SENTIMENT_CALLBACK_TOKEN = os.getenv('SENTIMENT_CALLBACK_TOKEN')
+    SENTIMENT_CALLBACK_TIMEOUT_SECONDS = float(os.getenv('SENTIMENT_CALLBACK_TIMEOUT_SECONDS', '120'))
+    # Sentiment results are cached by a hash of the normalized text and the model
+    # version: SENTIMENT_CACHE_SIZE in memory, up to SENTIMENT_CACHE_MAX_ROWS in the database
+    SENTIMENT_MODEL_VERSION = os.getenv('SENTIMENT_MODEL_VERSION', 'hume-language-1')
+    SENTIMENT_CACHE_ENABLED = os.getenv('SENTIMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    SENTIMENT_CACHE_PERSISTENT = os.getenv('SENTIMENT_CACHE_PERSISTENT', 'true').lower() == 'true'
+    SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', '10000'))
+    SENTIMENT_CACHE_MAX_ROWS = int(os.getenv('SENTIMENT_CACHE_MAX_ROWS', '100000'))
+    SENTIMENT_CACHE_TTL_HOURS = int(os.getenv('SENTIMENT_CACHE_TTL_HOURS', '168'))
+    SENTIMENT_CACHE_MAX_TEXT_LENGTH = int(os.getenv('SENTIMENT_CACHE_MAX_TEXT_LENGTH', '280'))
+    # 'hume', 'lexicon' (score offline only) or 'hybrid' (the lexicon settles texts whose
+    # compound score reaches SENTIMENT_PREFILTER_THRESHOLD, the ambiguous rest go to Hume);
+    # the lexicon also scores texts Hume could not unless SENTIMENT_LEXICON_FALLBACK is off
+    SENTIMENT_ENGINE = os.getenv('SENTIMENT_ENGINE', 'hume')
+    SENTIMENT_LEXICON_PATH = os.getenv('SENTIMENT_LEXICON_PATH')
+    SENTIMENT_LEXICON_FALLBACK = os.getenv('SENTIMENT_LEXICON_FALLBACK', 'true').lower() == 'true'
+    SENTIMENT_PREFILTER_THRESHOLD = float(os.getenv('SENTIMENT_PREFILTER_THRESHOLD', '0.35'))
     
     # System prompt for AI chat
     SYSTEM_PROMPT = """
@@ -77,6 +197,16 @@ class Config:
     
     # Data retention settings (GDPR compliance)
     DATA_RETENTION_PERIOD_DAYS = 730  # 24 months
+    # Per-user keyword rows are only kept for GDPR requests; the dashboard reads the daily rollup
+    KEYWORD_STAT_RETENTION_DAYS = int(os.getenv('KEYWORD_STAT_RETENTION_DAYS', '30'))
+    # Inbound messages stored by the async webhook are only kept to replay unprocessed ones
+    INBOUND_MESSAGE_RETENTION_DAYS = int(os.getenv('INBOUND_MESSAGE_RETENTION_DAYS', '30'))
+    # Outbound message records are only kept for delivery statistics
+    OUTBOUND_MESSAGE_RETENTION_DAYS = int(os.getenv('OUTBOUND_MESSAGE_RETENTION_DAYS', '90'))
+    # Optional normalization of extracted keywords: 'none', 'stem' (Porter) or 'lemma' (WordNet)
+    KEYWORD_NORMALIZER = os.getenv('KEYWORD_NORMALIZER', 'none')
+    # Messages whose keywords are extracted and written together by the background worker
+    KEYWORD_BATCH_SIZE = int(os.getenv('KEYWORD_BATCH_SIZE', '500'))
 
 
 class DevelopmentConfig(Config):
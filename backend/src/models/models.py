@@ -18,7 +18,7 @@ class User(db.Model):
     conversation_started = db.Column(db.Boolean, default=False)
     message_count = db.Column(db.Integer, default=0)
     last_message_time = db.Column(db.DateTime)
-    conversation_history = db.Column(db.Text)
+    conversation_history = db.Column(db.Text)  # Legacy transcript blob; superseded by ConversationTurn
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     messages = db.relationship('Message', backref='user', lazy=True)
@@ -37,6 +37,8 @@ class Message(db.Model):
     location = db.Column(db.String(50))
 
 class KeywordStat(db.Model):
+    # Legacy per-user keyword rows; new counts go to KeywordDailyStat and these
+    # are pruned after KEYWORD_STAT_RETENTION_DAYS
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     department = db.Column(db.String(50))
@@ -45,6 +47,172 @@ class KeywordStat(db.Model):
     count = db.Column(db.Integer, default=0)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+class KeywordDailyStat(db.Model):
+    """
+    Daily keyword counts per department and location
+
+    Incremented with an upsert as messages arrive, so the table grows with
+    distinct keywords per day rather than with message volume. The dashboard
+    reads keyword statistics from here instead of KeywordStat.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('day', 'department', 'location', 'keyword', name='uq_keyword_daily_stat'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    department = db.Column(db.String(50), nullable=False, default='Unknown')
+    location = db.Column(db.String(50), nullable=False, default='Unknown')
+    keyword = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ConversationTurn(db.Model):
+    """
+    Single turn of a user's conversation with the bot
+
+    Turns are append-only and numbered per user, so the recent window is an
+    indexed range read on (user_id, turn_no) regardless of history length.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'turn_no', name='uq_conversation_turn_user_turn'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    turn_no = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(10), nullable=False)  # user, ai, session (new-session marker)
+    content = db.Column(db.Text, nullable=False, default='')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ConversationSummary(db.Model):
+    """
+    Running summary of the older part of a user's conversation
+
+    Turns up to summarized_through_turn_no are folded into the summary and no
+    longer sent to Gemini verbatim; the summary is refreshed in the background.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    summarized_through_turn_no = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class InboundMessage(db.Model):
+    """
+    Inbound WhatsApp message accepted by the webhook in acknowledge-then-process mode
+
+    The webhook stores the message and returns immediately; a background worker
+    picks it up, runs the bot pipeline and records the outcome here.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    message_sid = db.Column(db.String(64), index=True)  # Twilio MessageSid, if provided
+    sender = db.Column(db.String(20), nullable=False, index=True)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, replayed, processing, processed, failed
+    error = db.Column(db.Text)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    processed_at = db.Column(db.DateTime)
+
+class ProcessedWebhook(db.Model):
+    """
+    Twilio webhook delivery that has already been accepted
+
+    The unique MessageSid makes a retried delivery fail to insert, so it can be
+    dropped before it reaches Gemini, the database write path or Twilio.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    message_sid = db.Column(db.String(64), nullable=False, unique=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class BroadcastJob(db.Model):
+    """
+    Bulk WhatsApp send, e.g. a check-in invitation to a whole department
+
+    The broadcast endpoint resolves the recipients, stores the job and returns
+    its ID; a background runner feeds the sends to the outbound sender and
+    flushes its progress counters here, so any worker can answer a poll.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    message = db.Column(db.Text, nullable=False)
+    criteria = db.Column(db.Text)  # JSON filter, or null for an explicit recipient list
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """Convert the job to a dictionary for JSON serialization"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'pending': self.total - self.sent - self.failed,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class CheckInSchedule(db.Model):
+    """
+    Proactive check-in cadence for one user
+
+    next_fire_at is the UTC time of the next invitation, already jittered
+    within the user's local-time window; the scheduler only ever scans the
+    index on (active, next_fire_at) for rows that are due.
+    """
+    __table_args__ = (
+        db.Index('ix_check_in_schedule_due', 'active', 'next_fire_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)
+    cadence_days = db.Column(db.Integer, nullable=False, default=7)
+    timezone = db.Column(db.String(50), nullable=False, default='UTC')  # IANA name, e.g. Asia/Kolkata
+    window_start = db.Column(db.Time, nullable=False)  # Local time invitations may start
+    window_end = db.Column(db.Time, nullable=False)  # Local time invitations must end by
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    next_fire_at = db.Column(db.DateTime, nullable=False)
+    last_fired_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert the schedule to a dictionary for JSON serialization"""
+        return {
+            'user_id': self.user_id,
+            'cadence_days': self.cadence_days,
+            'timezone': self.timezone,
+            'window_start': self.window_start.strftime('%H:%M'),
+            'window_end': self.window_end.strftime('%H:%M'),
+            'active': self.active,
+            'next_fire_at': self.next_fire_at.isoformat() if self.next_fire_at else None,
+            'last_fired_at': self.last_fired_at.isoformat() if self.last_fired_at else None
+        }
+
+class OutboundMessage(db.Model):
+    """
+    WhatsApp message the bot sent, keyed by its Twilio SID
+
+    Rows are inserted in batches as sends complete and their status is
+    advanced by Twilio's status callbacks (see services/delivery_status.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    sid = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    to_number = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(20), nullable=False, default='reply')  # reply, broadcast, template
+    broadcast_job_id = db.Column(db.Integer, db.ForeignKey('broadcast_job.id'), index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sent, delivered, read, failed, undelivered
+    error_code = db.Column(db.String(10))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class SentimentLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -55,6 +223,19 @@ class SentimentLog(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     message = db.relationship('Message', backref='sentiment', uselist=False)
 
+class SentimentCacheEntry(db.Model):
+    """
+    Sentiment result of one normalized text, shared across messages
+
+    Keyed by a SHA-256 of the model version and the normalized text; the
+    text itself is not stored (see services/sentiment_cache.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), unique=True, nullable=False)
+    model_version = db.Column(db.String(50), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON sentiment result
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
 class AuthUser(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), unique=True, nullable=False)
@@ -10,11 +10,18 @@ import logging
 import threading
 import queue
 import time
+from collections import Counter, OrderedDict
 from typing import Dict, Any, Callable, List, Optional
-from flask import Flask
-from datetime import datetime
+from flask import Flask, current_app
+from datetime import date, datetime
+from sqlalchemy import insert, update
 
-from .sentiment_analysis import analyze_sentiment
+from .sentiment_analysis import get_sentiment_service
+from .sentiment_cache import get_sentiment_cache, normalize_text
+from .sentiment_lexicon import score_locally
+from .conversation_context import refresh_conversation_summary
+from .keyword_extraction import get_keyword_extractor
+from .keyword_rollup import count_keywords, increment_keyword_counts
 from ..models.models import db, Message, SentimentLog, User
 
 # Configure logging
@@ -27,6 +34,21 @@ task_queue = queue.Queue()
 worker_running = False
 worker_thread = None
 
+# Users with a summary refresh already queued, so bursts of turns queue one refresh
+_pending_summaries = set()
+_pending_summaries_lock = threading.Lock()
+
+# Messages waiting for sentiment analysis; one queued task drains them as a batch
+_pending_sentiment = []
+_pending_sentiment_lock = threading.Lock()
+
+# Runs a sentiment batch gets before its messages are dropped
+SENTIMENT_MAX_ATTEMPTS = 3
+
+# Messages waiting for keyword extraction; one queued task drains them as a batch
+_pending_keywords = []
+_pending_keywords_lock = threading.Lock()
+
 def init_async_worker(app: Flask):
     """
     Initialize the async worker with the Flask app
@@ -42,15 +64,22 @@ def init_async_worker(app: Flask):
     
     logger.info("Initializing async worker")
     worker_running = True
+    
+    # The worker's sentiment client: one event loop and connection pool for all messages
+    get_sentiment_service(app)
     worker_thread = threading.Thread(target=worker_loop, args=(app,), daemon=True)
     worker_thread.start()
+
+def stop_async_worker():
+    """
+    Stop the async worker after the task it is currently processing
     
-    # Register shutdown handler
-    @app.teardown_appcontext
-    def shutdown_worker(exception=None):
-        global worker_running
-        worker_running = False
-        logger.info("Async worker shutdown signal received")
+    Note: this is not tied to teardown_appcontext, which runs after every
+    request and would stop the worker as soon as the first request ended.
+    """
+    global worker_running
+    worker_running = False
+    logger.info("Async worker shutdown signal received")
 
 def worker_loop(app: Flask):
     """
@@ -75,9 +104,12 @@ def worker_loop(app: Flask):
                 
                 if task.get('type') == 'sentiment_analysis':
                     process_sentiment_analysis(task)
+                elif task.get('type') == 'sentiment_results':
+                    process_sentiment_results(task)
+                elif task.get('type') == 'conversation_summary':
+                    process_conversation_summary(task)
                 elif task.get('type') == 'keyword_extraction':
-                    # Could add keyword extraction later if needed
-                    pass
+                    process_keyword_extraction(task)
                 else:
                     logger.warning(f"Unknown task type: {task.get('type')}")
                 
@@ -92,74 +124,298 @@ def worker_loop(app: Flask):
 
 def process_sentiment_analysis(task: Dict[str, Any]):
     """
-    Process a sentiment analysis task
+    Submit every pending message for sentiment analysis
+    
+    Messages queued while the worker was busy are handled together. Texts
+    the SENTIMENT_ENGINE settles locally are scored by the lexicon, texts
+    in the sentiment cache need no analysis, identical texts are analyzed
+    once, and the rest are submitted to the sentiment service at once,
+    which sends them to Hume in micro-batches. The worker does not wait for
+    the jobs; once every result is in, a sentiment_results task stores them.
+    
+    If the batch fails before it is submitted, its messages go back to the
+    pending buffer for another run, up to SENTIMENT_MAX_ATTEMPTS runs.
     
     Args:
-        task: Task dictionary containing message information
+        task: Task dictionary (the messages are taken from the pending buffer)
     """
-    message_id = task.get('message_id')
-    user_id = task.get('user_id')
+    global _pending_sentiment
     
-    if not message_id or not user_id:
-        logger.error("Missing message_id or user_id in sentiment analysis task")
+    with _pending_sentiment_lock:
+        pending, _pending_sentiment = _pending_sentiment, []
+    if not pending:
         return
     
     try:
-        # Get the message from the database
-        message = db.session.query(Message).filter_by(id=message_id).first()
-        user = db.session.query(User).filter_by(id=user_id).first()
+        message_ids = [message_id for message_id, _, _ in pending]
+        user_ids = {user_id for _, user_id, _ in pending}
+        contents = dict(db.session.query(Message.id, Message.content).filter(Message.id.in_(message_ids)).all())
+        users = {user.id: user for user in db.session.query(User).filter(User.id.in_(user_ids)).all()}
         
-        if not message:
-            logger.error(f"Message not found: {message_id}")
+        items, texts = [], []
+        for message_id, user_id, text in pending:
+            if message_id not in contents:
+                logger.error(f"Message not found: {message_id}")
+            elif user_id not in users:
+                logger.error(f"User not found: {user_id}")
+            else:
+                user = users[user_id]
+                items.append((message_id, user_id, user.department or "Unknown", user.location or "Unknown"))
+                texts.append(text or contents[message_id])
+        if not items:
             return
         
-        if not user:
-            logger.error(f"User not found: {user_id}")
+        # Texts the lexicon settles or the sentiment cache holds are answered now;
+        # identical texts are sent once
+        app = current_app._get_current_object()
+        known = score_locally(texts, app)
+        unknown = [index for index, result in enumerate(known) if result is None]
+        for index, result in zip(unknown, get_sentiment_cache(app).get_many([texts[i] for i in unknown])):
+            known[index] = result
+        submitted = OrderedDict()  # normalized text -> text sent to the service
+        for text, result in zip(texts, known):
+            if result is None:
+                submitted.setdefault(normalize_text(text), text)
+        
+        def queue_results(fresh: Dict[str, Dict[str, Any]]):
+            results = [result or fresh[normalize_text(text)] for text, result in zip(texts, known)]
+            task_queue.put({
+                'type': 'sentiment_results',
+                'results': [item + (result.get('sentiment_score', 0.5),) for item, result in zip(items, results)],
+                'fresh': [(text, fresh[normalized]) for normalized, text in submitted.items()],
+                'queued_at': datetime.utcnow().isoformat()
+            })
+        
+        if not submitted:
+            queue_results({})
             return
         
-        # Analyze sentiment
-        sentiment_result = analyze_sentiment(message.content)
-        sentiment_score = sentiment_result.get('sentiment_score', 0.5)
-        
-        # Update message with sentiment score
-        message.sentiment_score = sentiment_score
-        
-        # Create sentiment log
-        sentiment_log = SentimentLog(
-            user_id=user_id,
-            department=user.department or "Unknown",
-            location=user.location or "Unknown",
-            sentiment_score=sentiment_score,
-            message_id=message_id,
-            timestamp=datetime.utcnow()
-        )
-        
-        # Save to database
-        db.session.add(sentiment_log)
-        db.session.commit()
+        futures = get_sentiment_service(app).submit_many(list(submitted.values()))
+        remaining = [len(futures)]
+        remaining_lock = threading.Lock()
+        
+        def on_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            queue_results({normalized: future.result() for normalized, future in zip(submitted, futures)})
         
-        logger.info(f"Sentiment analysis completed for message {message_id}, score: {sentiment_score:.2f}")
+        for future in futures:
+            future.add_done_callback(on_done)
+        
+        logger.info(f"Submitted {len(submitted)} of {len(items)} messages for sentiment analysis")
         
     except Exception as e:
         logger.error(f"Error processing sentiment analysis: {str(e)}")
         db.session.rollback()
+        _restore_pending_sentiment(pending, task.get('attempt', 1))
+
+def _restore_pending_sentiment(pending: List[tuple], attempt: int):
+    """Put the messages of a failed sentiment run back in the pending buffer and queue another run"""
+    global _pending_sentiment
+    
+    if attempt >= SENTIMENT_MAX_ATTEMPTS:
+        logger.error(f"Dropping {len(pending)} messages after {attempt} failed sentiment analysis runs")
+        return
+    
+    with _pending_sentiment_lock:
+        _pending_sentiment = pending + _pending_sentiment
+        # Messages queued since the buffer was taken already have a task on the way
+        if len(_pending_sentiment) > len(pending):
+            return
+    
+    task_queue.put({
+        'type': 'sentiment_analysis',
+        'attempt': attempt + 1,
+        'queued_at': datetime.utcnow().isoformat()
+    })
+    logger.info(f"Requeued sentiment analysis for {len(pending)} messages")
+
+def process_sentiment_results(task: Dict[str, Any]):
+    """
+    Store sentiment scores: one bulk update of the messages and one bulk
+    insert of their sentiment logs
+    
+    Args:
+        task: Task dictionary with (message_id, user_id, department,
+            location, sentiment_score) results, and the (text, result) pairs
+            analyzed for them to add to the sentiment cache
+    """
+    results = task.get('results') or []
+    if not results:
+        return
+    
+    try:
+        now = datetime.utcnow()
+        db.session.execute(update(Message), [
+            {'id': message_id, 'sentiment_score': score} for message_id, _, _, _, score in results
+        ])
+        db.session.execute(insert(SentimentLog), [{
+            'user_id': user_id,
+            'department': department,
+            'location': location,
+            'sentiment_score': score,
+            'message_id': message_id,
+            'timestamp': now
+        } for message_id, user_id, department, location, score in results])
+        db.session.commit()
+        
+        logger.info(f"Sentiment analysis completed for {len(results)} messages")
+        
+        # Results new to the cache are kept for repeats of the same text
+        get_sentiment_cache(current_app._get_current_object()).put_many(task.get('fresh') or [])
+        
+    except Exception as e:
+        logger.error(f"Error storing sentiment results: {str(e)}")
+        db.session.rollback()
 
-def queue_sentiment_analysis(message_id: int, user_id: int):
+def queue_sentiment_analysis(message_id: int, user_id: int, text: Optional[str] = None):
     """
     Queue a message for sentiment analysis in the background
     
     Args:
         message_id: ID of the message to analyze
         user_id: ID of the user who sent the message
+        text: Text to analyze instead of the message content (e.g. a
+            completed check-in's answers)
+        
+    Returns:
+        False if a sentiment analysis task is already queued; it will pick
+        up this message too
     """
+    with _pending_sentiment_lock:
+        _pending_sentiment.append((message_id, user_id, text))
+        if len(_pending_sentiment) > 1:
+            return False
+    
     task = {
         'type': 'sentiment_analysis',
-        'message_id': message_id,
-        'user_id': user_id,
         'queued_at': datetime.utcnow().isoformat()
     }
     
     task_queue.put(task)
     logger.info(f"Queued sentiment analysis for message {message_id}")
     
-    return True 
\ No newline at end of file
+    return True
+
+def process_conversation_summary(task: Dict[str, Any]):
+    """
+    Process a conversation summary refresh task
+    
+    Args:
+        task: Task dictionary containing the user and the turn to fold through
+    """
+    user_id = task.get('user_id')
+    through_turn_no = task.get('through_turn_no')
+    
+    try:
+        if not user_id or not through_turn_no:
+            logger.error("Missing user_id or through_turn_no in conversation summary task")
+            return
+        
+        refresh_conversation_summary(user_id, through_turn_no)
+        
+    except Exception as e:
+        logger.error(f"Error refreshing conversation summary: {str(e)}")
+        db.session.rollback()
+    finally:
+        with _pending_summaries_lock:
+            _pending_summaries.discard(user_id)
+
+def queue_conversation_summary(user_id: int, through_turn_no: int):
+    """
+    Queue a refresh of a user's running conversation summary
+    
+    Args:
+        user_id: ID of the user
+        through_turn_no: Last turn to fold into the summary
+        
+    Returns:
+        False if a refresh for the user is already queued
+    """
+    with _pending_summaries_lock:
+        if user_id in _pending_summaries:
+            return False
+        _pending_summaries.add(user_id)
+    
+    task = {
+        'type': 'conversation_summary',
+        'user_id': user_id,
+        'through_turn_no': through_turn_no,
+        'queued_at': datetime.utcnow().isoformat()
+    }
+    
+    task_queue.put(task)
+    logger.info(f"Queued conversation summary refresh for user {user_id}")
+    
+    return True
+
+def process_keyword_extraction(task: Dict[str, Any]):
+    """
+    Extract keywords from every pending message and add them to the daily rollup
+    
+    Messages queued while the worker was busy are handled together: keywords
+    are extracted in batches of KEYWORD_BATCH_SIZE messages and each batch is
+    written as one upsert.
+    
+    Args:
+        task: Task dictionary (the messages are taken from the pending buffer)
+    """
+    global _pending_keywords
+    
+    with _pending_keywords_lock:
+        pending, _pending_keywords = _pending_keywords, []
+    
+    app = current_app._get_current_object()
+    batch_size = max(1, app.config.get('KEYWORD_BATCH_SIZE', 500))
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            # Inside the try, so a failing extractor cannot take the task down
+            # with the pending messages already taken out of the buffer
+            extractor = get_keyword_extractor(app)
+            increments = Counter()
+            keywords_per_message = extractor.extract_batch(text for text, _, _, _ in batch)
+            for (_, department, location, day), keywords in zip(batch, keywords_per_message):
+                increments.update(count_keywords(keywords, department, location, day=day))
+            
+            increment_keyword_counts(increments)
+            db.session.commit()
+            
+            logger.info(f"Keyword extraction completed for {len(batch)} messages, {len(increments)} counters")
+            
+        except Exception as e:
+            logger.error(f"Error processing keyword extraction: {str(e)}")
+            db.session.rollback()
+
+def queue_keyword_extraction(text: str, department: Optional[str], location: Optional[str],
+                             day: Optional[date] = None):
+    """
+    Queue a message for keyword extraction in the background
+    
+    Args:
+        text: Message text
+        department: Sender's department
+        location: Sender's location
+        day: Day to count the keywords on (defaults to today, UTC)
+        
+    Returns:
+        False if a keyword extraction task is already queued; it will pick up
+        this message too
+    """
+    with _pending_keywords_lock:
+        _pending_keywords.append((text, department, location, day or datetime.utcnow().date()))
+        if len(_pending_keywords) > 1:
+            return False
+    
+    task = {
+        'type': 'keyword_extraction',
+        'queued_at': datetime.utcnow().isoformat()
+    }
+    
+    task_queue.put(task)
+    logger.info("Queued keyword extraction")
+    
+    return True
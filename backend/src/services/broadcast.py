@@ -0,0 +1,376 @@
+"""
+Broadcast Service
+
+This module sends one WhatsApp message to many employees, e.g. a check-in
+invitation to a whole department. Recipients are resolved with a single
+query from a filter (department, location, employee status) or taken from
+an explicit list, and the job is stored as a BroadcastJob row. Only users
+who have given consent are messaged.
+
+A background runner feeds the sends to the outbound sender with a bounded
+number in flight, so a large broadcast never queues thousands of sends
+ahead of the bot's live replies. A broadcast can also send a registered
+template, personalized per recipient and rendered in one batch up front. Progress counters are flushed to the job
+row about once a second, and clients poll the job instead of holding the
+request open.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from flask import Flask
+from sqlalchemy import func, or_
+
+from ..models.models import db, BroadcastJob, Employee, User
+from ..utils.metrics import metrics
+from .message_templates import get_template_registry
+from .outbound_sender import OutboundSender, get_outbound_sender
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Filter fields a broadcast can select recipients by
+FILTER_FIELDS = ('department', 'location', 'status')
+
+# Per-recipient template parameters a broadcast fills in from the user records
+RECIPIENT_FIELDS = ('name', 'department', 'location')
+
+DEFAULT_INVITATION = (
+    "Hi! It's time for your wellbeing check-in. "
+    "Reply 'start check-in' whenever you're ready."
+)
+
+
+def filter_users(criteria: Dict[str, str], column):
+    """
+    Build a query selecting `column` of the users matching a filter
+
+    Department matches the employee record or, for users without one, the
+    department given during onboarding. Status is the employee status
+    (active, inactive, on_leave).
+
+    Args:
+        criteria: Mapping of FILTER_FIELDS to the values to match
+        column: User column to select
+
+    Returns:
+        Query over the distinct values of `column`, ordered by it
+    """
+    query = db.session.query(column).outerjoin(Employee, Employee.user_id == User.id)
+    if criteria.get('department'):
+        department = criteria['department']
+        query = query.filter(or_(Employee.department == department,
+                                 (Employee.id.is_(None)) & (User.department == department)))
+    if criteria.get('location'):
+        query = query.filter(User.location == criteria['location'])
+    if criteria.get('status'):
+        query = query.filter(Employee.status == criteria['status'])
+    return query.distinct().order_by(column)
+
+
+def resolve_recipients(criteria: Dict[str, str]) -> List[str]:
+    """
+    Resolve a broadcast filter to phone numbers with a single query
+
+    Users who have not given consent are left out.
+
+    Args:
+        criteria: Mapping of FILTER_FIELDS to the values to match (see filter_users)
+
+    Returns:
+        Distinct phone numbers, in order
+    """
+    query = filter_users(criteria, User.phone_number).filter(User.consent_given == True)
+    return [phone_number for (phone_number,) in query]
+
+
+def stored_forms(number: str) -> List[str]:
+    """Get the forms a phone number may be stored in: with and without the whatsapp: prefix"""
+    bare = number[9:] if number.startswith('whatsapp:') else number
+    return [f'whatsapp:{bare}', bare]
+
+
+def recipient_parameters(numbers: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Look up the per-recipient template parameters with a single query
+
+    Only known values are returned, so template defaults fill the gaps.
+    Users are matched whether their number is stored with or without the
+    whatsapp: prefix.
+
+    Args:
+        numbers: Phone numbers, with or without the whatsapp: prefix
+
+    Returns:
+        Mapping of each given phone number to its RECIPIENT_FIELDS values
+    """
+    requested = {}
+    for number in numbers:
+        for form in stored_forms(number):
+            requested.setdefault(form, number)
+
+    rows = (
+        db.session.query(User.phone_number, Employee.first_name,
+                         func.coalesce(Employee.department, User.department), User.location)
+        .outerjoin(Employee, Employee.user_id == User.id)
+        .filter(User.phone_number.in_(list(requested)))
+    )
+    return {
+        requested[phone_number]: {field: value for field, value in zip(RECIPIENT_FIELDS, values) if value}
+        for phone_number, *values in rows
+    }
+
+
+def consenting_recipients(numbers: List[str]) -> List[str]:
+    """
+    Keep the numbers of users who have given consent, with a single query
+
+    Numbers without a user record are dropped too, as their consent is
+    unknown. Users are matched whether their number is stored with or
+    without the whatsapp: prefix.
+
+    Args:
+        numbers: Phone numbers, with or without the whatsapp: prefix
+
+    Returns:
+        The consenting numbers, in the given order
+    """
+    requested = {}
+    for number in numbers:
+        for form in stored_forms(number):
+            requested.setdefault(form, number)
+
+    rows = (
+        db.session.query(User.phone_number)
+        .filter(User.phone_number.in_(list(requested)), User.consent_given == True)
+    )
+    consenting = {requested[phone_number] for (phone_number,) in rows}
+    return [number for number in numbers if number in consenting]
+
+
+def normalize_recipients(recipients: List[str]) -> List[str]:
+    """Bring numbers to the stored whatsapp:+... form and drop duplicates, keeping the given order"""
+    numbers = (number.strip() for number in recipients)
+    return list(dict.fromkeys(stored_forms(number)[0] for number in numbers if number))
+
+
+class BroadcastRunner:
+    """
+    Background runner for broadcast jobs
+
+    Jobs run one at a time in submission order on a single thread, each with
+    at most `max_in_flight` sends queued on the outbound sender.
+    """
+
+    def __init__(self, app: Flask, sender: OutboundSender, max_in_flight: int = 50,
+                 progress_interval: float = 1.0):
+        """
+        Initialize the runner
+
+        Args:
+            app: Flask application instance
+            sender: Outbound sender that delivers the messages
+            max_in_flight: Sends queued or in progress at once per job
+            progress_interval: Seconds between progress flushes to the job row
+        """
+        self.app = app
+        self.sender = sender
+        self.max_in_flight = max(1, max_in_flight)
+        self.progress_interval = progress_interval
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the runner thread"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, name='broadcast-runner', daemon=True)
+                self._thread.start()
+
+    def submit(self, job_id: int, recipients: List[str], message: Union[str, List[str]]):
+        """
+        Queue a stored job
+
+        Args:
+            job_id: ID of the BroadcastJob row
+            recipients: Phone numbers to send to
+            message: Message text, or one text per recipient
+        """
+        self._jobs.put((job_id, recipients, message))
+        metrics.gauge('broadcast.jobs_queued').inc()
+
+    def _run_loop(self):
+        while True:
+            job_id, recipients, message = self._jobs.get()
+            metrics.gauge('broadcast.jobs_queued').dec()
+            with self.app.app_context():
+                try:
+                    self.run(job_id, recipients, message)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Broadcast job {job_id} failed: {str(e)}")
+                    self._finish(job_id, 'failed', error=str(e))
+                finally:
+                    db.session.remove()
+
+    def run(self, job_id: int, recipients: List[str], message: Union[str, List[str]]):
+        """
+        Send a job's messages and record its progress (inside an app context)
+
+        Args:
+            job_id: ID of the BroadcastJob row
+            recipients: Phone numbers to send to
+            message: Message text, or one text per recipient
+        """
+        job = db.session.get(BroadcastJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        counts = {'sent': 0, 'failed': 0}
+        counts_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+
+        def on_done(future):
+            outcome = 'failed' if future.exception() is not None else 'sent'
+            with counts_lock:
+                counts[outcome] += 1
+            metrics.counter(f'broadcast.{outcome}').inc()
+            slots.release()
+
+        flushed_at = time.monotonic()
+        for index, to in enumerate(recipients):
+            # Flush progress while waiting for a free slot
+            while not slots.acquire(timeout=self.progress_interval):
+                flushed_at = self._flush(job_id, counts, counts_lock)
+            body = message[index] if isinstance(message, list) else message
+            self.sender.send(to, body, category='broadcast',
+                             broadcast_job_id=job_id).add_done_callback(on_done)
+            if time.monotonic() - flushed_at >= self.progress_interval:
+                flushed_at = self._flush(job_id, counts, counts_lock)
+
+        # Wait for the last sends by taking every slot back
+        for _ in range(self.max_in_flight):
+            while not slots.acquire(timeout=self.progress_interval):
+                self._flush(job_id, counts, counts_lock)
+
+        self._flush(job_id, counts, counts_lock)
+        self._finish(job_id, 'completed')
+        logger.info(f"Broadcast job {job_id} completed: {counts['sent']} sent, {counts['failed']} failed")
+
+    @staticmethod
+    def _flush(job_id: int, counts: Dict[str, int], counts_lock: threading.Lock) -> float:
+        """Write the progress counters to the job row"""
+        with counts_lock:
+            sent, failed = counts['sent'], counts['failed']
+        db.session.query(BroadcastJob).filter_by(id=job_id).update({'sent': sent, 'failed': failed})
+        db.session.commit()
+        return time.monotonic()
+
+    @staticmethod
+    def _finish(job_id: int, status: str, error: Optional[str] = None):
+        db.session.query(BroadcastJob).filter_by(id=job_id).update({
+            'status': status,
+            'error': error,
+            'finished_at': datetime.utcnow()
+        })
+        db.session.commit()
+
+
+# Process-wide broadcast runner
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_broadcast_runner(app: Flask) -> BroadcastRunner:
+    """
+    Get the process-wide broadcast runner, starting it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The running BroadcastRunner
+    """
+    global _runner
+
+    with _runner_lock:
+        if _runner is None:
+            runner = BroadcastRunner(
+                app,
+                get_outbound_sender(app),
+                max_in_flight=app.config.get('BROADCAST_MAX_IN_FLIGHT', 50),
+                progress_interval=app.config.get('BROADCAST_PROGRESS_INTERVAL', 1.0)
+            )
+            runner.start()
+            _runner = runner
+        return _runner
+
+
+def start_broadcast(app: Flask, message: Optional[str], criteria: Optional[Dict[str, str]] = None,
+                    recipients: Optional[List[str]] = None, template: Optional[str] = None,
+                    parameters: Optional[Dict[str, str]] = None) -> BroadcastJob:
+    """
+    Resolve recipients, store a broadcast job and queue it
+
+    Must be called inside an app context.
+
+    Args:
+        app: Flask application instance
+        message: Message text (ignored when a template is given)
+        criteria: Filter to resolve recipients with (see resolve_recipients)
+        recipients: Explicit phone numbers, used instead of a filter; numbers
+            of users who have not given consent are skipped
+        template: Name of a registered template to send instead of `message`
+        parameters: Template parameters shared by all recipients; each
+            recipient's RECIPIENT_FIELDS override them
+
+    Returns:
+        The stored BroadcastJob
+
+    Raises:
+        TemplateNotFoundError: If the template is not registered
+        TemplateParameterError: If a recipient's message misses a parameter
+    """
+    if recipients is not None:
+        requested = normalize_recipients(recipients)
+        numbers = consenting_recipients(requested)
+        if len(numbers) < len(requested):
+            metrics.counter('broadcast.skipped_no_consent').inc(len(requested) - len(numbers))
+            logger.warning(f"Skipping {len(requested) - len(numbers)} broadcast recipients without consent")
+    else:
+        numbers = resolve_recipients(criteria or {})
+
+    bodies = message
+    if template is not None:
+        compiled = get_template_registry(app).get(template)
+        message = compiled.body
+        if compiled.static_text is not None or not set(compiled.parameters) & set(RECIPIENT_FIELDS):
+            bodies = compiled.render(parameters)
+        else:
+            common = parameters or {}
+            fields = recipient_parameters(numbers)
+            bodies = compiled.render_many([{**common, **fields.get(number, {})} for number in numbers])
+
+    job = BroadcastJob(
+        status='queued',
+        message=message,
+        criteria=json.dumps(criteria) if recipients is None else None,
+        total=len(numbers),
+        sent=0,
+        failed=0,
+        created_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    get_broadcast_runner(app).submit(job.id, numbers, bodies)
+    metrics.counter('broadcast.recipients').inc(len(numbers))
+    logger.info(f"Queued broadcast job {job.id} to {len(numbers)} recipients")
+    return job
@@ -0,0 +1,269 @@
+"""
+Call Resilience Service
+
+This module protects the request path from a slow or failing dependency.
+A ResilientCaller runs each call on its own worker pool so the caller can
+give up at a hard deadline, short-circuits calls while a circuit breaker
+is open after repeated failures, and can hedge a slow call by starting a
+second attempt once the first has taken longer than the recent p95. A call
+is refused outright when every worker is still busy, rather than waiting
+for a thread while its deadline runs.
+
+Circuit state transitions and call latencies are recorded in the metrics
+registry, and every breaker is listed by circuit_breaker_snapshot().
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every live breaker, for the metrics endpoint
+_breakers = weakref.WeakValueDictionary()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit is open"""
+
+
+class CallRejectedError(CircuitOpenError):
+    """Raised instead of making a call while every worker is busy"""
+
+
+class CallTimeoutError(TimeoutError):
+    """Raised when a call does not complete within its deadline"""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `reset_timeout` seconds. Then a single probe call
+    is let through (half-open): its success closes the circuit, its failure
+    opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker
+
+        Args:
+            name: Metrics prefix, e.g. 'gemini'
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._transitions = deque(maxlen=20)
+        self._lock = threading.Lock()
+        _breakers[name] = self
+        metrics.gauge(f'{name}.circuit.open').set(0)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may be made now
+
+        Returns:
+            False while the circuit is open, or while a half-open probe is running
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Record a failed or timed-out call"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or (
+                    self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def _transition(self, new_state: str):
+        old_state, self._state = self._state, new_state
+        self._transitions.append({'at': datetime.utcnow().isoformat(), 'from': old_state, 'to': new_state})
+        metrics.counter(f'{self.name}.circuit.{old_state}_to_{new_state}').inc()
+        metrics.gauge(f'{self.name}.circuit.open').set(1 if new_state == self.OPEN else 0)
+        log = logger.warning if new_state == self.OPEN else logger.info
+        log(f"Circuit {self.name}: {old_state} -> {new_state} after {self._failures} consecutive failures")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'transitions': list(self._transitions)
+            }
+
+
+class ResilientCaller:
+    """
+    Runs calls with a deadline, a circuit breaker and optional hedging
+    """
+
+    def __init__(self, name: str, deadline: float = 20.0, breaker: Optional[CircuitBreaker] = None,
+                 hedge: bool = False, hedge_min_delay: float = 1.0, hedge_percentile: float = 95,
+                 hedge_min_samples: int = 20, max_workers: int = 16):
+        """
+        Initialize the caller
+
+        Args:
+            name: Metrics prefix, e.g. 'gemini'
+            deadline: Seconds a call may take before CallTimeoutError is raised
+            breaker: Circuit breaker (defaults to one with default settings)
+            hedge: Whether to start a second attempt for slow calls
+            hedge_min_delay: Lower bound on the hedging delay in seconds
+            hedge_percentile: Latency percentile after which a call is hedged
+            hedge_min_samples: Successful calls observed before hedging starts
+            max_workers: Threads running calls (a call past its deadline keeps
+                its thread until the underlying request gives up); calls made
+                while all of them are busy are rejected
+        """
+        self.name = name
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker(name)
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-call')
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Delay after which a slow call is hedged
+
+        Returns:
+            Seconds, or None if hedging is off or there are too few samples yet
+        """
+        latency = metrics.histogram(f'{self.name}.call_seconds')
+        if not self.hedge or latency.count < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, latency.percentile(self.hedge_percentile) or 0.0)
+
+    def _start(self, attempt: Callable[[], Any]) -> Future:
+        """Start an attempt on the worker slot taken for it, giving the slot back when it finishes"""
+        future = self._executor.submit(attempt)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def call(self, attempt: Callable[[], Any], hedge_attempt: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Make a call
+
+        Args:
+            attempt: Function making the call
+            hedge_attempt: Function making an independent second attempt; the
+                first attempt to succeed wins (defaults to no hedging)
+
+        Returns:
+            Result of the winning attempt
+
+        Raises:
+            CallRejectedError: Every worker is busy; no call was made
+            CircuitOpenError: The circuit is open; no call was made
+            CallTimeoutError: No attempt succeeded within the deadline
+            Exception: The error of the last failed attempt
+        """
+        # A full pool says nothing about the dependency, so it is not a breaker failure
+        if not self._slots.acquire(blocking=False):
+            metrics.counter(f'{self.name}.rejected').inc()
+            raise CallRejectedError(f"All {self.name} workers are busy")
+
+        if not self.breaker.allow():
+            self._slots.release()
+            metrics.counter(f'{self.name}.short_circuited').inc()
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        start = time.monotonic()
+        give_up_at = start + self.deadline
+        pending = {self._start(attempt)}
+        hedge = None
+        error = None
+
+        try:
+            hedge_delay = self.hedge_delay() if hedge_attempt is not None else None
+            if hedge_delay is not None and hedge_delay < self.deadline:
+                done, _ = wait(pending, timeout=hedge_delay)
+                if not done and self._slots.acquire(blocking=False):
+                    hedge = self._start(hedge_attempt)
+                    pending.add(hedge)
+                    metrics.counter(f'{self.name}.hedged').inc()
+
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, give_up_at - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        metrics.histogram(f'{self.name}.call_seconds').observe(time.monotonic() - start)
+                        self.breaker.record_success()
+                        if future is hedge:
+                            metrics.counter(f'{self.name}.hedge_wins').inc()
+                        return future.result()
+                    error = future.exception()
+
+            self.breaker.record_failure()
+            if pending:
+                metrics.counter(f'{self.name}.timeouts').inc()
+                raise CallTimeoutError(f"{self.name} call did not complete within {self.deadline}s")
+            raise error
+        finally:
+            # Attempts that have not started yet are dropped; running ones finish on their own
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        """Stop the worker threads (calls in flight run to completion)"""
+        self._executor.shutdown(wait=False)
+
+
+def circuit_breaker_snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the state and recent transitions of every circuit breaker
+
+    Returns:
+        Mapping of breaker name to its snapshot
+    """
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
@@ -70,12 +70,14 @@ def get_active_check_in(user_id):
         CheckIn.is_expired == False
     ).order_by(CheckIn.created_at.desc()).first()
 
-def create_check_in(user_id):
+def create_check_in(user_id, commit=True):
     """
     Create a new check-in session for a user
     
     Args:
         user_id: ID of the user
+        commit: Commit immediately; if False the check-in is only flushed
+            so it joins the caller's transaction
         
     Returns:
         Newly created CheckIn object
@@ -100,17 +102,22 @@ def create_check_in(user_id):
     )
     
     db.session.add(check_in)
-    db.session.commit()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     
     return check_in
 
-def update_check_in_state(check_in_id, new_state, **kwargs):
+def update_check_in_state(check_in_id, new_state, commit=True, **kwargs):
     """
     Update the state of a check-in session and any associated data
     
     Args:
         check_in_id: ID of the check-in to update
         new_state: The new state to set
+        commit: Commit immediately; if False the change is left in the
+            caller's transaction
         **kwargs: Additional fields to update
         
     Returns:
@@ -137,16 +144,19 @@ def update_check_in_state(check_in_id, new_state, **kwargs):
         check_in.is_completed = True
         check_in.completed_at = datetime.utcnow()
     
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return check_in
 
-def handle_check_in_response(user_id, message_text):
+def handle_check_in_response(user_id, message_text, commit=True):
     """
     Process a user's response during a check-in and determine the next step
     
     Args:
         user_id: ID of the user
         message_text: The message text from the user
+        commit: Commit state changes immediately; if False they are left in
+            the caller's transaction (the bot commits once per turn)
         
     Returns:
         dict with response_text and check_in object
@@ -156,7 +166,7 @@ def handle_check_in_response(user_id, message_text):
     # No active check-in, create one if user wants to start
     if not check_in:
         if 'check-in' in message_text.lower() or 'check in' in message_text.lower():
-            check_in = create_check_in(user_id)
+            check_in = create_check_in(user_id, commit=commit)
             return {
                 'response_text': RESPONSES['initiate'],
                 'check_in': check_in
@@ -172,11 +182,12 @@ def handle_check_in_response(user_id, message_text):
     if check_in.expires_at and datetime.utcnow() > check_in.expires_at:
         # Mark check-in as expired
         check_in.is_expired = True
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
         # Create a new check-in if the user explicitly asks
         if 'check-in' in message_text.lower() or 'check in' in message_text.lower():
-            check_in = create_check_in(user_id)
+            check_in = create_check_in(user_id, commit=commit)
             return {
                 'response_text': RESPONSES['initiate'],
                 'check_in': check_in
@@ -196,6 +207,7 @@ def handle_check_in_response(user_id, message_text):
                 check_in = update_check_in_state(
                     check_in.id, 
                     'mood_captured',
+                    commit=commit,
                     mood_score=mood_score
                 )
                 return {
@@ -218,6 +230,7 @@ def handle_check_in_response(user_id, message_text):
         check_in = update_check_in_state(
             check_in.id, 
             'stress_captured',
+                    commit=commit,
             mood_description=message_text
         )
         return {
@@ -233,6 +246,7 @@ def handle_check_in_response(user_id, message_text):
                 check_in = update_check_in_state(
                     check_in.id, 
                     'feedback_captured',
+                    commit=commit,
                     stress_level=stress_level
                 )
                 return {
@@ -255,6 +269,7 @@ def handle_check_in_response(user_id, message_text):
         check_in = update_check_in_state(
             check_in.id, 
             'qualitative_feedback',
+                    commit=commit,
             stress_factors=message_text
         )
         return {
@@ -267,6 +282,7 @@ def handle_check_in_response(user_id, message_text):
         check_in = update_check_in_state(
             check_in.id, 
             'completed',
+                    commit=commit,
             qualitative_feedback=message_text,
             is_completed=True,
             completed_at=datetime.utcnow()
@@ -293,22 +309,24 @@ def handle_timeout_checks():
     
     This should be called periodically, e.g., by a scheduled task.
     """
-    warning_threshold = datetime.utcnow() - timedelta(minutes=25)  # 5 min before timeout
-    timeout_threshold = datetime.utcnow() - timedelta(minutes=30)  # Complete timeout
+    # Timeouts go by expires_at, so scheduled invitations that stay open
+    # longer than CHECK_IN_TIMEOUT are not expired early
+    now = datetime.utcnow()
+    warning_threshold = now + timedelta(minutes=5)  # 5 min before timeout
     
     # Find check-ins that should receive a warning
     warning_check_ins = CheckIn.query.filter(
         CheckIn.is_completed == False,
         CheckIn.is_expired == False,
-        CheckIn.last_interaction_time <= warning_threshold,
-        CheckIn.last_interaction_time > timeout_threshold
+        CheckIn.expires_at <= warning_threshold,
+        CheckIn.expires_at > now
     ).all()
     
     # Find check-ins that have timed out
     expired_check_ins = CheckIn.query.filter(
         CheckIn.is_completed == False,
         CheckIn.is_expired == False,
-        CheckIn.last_interaction_time <= timeout_threshold
+        CheckIn.expires_at <= now
     ).all()
     
     # Mark expired check-ins
@@ -0,0 +1,325 @@
+"""
+Check-in Scheduler Service
+
+This module sends proactive check-in invitations on a per-user cadence
+(e.g. weekly) inside each user's local-time window. Every schedule stores
+the UTC time of its next invitation, already jittered uniformly across the
+window, so invitations to thousands of employees trickle out over the
+window (and, on enrollment, over the first cadence period) instead of
+arriving as one spike of Twilio sends and check-in rows.
+
+Each tick reads only the due rows through the (active, next_fire_at) index,
+creates their CheckIn rows with one bulk insert, moves every schedule to its
+next occurrence with one bulk update, and then hands the invitations to the
+outbound sender. Due rows are locked with SKIP LOCKED where the database
+supports it, so several workers can tick without double-sending.
+"""
+
+import logging
+import random
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import Flask
+from sqlalchemy import insert, update
+
+from ..models.models import db, CheckIn, CheckInSchedule, Employee, User
+from ..utils.metrics import metrics
+from .check_in_flow import RESPONSES
+from .outbound_sender import OutboundSender, get_outbound_sender
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+INVITATION = "Hi! It's time for your scheduled wellbeing check-in. " + RESPONSES['initiate']
+
+DEFAULT_WINDOW = (time(10, 0), time(16, 0))
+
+
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown time zone '{name}', scheduling in UTC")
+        return dt_timezone.utc
+
+
+def fire_time_in_window(day: date, tz_name: str, window_start: time, window_end: time,
+                        rng: random.Random) -> datetime:
+    """
+    Pick a uniformly random moment in a local-time window
+
+    A window whose end is not after its start runs past midnight.
+
+    Args:
+        day: Local date the window opens on
+        tz_name: IANA time zone of the window
+        window_start: Local opening time
+        window_end: Local closing time
+        rng: Random source for the jitter
+
+    Returns:
+        Naive UTC datetime
+    """
+    opens = datetime.combine(day, window_start)
+    closes = datetime.combine(day, window_end)
+    if closes <= opens:
+        closes += timedelta(days=1)
+    local = opens + timedelta(seconds=rng.uniform(0, (closes - opens).total_seconds()))
+    return local.replace(tzinfo=_zone(tz_name)).astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+def next_fire_at(schedule: Dict, after: datetime, rng: random.Random, first: bool = False) -> datetime:
+    """
+    Compute when a schedule fires next
+
+    The next invitation goes out `cadence_days` local days after `after`. A
+    new schedule instead fires on a random day within its first cadence
+    period, starting tomorrow, so enrolling a whole company at once spreads
+    the first round over the period.
+
+    Args:
+        schedule: Mapping with cadence_days, timezone, window_start and window_end
+        after: Naive UTC time the schedule last fired (or was enrolled)
+        rng: Random source for the jitter
+        first: Whether this is the schedule's first invitation
+
+    Returns:
+        Naive UTC datetime
+    """
+    local_today = after.replace(tzinfo=dt_timezone.utc).astimezone(_zone(schedule['timezone'])).date()
+    cadence = max(1, schedule['cadence_days'])
+    offset = 1 + rng.randrange(cadence) if first else cadence
+    return fire_time_in_window(local_today + timedelta(days=offset), schedule['timezone'],
+                               schedule['window_start'], schedule['window_end'], rng)
+
+
+def schedule_check_ins(user_ids: List[int], cadence_days: int = 7, timezone: str = 'UTC',
+                       window_start: time = DEFAULT_WINDOW[0], window_end: time = DEFAULT_WINDOW[1],
+                       rng: Optional[random.Random] = None) -> int:
+    """
+    Create or replace the check-in schedules of many users
+
+    Existing schedules take the new settings and are re-spread like new ones.
+    Uses one query, one bulk insert and one bulk update.
+
+    Args:
+        user_ids: Users to schedule
+        cadence_days: Days between invitations
+        timezone: IANA time zone the window is in
+        window_start: Local time invitations may start
+        window_end: Local time invitations must end by
+        rng: Random source for the jitter
+
+    Returns:
+        Number of schedules written
+    """
+    rng = rng or random.Random()
+    now = datetime.utcnow()
+    settings = {'cadence_days': cadence_days, 'timezone': timezone,
+                'window_start': window_start, 'window_end': window_end}
+
+    user_ids = list(dict.fromkeys(user_ids))
+    existing = dict(db.session.query(CheckInSchedule.user_id, CheckInSchedule.id)
+                    .filter(CheckInSchedule.user_id.in_(user_ids)).all()) if user_ids else {}
+
+    inserts, updates = [], []
+    for user_id in user_ids:
+        row = dict(settings, active=True, next_fire_at=next_fire_at(settings, now, rng, first=True),
+                   updated_at=now)
+        if user_id in existing:
+            updates.append(dict(row, id=existing[user_id]))
+        else:
+            inserts.append(dict(row, user_id=user_id, created_at=now))
+
+    if inserts:
+        db.session.execute(insert(CheckInSchedule), inserts)
+    if updates:
+        db.session.execute(update(CheckInSchedule), updates)
+    db.session.commit()
+    return len(inserts) + len(updates)
+
+
+class CheckInScheduler:
+    """
+    Periodically invites users whose check-in schedule is due
+    """
+
+    def __init__(self, app: Flask, sender: OutboundSender, tick_interval: float = 60.0,
+                 batch_size: int = 500, invitation_expiry: timedelta = timedelta(hours=12),
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            app: Flask application instance
+            sender: Outbound sender that delivers the invitations
+            tick_interval: Seconds between ticks
+            batch_size: Due schedules handled per transaction
+            invitation_expiry: How long an invited check-in stays open
+            rng: Random source for the jitter
+        """
+        self.app = app
+        self.sender = sender
+        self.tick_interval = tick_interval
+        self.batch_size = batch_size
+        self.invitation_expiry = invitation_expiry
+        self.rng = rng or random.Random()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the tick thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_loop, name='check-in-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the tick thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    self.run_due()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error running check-in schedules: {str(e)}")
+                finally:
+                    db.session.remove()
+            self._stop.wait(self.tick_interval)
+
+    def run_due(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Tick until no due schedules are left (inside an app context)
+
+        Args:
+            now: Current UTC time
+
+        Returns:
+            Totals of the counters returned by tick
+        """
+        totals = {'due': 0, 'invited': 0, 'skipped': 0}
+        while True:
+            result = self.tick(now)
+            for key in totals:
+                totals[key] += result[key]
+            if result['due'] < self.batch_size:
+                return totals
+
+    def tick(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Invite one batch of due users (inside an app context)
+
+        Users who have not given consent or already have a check-in open are
+        skipped for this occurrence; their schedule still moves on.
+
+        Args:
+            now: Current UTC time
+
+        Returns:
+            Dict with the 'due', 'invited' and 'skipped' counts
+        """
+        now = now or datetime.utcnow()
+        due = (
+            db.session.query(
+                CheckInSchedule.id, CheckInSchedule.user_id, CheckInSchedule.cadence_days,
+                CheckInSchedule.timezone, CheckInSchedule.window_start, CheckInSchedule.window_end,
+                User.phone_number, User.consent_given
+            )
+            .join(User, User.id == CheckInSchedule.user_id)
+            .filter(CheckInSchedule.active == True, CheckInSchedule.next_fire_at <= now)
+            .order_by(CheckInSchedule.next_fire_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True, of=CheckInSchedule)
+            .all()
+        )
+        if not due:
+            db.session.commit()
+            return {'due': 0, 'invited': 0, 'skipped': 0}
+
+        user_ids = [row.user_id for row in due]
+        employees = dict(db.session.query(Employee.user_id, Employee.id)
+                         .filter(Employee.user_id.in_(user_ids)).all())
+        open_check_ins = {user_id for (user_id,) in db.session.query(CheckIn.user_id).filter(
+            CheckIn.user_id.in_(user_ids),
+            CheckIn.is_completed == False,
+            CheckIn.is_expired == False,
+            CheckIn.expires_at > now
+        )}
+
+        check_ins, schedules, invitations = [], [], []
+        for row in due:
+            schedules.append({
+                'id': row.id,
+                'next_fire_at': next_fire_at(row._mapping, now, self.rng),
+                'last_fired_at': now
+            })
+            if not row.consent_given or row.user_id in open_check_ins:
+                continue
+            check_ins.append({
+                'user_id': row.user_id,
+                'employee_id': employees.get(row.user_id),
+                'state': 'initiated',
+                'is_completed': False,
+                'is_expired': False,
+                'follow_up_required': False,
+                'last_interaction_time': now,
+                'expires_at': now + self.invitation_expiry,
+                'created_at': now
+            })
+            invitations.append(row.phone_number)
+
+        if check_ins:
+            db.session.execute(insert(CheckIn), check_ins)
+        db.session.execute(update(CheckInSchedule), schedules)
+        db.session.commit()
+
+        # Sends go out after the commit, so a reply always finds its check-in
+        for phone_number in invitations:
+            self.sender.send(phone_number, INVITATION, category='check_in')
+
+        skipped = len(due) - len(invitations)
+        metrics.counter('check_in_scheduler.invited').inc(len(invitations))
+        metrics.counter('check_in_scheduler.skipped').inc(skipped)
+        logger.info(f"Check-in scheduler: {len(due)} due, {len(invitations)} invited, {skipped} skipped")
+        return {'due': len(due), 'invited': len(invitations), 'skipped': skipped}
+
+
+# Process-wide scheduler
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_check_in_scheduler(app: Flask) -> CheckInScheduler:
+    """
+    Get the process-wide check-in scheduler
+
+    The tick thread is started separately (see create_app), so deployments
+    that tick from cron through the API do not also run it.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The CheckInScheduler
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CheckInScheduler(
+                app,
+                get_outbound_sender(app),
+                tick_interval=app.config.get('CHECK_IN_SCHEDULER_INTERVAL', 60.0),
+                batch_size=app.config.get('CHECK_IN_SCHEDULER_BATCH_SIZE', 500),
+                invitation_expiry=timedelta(hours=app.config.get('CHECK_IN_INVITATION_EXPIRY_HOURS', 12))
+            )
+        return _scheduler
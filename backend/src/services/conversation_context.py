@@ -0,0 +1,222 @@
+"""
+Conversation Context Service
+
+This module builds the conversation context sent to Gemini with each bot
+turn. Recent turns are included verbatim up to a token budget; older turns
+are folded into a stored running summary instead of being dropped. Folding
+is done by the background worker, so the request path only ever reads the
+summary row and a bounded window of turns.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from flask import current_app
+
+from ..models.models import db, ConversationSummary, ConversationTurn
+from ..utils.metrics import metrics
+from .conversation_store import get_recent_turns, format_turns
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Defaults used when the app config does not set them
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_MIN_FOLD_TURNS = 6
+
+# Upper bound on turns folded by a single summary refresh
+MAX_FOLD_TURNS = 200
+
+SUMMARY_PROMPT = """
+You maintain a short running summary of a supportive conversation between an
+employee (User) and a wellbeing companion (AI). Update the summary with the new
+turns below. Keep what matters for continuing the conversation: what the user
+is dealing with, how they feel, what has helped, and anything they asked to be
+remembered. Leave out greetings and small talk. Write at most 150 words in
+plain prose.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:
+"""
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a piece of text
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Approximate token count
+    """
+    return len(text or '') // CHARS_PER_TOKEN + 1
+
+
+class ConversationContext:
+    """
+    Prompt context for one bot turn
+
+    Attributes:
+        summary: Running summary of the folded part of the conversation
+        turns: Recent (role, content) turns sent verbatim, oldest first
+        last_turn_no: Number of the latest stored turn (0 if none)
+        fold_through_turn_no: Turn the summary should be extended to, or None
+    """
+
+    def __init__(self, summary: str, turns: List[Tuple[str, str]], last_turn_no: int,
+                 fold_through_turn_no: Optional[int] = None):
+        self.summary = summary
+        self.turns = turns
+        self.last_turn_no = last_turn_no
+        self.fold_through_turn_no = fold_through_turn_no
+
+    @property
+    def has_history(self) -> bool:
+        return self.last_turn_no > 0
+
+    def render(self, extra_turns: Iterable[Tuple[str, str]] = ()) -> str:
+        """
+        Render the context as prompt text
+
+        Args:
+            extra_turns: Turns of the current exchange not yet stored
+
+        Returns:
+            Summary (if any) followed by the recent transcript
+        """
+        transcript = format_turns(self.turns + list(extra_turns))
+        if not self.summary:
+            return transcript
+        return f"Summary of the earlier conversation: {self.summary}\n\n{transcript}"
+
+
+def build_conversation_context(user_id: int, token_budget: Optional[int] = None,
+                               max_exchanges: int = 10) -> ConversationContext:
+    """
+    Build the prompt context for a user's next turn
+
+    The newest turns after the summarized point are kept while they fit the
+    token budget (the newest one is always kept). When enough older turns
+    fall outside the kept window, fold_through_turn_no is set so the caller
+    can queue a summary refresh.
+
+    Args:
+        user_id: ID of the user
+        token_budget: Approximate token budget for summary plus transcript
+        max_exchanges: Maximum number of recent exchanges to read
+
+    Returns:
+        ConversationContext for the turn
+    """
+    config = current_app.config
+    if token_budget is None:
+        token_budget = config.get('BOT_CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)
+    min_fold_turns = config.get('BOT_SUMMARY_MIN_TURNS', DEFAULT_MIN_FOLD_TURNS)
+
+    summary_row = ConversationSummary.query.filter_by(user_id=user_id).first()
+    summary = summary_row.summary if summary_row else ''
+    summarized_through = summary_row.summarized_through_turn_no if summary_row else 0
+
+    turns = get_recent_turns(user_id, max_exchanges, after_turn_no=summarized_through)
+    last_turn_no = turns[-1].turn_no if turns else summarized_through
+
+    remaining = token_budget - (estimate_tokens(summary) if summary else 0)
+    kept = []
+    for turn in reversed(turns):
+        cost = estimate_tokens(turn.content)
+        if kept and cost > remaining:
+            break
+        kept.append(turn)
+        remaining -= cost
+    kept.reverse()
+
+    # Everything between the summary and the oldest kept turn is missing from the prompt
+    oldest_kept = kept[0].turn_no if kept else last_turn_no + 1
+    fold_through = None
+    if oldest_kept - 1 - summarized_through >= min_fold_turns:
+        fold_through = oldest_kept - 1
+
+    context = ConversationContext(
+        summary=summary,
+        turns=[(turn.role, turn.content) for turn in kept],
+        last_turn_no=last_turn_no,
+        fold_through_turn_no=fold_through
+    )
+    metrics.histogram('bot.prompt_context_tokens').observe(token_budget - remaining)
+    return context
+
+
+def _get_summary_model():
+    """Get the Gemini model used for summaries (GEMINI_SUMMARY_MODEL) from the shared client"""
+    from .gemini_client import get_gemini_client
+    app = current_app._get_current_object()
+    return get_gemini_client(app).generative_model(app.config.get('GEMINI_SUMMARY_MODEL'))
+
+
+def summarize_turns(summary: str, turns: List[Tuple[str, str]]) -> str:
+    """
+    Fold turns into a running summary using Gemini
+
+    Args:
+        summary: Current summary (may be empty)
+        turns: (role, content) turns to fold in, oldest first
+
+    Returns:
+        Updated summary text
+    """
+    prompt = SUMMARY_PROMPT.format(summary=summary or '(none yet)', turns=format_turns(turns))
+    response = _get_summary_model().generate_content(prompt)
+    return response.text.strip()
+
+
+def refresh_conversation_summary(user_id: int, through_turn_no: int, summarize=summarize_turns) -> bool:
+    """
+    Extend a user's running summary to cover turns up to through_turn_no
+
+    Runs in the background worker. At most MAX_FOLD_TURNS turns are folded
+    per call; a longer backlog is picked up by later refreshes.
+
+    Args:
+        user_id: ID of the user
+        through_turn_no: Last turn to fold into the summary
+        summarize: Function taking (summary, turns) and returning the new summary
+
+    Returns:
+        True if the summary was updated
+    """
+    summary_row = ConversationSummary.query.filter_by(user_id=user_id).first()
+    start = summary_row.summarized_through_turn_no if summary_row else 0
+    through_turn_no = min(through_turn_no, start + MAX_FOLD_TURNS)
+    if through_turn_no <= start:
+        return False
+
+    turns = ConversationTurn.query.filter(
+        ConversationTurn.user_id == user_id,
+        ConversationTurn.turn_no > start,
+        ConversationTurn.turn_no <= through_turn_no
+    ).order_by(ConversationTurn.turn_no).all()
+
+    with metrics.histogram('bot.summary_refresh_seconds').time():
+        new_summary = summarize(summary_row.summary if summary_row else '',
+                                [(turn.role, turn.content) for turn in turns])
+
+    if summary_row is None:
+        summary_row = ConversationSummary(user_id=user_id)
+        db.session.add(summary_row)
+    summary_row.summary = new_summary
+    summary_row.summarized_through_turn_no = through_turn_no
+    summary_row.updated_at = datetime.utcnow()
+    db.session.commit()
+
+    metrics.counter('bot.summary_refreshes').inc()
+    logger.info(f"Folded turns {start + 1}-{through_turn_no} into summary for user {user_id}")
+    return True
@@ -0,0 +1,128 @@
+"""
+Conversation Store Service
+
+This module stores the bot conversation as an append-only table of turns
+instead of a single ever-growing text blob on the User row. Appending a
+turn is a single insert, and the prompt context is built from a bounded
+recent window read through the (user_id, turn_no) index.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from ..models.models import db, ConversationTurn
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Turn roles
+ROLE_USER = 'user'
+ROLE_AI = 'ai'
+ROLE_SESSION = 'session'  # Marker for a new session after inactivity
+
+# Prefixes used when rendering turns into a prompt transcript
+ROLE_PREFIXES = {
+    ROLE_USER: 'User: ',
+    ROLE_AI: 'AI: '
+}
+SESSION_SEPARATOR = '--- New Session ---'
+
+
+def get_recent_turns(user_id: int, max_exchanges: int = 10, after_turn_no: int = 0) -> List[ConversationTurn]:
+    """
+    Get the most recent turns of a user's conversation
+
+    Args:
+        user_id: ID of the user
+        max_exchanges: Number of user/AI exchanges to include
+        after_turn_no: Only include turns numbered above this one
+
+    Returns:
+        List of ConversationTurn objects, oldest first
+    """
+    query = ConversationTurn.query.filter_by(user_id=user_id)
+    if after_turn_no:
+        query = query.filter(ConversationTurn.turn_no > after_turn_no)
+    turns = query.order_by(ConversationTurn.turn_no.desc())\
+        .limit(max_exchanges * 2)\
+        .all()
+    turns.reverse()
+    return turns
+
+
+def append_turns(user_id: int, last_turn_no: int, entries: Iterable[Tuple[str, str]]) -> int:
+    """
+    Append turns to a user's conversation
+
+    The turns are added to the session but not committed. The unique
+    (user_id, turn_no) constraint rejects a concurrent writer that read
+    the same last_turn_no.
+
+    Args:
+        user_id: ID of the user
+        last_turn_no: Number of the latest stored turn (0 if none)
+        entries: (role, content) pairs in conversation order
+
+    Returns:
+        Number of the last appended turn
+    """
+    turn_no = last_turn_no
+    now = datetime.utcnow()
+    for role, content in entries:
+        turn_no += 1
+        db.session.add(ConversationTurn(
+            user_id=user_id,
+            turn_no=turn_no,
+            role=role,
+            content=content or '',
+            created_at=now
+        ))
+    return turn_no
+
+
+def format_turns(turns: Iterable[Tuple[str, str]]) -> str:
+    """
+    Render turns as the plain-text transcript used in the Gemini prompt
+
+    Args:
+        turns: (role, content) pairs, oldest first
+
+    Returns:
+        Transcript with one line per turn and separators between sessions
+    """
+    lines = []
+    for role, content in turns:
+        if role == ROLE_SESSION:
+            if lines:
+                lines.append(f"\n{SESSION_SEPARATOR}\n")
+            continue
+        lines.append(f"{ROLE_PREFIXES.get(role, '')}{content}")
+    return '\n'.join(lines)
+
+
+def split_history_blob(blob: str) -> List[Tuple[str, str]]:
+    """
+    Split a legacy User.conversation_history blob into (role, content) turns
+
+    Lines starting with 'User: ' or 'AI: ' start a new turn; other lines
+    continue the previous turn, and separator lines become session markers.
+
+    Args:
+        blob: Legacy transcript text
+
+    Returns:
+        List of (role, content) pairs in conversation order
+    """
+    turns = []
+    for line in (blob or '').split('\n'):
+        if line.strip() == SESSION_SEPARATOR:
+            turns.append([ROLE_SESSION, ''])
+        elif line.startswith(ROLE_PREFIXES[ROLE_USER]):
+            turns.append([ROLE_USER, line[len(ROLE_PREFIXES[ROLE_USER]):]])
+        elif line.startswith(ROLE_PREFIXES[ROLE_AI]):
+            turns.append([ROLE_AI, line[len(ROLE_PREFIXES[ROLE_AI]):]])
+        elif turns and turns[-1][0] != ROLE_SESSION:
+            turns[-1][1] += '\n' + line
+
+    return [(role, content.strip('\n')) for role, content in turns]
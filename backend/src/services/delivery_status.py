@@ -0,0 +1,380 @@
+"""
+Delivery Status Service
+
+This module records outbound WhatsApp messages and their delivery status.
+Every message the outbound sender delivers to Twilio is recorded with its
+SID in the indexed outbound_message table, and Twilio's status callbacks
+advance that row through queued, sent, delivered and read (or failed).
+
+Neither path writes per message: sends and callbacks are buffered in memory
+and a background thread applies them every few hundred milliseconds, with
+one bulk insert for new messages and one UPDATE ... WHERE sid IN (...) per
+status. A burst of callbacks after a broadcast therefore costs a handful of
+statements per flush rather than one transaction per callback. Buffered
+entries that have not been flushed yet are lost if the process dies.
+
+When a batch fails, its entries are applied one at a time so a single bad
+row (a duplicate SID, say) cannot hold back the rest; entries that keep
+failing are dropped after MAX_FAILED_FLUSHES flushes, and the flush thread
+backs off exponentially while flushes fail. Records are pruned once they
+are past their retention period.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import func
+
+from ..models.models import db, OutboundMessage
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How far along a message is; a callback never moves a message backwards,
+# since Twilio does not guarantee callbacks arrive in order
+STATUS_RANK = {
+    'accepted': 0,
+    'queued': 0,
+    'sending': 1,
+    'sent': 2,
+    'delivered': 3,
+    'undelivered': 3,
+    'failed': 3,
+    'read': 4
+}
+
+DELIVERED_STATUSES = ('delivered', 'read')
+FAILED_STATUSES = ('failed', 'undelivered')
+
+# Callbacks for a SID that is not recorded yet are retried for this many flushes
+# (the callback can overtake the send being recorded), then dropped
+MAX_UNMATCHED_FLUSHES = 20
+
+# Entries that fail to apply on their own are retried for this many flushes, then dropped
+MAX_FAILED_FLUSHES = 10
+
+# Longest wait between flushes while they keep failing
+MAX_FLUSH_BACKOFF = 30.0
+
+
+class DeliveryStatusRecorder:
+    """
+    Buffers sent messages and status callbacks and applies them in batches
+    """
+
+    def __init__(self, app: Flask, flush_interval: float = 0.25, max_batch: int = 1000):
+        """
+        Initialize the recorder
+
+        Args:
+            app: Flask application instance
+            flush_interval: Seconds between flushes
+            max_batch: Buffered entries that trigger an early flush
+        """
+        self.app = app
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._sent: List[Tuple[Dict, int]] = []  # (row, attempts)
+        self._statuses: Dict[str, Tuple[str, Optional[str], int]] = {}  # sid -> (status, error_code, attempts)
+        self._changed = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Start the flush thread"""
+        with self._changed:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, name='delivery-status', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flush thread after a final flush"""
+        with self._changed:
+            self._running = False
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _pending(self) -> int:
+        return len(self._sent) + len(self._statuses)
+
+    def record_sent(self, sid: str, to: str, category: str = 'reply', broadcast_job_id: Optional[int] = None):
+        """
+        Buffer a message that Twilio accepted
+
+        Args:
+            sid: Twilio message SID
+            to: Recipient, with or without the whatsapp: prefix
+            category: What the message was, e.g. 'reply' or 'broadcast'
+            broadcast_job_id: Broadcast job the message belongs to, if any
+        """
+        with self._changed:
+            self._sent.append(({
+                'sid': sid,
+                'to_number': to[9:] if to.startswith('whatsapp:') else to,
+                'category': category,
+                'broadcast_job_id': broadcast_job_id,
+                'status': 'queued',
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            }, 0))
+            if self._pending() >= self.max_batch:
+                self._changed.notify()
+
+    def record_status(self, sid: str, status: str, error_code: Optional[str] = None):
+        """
+        Buffer a status callback
+
+        Of several callbacks for the same SID within one flush, the one
+        furthest along wins.
+
+        Args:
+            sid: Twilio message SID
+            status: MessageStatus from the callback
+            error_code: ErrorCode from the callback, if any
+        """
+        status = status.lower()
+        if status not in STATUS_RANK:
+            logger.warning(f"Ignoring unknown message status '{status}' for {sid}")
+            return
+
+        metrics.counter('delivery.callbacks').inc()
+        with self._changed:
+            current = self._statuses.get(sid)
+            if current is None or STATUS_RANK[status] >= STATUS_RANK[current[0]]:
+                self._statuses[sid] = (status, error_code, 0)
+            if self._pending() >= self.max_batch:
+                self._changed.notify()
+
+    def _flush_loop(self):
+        backoff = 0.0
+        while True:
+            with self._changed:
+                if backoff:
+                    # Wait out the backoff even if the buffer is full
+                    deadline = time.monotonic() + backoff
+                    while self._running and time.monotonic() < deadline:
+                        self._changed.wait(deadline - time.monotonic())
+                elif self._running and self._pending() < self.max_batch:
+                    self._changed.wait(self.flush_interval)
+                running = self._running
+            with self.app.app_context():
+                try:
+                    self.flush()
+                    backoff = 0.0
+                except Exception as e:
+                    backoff = min(max(backoff * 2, self.flush_interval), MAX_FLUSH_BACKOFF)
+                    logger.error(f"Error flushing delivery statuses, retrying in {backoff:.2f}s: {str(e)}")
+                finally:
+                    db.session.remove()
+            if not running:
+                break
+
+    def flush(self):
+        """
+        Apply everything buffered so far (inside an app context)
+
+        Raises:
+            Exception: The batch error, if some entries could not be applied
+                even one at a time; those entries are kept for the next flush
+        """
+        with self._changed:
+            sent, self._sent = self._sent, []
+            statuses, self._statuses = self._statuses, {}
+        if not sent and not statuses:
+            return
+
+        start = time.monotonic()
+        try:
+            if sent:
+                db.session.execute(OutboundMessage.__table__.insert(), [row for row, _ in sent])
+            unmatched = self._apply_statuses(statuses)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Delivery status batch failed, applying entries one at a time: {str(e)}")
+            failed_sent, failed_statuses, unmatched = self._flush_each(sent, statuses)
+            self._requeue(unmatched)
+            if failed_sent or failed_statuses:
+                self._requeue_failed(failed_sent, failed_statuses)
+                raise
+            return
+
+        self._requeue(unmatched)
+        metrics.histogram('delivery.flush_seconds').observe(time.monotonic() - start)
+        metrics.histogram('delivery.flush_size').observe(len(sent) + len(statuses))
+
+    def _apply_statuses(self, statuses: Dict[str, Tuple[str, Optional[str], int]]) -> Dict:
+        """Run one guarded UPDATE per status; return the callbacks whose SID has no row yet"""
+        if not statuses:
+            return {}
+
+        by_status: Dict[Tuple[str, Optional[str]], List[str]] = {}
+        for sid, (status, error_code, _) in statuses.items():
+            by_status.setdefault((status, error_code), []).append(sid)
+
+        table = OutboundMessage.__table__
+        now = datetime.utcnow()
+        for (status, error_code), sids in by_status.items():
+            earlier = [name for name, rank in STATUS_RANK.items() if rank < STATUS_RANK[status]]
+            values = {'status': status, 'updated_at': now}
+            if error_code:
+                values['error_code'] = error_code
+            db.session.execute(
+                table.update().where(table.c.sid.in_(sids), table.c.status.in_(earlier)).values(**values)
+            )
+
+        known = {sid for (sid,) in db.session.execute(
+            db.select(table.c.sid).where(table.c.sid.in_(list(statuses)))
+        )}
+        return {sid: entry for sid, entry in statuses.items() if sid not in known}
+
+    def _flush_each(self, sent: List[Tuple[Dict, int]], statuses: Dict[str, Tuple[str, Optional[str], int]]):
+        """Apply a failed batch one entry per transaction; return the failed sends and callbacks, and unmatched callbacks"""
+        failed_sent = []
+        for row, attempts in sent:
+            try:
+                db.session.execute(OutboundMessage.__table__.insert(), [row])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Could not record message {row['sid']}: {str(e)}")
+                failed_sent.append((row, attempts))
+
+        failed_statuses, unmatched = {}, {}
+        for sid, entry in statuses.items():
+            try:
+                unmatched.update(self._apply_statuses({sid: entry}))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Could not apply status '{entry[0]}' to {sid}: {str(e)}")
+                failed_statuses[sid] = entry
+        return failed_sent, failed_statuses, unmatched
+
+    def _requeue_failed(self, sent: List[Tuple[Dict, int]], statuses: Dict[str, Tuple[str, Optional[str], int]]):
+        dropped = 0
+        with self._changed:
+            retry = []
+            for row, attempts in sent:
+                if attempts + 1 >= MAX_FAILED_FLUSHES:
+                    dropped += 1
+                else:
+                    retry.append((row, attempts + 1))
+            self._sent[:0] = retry
+            for sid, (status, error_code, attempts) in statuses.items():
+                if attempts + 1 >= MAX_FAILED_FLUSHES:
+                    dropped += 1
+                else:
+                    self._statuses.setdefault(sid, (status, error_code, attempts + 1))
+        if dropped:
+            metrics.counter('delivery.failed_dropped').inc(dropped)
+            logger.error(f"Dropped {dropped} delivery status entries after {MAX_FAILED_FLUSHES} failed flushes")
+
+    def _requeue(self, unmatched: Dict[str, Tuple[str, Optional[str], int]]):
+        dropped = 0
+        with self._changed:
+            for sid, (status, error_code, attempts) in unmatched.items():
+                if attempts + 1 >= MAX_UNMATCHED_FLUSHES:
+                    dropped += 1
+                    continue
+                current = self._statuses.get(sid)
+                if current is None or STATUS_RANK[status] > STATUS_RANK[current[0]]:
+                    self._statuses[sid] = (status, error_code, attempts + 1)
+        if dropped:
+            metrics.counter('delivery.unmatched_dropped').inc(dropped)
+            logger.warning(f"Dropped {dropped} status callbacks for unknown message SIDs")
+
+
+def get_delivery_stats(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       category: Optional[str] = None, broadcast_job_id: Optional[int] = None) -> Dict:
+    """
+    Get message counts per status and the delivery and failure rates
+
+    Args:
+        start_date: Only messages sent at or after this time
+        end_date: Only messages sent before this time
+        category: Only messages of this category, e.g. 'broadcast'
+        broadcast_job_id: Only messages of this broadcast job
+
+    Returns:
+        Dict with 'total', 'by_status', 'delivery_rate' and 'failure_rate'
+    """
+    query = db.session.query(OutboundMessage.status, func.count(OutboundMessage.id))
+    if start_date:
+        query = query.filter(OutboundMessage.created_at >= start_date)
+    if end_date:
+        query = query.filter(OutboundMessage.created_at < end_date)
+    if category:
+        query = query.filter(OutboundMessage.category == category)
+    if broadcast_job_id is not None:
+        query = query.filter(OutboundMessage.broadcast_job_id == broadcast_job_id)
+
+    by_status = dict(query.group_by(OutboundMessage.status).all())
+    total = sum(by_status.values())
+    delivered = sum(by_status.get(status, 0) for status in DELIVERED_STATUSES)
+    failed = sum(by_status.get(status, 0) for status in FAILED_STATUSES)
+    return {
+        'total': total,
+        'by_status': by_status,
+        'delivery_rate': delivered / total if total else None,
+        'failure_rate': failed / total if total else None
+    }
+
+
+def prune_outbound_messages(retention_days: int) -> int:
+    """
+    Delete outbound message records older than the retention period
+
+    Args:
+        retention_days: Days to keep outbound message records
+
+    Returns:
+        Number of rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = OutboundMessage.query.filter(OutboundMessage.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Pruned {deleted} outbound messages older than {retention_days} days")
+    return deleted
+
+
+# Process-wide recorder
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_delivery_recorder(app: Flask) -> DeliveryStatusRecorder:
+    """
+    Get the process-wide delivery status recorder, starting it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The running DeliveryStatusRecorder
+    """
+    global _recorder
+
+    if _recorder is not None:
+        return _recorder
+
+    with _recorder_lock:
+        if _recorder is None:
+            recorder = DeliveryStatusRecorder(
+                app,
+                flush_interval=app.config.get('DELIVERY_STATUS_FLUSH_INTERVAL', 0.25),
+                max_batch=app.config.get('DELIVERY_STATUS_MAX_BATCH', 1000)
+            )
+            recorder.start()
+            _recorder = recorder
+
+    return _recorder
@@ -0,0 +1,407 @@
+"""
+Gemini Client Service
+
+This module owns the bot's connection to Gemini. The SDK used to be
+configured at import time of the bot module, and every message started a
+fresh chat with an empty history and pasted the whole transcript into one
+prompt string. Here the SDK is configured lazily, once per process, and
+one model object (and with it the SDK's pooled transport) is reused for
+every call. Each user gets a live chat session whose native multi-turn
+history mirrors the stored conversation context; sessions are kept in an
+LRU bounded by count, history size and idle time.
+
+Calls go through a ResilientCaller, which enforces a deadline, opens a
+circuit after repeated failures and can hedge a slow reply with a second
+attempt on a fresh chat built from the same history. Every call records
+its latency and token counts in the metrics registry.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask
+
+from ..utils.metrics import metrics
+from .call_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from .conversation_context import CHARS_PER_TOKEN, ConversationContext, estimate_tokens
+from .conversation_store import ROLE_AI, ROLE_SESSION, ROLE_USER
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-1.5-flash-002"
+
+# Native chat roles for stored turn roles
+CHAT_ROLES = {
+    ROLE_USER: 'user',
+    ROLE_AI: 'model'
+}
+
+# Opening exchange that hands the running summary to the model
+SUMMARY_PREFIX = "Summary of our earlier conversation: "
+SUMMARY_ACK = "Thank you, I'll keep that in mind."
+
+
+def build_history(context: ConversationContext) -> List[Dict]:
+    """
+    Build native chat history from a conversation context
+
+    Session markers are dropped and consecutive turns of the same role are
+    merged, so the history alternates between user and model.
+
+    Args:
+        context: Conversation context of the turn
+
+    Returns:
+        List of {'role', 'parts'} contents, oldest first
+    """
+    history = []
+    if context.summary:
+        history.append({'role': 'user', 'parts': [SUMMARY_PREFIX + context.summary]})
+        history.append({'role': 'model', 'parts': [SUMMARY_ACK]})
+    for role, content in context.turns:
+        chat_role = CHAT_ROLES.get(role)
+        if chat_role is None or not content:
+            continue
+        if history and history[-1]['role'] == chat_role:
+            history[-1]['parts'][0] += f"\n{content}"
+        elif history or chat_role == 'user':
+            # The window can start mid-exchange; history has to open with the user
+            history.append({'role': chat_role, 'parts': [content]})
+    return history
+
+
+def _context_key(context: ConversationContext) -> Tuple:
+    """What a session's history was built from; a session is reusable while this matches"""
+    return (context.summary, tuple(turn for turn in context.turns if turn[0] != ROLE_SESSION))
+
+
+class ChatSessionEntry:
+    """
+    A user's live chat session and the context its history reflects
+    """
+
+    __slots__ = ('chat', 'key', 'size', 'last_used')
+
+    def __init__(self, chat, key: Tuple, size: int):
+        self.chat = chat
+        self.key = key
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class GeminiClient:
+    """
+    Lazily configured Gemini model with an LRU of per-user chat sessions
+
+    A user's turns are serialized by the sender dispatcher, so a session is
+    only used by one thread at a time; the lock guards the LRU itself.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = DEFAULT_MODEL,
+                 api_endpoint: Optional[str] = None,
+                 max_sessions: int = 1000, max_history_chars: int = 20_000_000,
+                 idle_timeout: float = 900.0, model_factory: Optional[Callable] = None,
+                 caller: Optional[ResilientCaller] = None):
+        """
+        Initialize the client (nothing is configured or connected yet)
+
+        Args:
+            api_key: Gemini API key
+            model_name: Model used for chat replies
+            api_endpoint: Base URL of the API, e.g. a local stand-in for load
+                tests (defaults to Google's endpoint)
+            max_sessions: Maximum number of live chat sessions
+            max_history_chars: Maximum characters of history held across all sessions
+            idle_timeout: Seconds after which an unused session is dropped
+            model_factory: Callable taking a model name and returning a model
+                (defaults to genai.GenerativeModel after configuring the SDK)
+            caller: Deadline, circuit breaker and hedging for chat calls
+                (defaults to calling the model directly)
+        """
+        self.api_key = api_key
+        self.model_name = model_name
+        self.api_endpoint = api_endpoint
+        self.max_sessions = max_sessions
+        self.max_history_chars = max_history_chars
+        self.idle_timeout = idle_timeout
+        self._model_factory = model_factory
+        self.caller = caller
+        self._models = {}
+        self._sessions = OrderedDict()  # user_id -> ChatSessionEntry
+        self._history_chars = 0
+        self._lock = threading.Lock()
+        self._configure_lock = threading.Lock()
+
+    def _configure(self):
+        """Configure the SDK once; the transport it creates is shared by all models"""
+        with self._configure_lock:
+            if self._model_factory is None:
+                import google.generativeai as genai
+                if self.api_endpoint:
+                    # Plain HTTP to the stand-in needs the REST transport
+                    genai.configure(api_key=self.api_key, transport='rest',
+                                    client_options={'api_endpoint': self.api_endpoint})
+                else:
+                    genai.configure(api_key=self.api_key)
+                self._model_factory = genai.GenerativeModel
+                logger.info("Gemini client configured")
+        return self._model_factory
+
+    def generative_model(self, model_name: Optional[str] = None):
+        """
+        Get the shared model object for a model name
+
+        Args:
+            model_name: Model to use (defaults to the chat model)
+
+        Returns:
+            Model object, created on first use
+        """
+        model_name = model_name or self.model_name
+        model = self._models.get(model_name)
+        if model is None:
+            factory = self._configure()
+            with self._lock:
+                model = self._models.setdefault(model_name, factory(model_name))
+        return model
+
+    def warm_up(self):
+        """Open the transport with a cheap request so the first reply does not pay for it"""
+        try:
+            with metrics.histogram('gemini.warm_up_seconds').time():
+                self.generative_model().count_tokens('ping')
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed: {str(e)}")
+
+    def start_warm_up(self):
+        """Warm up in a background thread"""
+        threading.Thread(target=self.warm_up, name='gemini-warm-up', daemon=True).start()
+
+    def _session(self, user_id: int, context: ConversationContext) -> ChatSessionEntry:
+        """Get the user's chat session, rebuilding its history if the context moved on"""
+        key = _context_key(context)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(user_id)
+            if entry is not None:
+                self._sessions.move_to_end(user_id)
+                entry.last_used = now
+                if entry.key == key:
+                    metrics.counter('gemini.sessions.hits').inc()
+                    return entry
+
+        history = build_history(context)
+        size = sum(len(content['parts'][0]) for content in history)
+        if entry is not None:
+            # Summarized or trimmed since the last turn, or written by another process
+            metrics.counter('gemini.sessions.rebuilds').inc()
+            entry.chat.history = history
+            self._resize(user_id, entry, key, size)
+            return entry
+
+        metrics.counter('gemini.sessions.misses').inc()
+        entry = ChatSessionEntry(self.generative_model().start_chat(history=history), key, size)
+        with self._lock:
+            previous = self._sessions.pop(user_id, None)
+            if previous is not None:
+                self._history_chars -= previous.size
+            self._sessions[user_id] = entry
+            self._history_chars += size
+            self._evict_over_capacity()
+        return entry
+
+    def _resize(self, user_id: int, entry: ChatSessionEntry, key: Tuple, size: int):
+        with self._lock:
+            if self._sessions.get(user_id) is entry:
+                self._history_chars += size - entry.size
+            entry.key = key
+            entry.size = size
+            self._evict_over_capacity()
+
+    def _evict_idle(self, now: float):
+        while self._sessions:
+            user_id, entry = next(iter(self._sessions.items()))
+            if now - entry.last_used < self.idle_timeout:
+                break
+            self._drop_locked(user_id)
+
+    def _evict_over_capacity(self):
+        while self._sessions and (len(self._sessions) > self.max_sessions
+                                  or self._history_chars > self.max_history_chars):
+            self._drop_locked(next(iter(self._sessions)))
+        metrics.gauge('gemini.sessions.live').set(len(self._sessions))
+
+    def _drop_locked(self, user_id: int):
+        entry = self._sessions.pop(user_id, None)
+        if entry is not None:
+            self._history_chars -= entry.size
+
+    def drop_session(self, user_id: int):
+        """
+        Forget a user's chat session
+
+        Args:
+            user_id: ID of the user
+        """
+        with self._lock:
+            self._drop_locked(user_id)
+
+    def _record_exchange(self, user_id: int, entry: ChatSessionEntry, user_input: str, reply: str):
+        """Advance the session key to include the exchange just added to its history"""
+        summary, turns = entry.key
+        key = (summary, turns + ((ROLE_USER, user_input), (ROLE_AI, reply)))
+        self._resize(user_id, entry, key, entry.size + len(user_input) + len(reply))
+
+    @staticmethod
+    def _record_usage(response, prompt_chars: int, reply: str):
+        """Record token counts, from the response's usage metadata when the SDK provides it"""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) or prompt_chars // CHARS_PER_TOKEN + 1
+        output_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(reply)
+        metrics.histogram('gemini.prompt_tokens').observe(prompt_tokens)
+        metrics.histogram('gemini.output_tokens').observe(output_tokens)
+
+    def _send(self, entry: ChatSessionEntry, user_input: str) -> Tuple:
+        """Send a message through the caller; a hedged attempt runs on a fresh chat"""
+        def attempt(chat):
+            response = chat.send_message(user_input)
+            return chat, response, response.text
+
+        if self.caller is None:
+            return attempt(entry.chat)
+        history = list(entry.chat.history)
+        return self.caller.call(
+            lambda: attempt(entry.chat),
+            lambda: attempt(self.generative_model().start_chat(history=history))
+        )
+
+    def _send_stream(self, entry: ChatSessionEntry, user_input: str) -> Tuple:
+        """Start a stream through the caller; the deadline covers the first chunk"""
+        def attempt():
+            response = entry.chat.send_message(user_input, stream=True)
+            chunks = iter(response)
+            first = next(chunks, None)
+            return response, chunks if first is None else chain([first], chunks)
+
+        if self.caller is None:
+            return attempt()
+        return self.caller.call(attempt)
+
+    def reply(self, user_id: int, context: ConversationContext, user_input: str) -> str:
+        """
+        Get the model's reply to a user's message
+
+        Args:
+            user_id: ID of the user
+            context: Conversation context of the turn (summary and recent turns)
+            user_input: The user's message
+
+        Returns:
+            Reply text
+
+        Raises:
+            CircuitOpenError: Recent calls kept failing; no call was made
+            CallTimeoutError: The reply did not arrive within the deadline
+        """
+        entry = self._session(user_id, context)
+        start = time.monotonic()
+        try:
+            # A hedged attempt that wins carries on with its own chat
+            entry.chat, response, reply = self._send(entry, user_input)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            metrics.counter('gemini.errors').inc()
+            self.drop_session(user_id)
+            raise
+        finally:
+            metrics.histogram('gemini.chat_seconds').observe(time.monotonic() - start)
+
+        self._record_usage(response, entry.size + len(user_input), reply)
+        self._record_exchange(user_id, entry, user_input, reply)
+        return reply
+
+    def reply_stream(self, user_id: int, context: ConversationContext, user_input: str) -> Iterator[str]:
+        """
+        Stream the model's reply to a user's message
+
+        Only the first chunk is bound by the caller's deadline; streams are
+        not hedged, since part of the reply may already have been sent.
+
+        Args:
+            user_id: ID of the user
+            context: Conversation context of the turn (summary and recent turns)
+            user_input: The user's message
+
+        Yields:
+            Reply text as it is generated
+        """
+        entry = self._session(user_id, context)
+        start = time.monotonic()
+        parts = []
+        try:
+            response, chunks = self._send_stream(entry, user_input)
+            for chunk in chunks:
+                if not parts:
+                    metrics.histogram('gemini.first_chunk_seconds').observe(time.monotonic() - start)
+                parts.append(chunk.text)
+                yield chunk.text
+        except CircuitOpenError:
+            raise
+        except BaseException:
+            # A broken or abandoned stream leaves the session's history incomplete
+            metrics.counter('gemini.errors').inc()
+            self.drop_session(user_id)
+            raise
+        finally:
+            metrics.histogram('gemini.chat_seconds').observe(time.monotonic() - start)
+
+        reply = ''.join(parts)
+        self._record_usage(response, entry.size + len(user_input), reply)
+        self._record_exchange(user_id, entry, user_input, reply)
+
+_client: Optional[GeminiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client(app: Flask) -> GeminiClient:
+    """
+    Get the process-wide Gemini client, creating it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        GeminiClient configured from the app config
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            config = app.config
+            _client = GeminiClient(
+                api_key=config.get('GOOGLE_API_KEY'),
+                model_name=config.get('GEMINI_MODEL', DEFAULT_MODEL),
+                api_endpoint=config.get('GEMINI_API_ENDPOINT'),
+                max_sessions=config.get('GEMINI_MAX_SESSIONS', 1000),
+                max_history_chars=config.get('GEMINI_SESSION_MAX_CHARS', 20_000_000),
+                idle_timeout=config.get('GEMINI_SESSION_IDLE_TIMEOUT', 900),
+                caller=ResilientCaller(
+                    'gemini',
+                    deadline=config.get('GEMINI_CALL_DEADLINE', 20.0),
+                    breaker=CircuitBreaker(
+                        'gemini',
+                        failure_threshold=config.get('GEMINI_BREAKER_FAILURES', 5),
+                        reset_timeout=config.get('GEMINI_BREAKER_RESET_SECONDS', 30.0)
+                    ),
+                    hedge=config.get('GEMINI_HEDGE', False),
+                    hedge_min_delay=config.get('GEMINI_HEDGE_MIN_DELAY', 1.0)
+                )
+            )
+        return _client
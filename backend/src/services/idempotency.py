@@ -0,0 +1,138 @@
+"""
+Webhook Idempotency Service
+
+Twilio retries a webhook when it does not get a response in time, so a
+slow reply can cause the same message to be delivered twice. This module
+remembers accepted MessageSids in a bounded in-memory LRU backed by the
+uniquely indexed processed_webhook table. The LRU answers most repeats
+without touching the database; the unique index catches the rest,
+including repeats handled by another process.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy.exc import IntegrityError
+
+from ..models.models import db, ProcessedWebhook
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyGuard:
+    """
+    Claims webhook deliveries by MessageSid so each is processed only once
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Initialize the guard
+
+        Args:
+            capacity: Maximum number of MessageSids kept in memory
+        """
+        self.capacity = capacity
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, message_sid: str):
+        with self._lock:
+            self._seen[message_sid] = True
+            self._seen.move_to_end(message_sid)
+            while len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+
+    def _seen_recently(self, message_sid: str) -> bool:
+        with self._lock:
+            if message_sid in self._seen:
+                self._seen.move_to_end(message_sid)
+                return True
+            return False
+
+    def claim(self, message_sid: str) -> bool:
+        """
+        Claim a delivery for processing
+
+        Args:
+            message_sid: Twilio MessageSid of the delivery
+
+        Returns:
+            True for the first delivery, False for a duplicate
+        """
+        if self._seen_recently(message_sid):
+            metrics.counter('bot.webhook_duplicates').inc()
+            return False
+
+        try:
+            db.session.add(ProcessedWebhook(message_sid=message_sid))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            self._remember(message_sid)
+            metrics.counter('bot.webhook_duplicates').inc()
+            return False
+
+        self._remember(message_sid)
+        return True
+
+    def release(self, message_sid: str):
+        """
+        Forget a claimed delivery so a retry of it is processed again
+
+        Used when processing fails before the reply could be sent.
+
+        Args:
+            message_sid: Twilio MessageSid of the delivery
+        """
+        with self._lock:
+            self._seen.pop(message_sid, None)
+        try:
+            ProcessedWebhook.query.filter_by(message_sid=message_sid).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to release webhook {message_sid}: {str(e)}")
+
+
+def prune_processed_webhooks(max_age: timedelta = timedelta(days=2)) -> int:
+    """
+    Delete processed webhook records older than Twilio's retry window
+
+    Args:
+        max_age: Age after which a record can no longer match a retry
+
+    Returns:
+        Number of records deleted
+    """
+    cutoff = datetime.utcnow() - max_age
+    deleted = ProcessedWebhook.query.filter(ProcessedWebhook.received_at < cutoff).delete()
+    db.session.commit()
+    return deleted
+
+
+_guard: Optional[IdempotencyGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_idempotency_guard(app: Flask) -> IdempotencyGuard:
+    """
+    Get the process-wide webhook idempotency guard, creating it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        IdempotencyGuard sized from WEBHOOK_IDEMPOTENCY_CACHE_SIZE
+    """
+    global _guard
+
+    with _guard_lock:
+        if _guard is None:
+            _guard = IdempotencyGuard(capacity=app.config.get('WEBHOOK_IDEMPOTENCY_CACHE_SIZE', 10000))
+        return _guard
@@ -0,0 +1,272 @@
+"""
+Inbound Message Worker Service
+
+This module implements the acknowledge-then-process mode of the WhatsApp
+webhook. The webhook stores the inbound message and returns immediately;
+a pool of background workers runs the bot pipeline and sends the reply
+through the Twilio REST API.
+
+Each worker claims its row with a conditional update before running the
+pipeline, so a message is processed once even when a replay races the live
+process. Messages still queued when a process dies (or that failed) are
+replayed shortly after the next pool starts, and stored messages are pruned
+once they are past their retention period.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional
+from flask import Flask
+
+from ..models.models import db, InboundMessage
+from ..utils.metrics import metrics
+from .sender_dispatcher import SenderDispatcher, get_sender_dispatcher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Handler signature: handler(sender, incoming_msg) -> result dict
+MessageHandler = Callable[[str, str], Dict[str, Any]]
+
+
+class InboundWorkerPool:
+    """
+    Pool of background workers that process stored inbound messages
+
+    Work runs on a SenderDispatcher keyed by phone number, so messages from
+    the same sender are processed in the order they were acknowledged while
+    different senders are processed in parallel.
+    """
+
+    def __init__(self, app: Flask, handler: MessageHandler,
+                 dispatcher: Optional[SenderDispatcher] = None, num_workers: int = 4):
+        """
+        Initialize the worker pool
+
+        Args:
+            app: Flask application instance
+            handler: Callable that runs the bot pipeline for one message
+            dispatcher: Shared dispatcher to run on (a private one is created if omitted)
+            num_workers: Number of worker threads for a private dispatcher
+        """
+        self.app = app
+        self.handler = handler
+        self.dispatcher = dispatcher or SenderDispatcher(num_workers, app=app, name='bot.inbound')
+
+    def start(self):
+        """Start the worker threads"""
+        self.dispatcher.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Signal the workers to stop and wait for them to exit"""
+        self.dispatcher.stop(timeout=timeout)
+
+    def submit(self, inbound_id: int, sender: str, body: str, acked_at: Optional[float] = None,
+               status: str = 'queued') -> Future:
+        """
+        Queue a stored inbound message for processing
+
+        Args:
+            inbound_id: ID of the InboundMessage row
+            sender: Sender phone number (without the whatsapp: prefix)
+            body: Message text
+            acked_at: Monotonic time at which the webhook acknowledged the message
+            status: Status the row must still have for this worker to claim it
+
+        Returns:
+            Future resolved once the message has been processed
+        """
+        task = {
+            'inbound_id': inbound_id,
+            'sender': sender,
+            'body': body,
+            'acked_at': acked_at if acked_at is not None else time.monotonic(),
+            'status': status
+        }
+        return self.dispatcher.submit(sender, self._process, task)
+
+    def _process(self, task: Dict[str, Any]):
+        """Claim one inbound message, run the bot pipeline for it and record the outcome"""
+        if not self._claim(task['inbound_id'], task['status']):
+            metrics.counter('bot.inbound_skipped').inc()
+            logger.info(f"Inbound message {task['inbound_id']} was claimed elsewhere, skipping")
+            return
+
+        try:
+            self.handler(task['sender'], task['body'])
+            status, error = 'processed', None
+            metrics.counter('bot.inbound_processed').inc()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error processing inbound message {task['inbound_id']}: {str(e)}")
+            status, error = 'failed', str(e)
+            metrics.counter('bot.inbound_failed').inc()
+        finally:
+            metrics.histogram('bot.ack_to_reply_seconds').observe(time.monotonic() - task['acked_at'])
+
+        self._record_outcome(task['inbound_id'], status, error)
+
+    def replay(self, min_age: float = 0.0, max_age: float = 3600.0) -> int:
+        """
+        Resubmit stored messages that were never processed or failed (inside an app context)
+
+        Each row is claimed with a conditional update, so a message is replayed
+        by one process only, and a live worker that reaches a replayed row later
+        skips it. Rows younger than `min_age` are left to the live process that
+        may still be working through them, and rows older than `max_age` are too
+        stale to answer. Rows left processing by a process that died are not
+        replayed, as their reply may already have been sent.
+
+        Args:
+            min_age: Seconds a message must have waited to be replayed
+            max_age: Seconds after which a message is no longer replayed
+
+        Returns:
+            Number of messages resubmitted
+        """
+        now = datetime.utcnow()
+        rows = (
+            db.session.query(InboundMessage.id, InboundMessage.status, InboundMessage.sender, InboundMessage.body)
+            .filter(InboundMessage.status.in_(('queued', 'failed')),
+                    InboundMessage.received_at <= now - timedelta(seconds=min_age),
+                    InboundMessage.received_at >= now - timedelta(seconds=max_age))
+            .order_by(InboundMessage.id)
+            .all()
+        )
+
+        replayed = 0
+        for inbound_id, status, sender, body in rows:
+            claimed = InboundMessage.query.filter_by(id=inbound_id, status=status).update(
+                {'status': 'replayed'}, synchronize_session=False
+            )
+            db.session.commit()
+            if claimed:
+                self.submit(inbound_id, sender, body, status='replayed')
+                replayed += 1
+
+        if replayed:
+            metrics.counter('bot.inbound_replayed').inc(replayed)
+            logger.info(f"Replayed {replayed} unprocessed inbound messages")
+        return replayed
+
+    def _claim(self, inbound_id: int, status: str) -> bool:
+        """Move the stored inbound message from `status` to processing, returning whether it was claimed"""
+        claimed = InboundMessage.query.filter_by(id=inbound_id, status=status).update(
+            {'status': 'processing'}, synchronize_session=False
+        )
+        db.session.commit()
+        return bool(claimed)
+
+    def _record_outcome(self, inbound_id: int, status: str, error: Optional[str]):
+        """Mark the stored inbound message as processed or failed"""
+        inbound = db.session.get(InboundMessage, inbound_id)
+        if not inbound:
+            logger.error(f"Inbound message not found: {inbound_id}")
+            return
+
+        inbound.status = status
+        inbound.error = error
+        inbound.processed_at = datetime.utcnow()
+        db.session.commit()
+
+
+# Process-wide worker pool
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def init_inbound_workers(app: Flask, handler: MessageHandler) -> InboundWorkerPool:
+    """
+    Initialize the inbound worker pool once per process
+
+    Args:
+        app: Flask application instance
+        handler: Callable that runs the bot pipeline for one message
+
+    Returns:
+        The running InboundWorkerPool
+    """
+    global _worker_pool
+
+    if _worker_pool is not None:
+        return _worker_pool
+
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            pool = InboundWorkerPool(app, handler, dispatcher=get_sender_dispatcher(app))
+            pool.start()
+            _worker_pool = pool
+
+            # Give live processes time to drain what they acknowledged before replaying
+            delay = app.config.get('INBOUND_REPLAY_DELAY_SECONDS', 60)
+            timer = threading.Timer(delay, _replay_unprocessed, args=(pool, delay))
+            timer.daemon = True
+            timer.start()
+
+    return _worker_pool
+
+
+def _replay_unprocessed(pool: InboundWorkerPool, min_age: float):
+    """Replay messages a previous process left unprocessed"""
+    with pool.app.app_context():
+        try:
+            pool.replay(min_age=min_age,
+                        max_age=pool.app.config.get('INBOUND_REPLAY_MAX_AGE_MINUTES', 60) * 60)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error replaying inbound messages: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def enqueue_inbound_message(sender: str, body: str, message_sid: Optional[str] = None) -> int:
+    """
+    Store an inbound message and hand it to the worker pool
+
+    Must be called after init_inbound_workers and inside an app context.
+
+    Args:
+        sender: Sender phone number (without the whatsapp: prefix)
+        body: Message text
+        message_sid: Twilio MessageSid, if provided
+
+    Returns:
+        ID of the stored InboundMessage row
+    """
+    if _worker_pool is None:
+        raise RuntimeError("Inbound workers have not been initialized")
+
+    inbound = InboundMessage(
+        message_sid=message_sid,
+        sender=sender,
+        body=body,
+        status='queued',
+        received_at=datetime.utcnow()
+    )
+    db.session.add(inbound)
+    db.session.commit()
+
+    _worker_pool.submit(inbound.id, sender, body, acked_at=time.monotonic())
+    logger.info(f"Queued inbound message {inbound.id} for background processing")
+
+    return inbound.id
+
+
+def prune_inbound_messages(retention_days: int) -> int:
+    """
+    Delete stored inbound messages older than the retention period
+
+    Args:
+        retention_days: Days to keep inbound messages
+
+    Returns:
+        Number of rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = InboundMessage.query.filter(InboundMessage.received_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Pruned {deleted} inbound messages older than {retention_days} days")
+    return deleted
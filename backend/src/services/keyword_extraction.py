@@ -0,0 +1,155 @@
+"""
+Keyword Extraction Service
+
+This module extracts the keywords counted for the dashboard from message
+text. The bot used to reload NLTK's stopword list into a new set and run
+the Punkt-backed word_tokenize for every message, only to keep alphabetic
+tokens longer than three characters. Here the stopword set is loaded once
+into a frozenset and tokens are found with one compiled regular expression
+that reproduces the word boundaries word_tokenize would have produced for
+those tokens, so the keywords are the same without the per-call setup.
+"""
+
+import logging
+import re
+import threading
+from typing import Callable, FrozenSet, Iterable, List, Optional
+
+from flask import Flask
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MIN_KEYWORD_LENGTH = 4
+
+NORMALIZERS = ('none', 'stem', 'lemma')
+
+# A run of letters, optionally followed by one of the contraction suffixes the
+# Treebank tokenizer splits off ("couldn't" -> "could", "it's" -> "it"). The
+# lookarounds reject letters that word_tokenize would have kept as part of a
+# larger non-alphabetic token: digits or underscores ("abc123", "tired:30"),
+# single hyphens ("well-being"), slashes ("x/y"), inner or leading periods
+# ("e.g.") and inner apostrophes ("o'clock"). Double hyphens, ellipses and a
+# period before whitespace or the end of the text are split off by
+# word_tokenize, so they end a word. Punctuation run directly into a word
+# around an abbreviation Punkt knows ("sept.") can still differ, which is
+# rare in chat messages and only affects that one word.
+WORD_PATTERN = re.compile(
+    r"(?<![\w/])(?<![^.]\.)(?<!^\.)(?<![^-]-)(?<!^-)(?<!\w')"
+    r"([^\W\d_]+?)(?:n't|'s|'m|'d|'ll|'re|'ve)?"
+    r"(?![\w/]|[:,']\d|-(?!-)|\.[^\s.]|'[^\W\d_])"
+)
+
+# Words the Treebank tokenizer splits into fragments too short to be keywords
+SPLIT_WORDS = frozenset({'cannot', 'gimme', 'gonna', 'gotta', 'lemme', 'wanna'})
+
+
+def load_stopwords(language: str = 'english') -> FrozenSet[str]:
+    """
+    Load NLTK's stopword list once as a frozenset
+
+    Args:
+        language: Stopword corpus to load
+
+    Returns:
+        Frozen set of stopwords
+    """
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+
+def _build_normalizer(normalizer: str) -> Optional[Callable[[str], str]]:
+    """Build the optional stemming or lemmatization step"""
+    if normalizer == 'none':
+        return None
+    if normalizer == 'stem':
+        from nltk.stem import PorterStemmer
+        return PorterStemmer().stem
+    if normalizer == 'lemma':
+        from nltk.stem import WordNetLemmatizer
+        return WordNetLemmatizer().lemmatize
+    raise ValueError(f"Unknown keyword normalizer '{normalizer}', expected one of {NORMALIZERS}")
+
+
+class KeywordExtractor:
+    """
+    Extract distinct keywords from message text
+
+    A keyword is an alphabetic word longer than three characters that is
+    not a stopword. Keywords are returned in order of first occurrence.
+    Instances are immutable and safe to share between threads.
+    """
+
+    def __init__(self, stop_words: Iterable[str], normalizer: str = 'none'):
+        """
+        Initialize the extractor
+
+        Args:
+            stop_words: Words never returned as keywords
+            normalizer: 'none', 'stem' (Porter) or 'lemma' (WordNet), applied
+                to keywords after the stopword filter
+        """
+        self.stop_words = frozenset(stop_words)
+        self.normalizer = normalizer
+        self._normalize = _build_normalizer(normalizer)
+
+    def extract(self, text: str) -> List[str]:
+        """
+        Extract the keywords of one message
+
+        Args:
+            text: Message text
+
+        Returns:
+            Distinct keywords in order of first occurrence
+        """
+        stop_words = self.stop_words
+        normalize = self._normalize
+        keywords = {}
+        for word in WORD_PATTERN.findall(text.lower()):
+            if len(word) < MIN_KEYWORD_LENGTH or word in stop_words or word in SPLIT_WORDS:
+                continue
+            if not word.isalpha():
+                continue
+            if normalize is not None:
+                word = normalize(word)
+            keywords[word] = None
+        return list(keywords)
+
+    def extract_batch(self, texts: Iterable[str]) -> List[List[str]]:
+        """
+        Extract the keywords of several messages
+
+        Args:
+            texts: Message texts
+
+        Returns:
+            One keyword list per message, in the same order
+        """
+        return [self.extract(text) for text in texts]
+
+
+_extractor: Optional[KeywordExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_keyword_extractor(app: Flask) -> KeywordExtractor:
+    """
+    Get the process-wide keyword extractor, creating it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        KeywordExtractor using the KEYWORD_NORMALIZER setting
+    """
+    global _extractor
+
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = KeywordExtractor(
+                load_stopwords(),
+                normalizer=app.config.get('KEYWORD_NORMALIZER', 'none')
+            )
+            logger.info(f"Keyword extractor ready with {len(_extractor.stop_words)} stopwords")
+        return _extractor
@@ -0,0 +1,160 @@
+"""
+Keyword Rollup Service
+
+This module maintains the daily keyword rollup used by the dashboard.
+Instead of inserting one KeywordStat row per keyword per message, counts
+are added to a single row per (day, department, location, keyword) with
+an upsert, so storage and the top-keywords query scale with the number of
+distinct keywords per day rather than with message volume.
+"""
+
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, desc
+
+from ..models.models import db, KeywordDailyStat, KeywordStat
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'Unknown'
+
+RollupKey = Tuple[date, str, str, str]  # (day, department, location, keyword)
+
+
+def count_keywords(keywords: Iterable[str], department: Optional[str], location: Optional[str],
+                   day: Optional[date] = None) -> Dict[RollupKey, int]:
+    """
+    Build rollup increments for the keywords of one message
+
+    Args:
+        keywords: Keywords extracted from the message
+        department: Sender's department
+        location: Sender's location
+        day: Day to count the keywords on (defaults to today, UTC)
+
+    Returns:
+        Mapping of rollup key to increment
+    """
+    day = day or datetime.utcnow().date()
+    department = department or UNKNOWN
+    location = location or UNKNOWN
+    return dict(Counter((day, department, location, keyword[:50]) for keyword in keywords))
+
+
+def _upsert_statement(dialect_name: str):
+    """Build an insert that adds to the count of an existing row, or None if unsupported"""
+    table = KeywordDailyStat.__table__
+
+    if dialect_name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(count=table.c['count'] + stmt.inserted['count'])
+
+    if dialect_name in ('postgresql', 'sqlite'):
+        if dialect_name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=['day', 'department', 'location', 'keyword'],
+            set_={'count': table.c['count'] + stmt.excluded['count']}
+        )
+
+    return None
+
+
+def increment_keyword_counts(increments: Dict[RollupKey, int]):
+    """
+    Add keyword counts to the daily rollup
+
+    All increments go out as one batched upsert. The rows are written in the
+    caller's transaction and are not committed here.
+
+    Args:
+        increments: Mapping of (day, department, location, keyword) to count
+    """
+    if not increments:
+        return
+
+    rows = [
+        {'day': day, 'department': department, 'location': location, 'keyword': keyword, 'count': count}
+        for (day, department, location, keyword), count in sorted(increments.items())
+    ]
+
+    stmt = _upsert_statement(db.session.get_bind().dialect.name)
+    if stmt is not None:
+        db.session.execute(stmt, rows)
+        return
+
+    # Portable fallback: update, then insert the keys that did not exist yet
+    table = KeywordDailyStat.__table__
+    for row in rows:
+        result = db.session.execute(
+            table.update()
+            .where(table.c.day == row['day'], table.c.department == row['department'],
+                   table.c.location == row['location'], table.c.keyword == row['keyword'])
+            .values(count=table.c['count'] + row['count'])
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(**row))
+
+
+def get_top_keywords(department: Optional[str] = None, location: Optional[str] = None,
+                     start_date: Optional[date] = None, end_date: Optional[date] = None,
+                     limit: int = 20) -> List[Tuple[str, int]]:
+    """
+    Get the most frequent keywords from the daily rollup
+
+    Args:
+        department: Only count this department
+        location: Only count this location
+        start_date: First day to include
+        end_date: Last day to include
+        limit: Number of keywords to return
+
+    Returns:
+        List of (keyword, total_count), most frequent first
+    """
+    query = db.session.query(
+        KeywordDailyStat.keyword,
+        func.sum(KeywordDailyStat.count).label('total_count')
+    )
+
+    if department:
+        query = query.filter(KeywordDailyStat.department == department)
+    if location:
+        query = query.filter(KeywordDailyStat.location == location)
+    if start_date:
+        query = query.filter(KeywordDailyStat.day >= start_date)
+    if end_date:
+        query = query.filter(KeywordDailyStat.day <= end_date)
+
+    return query.group_by(KeywordDailyStat.keyword)\
+        .order_by(desc('total_count'))\
+        .limit(limit)\
+        .all()
+
+
+def prune_keyword_stats(retention_days: int) -> int:
+    """
+    Delete legacy per-user KeywordStat rows older than the retention period
+
+    The rollup already holds their counts; the per-user rows are only kept
+    while they may still be needed for GDPR access and deletion requests.
+
+    Args:
+        retention_days: Days to keep per-user rows
+
+    Returns:
+        Number of rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = KeywordStat.query.filter(KeywordStat.timestamp < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Pruned {deleted} per-user keyword rows older than {retention_days} days")
+    return deleted
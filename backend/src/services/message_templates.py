@@ -0,0 +1,247 @@
+"""
+Message Template Service
+
+This module holds the WhatsApp message templates used by /template and by
+broadcasts. Templates are loaded once from JSON files, each mapping a
+template name to its body, declared parameters and optional defaults:
+
+    {
+        "appointment_reminder": {
+            "body": "Hi {name}, a reminder of your session at {time}.",
+            "parameters": ["name", "time"],
+            "defaults": {"name": "there"}
+        }
+    }
+
+At load time every body is parsed once and checked against its declared
+parameters (no undeclared, unused, positional or attribute/index fields),
+so a broken template fails at startup rather than on a send. Rendering is
+a single str.format_map call; templates without parameters are rendered
+once and the text reused, and render_many renders a whole broadcast in one
+pass.
+"""
+
+import glob
+import json
+import logging
+import os
+import string
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from flask import Flask
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'message_templates')
+
+
+class TemplateError(ValueError):
+    """A template file or definition is invalid"""
+
+
+class TemplateNotFoundError(KeyError):
+    """No template is registered under the requested name"""
+
+
+class TemplateParameterError(ValueError):
+    """A render is missing a parameter the template needs"""
+
+
+class CompiledTemplate:
+    """
+    A validated template bound to its formatter
+    """
+
+    __slots__ = ('name', 'body', 'parameters', 'defaults', 'static_text', '_format')
+
+    def __init__(self, name: str, body: str, parameters: Iterable[str] = (),
+                 defaults: Optional[Mapping[str, object]] = None):
+        """
+        Parse and validate a template
+
+        Args:
+            name: Template name
+            body: Body in str.format syntax, with named fields only
+            parameters: Declared parameter names
+            defaults: Values used for parameters a render does not supply
+
+        Raises:
+            TemplateError: If the body does not match the declared parameters
+        """
+        self.name = name
+        self.body = body
+        self.parameters = tuple(parameters)
+        self.defaults = dict(defaults or {})
+
+        try:
+            fields = [field for _, field, _, _ in string.Formatter().parse(body) if field is not None]
+        except ValueError as e:
+            raise TemplateError(f"Template '{name}' has invalid syntax: {e}")
+        for field in fields:
+            if not field.isidentifier():
+                raise TemplateError(f"Template '{name}' field '{{{field}}}' must be a plain parameter name")
+        undeclared = set(fields) - set(self.parameters)
+        if undeclared:
+            raise TemplateError(f"Template '{name}' uses undeclared parameters: {', '.join(sorted(undeclared))}")
+        unused = set(self.parameters) - set(fields)
+        if unused:
+            raise TemplateError(f"Template '{name}' declares unused parameters: {', '.join(sorted(unused))}")
+        unknown_defaults = set(self.defaults) - set(self.parameters)
+        if unknown_defaults:
+            raise TemplateError(f"Template '{name}' has defaults for unknown parameters: "
+                                f"{', '.join(sorted(unknown_defaults))}")
+
+        self._format = body.format_map
+        # Parameter-free templates are rendered once, here
+        self.static_text = self._format({}) if not self.parameters else None
+
+    def render(self, parameters: Optional[Mapping[str, object]] = None) -> str:
+        """
+        Render the template
+
+        Args:
+            parameters: Parameter values; extra keys are ignored
+
+        Returns:
+            Rendered text
+
+        Raises:
+            TemplateParameterError: If a parameter without a default is missing
+        """
+        if self.static_text is not None:
+            return self.static_text
+        parameters = parameters or {}
+        values = {**self.defaults, **parameters} if self.defaults else parameters
+        try:
+            return self._format(values)
+        except KeyError as e:
+            raise TemplateParameterError(f"Template '{self.name}' is missing parameter {e}")
+
+    def render_many(self, parameter_sets: Iterable[Mapping[str, object]]) -> List[str]:
+        """
+        Render the template once per parameter set
+
+        Args:
+            parameter_sets: One mapping of parameter values per message
+
+        Returns:
+            Rendered texts, in order
+
+        Raises:
+            TemplateParameterError: If any set misses a parameter without a default
+        """
+        if self.static_text is not None:
+            return [self.static_text] * len(list(parameter_sets))
+        format_map, defaults = self._format, self.defaults
+        try:
+            if defaults:
+                return [format_map({**defaults, **parameters}) for parameters in parameter_sets]
+            return [format_map(parameters) for parameters in parameter_sets]
+        except KeyError as e:
+            raise TemplateParameterError(f"Template '{self.name}' is missing parameter {e}")
+
+
+class TemplateRegistry:
+    """
+    Named, precompiled message templates
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, CompiledTemplate] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def names(self) -> List[str]:
+        return sorted(self._templates)
+
+    def add(self, name: str, body: str, parameters: Iterable[str] = (),
+            defaults: Optional[Mapping[str, object]] = None) -> CompiledTemplate:
+        """Compile and register a template, replacing any of the same name"""
+        template = CompiledTemplate(name, body, parameters, defaults)
+        self._templates[name] = template
+        return template
+
+    def load_file(self, path: str) -> int:
+        """
+        Load the templates defined in a JSON file
+
+        Args:
+            path: Path of the JSON file
+
+        Returns:
+            Number of templates loaded
+
+        Raises:
+            TemplateError: If the file or any template in it is invalid
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                definitions = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise TemplateError(f"Cannot load templates from {path}: {e}")
+        if not isinstance(definitions, dict):
+            raise TemplateError(f"{path} must map template names to definitions")
+
+        for name, definition in definitions.items():
+            if not isinstance(definition, dict) or not isinstance(definition.get('body'), str):
+                raise TemplateError(f"Template '{name}' in {path} needs a string body")
+            self.add(name, definition['body'], definition.get('parameters', ()), definition.get('defaults'))
+        return len(definitions)
+
+    def load_directory(self, directory: str) -> int:
+        """Load every *.json file in a directory, in name order"""
+        return sum(self.load_file(path) for path in sorted(glob.glob(os.path.join(directory, '*.json'))))
+
+    def get(self, name: str) -> CompiledTemplate:
+        """
+        Get a compiled template
+
+        Raises:
+            TemplateNotFoundError: If no template has that name
+        """
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise TemplateNotFoundError(name)
+
+    def render(self, name: str, parameters: Optional[Mapping[str, object]] = None) -> str:
+        """Render a template by name (see CompiledTemplate.render)"""
+        return self.get(name).render(parameters)
+
+    def render_many(self, name: str, parameter_sets: Iterable[Mapping[str, object]]) -> List[str]:
+        """Render a template by name once per parameter set (see CompiledTemplate.render_many)"""
+        return self.get(name).render_many(parameter_sets)
+
+
+# Process-wide template registry
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry(app: Flask) -> TemplateRegistry:
+    """
+    Get the process-wide template registry, loading it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The loaded TemplateRegistry
+    """
+    global _registry
+
+    if _registry is not None:
+        return _registry
+
+    with _registry_lock:
+        if _registry is None:
+            registry = TemplateRegistry()
+            directory = app.config.get('WHATSAPP_TEMPLATES_DIR') or DEFAULT_TEMPLATES_DIR
+            count = registry.load_directory(directory)
+            logger.info(f"Loaded {count} WhatsApp templates from {directory}")
+            _registry = registry
+
+    return _registry
@@ -0,0 +1,314 @@
+"""
+Outbound WhatsApp Sender Service
+
+This module delivers outbound WhatsApp messages through the Twilio REST API.
+It keeps a pool of Twilio clients with persistent HTTP sessions, shapes
+traffic with a token bucket per sender number, retries 429/5xx responses
+with jittered exponential backoff, and preserves chunk order per recipient
+by running each recipient's sends on the same dispatcher shard. Each sent
+chunk's SID can be handed to a callback (the delivery status recorder), and
+Twilio can be asked to post status callbacks for it.
+"""
+
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Union
+import requests
+from flask import Flask
+from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from twilio.base.exceptions import TwilioRestException
+
+from ..utils.metrics import metrics
+from .sender_dispatcher import SenderDispatcher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limited or server-side failures
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Scheme and host of the Twilio REST API, in the URLs the SDK builds
+TWILIO_API_HOST = re.compile(r'^https://[\w.-]*twilio\.com')
+
+
+class RedirectingTwilioHttpClient(TwilioHttpClient):
+    """
+    Twilio HTTP client that sends API requests to another base URL
+
+    Used to point the app at a local Twilio stand-in for load tests.
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, TWILIO_API_HOST.sub(self.base_url, url, count=1), *args, **kwargs)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    each send consumes one token.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0.0 if a token was taken, otherwise the seconds until one is available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class TwilioClientPool:
+    """
+    Pool of Twilio clients, each holding a persistent HTTP session
+
+    A requests session is not safe to share between threads, so each send
+    borrows a client for its duration and returns it afterwards.
+    """
+
+    def __init__(self, factory: Callable[[], Client], size: int):
+        self._clients = queue.Queue()
+        for _ in range(max(1, size)):
+            self._clients.put(factory())
+
+    @contextmanager
+    def client(self):
+        client = self._clients.get()
+        try:
+            yield client
+        finally:
+            self._clients.put(client)
+
+
+class OutboundSender:
+    """
+    Concurrent, rate-limited WhatsApp sender
+
+    Sends for one recipient run in submission order; different recipients
+    are sent concurrently across the worker shards.
+    """
+
+    def __init__(self, client_factory: Callable[[], Client], from_number: str,
+                 num_workers: int = 8, rate_per_second: float = 80.0, burst: Optional[float] = None,
+                 max_attempts: int = 4, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 status_callback: Optional[str] = None,
+                 on_sent: Optional[Callable[[str, str, str, Optional[int]], None]] = None):
+        """
+        Initialize the outbound sender
+
+        Args:
+            client_factory: Callable returning a new Twilio client
+            from_number: Default WhatsApp sender number (without the whatsapp: prefix)
+            num_workers: Number of concurrent send workers (and pooled clients)
+            rate_per_second: Sustained messages per second per sender number
+            burst: Token bucket capacity per sender number
+            max_attempts: Attempts per chunk before giving up
+            backoff_base: Base delay in seconds for retry backoff
+            backoff_cap: Maximum delay in seconds for retry backoff
+            status_callback: URL Twilio posts delivery status callbacks to
+            on_sent: Called with (sid, to, category, broadcast_job_id) for each sent chunk
+        """
+        self.from_number = from_number
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.status_callback = status_callback
+        self.on_sent = on_sent
+        self.clients = TwilioClientPool(client_factory, num_workers)
+        self.dispatcher = SenderDispatcher(num_workers=num_workers, name='twilio.outbound')
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def start(self):
+        self.dispatcher.start()
+
+    def stop(self, timeout: float = 5.0):
+        self.dispatcher.stop(timeout=timeout)
+
+    def queue_depth(self) -> int:
+        return self.dispatcher.queue_depth()
+
+    def bucket_for(self, from_number: str) -> TokenBucket:
+        """Get the token bucket shaping traffic for a sender number"""
+        bucket = self._buckets.get(from_number)
+        if bucket is None:
+            with self._buckets_lock:
+                bucket = self._buckets.setdefault(
+                    from_number, TokenBucket(self.rate_per_second, self.burst)
+                )
+        return bucket
+
+    def send(self, to: str, chunks: Union[str, List[str]], from_number: Optional[str] = None,
+             category: str = 'reply', broadcast_job_id: Optional[int] = None) -> Future:
+        """
+        Queue a message for delivery
+
+        Args:
+            to: Recipient number, with or without the whatsapp: prefix
+            chunks: Message body, or a list of chunks to send in order
+            from_number: Sender number override
+            category: What the message is, recorded with its delivery status
+            broadcast_job_id: Broadcast job the message belongs to, if any
+
+        Returns:
+            Future resolved with the list of Twilio message SIDs
+        """
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        to = to if to.startswith('whatsapp:') else f'whatsapp:{to}'
+        from_number = from_number or self.from_number
+
+        return self.dispatcher.submit(to, self._send_chunks, to, list(chunks), from_number,
+                                      category, broadcast_job_id)
+
+    def _send_chunks(self, to: str, chunks: List[str], from_number: str,
+                     category: str = 'reply', broadcast_job_id: Optional[int] = None) -> List[str]:
+        """Send chunks one after another; a failed chunk aborts the rest"""
+        sids = []
+        for chunk in chunks:
+            sid = self._send_one(to, chunk, from_number)
+            sids.append(sid)
+            if self.on_sent is not None:
+                try:
+                    self.on_sent(sid, to, category, broadcast_job_id)
+                except Exception as e:
+                    logger.error(f"Error recording sent message {sid}: {str(e)}")
+        return sids
+
+    def _send_one(self, to: str, body: str, from_number: str) -> str:
+        """Send a single chunk, retrying throttled and server errors"""
+        bucket = self.bucket_for(from_number)
+
+        for attempt in range(1, self.max_attempts + 1):
+            bucket.acquire()
+            start = time.monotonic()
+            try:
+                params = {'from_': f'whatsapp:{from_number}', 'body': body, 'to': to}
+                if self.status_callback:
+                    params['status_callback'] = self.status_callback
+                with self.clients.client() as client:
+                    message = client.messages.create(**params)
+                metrics.histogram('twilio.outbound.send_seconds').observe(time.monotonic() - start)
+                metrics.counter('twilio.outbound.sent').inc()
+                return message.sid
+            except Exception as e:
+                metrics.histogram('twilio.outbound.send_seconds').observe(time.monotonic() - start)
+                if attempt >= self.max_attempts or not self._is_retryable(e):
+                    metrics.counter('twilio.outbound.failed').inc()
+                    logger.error(f"Failed to send WhatsApp message after {attempt} attempt(s): {str(e)}")
+                    raise
+
+                delay = self._backoff_delay(attempt)
+                metrics.counter('twilio.outbound.retries').inc()
+                logger.warning(f"Retrying WhatsApp send in {delay:.2f}s (attempt {attempt}): {str(e)}")
+                time.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1))))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, TwilioRestException):
+            return error.status in RETRYABLE_STATUSES
+        # Only failures to connect: after a read timeout Twilio may already have
+        # accepted the message, and a retry would deliver it twice
+        return isinstance(error, (requests.exceptions.ConnectTimeout, requests.exceptions.ConnectionError))
+
+
+# Process-wide outbound sender
+_outbound_sender = None
+_outbound_sender_lock = threading.Lock()
+
+
+def get_outbound_sender(app: Flask) -> OutboundSender:
+    """
+    Get the process-wide outbound sender, starting it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The running OutboundSender
+    """
+    global _outbound_sender
+
+    if _outbound_sender is not None:
+        return _outbound_sender
+
+    with _outbound_sender_lock:
+        if _outbound_sender is None:
+            account_sid = app.config.get('TWILIO_ACCOUNT_SID')
+            auth_token = app.config.get('TWILIO_AUTH_TOKEN')
+            base_url = app.config.get('TWILIO_API_BASE_URL')
+
+            def client_factory():
+                if base_url:
+                    http_client = RedirectingTwilioHttpClient(base_url, pool_connections=True)
+                else:
+                    http_client = TwilioHttpClient(pool_connections=True)
+                return Client(account_sid, auth_token, http_client=http_client)
+
+            # Imported here: the recorder needs the models, which this module does not
+            from .delivery_status import get_delivery_recorder
+
+            sender = OutboundSender(
+                client_factory,
+                from_number=app.config.get('TWILIO_WHATSAPP_NUMBER'),
+                num_workers=app.config.get('TWILIO_SEND_WORKERS', 8),
+                rate_per_second=app.config.get('TWILIO_SEND_RATE', 80.0),
+                burst=app.config.get('TWILIO_SEND_BURST'),
+                max_attempts=app.config.get('TWILIO_SEND_MAX_ATTEMPTS', 4),
+                status_callback=app.config.get('TWILIO_STATUS_CALLBACK_URL'),
+                on_sent=get_delivery_recorder(app).record_sent
+            )
+            sender.start()
+            _outbound_sender = sender
+
+    return _outbound_sender
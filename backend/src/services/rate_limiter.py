@@ -0,0 +1,341 @@
+"""
+Rate Limiter Service
+
+This module limits how many messages a user can send per day and per
+minute. The bot used to keep a message_count that reset 24 hours after the
+*last* message, so a steady sender never got a fresh allowance, and every
+check went through the User row.
+
+Limits are enforced with the generic cell rate algorithm (GCRA): each
+(limit, key) pair stores a single "theoretical arrival time" instead of a
+log of past messages. A limit of N per period allows a burst of N, and the
+allowance then refills continuously at one hit every period / N, so it
+never depends on when the sender last went quiet.
+
+State lives in a pluggable backend: 'memory' keeps it in the process, and
+'sqlite' keeps it in a WAL-mode SQLite file so every gunicorn worker on the
+host shares the same allowance.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import Flask
+
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RateLimit:
+    """
+    A named limit of `limit` hits per `period` seconds
+    """
+
+    __slots__ = ('name', 'limit', 'period')
+
+    def __init__(self, name: str, limit: int, period: float):
+        if limit < 1 or period <= 0:
+            raise ValueError(f"Rate limit '{name}' needs a positive limit and period")
+        self.name = name
+        self.limit = limit
+        self.period = float(period)
+
+    @property
+    def interval(self) -> float:
+        """Seconds one hit adds to the theoretical arrival time"""
+        return self.period / self.limit
+
+    def __repr__(self):
+        return f"RateLimit({self.name!r}, {self.limit}, {self.period})"
+
+
+class RateLimitResult:
+    """
+    Outcome of a rate limit check
+
+    Attributes:
+        allowed: Whether the hit was allowed (and counted)
+        limit: The limit that rejected the hit, or None if allowed
+        retry_after: Seconds until the rejected hit would be allowed
+    """
+
+    __slots__ = ('allowed', 'limit', 'retry_after')
+
+    def __init__(self, allowed: bool, limit: Optional[RateLimit] = None, retry_after: float = 0.0):
+        self.allowed = allowed
+        self.limit = limit
+        self.retry_after = retry_after
+
+    def __bool__(self):
+        return self.allowed
+
+
+def gcra(tat: Optional[float], now: float, limit: RateLimit, cost: int = 1) -> Tuple[bool, float, float]:
+    """
+    Apply one GCRA step
+
+    Args:
+        tat: Stored theoretical arrival time, or None for a new key
+        now: Current time in seconds since the epoch
+        limit: Limit to check
+        cost: Number of hits to count
+
+    Returns:
+        (allowed, new theoretical arrival time, seconds to wait if rejected)
+    """
+    tat = max(tat or now, now)
+    new_tat = tat + limit.interval * cost
+    allow_at = new_tat - limit.period
+    if allow_at > now:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+def _check(tats: Dict[str, Optional[float]], key: str, limits: Sequence[RateLimit], cost: int,
+           now: float) -> Tuple[RateLimitResult, Dict[str, float]]:
+    """Check every limit; the hit is only counted if all of them allow it"""
+    updates = {}
+    for limit in limits:
+        state_key = f"{limit.name}:{key}"
+        allowed, new_tat, retry_after = gcra(tats.get(state_key), now, limit, cost)
+        if not allowed:
+            return RateLimitResult(False, limit, retry_after), {}
+        updates[state_key] = new_tat
+    return RateLimitResult(True), updates
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for theoretical arrival times
+
+    Backends make hit() atomic: the stored times of all limits are read,
+    checked and updated as one step.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limits: Sequence[RateLimit], cost: int = 1,
+            now: Optional[float] = None) -> RateLimitResult:
+        """
+        Count a hit against every limit for a key
+
+        Args:
+            key: What is being limited, e.g. a user ID
+            limits: Limits that all have to allow the hit
+            cost: Number of hits to count
+            now: Current time in seconds since the epoch (defaults to time.time())
+
+        Returns:
+            RateLimitResult
+        """
+
+    @abstractmethod
+    def reset(self, key: str, limits: Sequence[RateLimit]):
+        """Forget the state of a key for the given limits"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process backend; each gunicorn worker enforces its own allowance
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limits, cost=1, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            result, updates = _check(self._tats, key, limits, cost, now)
+            self._tats.update(updates)
+            if len(self._tats) > self.max_entries:
+                self._prune(now)
+        return result
+
+    def reset(self, key, limits):
+        with self._lock:
+            for limit in limits:
+                self._tats.pop(f"{limit.name}:{key}", None)
+
+    def _prune(self, now: float):
+        # An arrival time in the past means the full allowance is back
+        for state_key in [k for k, tat in self._tats.items() if tat <= now]:
+            del self._tats[state_key]
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Backend shared by every process on the host through a SQLite file
+
+    The database runs in WAL mode and each hit is one IMMEDIATE transaction,
+    so concurrent workers serialize on the write lock instead of racing.
+    Connections are kept per thread.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """
+        Initialize the backend
+
+        Args:
+            path: SQLite database file, created if missing
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._hits = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_state (key TEXT PRIMARY KEY, tat REAL NOT NULL)'
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode; transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key, limits, cost=1, now=None):
+        now = time.time() if now is None else now
+        state_keys = [f"{limit.name}:{key}" for limit in limits]
+        connection = self._connection()
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ','.join('?' * len(state_keys))
+            tats = dict(connection.execute(
+                f'SELECT key, tat FROM rate_limit_state WHERE key IN ({placeholders})', state_keys
+            ).fetchall())
+            result, updates = _check(tats, key, limits, cost, now)
+            if updates:
+                connection.executemany(
+                    'INSERT INTO rate_limit_state (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = excluded.tat',
+                    list(updates.items())
+                )
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM rate_limit_state WHERE tat <= ?', (now,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+    def reset(self, key, limits):
+        state_keys = [f"{limit.name}:{key}" for limit in limits]
+        self._connection().executemany('DELETE FROM rate_limit_state WHERE key = ?', [(k,) for k in state_keys])
+
+
+BACKENDS = {
+    'memory': MemoryRateLimitBackend,
+    'sqlite': SQLiteRateLimitBackend
+}
+
+
+class RateLimiter:
+    """
+    A set of limits enforced together on a backend
+    """
+
+    def __init__(self, limits: Sequence[RateLimit], backend: Optional[RateLimitBackend] = None,
+                 name: str = 'rate_limiter'):
+        """
+        Initialize the limiter
+
+        Args:
+            limits: Limits that all have to allow a hit
+            backend: State storage (defaults to a MemoryRateLimitBackend)
+            name: Metrics prefix
+        """
+        self.limits: List[RateLimit] = list(limits)
+        self.backend = backend or MemoryRateLimitBackend()
+        self.name = name
+
+    def hit(self, key, cost: int = 1, now: Optional[float] = None) -> RateLimitResult:
+        """
+        Count a hit for a key if every limit allows it
+
+        Args:
+            key: What is being limited, e.g. a user ID
+            cost: Number of hits to count
+            now: Current time in seconds since the epoch
+
+        Returns:
+            RateLimitResult; rejected hits are not counted
+        """
+        result = self.backend.hit(str(key), self.limits, cost, now)
+        if not result.allowed:
+            metrics.counter(f'{self.name}.rejected.{result.limit.name}').inc()
+        return result
+
+    def reset(self, key):
+        """Give a key its full allowance back"""
+        self.backend.reset(str(key), self.limits)
+
+
+def create_backend(kind: str, **options) -> RateLimitBackend:
+    """
+    Create a rate limit backend by name
+
+    Args:
+        kind: One of BACKENDS
+        **options: Backend constructor arguments
+
+    Returns:
+        RateLimitBackend
+    """
+    try:
+        backend_class = BACKENDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown rate limit backend '{kind}', expected one of {sorted(BACKENDS)}")
+    return backend_class(**options)
+
+
+_message_limiter: Optional[RateLimiter] = None
+_message_limiter_lock = threading.Lock()
+
+
+def get_message_rate_limiter(app: Flask) -> RateLimiter:
+    """
+    Get the process-wide limiter for inbound WhatsApp messages, creating it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        RateLimiter with the per-day and per-minute message limits
+    """
+    global _message_limiter
+
+    with _message_limiter_lock:
+        if _message_limiter is None:
+            kind = app.config.get('BOT_RATE_LIMIT_BACKEND', 'memory')
+            options = {}
+            if kind == 'sqlite':
+                options['path'] = app.config.get('BOT_RATE_LIMIT_PATH') or os.path.join(
+                    app.instance_path, 'rate_limits.db'
+                )
+            limits = [
+                RateLimit('day', app.config.get('MAX_DAILY_MESSAGES', 50), 86400),
+                RateLimit('minute', app.config.get('BOT_MESSAGES_PER_MINUTE', 10), 60)
+            ]
+            _message_limiter = RateLimiter(limits, create_backend(kind, **options), name='bot.rate_limit')
+            logger.info(f"Message rate limiter ready ({kind} backend, limits {limits})")
+        return _message_limiter
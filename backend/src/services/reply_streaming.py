@@ -0,0 +1,163 @@
+"""
+Reply Streaming Service
+
+This module turns a streamed model reply into WhatsApp-sized messages.
+Instead of waiting for the full generation and then cutting it into
+1600-character pieces, text is buffered as it arrives and a chunk is
+flushed as soon as a sentence boundary near the size limit is reached,
+so the first message can be delivered while the rest is still generating.
+"""
+
+import logging
+import re
+import time
+from typing import Callable, Iterable, List, Optional
+
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# WhatsApp message size limit used by split_message
+WHATSAPP_MESSAGE_LIMIT = 1600
+
+# End of a sentence (optionally followed by closing quotes/brackets), or a line break
+SENTENCE_BOUNDARY = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+
+# Last whitespace run, used when no sentence boundary fits within the limit
+WHITESPACE = re.compile(r'\s+')
+
+
+class StreamingChunker:
+    """
+    Incrementally splits streamed text into sentence-aligned chunks
+
+    A chunk is emitted once the buffer holds a sentence boundary between
+    `near_ratio * limit` and `limit` characters. If the buffer exceeds the
+    limit without such a boundary, the chunk is cut at the last earlier
+    sentence boundary, then the last whitespace, then hard at the limit.
+    """
+
+    def __init__(self, limit: int = WHATSAPP_MESSAGE_LIMIT, near_ratio: float = 0.75):
+        """
+        Initialize the chunker
+
+        Args:
+            limit: Maximum characters per chunk
+            near_ratio: Fraction of the limit from which a boundary triggers a flush
+        """
+        self.limit = limit
+        self.near = int(limit * near_ratio)
+        self._buffer = ''
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text
+
+        Args:
+            text: Newly generated text
+
+        Returns:
+            Chunks that are ready to send (possibly empty)
+        """
+        self._buffer += text
+        chunks = []
+
+        while len(self._buffer) >= self.near:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+
+        return chunks
+
+    def finish(self) -> List[str]:
+        """
+        Flush whatever is left once the stream has ended
+
+        Returns:
+            Remaining chunks, each within the limit
+        """
+        chunks = []
+        while len(self._buffer) > self.limit:
+            cut = self._find_cut(force=True)
+            chunk = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+
+        remainder = self._buffer.strip()
+        self._buffer = ''
+        if remainder:
+            chunks.append(remainder)
+        return chunks
+
+    def _find_cut(self, force: bool = False) -> Optional[int]:
+        """Find where to end the next chunk, or None to wait for more text"""
+        window = self._buffer[:self.limit + 1]
+
+        last_boundary = None
+        for match in SENTENCE_BOUNDARY.finditer(window):
+            if match.end() > self.limit + 1:
+                break
+            last_boundary = match.end()
+
+        if last_boundary is not None and last_boundary >= self.near:
+            return last_boundary
+
+        if len(self._buffer) <= self.limit and not force:
+            # Not near enough to a boundary yet; wait for more text
+            return None
+
+        # Over the limit without a boundary near it: fall back gracefully
+        if last_boundary:
+            return last_boundary
+
+        last_space = None
+        for match in WHITESPACE.finditer(self._buffer[:self.limit]):
+            last_space = match.end()
+        if last_space:
+            return last_space
+
+        return self.limit
+
+
+def stream_reply(pieces: Iterable[str], on_chunk: Callable[[str], None],
+                 limit: int = WHATSAPP_MESSAGE_LIMIT) -> str:
+    """
+    Drive a streamed reply through the chunker, delivering chunks as they are ready
+
+    Args:
+        pieces: Iterable of text fragments from the model
+        on_chunk: Called with each chunk as soon as it is ready to send
+        limit: Maximum characters per chunk
+
+    Returns:
+        The full reply text
+    """
+    chunker = StreamingChunker(limit=limit)
+    parts = []
+    start = time.monotonic()
+    first_chunk_sent = False
+
+    def deliver(chunks):
+        nonlocal first_chunk_sent
+        for chunk in chunks:
+            if not first_chunk_sent:
+                metrics.histogram('bot.reply_first_chunk_seconds').observe(time.monotonic() - start)
+                first_chunk_sent = True
+            on_chunk(chunk)
+
+    for piece in pieces:
+        if not piece:
+            continue
+        parts.append(piece)
+        deliver(chunker.feed(piece))
+
+    deliver(chunker.finish())
+    metrics.histogram('bot.reply_generation_seconds').observe(time.monotonic() - start)
+
+    return ''.join(parts)
@@ -0,0 +1,223 @@
+"""
+Sender Dispatcher Service
+
+This module provides a sharded, per-sender ordered dispatcher. Work items
+are keyed by phone number: items with the same key always run on the same
+worker thread, strictly in submission order, while different keys run in
+parallel across the workers. This serializes the read-modify-write of a
+user's conversation state without holding locks across requests.
+
+The synchronous webhook does not hand work to the dispatcher, since that
+would cap concurrent requests at the shard count. It runs each message on
+its own request thread under a per-sender lock from SenderLocks instead.
+"""
+
+import logging
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from flask import Flask
+
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sentinel used to wake and stop worker threads
+_STOP = object()
+
+
+class SenderDispatcher:
+    """
+    Actor-style dispatcher with one FIFO mailbox per worker shard
+
+    Each key is hashed to a shard; a shard is drained by exactly one thread,
+    so work for a key is never processed concurrently or out of order.
+    """
+
+    def __init__(self, num_workers: int = 4, app: Optional[Flask] = None, name: str = 'dispatcher'):
+        """
+        Initialize the dispatcher
+
+        Args:
+            num_workers: Number of shards (and worker threads)
+            app: Flask application; when set, work runs inside an app context
+            name: Name used for thread names and metrics
+        """
+        self.app = app
+        self.name = name
+        self.queues = [queue.Queue() for _ in range(max(1, num_workers))]
+        self.threads = []
+        self.running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads"""
+        with self._lock:
+            if self.running:
+                return
+
+            self.running = True
+            for index, shard_queue in enumerate(self.queues):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(shard_queue,),
+                    name=f"{self.name}-{index}",
+                    daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+        logger.info(f"Started {len(self.threads)} {self.name} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers after they drain the work already queued"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+
+        for shard_queue in self.queues:
+            shard_queue.put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def shard_for(self, key: str) -> int:
+        """Get the shard index that owns a key"""
+        return zlib.crc32(key.encode('utf-8')) % len(self.queues)
+
+    def queue_depth(self) -> int:
+        """Get the number of work items waiting across all shards"""
+        return sum(shard_queue.qsize() for shard_queue in self.queues)
+
+    def submit(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue a call to run after all earlier work for the same key
+
+        Args:
+            key: Ordering key, e.g. the sender's phone number
+            fn: Callable to run
+            *args, **kwargs: Arguments for the callable
+
+        Returns:
+            Future resolved with the callable's result or exception
+        """
+        if not self.running:
+            raise RuntimeError(f"{self.name} is not running")
+
+        future = Future()
+        self.queues[self.shard_for(key)].put((future, fn, args, kwargs))
+        metrics.gauge(f'{self.name}.queue_depth').inc()
+        return future
+
+    def _worker_loop(self, shard_queue: queue.Queue):
+        """Run work items from one shard in FIFO order"""
+        while True:
+            item = shard_queue.get()
+            if item is _STOP:
+                break
+
+            metrics.gauge(f'{self.name}.queue_depth').dec()
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        result = fn(*args, **kwargs)
+                else:
+                    result = fn(*args, **kwargs)
+                future.set_result(result)
+            except BaseException as e:
+                logger.error(f"Error in {self.name} worker: {str(e)}")
+                future.set_exception(e)
+
+
+class SenderLocks:
+    """
+    One lock per key, held on the calling thread
+
+    Threads holding the same key run one at a time; different keys do not
+    wait for each other. A key's lock is dropped once no thread holds or
+    waits for it, so the table stays as small as the set of busy senders.
+    """
+
+    def __init__(self, name: str = 'locks'):
+        """
+        Initialize the lock table
+
+        Args:
+            name: Name used for metrics
+        """
+        self.name = name
+        self._locks: Dict[str, List] = {}  # key -> [lock, holders and waiters]
+        self._guard = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
+
+    @contextmanager
+    def hold(self, key: str):
+        """
+        Hold the lock for a key for the duration of a with block
+
+        Args:
+            key: Ordering key, e.g. the sender's phone number
+        """
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            start = time.monotonic()
+            with entry[0]:
+                metrics.histogram(f'{self.name}.wait_seconds').observe(time.monotonic() - start)
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+# Process-wide per-sender locks for the synchronous webhook
+sender_locks = SenderLocks(name='bot.sender_locks')
+
+
+# Process-wide dispatcher for inbound WhatsApp messages
+_sender_dispatcher = None
+_sender_dispatcher_lock = threading.Lock()
+
+
+def get_sender_dispatcher(app: Flask) -> SenderDispatcher:
+    """
+    Get the process-wide inbound message dispatcher used in async mode, starting it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        The running SenderDispatcher
+    """
+    global _sender_dispatcher
+
+    if _sender_dispatcher is not None:
+        return _sender_dispatcher
+
+    with _sender_dispatcher_lock:
+        if _sender_dispatcher is None:
+            dispatcher = SenderDispatcher(
+                num_workers=app.config.get('BOT_WORKER_COUNT', 4),
+                app=app,
+                name='bot.inbound'
+            )
+            dispatcher.start()
+            _sender_dispatcher = dispatcher
+
+    return _sender_dispatcher
@@ -3,6 +3,27 @@ Sentiment Analysis Service
 
 This module provides sentiment analysis capabilities using the Hume API.
 It analyzes text messages and returns sentiment scores.
+
+The worker shares one SentimentService per process: a single event loop
+running in its own thread and one pooled httpx.AsyncClient (keep-alive,
+HTTP/2 when h2 is installed), so a message does not pay for a new loop,
+client and TLS handshake. Callers submit texts and get futures back; the
+service groups queued texts into multi-text Hume batch jobs (up to
+SENTIMENT_BATCH_SIZE texts or SENTIMENT_BATCH_WAIT_MS of waiting), so a
+burst of messages costs one submit and one polling loop per batch instead
+of per message.
+
+Jobs are polled with exponentially growing delays, the first one seeded
+from the median duration of recent jobs. With SENTIMENT_CALLBACK_URL set,
+Hume posts each job's completion to the bot API instead and the job is
+parked (an awaited future, no polling) until it arrives, so hundreds of
+jobs can be in flight on the one loop.
+
+Texts Hume could not score (no API key, an API error or a missing
+prediction) are scored by the offline lexicon engine
+(sentiment_lexicon.py) rather than given a flat neutral 0.5, and
+SENTIMENT_ENGINE can have the lexicon score texts instead of Hume or
+before it, sending Hume only the ambiguous ones.
 """
 
 import os
@@ -10,13 +31,27 @@ import logging
 import httpx
 import json
 import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from flask import current_app
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from flask import Flask, current_app
+
+from ..utils.metrics import metrics
+from .sentiment_cache import get_sentiment_cache
+from .sentiment_lexicon import LexiconSentimentAnalyzer, get_lexicon_analyzer, score_locally
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+DEFAULT_API_URL = "https://api.hume.ai/v0/batch/jobs"
+
+# Completion callbacks kept for jobs that were not parked (yet) in this process
+MAX_EARLY_CALLBACKS = 1000
+
 class HumeSentimentAnalyzer:
     """
     Sentiment analysis using Hume API
@@ -24,36 +59,93 @@ class HumeSentimentAnalyzer:
     This class provides methods to analyze text sentiment using Hume's
     emotion recognition API.
     """
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None,
+                 poll_initial: float = 0.25, poll_max: float = 8.0, poll_factor: float = 2.0,
+                 poll_deadline: float = 60.0, poll_min_samples: int = 20,
+                 callback_url: Optional[str] = None, callback_timeout: float = 120.0,
+                 fallback: Optional[LexiconSentimentAnalyzer] = None):
         """
         Initialize the Hume Sentiment Analyzer
         
         Args:
             api_key: Hume API key (defaults to environment variable)
+            api_url: Batch jobs endpoint (defaults to environment variable, then Hume's)
+            poll_initial: Seconds before the first poll until job durations are known
+            poll_max: Cap on the seconds between polls
+            poll_factor: Growth of the delay between consecutive polls
+            poll_deadline: Seconds after submission a job is given up on
+            poll_min_samples: Completed jobs observed before their median seeds the first poll
+            callback_url: URL Hume posts job completions to; jobs are parked
+                until their callback arrives instead of being polled
+            callback_timeout: Seconds a parked job waits before falling back to polling
+            fallback: Lexicon analyzer scoring texts Hume could not; without
+                one they get a neutral score
         """
         self.api_key = api_key or os.getenv('HUME_API_KEY')
         if not self.api_key:
             logger.warning("No Hume API key provided. Sentiment analysis will not work.")
         
-        self.api_url = "https://api.hume.ai/v0/batch/jobs"
+        self.api_url = api_url or os.getenv('HUME_API_URL') or DEFAULT_API_URL
         self.models = ["language"]
+        self.poll_initial = poll_initial
+        self.poll_max = max(poll_initial, poll_max)
+        self.poll_factor = max(1.0, poll_factor)
+        self.poll_deadline = poll_deadline
+        self.poll_min_samples = poll_min_samples
+        self.callback_url = callback_url
+        self.callback_timeout = callback_timeout
+        self.fallback = fallback
+        # Owned by the event loop the jobs run on
+        self._parked: Dict[str, asyncio.Future] = {}
+        self._early_callbacks: OrderedDict = OrderedDict()
     
-    async def analyze_text(self, text: str) -> Dict[str, Any]:
+    def headers(self) -> Dict[str, str]:
+        """Request headers for the Hume API"""
+        return {
+            "X-Hume-Api-Key": self.api_key,
+            "Content-Type": "application/json"
+        }
+    
+    async def analyze_text(self, text: str, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
         """
         Analyze the sentiment of text using Hume API
         
         Args:
             text: The text to analyze
+            client: Pooled client to send the requests on; a one-off client
+                is created (and closed) when omitted
             
         Returns:
             Dict containing sentiment analysis results
         """
+        return (await self.analyze_texts([text], client))[0]
+    
+    async def analyze_texts(self, texts: List[str], client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+        """
+        Analyze the sentiment of several texts with a single Hume batch job
+        
+        Args:
+            texts: The texts to analyze
+            client: Pooled client to send the requests on; a one-off client
+                is created (and closed) when omitted
+            
+        Returns:
+            One sentiment result dict per text, in order; texts the job
+            returned no prediction for get the fallback
+        """
+        if not texts:
+            return []
+        
         if not self.api_key:
             logger.error("No Hume API key available. Cannot perform sentiment analysis.")
-            return self._generate_fallback_sentiment()
+            return [self._generate_fallback_sentiment(text) for text in texts]
+        
+        if client is None:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                return await self.analyze_texts(texts, client)
         
         try:
-            logger.info(f"Analyzing sentiment for text: {text[:50]}...")
+            logger.info(f"Analyzing sentiment for {len(texts)} texts, first: {texts[0][:50]}...")
             
             # Prepare the request payload
             payload = {
@@ -61,85 +153,176 @@ class HumeSentimentAnalyzer:
                     "language": {}
                 },
                 "data": {
-                    "text": text
+                    "text": list(texts)
                 }
             }
+            if self.callback_url:
+                payload["callback_url"] = self.callback_url
             
-            headers = {
-                "X-Hume-Api-Key": self.api_key,
-                "Content-Type": "application/json"
-            }
+            headers = self.headers()
+            submitted_at = time.monotonic()
             
             # Send request to Hume API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    json=payload,
-                    headers=headers
-                )
-                
-                # Check response status
-                if response.status_code != 200:
-                    logger.error(f"Hume API returned error: {response.status_code}, {response.text}")
-                    return self._generate_fallback_sentiment()
-                
-                # Process the response
-                response_data = response.json()
-                job_id = response_data.get("job_id")
-                
-                if not job_id:
-                    logger.error("No job_id in Hume API response")
-                    return self._generate_fallback_sentiment()
-                
-                # Poll for results
-                result = await self._poll_for_results(client, job_id, headers)
-                return self._process_results(result)
+            response = await client.post(
+                self.api_url,
+                json=payload,
+                headers=headers
+            )
+            
+            # Check response status
+            if response.status_code != 200:
+                logger.error(f"Hume API returned error: {response.status_code}, {response.text}")
+                return [self._generate_fallback_sentiment(text) for text in texts]
+            
+            # Process the response
+            response_data = response.json()
+            job_id = response_data.get("job_id")
+            
+            if not job_id:
+                logger.error("No job_id in Hume API response")
+                return [self._generate_fallback_sentiment(text) for text in texts]
+            
+            # Wait for the completion callback, or poll for results
+            if self.callback_url:
+                result = await self._wait_for_callback(client, job_id, headers, submitted_at)
+            else:
+                result = await self._poll_for_results(client, job_id, headers, submitted_at)
+            return self._process_results(result, texts)
                 
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}")
-            return self._generate_fallback_sentiment()
+            return [self._generate_fallback_sentiment(text) for text in texts]
+    
+    def poll_delays(self) -> Iterator[float]:
+        """
+        Delays between polls of one job
+        
+        The first poll comes at the median duration of recently completed
+        jobs (poll_initial until enough have been seen), so short jobs are
+        picked up right away; each later delay grows by poll_factor up to
+        poll_max. Polled durations are midpoint estimates, callback
+        durations exact.
+        """
+        durations = metrics.histogram('sentiment.job_seconds')
+        delay = self.poll_initial
+        if durations.count >= self.poll_min_samples:
+            delay = max(self.poll_initial, durations.percentile(50) or 0.0)
+        delay = min(delay, self.poll_max)
+        while True:
+            yield delay
+            delay = min(self.poll_max, delay * self.poll_factor)
     
-    async def _poll_for_results(self, client: httpx.AsyncClient, job_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    async def _poll_for_results(self, client: httpx.AsyncClient, job_id: str, headers: Dict[str, str],
+                                submitted_at: float, delays: Optional[Iterator[float]] = None) -> Dict[str, Any]:
         """Poll the Hume API for analysis results"""
         status_url = f"{self.api_url}/{job_id}"
-        max_attempts = 10
+        deadline = submitted_at + self.poll_deadline
+        # The job finished between the last poll that found it running and the one finding it done
+        running_at = submitted_at
         attempt = 0
         
-        while attempt < max_attempts:
+        for delay in delays or self.poll_delays():
+            # Wait before polling
+            if delay > 0:
+                await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
             attempt += 1
+            metrics.counter('sentiment.job_polls').inc()
+            polled_at = time.monotonic()
             response = await client.get(status_url, headers=headers)
             
             if response.status_code != 200:
                 logger.error(f"Error polling Hume API: {response.status_code}, {response.text}")
-                await asyncio.sleep(2)
-                continue
-            
-            data = response.json()
-            status = data.get("state")
+            else:
+                data = response.json()
+                status = data.get("state")
+                
+                if status == "completed":
+                    # Midpoint estimate, so durations can shrink as well as grow
+                    metrics.histogram('sentiment.job_seconds').observe((running_at + polled_at) / 2 - submitted_at)
+                    return data.get("results", {})
+                elif status == "failed":
+                    logger.error(f"Hume API job failed: {data.get('error', 'Unknown error')}")
+                    return {}
+                running_at = polled_at
             
-            if status == "completed":
-                return data.get("results", {})
-            elif status == "failed":
-                logger.error(f"Hume API job failed: {data.get('error', 'Unknown error')}")
+            if time.monotonic() >= deadline:
                 break
-            
-            # Wait before polling again
-            await asyncio.sleep(2)
         
-        logger.error(f"Timed out waiting for Hume API results after {max_attempts} attempts")
+        logger.error(f"Timed out waiting for Hume API results after {attempt} polls")
         return {}
     
-    def _process_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """Process and normalize Hume API results"""
-        try:
-            # Extract language model predictions
-            language_predictions = results.get('language', {}).get('predictions', [])
-            
-            if not language_predictions:
-                return self._generate_fallback_sentiment()
+    async def _wait_for_callback(self, client: httpx.AsyncClient, job_id: str, headers: Dict[str, str],
+                                 submitted_at: float) -> Dict[str, Any]:
+        """Park a job until its completion callback arrives, then return its results"""
+        data = self._early_callbacks.pop(job_id, None)
+        if data is None:
+            future = asyncio.get_running_loop().create_future()
+            self._parked[job_id] = future
+            metrics.gauge('sentiment.jobs_parked').set(len(self._parked))
+            try:
+                data = await asyncio.wait_for(future, self.callback_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"No completion callback for Hume job {job_id} after "
+                               f"{self.callback_timeout}s; polling instead")
+                return await self._poll_for_results(client, job_id, headers, submitted_at)
+            finally:
+                self._parked.pop(job_id, None)
+                metrics.gauge('sentiment.jobs_parked').set(len(self._parked))
+        
+        status = str(data.get("state") or data.get("status") or "").lower()
+        if status == "failed":
+            logger.error(f"Hume API job failed: {data.get('error', 'Unknown error')}")
+            return {}
+        if status == "completed" and "results" in data:
+            metrics.histogram('sentiment.job_seconds').observe(time.monotonic() - submitted_at)
+            return data["results"] or {}
+        
+        # A bare notification: fetch the results now
+        return await self._poll_for_results(client, job_id, headers, submitted_at,
+                                            delays=itertools.chain([0.0], self.poll_delays()))
+    
+    def complete_job(self, job_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Hand a job's completion callback to the job waiting for it
+        
+        Must run on the event loop the job runs on. A callback for a job
+        that is not parked (yet) is kept for a while, in case it raced
+        ahead of the submit response.
+        
+        Args:
+            job_id: Hume job ID
+            data: Callback payload
             
+        Returns:
+            Whether a parked job was woken
+        """
+        future = self._parked.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(data)
+            return True
+        self._early_callbacks[job_id] = data
+        while len(self._early_callbacks) > MAX_EARLY_CALLBACKS:
+            self._early_callbacks.popitem(last=False)
+        return False
+    
+    def _process_results(self, results: Dict[str, Any], texts: List[str]) -> List[Dict[str, Any]]:
+        """Split Hume API results into one normalized result per submitted text"""
+        count = len(texts)
+        # Language model predictions come back in the order the texts were sent
+        language_predictions = results.get('language', {}).get('predictions', [])
+        if language_predictions and len(language_predictions) != count:
+            logger.warning(f"Hume API returned {len(language_predictions)} predictions for {count} texts")
+        
+        processed = [self._process_prediction(prediction, text)
+                     for prediction, text in zip(language_predictions, texts)]
+        processed.extend(self._generate_fallback_sentiment(text) for text in texts[len(processed):])
+        return processed
+    
+    def _process_prediction(self, prediction: Dict[str, Any], text: Optional[str] = None) -> Dict[str, Any]:
+        """Normalize the prediction for one text"""
+        try:
             # Extract emotions data
-            emotions = language_predictions[0].get('emotions', [])
+            emotions = prediction.get('emotions', [])
             
             # Calculate weighted sentiment score
             # Positive emotions: joy, amusement, admiration, approval, gratitude, excitement, love
@@ -173,10 +356,12 @@ class HumeSentimentAnalyzer:
             
         except Exception as e:
             logger.error(f"Error processing Hume API results: {str(e)}")
-            return self._generate_fallback_sentiment()
+            return self._generate_fallback_sentiment(text)
     
-    def _generate_fallback_sentiment(self) -> Dict[str, Any]:
-        """Generate fallback sentiment when API fails"""
+    def _generate_fallback_sentiment(self, text: Optional[str] = None) -> Dict[str, Any]:
+        """Generate fallback sentiment when API fails: the lexicon score of the text, if possible"""
+        if self.fallback is not None and text is not None:
+            return self.fallback.analyze(text, source='fallback')
         return {
             'sentiment_score': 0.5,  # Neutral score
             'emotions': {},
@@ -186,27 +371,259 @@ class HumeSentimentAnalyzer:
             'source': 'fallback'
         }
 
+class SentimentService:
+    """
+    Long-lived sentiment client owned by the worker
+    
+    Runs one event loop in a background thread and sends every analysis on
+    the same pooled AsyncClient, so connections (and their TLS sessions)
+    are reused across messages and many analyses can be in flight at once.
+    
+    Submitted texts are micro-batched: they wait until `batch_size` texts
+    are queued or the oldest has waited `batch_wait` seconds, then go to
+    Hume as one multi-text job whose predictions resolve each text's
+    future. A batch_size of 1 sends every text as its own job.
+    """
+    
+    def __init__(self, analyzer: Optional[HumeSentimentAnalyzer] = None, http2: bool = True,
+                 max_connections: int = 20, keepalive_expiry: float = 30.0, timeout: float = 30.0,
+                 batch_size: int = 1, batch_wait: float = 0.0):
+        """
+        Initialize the service
+        
+        Args:
+            analyzer: Hume analyzer (defaults to one configured from the environment)
+            http2: Negotiate HTTP/2 when the h2 package is installed
+            max_connections: Connections the pool keeps open at most
+            keepalive_expiry: Seconds an idle pooled connection is kept
+            timeout: Seconds before a single HTTP request times out
+            batch_size: Texts sent to Hume in one job at most
+            batch_wait: Seconds a queued text waits for its batch to fill
+        """
+        self.analyzer = analyzer or HumeSentimentAnalyzer()
+        self.http2 = http2
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait)
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._lock = threading.Lock()
+        # Owned by the loop thread
+        self._pending: List[Tuple[str, Future]] = []
+        self._flush_handle = None
+        self._batches = set()
+    
+    def start(self):
+        """Start the event loop thread and open the client on it"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='sentiment-loop', daemon=True)
+            thread.start()
+            self._client = asyncio.run_coroutine_threadsafe(self._open_client(), loop).result()
+            self._loop, self._thread = loop, thread
+    
+    async def _open_client(self) -> httpx.AsyncClient:
+        try:
+            return httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout)
+        except ImportError:
+            logger.warning("h2 is not installed; the Hume client will use HTTP/1.1")
+            return httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+    
+    def stop(self, timeout: float = 5.0):
+        """Send any queued texts, close the client and stop the event loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+    
+    async def _drain(self):
+        self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        client, self._client = self._client, None
+        await client.aclose()
+    
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text for analysis
+        
+        Args:
+            text: The text to analyze
+            
+        Returns:
+            Future resolved with the sentiment result dict
+        """
+        if self._loop is None:
+            self.start()
+        future = Future()
+        self._loop.call_soon_threadsafe(self._enqueue, text, future)
+        return future
+    
+    def submit_many(self, texts: List[str]) -> List[Future]:
+        """Queue several texts at once; see submit"""
+        if self._loop is None:
+            self.start()
+        futures = [Future() for _ in texts]
+        self._loop.call_soon_threadsafe(self._enqueue_many, list(zip(texts, futures)))
+        return futures
+    
+    def _enqueue(self, text: str, future: Future):
+        self._enqueue_many([(text, future)])
+    
+    def _enqueue_many(self, items: List[Tuple[str, Future]]):
+        self._pending.extend(items)
+        while len(self._pending) >= self.batch_size:
+            self._flush()
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.batch_wait, self._flush)
+    
+    def _flush(self):
+        """Send up to batch_size queued texts as one job"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if self._pending:
+            self._flush_handle = self._loop.call_later(self.batch_wait, self._flush)
+        if batch:
+            task = self._loop.create_task(self._analyze_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+    
+    async def _analyze_batch(self, batch: List[Tuple[str, Future]]):
+        start = time.monotonic()
+        try:
+            results = await self.analyzer.analyze_texts([text for text, _ in batch], self._client)
+        except Exception as e:
+            logger.error(f"Error analyzing sentiment batch: {str(e)}")
+            results = [self.analyzer._generate_fallback_sentiment(text) for text, _ in batch]
+        metrics.histogram('sentiment.analyze_seconds').observe(time.monotonic() - start)
+        metrics.histogram('sentiment.batch_size').observe(len(batch))
+        for (_, future), result in zip(batch, results):
+            metrics.counter(f"sentiment.source.{result.get('source', 'unknown')}").inc()
+            if future.set_running_or_notify_cancel():
+                future.set_result(result)
+    
+    def complete_job(self, job_id: str, data: Dict[str, Any], timeout: float = 5.0) -> bool:
+        """
+        Deliver a Hume job completion callback (thread-safe)
+        
+        Args:
+            job_id: Hume job ID
+            data: Callback payload
+            timeout: Seconds to wait for the event loop
+            
+        Returns:
+            Whether a job parked in this process was woken
+        """
+        loop = self._loop
+        if loop is None:
+            return False
+        
+        async def complete():
+            return self.analyzer.complete_job(job_id, data)
+        
+        return asyncio.run_coroutine_threadsafe(complete(), loop).result(timeout)
+    
+    def analyze(self, text: str, timeout: Optional[float] = 60.0) -> Dict[str, Any]:
+        """
+        Analyze a text and wait for the result
+        
+        Args:
+            text: The text to analyze
+            timeout: Seconds to wait for the result
+            
+        Returns:
+            Dict containing sentiment analysis results
+        """
+        return self.submit(text).result(timeout)
+
+
+# Process-wide sentiment service
+_sentiment_service = None
+_sentiment_service_lock = threading.Lock()
+
+
+def get_sentiment_service(app: Flask) -> SentimentService:
+    """
+    Get the process-wide sentiment service, starting it on first use
+    
+    Args:
+        app: Flask application instance
+        
+    Returns:
+        The running SentimentService
+    """
+    global _sentiment_service
+    
+    if _sentiment_service is not None:
+        return _sentiment_service
+    
+    with _sentiment_service_lock:
+        if _sentiment_service is None:
+            service = SentimentService(
+                HumeSentimentAnalyzer(
+                    app.config.get('HUME_API_KEY'),
+                    app.config.get('HUME_API_URL'),
+                    poll_initial=app.config.get('SENTIMENT_POLL_INITIAL_SECONDS', 0.25),
+                    poll_max=app.config.get('SENTIMENT_POLL_MAX_SECONDS', 8.0),
+                    poll_deadline=app.config.get('SENTIMENT_POLL_DEADLINE_SECONDS', 60.0),
+                    callback_url=app.config.get('SENTIMENT_CALLBACK_URL'),
+                    callback_timeout=app.config.get('SENTIMENT_CALLBACK_TIMEOUT_SECONDS', 120.0),
+                    fallback=(get_lexicon_analyzer(app)
+                              if app.config.get('SENTIMENT_LEXICON_FALLBACK', True) else None)
+                ),
+                http2=app.config.get('SENTIMENT_HTTP2', True),
+                max_connections=app.config.get('SENTIMENT_MAX_CONNECTIONS', 20),
+                keepalive_expiry=app.config.get('SENTIMENT_KEEPALIVE_SECONDS', 30.0),
+                timeout=app.config.get('SENTIMENT_REQUEST_TIMEOUT', 30.0),
+                batch_size=app.config.get('SENTIMENT_BATCH_SIZE', 20),
+                batch_wait=app.config.get('SENTIMENT_BATCH_WAIT_MS', 250) / 1000
+            )
+            service.start()
+            _sentiment_service = service
+    
+    return _sentiment_service
+
 # Synchronous wrapper function for easier integration
 def analyze_sentiment(text: str) -> Dict[str, Any]:
     """
     Analyze text sentiment (synchronous wrapper)
     
+    Texts the SENTIMENT_ENGINE settles locally are scored by the lexicon,
+    repeated texts are answered from the sentiment cache and the rest go
+    to the process-wide SentimentService; must be called inside an app
+    context.
+    
     Args:
         text: The text to analyze
         
     Returns:
         Dict containing sentiment analysis results
     """
-    analyzer = HumeSentimentAnalyzer()
-    
-    # Use asyncio to run the async function
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(analyzer.analyze_text(text))
+    app = current_app._get_current_object()
+    result = score_locally([text], app)[0]
+    if result is not None:
         return result
-    finally:
-        loop.close()
+    cache = get_sentiment_cache(app)
+    result = cache.get(text)
+    if result is None:
+        result = get_sentiment_service(app).analyze(text)
+        cache.put(text, result)
+    return result
 
 # Function to extract key emotions with scores
 def extract_key_emotions(sentiment_data: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
@@ -0,0 +1,312 @@
+"""
+Sentiment Cache Service
+
+Many of the texts we score repeat verbatim: check-in answers such as "ok",
+"tired" or "5", and templated onboarding replies. This module caches
+sentiment results by content, so a repeat costs no Hume job. The key is a
+SHA-256 of the model version and the normalized text (Unicode NFKC,
+case-folded, whitespace collapsed); the text itself is never stored.
+
+Lookups go to a bounded in-memory LRU first and then to the
+sentiment_cache_entry table, which every process shares and which
+survives restarts. Entries expire after a TTL, and prune_sentiment_cache
+keeps the table to a maximum number of rows, oldest first. Only API
+results are cached, never fallbacks, and long texts (which rarely repeat)
+are not cached at all. Hits, misses and the hit rate are published as
+metrics.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.models import db, SentimentCacheEntry
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_VERSION = 'hume-language-1'
+
+# Result sources worth caching; fallbacks are retried on the next message
+CACHEABLE_SOURCES = frozenset({'hume_api'})
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a text for cache lookups: NFKC, collapsed whitespace, case-folded"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().casefold()
+
+
+class SentimentCache:
+    """
+    Two-tier, content-addressed cache of sentiment results
+    """
+
+    def __init__(self, model_version: str = DEFAULT_MODEL_VERSION, max_entries: int = 10000,
+                 ttl: timedelta = timedelta(days=7), persistent: bool = True,
+                 max_text_length: int = 280, enabled: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            model_version: Version of the model producing the results; part of every key
+            max_entries: Maximum number of results kept in memory
+            ttl: How long a result is reused
+            persistent: Whether to use the sentiment_cache_entry table as a second tier
+            max_text_length: Longest normalized text that is cached
+            enabled: Whether to cache at all; a disabled cache misses every lookup
+        """
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent = persistent
+        self.max_text_length = max_text_length
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> Optional[str]:
+        """
+        Cache key of a text: SHA-256 of the model version and the normalized text
+
+        Returns:
+            The hex digest, or None if the text is empty or too long to cache
+        """
+        normalized = normalize_text(text or '')
+        if not normalized or len(normalized) > self.max_text_length:
+            return None
+        return hashlib.sha256(f"{self.model_version}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, result: Dict[str, Any], expires_at: float):
+        # Called with the lock held
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """Look up one text (see get_many)"""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up several texts: memory first, then one query for the rest
+
+        Must be called inside an app context when the cache is persistent.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            A copy of the cached result per text, or None where there is none
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        if not self.enabled:
+            return results
+
+        now = time.monotonic()
+        missing: Dict[str, List[int]] = {}
+        memory_hits = table_hits = 0
+        with self._lock:
+            for index, text in enumerate(texts):
+                key = self.key(text)
+                if key is None:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    results[index] = dict(entry[1])
+                    memory_hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.setdefault(key, []).append(index)
+
+        if missing and self.persistent:
+            utcnow = datetime.utcnow()
+            try:
+                rows = db.session.query(
+                    SentimentCacheEntry.key, SentimentCacheEntry.result, SentimentCacheEntry.created_at
+                ).filter(
+                    SentimentCacheEntry.key.in_(list(missing)),
+                    SentimentCacheEntry.created_at > utcnow - self.ttl
+                ).all()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error reading the sentiment cache table: {str(e)}")
+                rows = []
+
+            with self._lock:
+                for key, result, created_at in rows:
+                    value = json.loads(result)
+                    # Keep the table's expiry in memory too
+                    self._remember(key, value, now + (created_at + self.ttl - utcnow).total_seconds())
+                    for index in missing.pop(key):
+                        results[index] = dict(value)
+                        table_hits += 1
+
+        self._record(memory_hits, table_hits, len(texts) - memory_hits - table_hits)
+        return results
+
+    def put(self, text: str, result: Dict[str, Any]):
+        """Cache one result (see put_many)"""
+        self.put_many([(text, result)])
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Cache the results of several texts in memory and in the table
+
+        Only results from CACHEABLE_SOURCES are kept. Table rows are written
+        with one bulk insert (and one bulk update for expired rows being
+        replaced); a conflicting write from another process is ignored.
+        Must be called inside an app context when the cache is persistent.
+
+        Args:
+            items: (text, sentiment result) pairs
+
+        Returns:
+            Number of distinct results cached
+        """
+        if not self.enabled:
+            return 0
+
+        fresh: Dict[str, Dict[str, Any]] = {}
+        for text, result in items:
+            if not result or result.get('source') not in CACHEABLE_SOURCES:
+                continue
+            key = self.key(text)
+            if key is not None:
+                fresh[key] = result
+        if not fresh:
+            return 0
+
+        expires_at = time.monotonic() + self.ttl.total_seconds()
+        with self._lock:
+            for key, result in fresh.items():
+                self._remember(key, dict(result), expires_at)
+
+        if self.persistent:
+            now = datetime.utcnow()
+            try:
+                existing = dict(db.session.query(SentimentCacheEntry.key, SentimentCacheEntry.id)
+                                .filter(SentimentCacheEntry.key.in_(list(fresh))).all())
+                rows = [{'key': key, 'model_version': self.model_version, 'result': json.dumps(result),
+                         'created_at': now} for key, result in fresh.items()]
+                inserts = [row for row in rows if row['key'] not in existing]
+                # Rows for these keys are expired (or were cached by another process meanwhile)
+                updates = [dict(row, id=existing[row['key']]) for row in rows if row['key'] in existing]
+                if inserts:
+                    db.session.execute(insert(SentimentCacheEntry), inserts)
+                if updates:
+                    db.session.execute(update(SentimentCacheEntry), updates)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                logger.debug("Sentiment results were cached concurrently by another process")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error writing the sentiment cache table: {str(e)}")
+
+        metrics.counter('sentiment.cache.writes').inc(len(fresh))
+        return len(fresh)
+
+    def _record(self, memory_hits: int, table_hits: int, misses: int):
+        metrics.counter('sentiment.cache.hits.memory').inc(memory_hits)
+        metrics.counter('sentiment.cache.hits.table').inc(table_hits)
+        metrics.counter('sentiment.cache.misses').inc(misses)
+        metrics.gauge('sentiment.cache.hit_rate').set(self.stats()['hit_rate'])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Lookup counts of this process
+
+        Returns:
+            Dict with memory and table hits, misses, the hit rate over all
+            lookups and the number of results held in memory
+        """
+        memory_hits = metrics.counter('sentiment.cache.hits.memory').value
+        table_hits = metrics.counter('sentiment.cache.hits.table').value
+        misses = metrics.counter('sentiment.cache.misses').value
+        lookups = memory_hits + table_hits + misses
+        return {
+            'memory_hits': memory_hits,
+            'table_hits': table_hits,
+            'misses': misses,
+            'hit_rate': round((memory_hits + table_hits) / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries)
+        }
+
+
+def prune_sentiment_cache(ttl: timedelta = timedelta(days=7), max_rows: int = 100000) -> int:
+    """
+    Delete expired cache rows, then the oldest rows beyond max_rows
+
+    Args:
+        ttl: Age after which a row is no longer used
+        max_rows: Rows kept at most
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted = SentimentCacheEntry.query.filter(
+        SentimentCacheEntry.created_at < datetime.utcnow() - ttl
+    ).delete(synchronize_session=False)
+
+    # The newest row past the limit; it and everything older goes
+    boundary = (
+        db.session.query(SentimentCacheEntry.created_at, SentimentCacheEntry.id)
+        .order_by(SentimentCacheEntry.created_at.desc(), SentimentCacheEntry.id.desc())
+        .offset(max_rows)
+        .first()
+    )
+    if boundary is not None:
+        deleted += SentimentCacheEntry.query.filter(or_(
+            SentimentCacheEntry.created_at < boundary.created_at,
+            and_(SentimentCacheEntry.created_at == boundary.created_at, SentimentCacheEntry.id <= boundary.id)
+        )).delete(synchronize_session=False)
+
+    db.session.commit()
+    return deleted
+
+
+# Process-wide sentiment cache
+_cache: Optional[SentimentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_sentiment_cache(app: Flask) -> SentimentCache:
+    """
+    Get the process-wide sentiment cache, creating it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        SentimentCache configured from the SENTIMENT_CACHE_* settings
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = SentimentCache(
+                model_version=app.config.get('SENTIMENT_MODEL_VERSION', DEFAULT_MODEL_VERSION),
+                max_entries=app.config.get('SENTIMENT_CACHE_SIZE', 10000),
+                ttl=timedelta(hours=app.config.get('SENTIMENT_CACHE_TTL_HOURS', 168)),
+                persistent=app.config.get('SENTIMENT_CACHE_PERSISTENT', True),
+                max_text_length=app.config.get('SENTIMENT_CACHE_MAX_TEXT_LENGTH', 280),
+                enabled=app.config.get('SENTIMENT_CACHE_ENABLED', True)
+            )
+        return _cache
@@ -0,0 +1,284 @@
+"""
+Lexicon Sentiment Service
+
+An in-process, rule-based sentiment scorer in the style of VADER. Each
+token's valence comes from a lexicon (backend/src/sentiment_lexicon/en.tsv,
+or SENTIMENT_LEXICON_PATH in the same format, e.g. VADER's
+vader_lexicon.txt) that is loaded once into a dict. The valence is then
+adjusted for boosters ("very", "a bit"), negation ("not", "don't"),
+ALL-CAPS emphasis, a contrasting "but" and exclamation marks. The sum is
+squashed into a compound score in [-1, 1] and mapped onto the 0-1
+sentiment_score scale used by the Hume results. Tokenizing is one
+compiled regular expression and scoring is a dict lookup per token, so a
+process scores tens of thousands of short messages per second.
+
+The lexicon serves three purposes, chosen with SENTIMENT_ENGINE:
+
+    hume     every text goes to Hume (the default)
+    lexicon  every text is scored locally; Hume is never called
+    hybrid   texts the lexicon scores clearly are settled locally and only
+             ambiguous ones (no sentiment words, mixed polarity or a weak
+             compound score) go to Hume
+
+Whatever the engine, the lexicon also scores texts Hume could not (no API
+key, an API error or a missing prediction) instead of the flat neutral
+0.5 that used to skew the aggregates.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from flask import Flask
+
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ENGINES = ('hume', 'lexicon', 'hybrid')
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'sentiment_lexicon', 'en.tsv')
+
+# Emoticons (":)", ":-(", "<3", but not the ":/" of "://"), words with inner
+# apostrophes ("don't"), emoji with an optional variation selector and the
+# clause punctuation that ends the reach of a booster or negation
+TOKEN_PATTERN = re.compile(
+    r"</?3|[:;=]'?-?(?:[()dDpP|\\]|/(?!/))"
+    r"|[^\W\d_]+(?:'[^\W\d_]+)*"
+    r"|[\u2600-\u27bf\U0001f000-\U0001faff]\ufe0f?"
+    r"|[,.;:!?]"
+)
+CLAUSE_BREAKS = frozenset(',.;:!?')
+
+# Words that raise or lower the intensity of the sentiment word after them
+BOOSTERS = {
+    **dict.fromkeys((
+        'absolutely', 'completely', 'deeply', 'extremely', 'fully', 'hugely', 'incredibly', 'massively',
+        'properly', 'really', 'seriously', 'so', 'super', 'too', 'totally', 'truly', 'utterly', 'very'
+    ), 0.293),
+    **dict.fromkeys((
+        'abit', 'barely', 'bit', 'fairly', 'kinda', 'little', 'marginally', 'slightly', 'somewhat', 'sorta'
+    ), -0.293)
+}
+
+# Words that flip the sentiment word after them; so does any "...n't"
+NEGATIONS = frozenset({
+    'aint', 'cannot', 'cant', 'didnt', 'doesnt', 'dont', 'hardly', 'isnt', 'neither', 'never', 'nobody',
+    'none', 'nor', 'not', 'nothing', 'nowhere', 'wasnt', 'without', 'wont', 'wouldnt'
+})
+
+# Tokens before a sentiment word that a booster or negation may come from
+WINDOW = 3
+NEGATION_SCALAR = -0.74
+CAPS_BOOST = 0.733
+EXCLAMATION_BOOST = 0.292
+MAX_EXCLAMATIONS = 4
+# Sentiment before a "but" counts for less, and after it for more
+BUT_BEFORE, BUT_AFTER = 0.5, 1.5
+# Squashes the valence sum into a compound score in (-1, 1)
+ALPHA = 15
+
+
+def load_lexicon(path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Load a sentiment lexicon once into a dict
+
+    Each line holds a token, a tab and its valence; further columns are
+    ignored and lines starting with '#' (without a tab) are comments.
+
+    Args:
+        path: Lexicon file (defaults to the bundled English lexicon)
+
+    Returns:
+        Dict of lowercased token to valence
+    """
+    path = path or DEFAULT_LEXICON_PATH
+    lexicon = {}
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or (line.startswith('#') and '\t' not in line):
+                continue
+            fields = line.split('\t')
+            try:
+                lexicon[fields[0].strip().lower()] = float(fields[1])
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{number}: expected '<token>\\t<valence>', got {line!r}")
+    return lexicon
+
+
+class LexiconSentimentAnalyzer:
+    """
+    Score text sentiment from a lexicon and a few VADER-style rules
+
+    Results have the same keys as Hume results (emotions is always empty)
+    plus the compound score and the number of sentiment words matched.
+    Instances are immutable and safe to share between threads.
+    """
+
+    def __init__(self, lexicon: Mapping[str, float], prefilter_threshold: float = 0.35):
+        """
+        Initialize the analyzer
+
+        Args:
+            lexicon: Lowercased token to valence (-4 to +4)
+            prefilter_threshold: Compound score magnitude below which a text
+                counts as ambiguous
+        """
+        self.lexicon = dict(lexicon)
+        self.prefilter_threshold = prefilter_threshold
+
+    def polarity(self, text: str) -> Tuple[float, float, float, int]:
+        """
+        Score one text
+
+        Args:
+            text: The text to score
+
+        Returns:
+            (compound score in [-1, 1], sum of positive valences, sum of
+            negative valences as a positive number, sentiment words matched)
+        """
+        lexicon = self.lexicon
+        tokens = TOKEN_PATTERN.findall(text.replace('\u2019', "'"))
+        words = [token.lower() for token in tokens]
+        all_caps = text.isupper()
+
+        valences = []
+        but_index = None
+        for index, word in enumerate(words):
+            if word == 'but' and but_index is None:
+                but_index = index
+            valence = lexicon.get(word)
+            if valence is None or word in BOOSTERS:
+                continue
+            sign = 1 if valence > 0 else -1
+            token = tokens[index]
+            if not all_caps and len(token) > 1 and token.isupper():
+                valence += sign * CAPS_BOOST
+
+            preceding = words[max(0, index - WINDOW):index]
+            negated = False
+            for distance, previous in enumerate(reversed(preceding)):
+                # A negation or booster reaches only the next sentiment word in its clause
+                if previous in CLAUSE_BREAKS or (previous in lexicon and previous not in BOOSTERS):
+                    break
+                boost = BOOSTERS.get(previous)
+                if boost is not None:
+                    valence += sign * boost * (1 - 0.05 * distance)
+                if previous in NEGATIONS or previous.endswith("n't"):
+                    negated = True
+            if negated:
+                valence *= NEGATION_SCALAR
+            valences.append((index, valence))
+
+        if but_index is not None:
+            valences = [(index, valence * (BUT_BEFORE if index < but_index else BUT_AFTER))
+                        for index, valence in valences]
+
+        total = sum(valence for _, valence in valences)
+        if total:
+            total += math.copysign(min(text.count('!'), MAX_EXCLAMATIONS) * EXCLAMATION_BOOST, total)
+        compound = total / math.sqrt(total * total + ALPHA)
+        positive = sum(valence for _, valence in valences if valence > 0)
+        negative = -sum(valence for _, valence in valences if valence < 0)
+        return compound, positive, negative, len(valences)
+
+    def analyze(self, text: str, source: str = 'lexicon') -> Dict[str, Any]:
+        """
+        Score one text as a sentiment result
+
+        Args:
+            text: The text to score
+            source: Source recorded in the result
+
+        Returns:
+            Dict shaped like a Hume sentiment result
+        """
+        compound, positive, negative, matched = self.polarity(text or '')
+        return {
+            'sentiment_score': (compound + 1) / 2,
+            'emotions': {},
+            'positive_score': positive,
+            'negative_score': negative,
+            'compound': compound,
+            'matched': matched,
+            'timestamp': datetime.utcnow().isoformat(),
+            'source': source
+        }
+
+    def analyze_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """Score several texts; see analyze"""
+        return [self.analyze(text) for text in texts]
+
+    def is_ambiguous(self, result: Dict[str, Any]) -> bool:
+        """
+        Whether a lexicon result is too uncertain to stand in for Hume
+
+        A result is ambiguous if no sentiment word matched, if it mixes
+        positive and negative words, or if its compound score is weaker
+        than the prefilter threshold.
+        """
+        return (not result['matched']
+                or (result['positive_score'] > 0 and result['negative_score'] > 0)
+                or abs(result['compound']) < self.prefilter_threshold)
+
+
+_analyzer: Optional[LexiconSentimentAnalyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_lexicon_analyzer(app: Flask) -> LexiconSentimentAnalyzer:
+    """
+    Get the process-wide lexicon analyzer, loading the lexicon on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        LexiconSentimentAnalyzer using the SENTIMENT_LEXICON_PATH and
+        SENTIMENT_PREFILTER_THRESHOLD settings
+    """
+    global _analyzer
+
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = LexiconSentimentAnalyzer(
+                load_lexicon(app.config.get('SENTIMENT_LEXICON_PATH')),
+                prefilter_threshold=app.config.get('SENTIMENT_PREFILTER_THRESHOLD', 0.35)
+            )
+            logger.info(f"Sentiment lexicon ready with {len(_analyzer.lexicon)} tokens")
+        return _analyzer
+
+
+def score_locally(texts: List[str], app: Flask) -> List[Optional[Dict[str, Any]]]:
+    """
+    Score the texts the configured SENTIMENT_ENGINE settles without Hume
+
+    Args:
+        texts: Texts to score
+        app: Flask application instance
+
+    Returns:
+        One lexicon result per text, or None where the text is to go to
+        Hume: every text with 'hume', none with 'lexicon', and with
+        'hybrid' the texts the lexicon finds ambiguous
+    """
+    engine = app.config.get('SENTIMENT_ENGINE', 'hume')
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown sentiment engine '{engine}', expected one of {ENGINES}")
+    if engine == 'hume' or not texts:
+        return [None] * len(texts)
+
+    analyzer = get_lexicon_analyzer(app)
+    results = analyzer.analyze_many(texts)
+    if engine == 'hybrid':
+        results = [None if analyzer.is_ambiguous(result) else result for result in results]
+        metrics.counter('sentiment.prefilter.forwarded').inc(results.count(None))
+    metrics.counter('sentiment.source.lexicon').inc(len(results) - results.count(None))
+    return results
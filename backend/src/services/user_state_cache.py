@@ -0,0 +1,283 @@
+"""
+User State Cache Service
+
+Every WhatsApp message used to load the User row just to walk the
+onboarding gates (authenticated, consented, department and location set)
+and then write message_count/last_message_time back in the turn's commit.
+This module keeps the onboarding state of fully onboarded users in an
+in-process TTL cache keyed by phone number, so those gates are answered
+without a query. The per-message counters are updated in the cached state
+and written behind in batches by a background flusher.
+
+Any ORM write to a User row invalidates its cache entry. The cache is per
+process; the TTL bounds how long another process's changes can go unseen.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import bindparam, event
+
+from ..models.models import db, User
+from ..utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every live cache, so ORM writes to User can invalidate all of them
+_live_caches = weakref.WeakSet()
+
+
+class UserState:
+    """
+    Cached onboarding state of a WhatsApp user
+
+    Exposes the same attribute names as User for the fields the bot reads,
+    so it can stand in for the row once the onboarding gates are passed.
+    """
+
+    __slots__ = (
+        'id', 'phone_number', 'is_authenticated', 'consent_given', 'conversation_started',
+        'department', 'location', 'message_count', 'last_message_time'
+    )
+
+    def __init__(self, id: int, phone_number: str, is_authenticated: bool, consent_given: bool,
+                 conversation_started: bool, department: Optional[str], location: Optional[str],
+                 message_count: int, last_message_time: Optional[datetime]):
+        self.id = id
+        self.phone_number = phone_number
+        self.is_authenticated = is_authenticated
+        self.consent_given = consent_given
+        self.conversation_started = conversation_started
+        self.department = department
+        self.location = location
+        self.message_count = message_count
+        self.last_message_time = last_message_time
+
+    @classmethod
+    def from_user(cls, user: User) -> 'UserState':
+        return cls(
+            id=user.id,
+            phone_number=user.phone_number,
+            is_authenticated=bool(user.is_authenticated),
+            consent_given=bool(user.consent_given),
+            conversation_started=bool(user.conversation_started),
+            department=user.department,
+            location=user.location,
+            message_count=user.message_count or 0,
+            last_message_time=user.last_message_time
+        )
+
+    @property
+    def is_onboarded(self) -> bool:
+        return bool(self.is_authenticated and self.consent_given and self.department and self.location)
+
+
+class UserStateCache:
+    """
+    TTL-bounded cache of onboarded users with write-behind message counters
+    """
+
+    def __init__(self, app: Optional[Flask] = None, ttl: float = 300.0, max_entries: int = 10000,
+                 flush_interval: float = 5.0, flush_batch_size: int = 500):
+        """
+        Initialize the cache
+
+        Args:
+            app: Flask application, used for the flusher's app context
+            ttl: Seconds a cached state is trusted before it is reloaded
+            max_entries: Maximum number of cached users
+            flush_interval: Seconds between counter flushes
+            flush_batch_size: Pending updates that trigger an early flush
+        """
+        self.app = app
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._entries = OrderedDict()  # phone_number -> (expires_at, UserState)
+        self._pending: Dict[int, Tuple[int, datetime]] = {}  # user_id -> (message_count, last_message_time)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        _live_caches.add(self)
+
+    def start(self):
+        """Start the background counter flusher"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, name='user-state-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flusher after writing out any pending counters"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def get(self, phone_number: str) -> Optional[UserState]:
+        """
+        Get the cached state of an onboarded user
+
+        Args:
+            phone_number: Sender phone number
+
+        Returns:
+            UserState, or None if not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(phone_number)
+                metrics.counter('bot.user_state_cache.hits').inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[phone_number]
+        metrics.counter('bot.user_state_cache.misses').inc()
+        return None
+
+    def put_user(self, user: User) -> UserState:
+        """
+        Cache the state of a freshly loaded User row
+
+        Counters still waiting to be written behind are newer than the row,
+        so they take precedence over its values.
+
+        Args:
+            user: Loaded User row
+
+        Returns:
+            The UserState now cached (not cached if the user is not onboarded)
+        """
+        state = UserState.from_user(user)
+        with self._lock:
+            pending = self._pending.get(state.id)
+            if pending is not None:
+                state.message_count, state.last_message_time = pending
+            if state.is_onboarded:
+                self._entries[state.phone_number] = (time.monotonic() + self.ttl, state)
+                self._entries.move_to_end(state.phone_number)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return state
+
+    def invalidate(self, phone_number: str):
+        """
+        Drop a user's cached state
+
+        Args:
+            phone_number: Phone number of the user
+        """
+        with self._lock:
+            self._entries.pop(phone_number, None)
+
+    def record_message(self, state: UserState):
+        """
+        Queue the state's message counters to be written behind
+
+        Args:
+            state: UserState whose message_count/last_message_time were updated
+        """
+        with self._lock:
+            self._pending[state.id] = (state.message_count, state.last_message_time)
+            pending = len(self._pending)
+        metrics.gauge('bot.user_state_cache.pending_writes').set(pending)
+        if pending >= self.flush_batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """
+        Write pending counters with one batched UPDATE
+
+        Returns:
+            Number of users updated
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        rows = [
+            {'user_id': user_id, 'count': count, 'last_time': last_time}
+            for user_id, (count, last_time) in batch.items()
+        ]
+        table = User.__table__
+        statement = table.update().where(table.c.id == bindparam('user_id')).values(
+            message_count=bindparam('count'), last_message_time=bindparam('last_time')
+        )
+        try:
+            # Core UPDATE by primary key: one executemany, no ORM events, and a
+            # user deleted in the meantime simply matches no row
+            db.session.execute(statement, rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error writing behind message counters: {str(e)}")
+            with self._lock:
+                # Keep anything newer recorded while the flush was running
+                for user_id, values in batch.items():
+                    self._pending.setdefault(user_id, values)
+            return 0
+
+        metrics.counter('bot.user_state_cache.flushed_writes').inc(len(rows))
+        return len(rows)
+
+    def _flush_loop(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_in_context()
+        self._flush_in_context()
+
+    def _flush_in_context(self):
+        if self.app is not None:
+            with self.app.app_context():
+                self.flush()
+        else:
+            self.flush()
+
+
+_cache: Optional[UserStateCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_user_state_cache(app: Flask) -> UserStateCache:
+    """
+    Get the process-wide user state cache, starting it on first use
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        Running UserStateCache configured from the app config
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = UserStateCache(
+                app=app,
+                ttl=app.config.get('BOT_USER_CACHE_TTL', 300),
+                flush_interval=app.config.get('BOT_COUNTER_FLUSH_INTERVAL', 5)
+            )
+            _cache.start()
+        return _cache
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_on_write(mapper, connection, target):
+    """Drop the cached state whenever a User row is written through the ORM"""
+    if target.phone_number:
+        for cache in list(_live_caches):
+            cache.invalidate(target.phone_number)
@@ -42,6 +42,26 @@ def create_celery(app):
         'process-gdpr-requests': {
             'task': 'gdpr.process_requests',
             'schedule': crontab(minute=0)  # Run hourly
+        },
+        'prune-processed-webhooks': {
+            'task': 'bot.prune_processed_webhooks',
+            'schedule': crontab(hour=1, minute=0)  # Run daily at 01:00
+        },
+        'prune-keyword-stats': {
+            'task': 'bot.prune_keyword_stats',
+            'schedule': crontab(hour=1, minute=30)  # Run daily at 01:30
+        },
+        'prune-inbound-messages': {
+            'task': 'bot.prune_inbound_messages',
+            'schedule': crontab(hour=1, minute=45)  # Run daily at 01:45
+        },
+        'prune-outbound-messages': {
+            'task': 'bot.prune_outbound_messages',
+            'schedule': crontab(hour=2, minute=0)  # Run daily at 02:00
+        },
+        'prune-sentiment-cache': {
+            'task': 'bot.prune_sentiment_cache',
+            'schedule': crontab(minute=15)  # Run hourly
         }
     }
     
@@ -55,4 +75,8 @@ def create_celery(app):
     return celery
 
 # Import tasks after Celery is configured
-from .gdpr_tasks import scheduled_retention_check, process_pending_requests 
\ No newline at end of file
+from .gdpr_tasks import scheduled_retention_check, process_pending_requests
+from .bot_tasks import (
+    scheduled_webhook_prune, scheduled_keyword_stat_prune, scheduled_inbound_message_prune,
+    scheduled_sentiment_cache_prune, scheduled_outbound_message_prune
+) 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Scheduled maintenance tasks for the WhatsApp bot.
+
+This module contains periodic cleanup of bookkeeping tables used
+by the bot webhook.
+"""
+
+from datetime import timedelta
+from flask import current_app
+from celery import shared_task
+from backend.src.services.delivery_status import prune_outbound_messages
+from backend.src.services.idempotency import prune_processed_webhooks
+from backend.src.services.inbound_worker import prune_inbound_messages
+from backend.src.services.keyword_rollup import prune_keyword_stats
+from backend.src.services.sentiment_cache import prune_sentiment_cache
+
+@shared_task(name='bot.prune_processed_webhooks')
+def scheduled_webhook_prune():
+    """
+    Delete processed webhook records that are past Twilio's retry window
+    
+    This task runs daily; the in-memory cache and unique index only need
+    to cover recent deliveries.
+    """
+    with current_app.app_context():
+        try:
+            deleted = prune_processed_webhooks()
+            current_app.logger.info(f"Pruned {deleted} processed webhook records")
+            
+        except Exception as e:
+            current_app.logger.error(f"Error pruning processed webhook records: {str(e)}")
+            raise
+
+@shared_task(name='bot.prune_keyword_stats')
+def scheduled_keyword_stat_prune():
+    """
+    Delete legacy per-user keyword rows past their retention period
+    
+    This task runs daily; keyword counts live on in the daily rollup.
+    """
+    with current_app.app_context():
+        try:
+            prune_keyword_stats(current_app.config.get('KEYWORD_STAT_RETENTION_DAYS', 30))
+            
+        except Exception as e:
+            current_app.logger.error(f"Error pruning per-user keyword rows: {str(e)}")
+            raise
+
+@shared_task(name='bot.prune_inbound_messages')
+def scheduled_inbound_message_prune():
+    """
+    Delete stored inbound messages past their retention period
+    
+    This task runs daily; messages are only kept to replay unprocessed ones.
+    """
+    with current_app.app_context():
+        try:
+            prune_inbound_messages(current_app.config.get('INBOUND_MESSAGE_RETENTION_DAYS', 30))
+            
+        except Exception as e:
+            current_app.logger.error(f"Error pruning inbound messages: {str(e)}")
+            raise
+
+@shared_task(name='bot.prune_sentiment_cache')
+def scheduled_sentiment_cache_prune():
+    """
+    Delete expired sentiment cache rows and keep the table to its size limit
+    
+    This task runs hourly; the oldest cached results are evicted first.
+    """
+    with current_app.app_context():
+        try:
+            deleted = prune_sentiment_cache(
+                ttl=timedelta(hours=current_app.config.get('SENTIMENT_CACHE_TTL_HOURS', 168)),
+                max_rows=current_app.config.get('SENTIMENT_CACHE_MAX_ROWS', 100000)
+            )
+            current_app.logger.info(f"Pruned {deleted} sentiment cache rows")
+            
+        except Exception as e:
+            current_app.logger.error(f"Error pruning the sentiment cache: {str(e)}")
+            raise
+
+@shared_task(name='bot.prune_outbound_messages')
+def scheduled_outbound_message_prune():
+    """
+    Delete outbound message records past their retention period
+    
+    This task runs daily; records are only kept for delivery statistics.
+    """
+    with current_app.app_context():
+        try:
+            prune_outbound_messages(current_app.config.get('OUTBOUND_MESSAGE_RETENTION_DAYS', 90))
+            
+        except Exception as e:
+            current_app.logger.error(f"Error pruning outbound messages: {str(e)}")
+            raise
@@ -32,7 +32,7 @@ file_handler.setFormatter(formatter)
 # Add the handler to the logger
 audit_logger.addHandler(file_handler)
 
-def log_audit_event(user_id, action, target, details=None, ip_address=None):
+def log_audit_event(user_id, action, target, details=None, ip_address=None, commit=True):
     """
     Log an audit event with user_id, timestamp, action, and target.
     
@@ -42,6 +42,8 @@ def log_audit_event(user_id, action, target, details=None, ip_address=None):
         target (str): The target of the action (e.g., "employee_data", "sentiment_log")
         details (dict, optional): Additional details about the action
         ip_address (str, optional): The IP address of the user
+        commit (bool, optional): Commit the audit record immediately. Pass False
+            to add it to the caller's transaction instead.
     """
     event_id = str(uuid.uuid4())
     timestamp = datetime.utcnow().isoformat()
@@ -62,8 +64,7 @@ def log_audit_event(user_id, action, target, details=None, ip_address=None):
     # Also store in database if available
     try:
         if current_app and hasattr(current_app, 'extensions') and 'sqlalchemy' in current_app.extensions:
-            db = current_app.extensions['sqlalchemy'].db
-            from ..models.models import AuditLog
+            from ..models.models import db, AuditLog
             
             # Create a new AuditLog record
             audit_log = AuditLog(
@@ -75,9 +76,10 @@ def log_audit_event(user_id, action, target, details=None, ip_address=None):
                 timestamp=datetime.utcnow()
             )
             
-            # Add and commit to the database
+            # Add to the database, committing unless the caller owns the transaction
             db.session.add(audit_log)
-            db.session.commit()
+            if commit:
+                db.session.commit()
     except Exception as e:
         # Log any errors but don't fail the request
         if current_app:
@@ -136,6 +136,18 @@ def role_required(*roles):
         return wrapper
     return decorator
 
+def hr_required(fn):
+    """
+    Decorator restricting a route to HR and admin users
+    """
+    return role_required('hr', 'admin')(fn)
+
+def admin_required(fn):
+    """
+    Decorator restricting a route to admin users
+    """
+    return role_required('admin')(fn)
+
 def check_gdpr_compliance(fn):
     """
     Decorator to check GDPR compliance before accessing user data
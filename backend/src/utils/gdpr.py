@@ -13,9 +13,33 @@ from flask import current_app
 from sqlalchemy import and_
 from backend.src.models.models import (
     db, User, Message, KeywordStat, SentimentLog,
-    AuthUser, Employee, CheckIn, GDPRRequest
+    AuthUser, Employee, CheckIn, GDPRRequest, ConversationTurn, ConversationSummary,
+    CheckInSchedule, InboundMessage, OutboundMessage
 )
 
+def _phone_forms(user_id: int) -> List[str]:
+    """
+    Get the forms a bot user's number may be stored in
+
+    The webhook and the delivery status records store numbers without the
+    whatsapp: prefix, so both forms of the user's number are matched.
+    """
+    user = User.query.get(user_id)
+    if not user or not user.phone_number:
+        return []
+
+    number = user.phone_number
+    bare = number[9:] if number.startswith('whatsapp:') else number
+    return [bare, f'whatsapp:{bare}']
+
+def _inbound_messages(user_id: int):
+    """Query the inbound messages of a bot user"""
+    return InboundMessage.query.filter(InboundMessage.sender.in_(_phone_forms(user_id)))
+
+def _outbound_messages(user_id: int):
+    """Query the delivery records of the messages sent to a bot user"""
+    return OutboundMessage.query.filter(OutboundMessage.to_number.in_(_phone_forms(user_id)))
+
 def anonymize_user_data(user_id: int) -> bool:
     """
     Anonymize user data while preserving statistical value
@@ -50,6 +74,27 @@ def anonymize_user_data(user_id: int) -> bool:
             msg.content = "[Content Removed]"
             msg.detected_keywords = None
         
+        # Anonymize conversation transcript
+        ConversationTurn.query.filter_by(user_id=user_id).update(
+            {'content': "[Content Removed]"}, synchronize_session=False
+        )
+        
+        # Anonymize messages stored by the async webhook
+        _inbound_messages(user_id).update(
+            {'body': "[Content Removed]", 'error': None}, synchronize_session=False
+        )
+        
+        # Keep delivery records for the statistics but drop the recipient
+        _outbound_messages(user_id).update(
+            {'to_number': "[removed]"}, synchronize_session=False
+        )
+        
+        # The rolling summary is derived from the transcript, so it goes too
+        ConversationSummary.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        
+        # Stop proactive check-ins
+        CheckInSchedule.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        
         # Keep aggregated sentiment data but remove personal information
         sentiment_logs = SentimentLog.query.filter_by(user_id=user_id).all()
         for log in sentiment_logs:
@@ -87,7 +132,10 @@ def export_user_data(user_id: int) -> Dict[str, Any]:
         'employee_information': {},
         'messages': [],
         'check_ins': [],
-        'sentiment_logs': []
+        'sentiment_logs': [],
+        'inbound_messages': [],
+        'outbound_messages': [],
+        'conversation_summary': None
     }
     
     # Get employee information
@@ -119,6 +167,33 @@ def export_user_data(user_id: int) -> Dict[str, Any]:
         } for log in sentiment_logs
     ]
     
+    # Get messages stored by the async webhook
+    data['inbound_messages'] = [
+        {
+            'body': inbound.body,
+            'status': inbound.status,
+            'received_at': inbound.received_at.isoformat() if inbound.received_at else None
+        } for inbound in _inbound_messages(user_id).order_by(InboundMessage.id)
+    ]
+    
+    # Get the delivery records of messages sent to the user
+    data['outbound_messages'] = [
+        {
+            'category': outbound.category,
+            'status': outbound.status,
+            'error_code': outbound.error_code,
+            'created_at': outbound.created_at.isoformat() if outbound.created_at else None
+        } for outbound in _outbound_messages(user_id).order_by(OutboundMessage.id)
+    ]
+    
+    # Get the rolling conversation summary
+    summary = ConversationSummary.query.filter_by(user_id=user_id).first()
+    if summary:
+        data['conversation_summary'] = {
+            'summary': summary.summary,
+            'updated_at': summary.updated_at.isoformat() if summary.updated_at else None
+        }
+    
     return data
 
 def delete_user_data(user_id: int) -> bool:
@@ -134,13 +209,24 @@ def delete_user_data(user_id: int) -> bool:
     try:
         # Delete related records first
         Message.query.filter_by(user_id=user_id).delete()
+        ConversationTurn.query.filter_by(user_id=user_id).delete()
+        ConversationSummary.query.filter_by(user_id=user_id).delete()
+        _inbound_messages(user_id).delete(synchronize_session=False)
+        _outbound_messages(user_id).delete(synchronize_session=False)
         KeywordStat.query.filter_by(user_id=user_id).delete()
         SentimentLog.query.filter_by(user_id=user_id).delete()
         CheckIn.query.filter_by(user_id=user_id).delete()
+        CheckInSchedule.query.filter_by(user_id=user_id).delete()
         
         # Delete employee record
         Employee.query.filter_by(user_id=user_id).delete()
         
+        # Delete the bot user (phone number) once nothing references it; an ORM
+        # delete so the user state cache drops the user
+        bot_user = db.session.get(User, user_id)
+        if bot_user:
+            db.session.delete(bot_user)
+        
         # Delete user record
         user = AuthUser.query.get(user_id)
         if user:
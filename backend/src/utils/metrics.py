@@ -0,0 +1,171 @@
+"""
+In-process metrics for the Manobal platform.
+
+This module provides lightweight counters, gauges and latency histograms
+that services record into, and a registry that the API exposes as a JSON
+snapshot. Metrics are kept per process; nothing is exported externally.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile over an already sorted list of samples"""
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, int(round(pct / 100.0 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down, e.g. a queue depth"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """
+    Latency histogram backed by a bounded reservoir of recent samples
+
+    Percentiles are computed over the most recent `reservoir_size` samples,
+    while `count` and `sum` cover every observation.
+    """
+
+    def __init__(self, reservoir_size: int = 1024):
+        self._samples = deque(maxlen=reservoir_size)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+            self._count += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Context manager that observes the elapsed wall time in seconds"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Get a percentile over the recent samples
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            The sample value at that percentile, or None if nothing was observed
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        return _percentile(samples, pct)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self._count
+            total = self._sum
+        return {
+            'count': count,
+            'sum': total,
+            'p50': _percentile(samples, 50),
+            'p95': _percentile(samples, 95),
+            'p99': _percentile(samples, 99),
+            'max': samples[-1] if samples else None
+        }
+
+
+class MetricsRegistry:
+    """Named collection of counters, gauges and histograms"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = factory()
+                    self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get_or_create(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get_or_create(name, Gauge)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get_or_create(name, Histogram)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current value of every registered metric"""
+        with self._lock:
+            items = list(self._metrics.items())
+        return {name: metric.snapshot() for name, metric in sorted(items)}
+
+    def reset(self):
+        """Drop all registered metrics (used by tests)"""
+        with self._lock:
+            self._metrics.clear()
+
+
+# Process-wide registry used by the services
+metrics = MetricsRegistry()
@@ -0,0 +1,40 @@
+"""add broadcast job model
+
+Revision ID: broadcast_job_20261016
+Revises: keyword_daily_stat_20261016
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'broadcast_job_20261016'
+down_revision = 'keyword_daily_stat_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create broadcast_job table
+    op.create_table(
+        'broadcast_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('criteria', sa.Text(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('sent', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    # Drop broadcast_job table
+    op.drop_table('broadcast_job')
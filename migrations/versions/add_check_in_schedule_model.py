@@ -0,0 +1,44 @@
+"""add check-in schedule model
+
+Revision ID: check_in_schedule_20261016
+Revises: outbound_message_20261016
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'check_in_schedule_20261016'
+down_revision = 'outbound_message_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create check_in_schedule table
+    op.create_table(
+        'check_in_schedule',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('cadence_days', sa.Integer(), nullable=False),
+        sa.Column('timezone', sa.String(length=50), nullable=False),
+        sa.Column('window_start', sa.Time(), nullable=False),
+        sa.Column('window_end', sa.Time(), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('next_fire_at', sa.DateTime(), nullable=False),
+        sa.Column('last_fired_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+    )
+    op.create_index('ix_check_in_schedule_due', 'check_in_schedule', ['active', 'next_fire_at'], unique=False)
+
+
+def downgrade():
+    # Drop check_in_schedule table
+    op.drop_index('ix_check_in_schedule_due', table_name='check_in_schedule')
+    op.drop_table('check_in_schedule')
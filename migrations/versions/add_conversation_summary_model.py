@@ -0,0 +1,36 @@
+"""add conversation summary model
+
+Revision ID: conversation_summary_20261016
+Revises: conversation_turn_20261016
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'conversation_summary_20261016'
+down_revision = 'conversation_turn_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create conversation_summary table
+    op.create_table(
+        'conversation_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('summarized_through_turn_no', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+    )
+
+
+def downgrade():
+    # Drop conversation_summary table
+    op.drop_table('conversation_summary')
@@ -0,0 +1,93 @@
+"""add conversation turn model
+
+Revision ID: conversation_turn_20261016
+Revises: inbound_message_20261016
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'conversation_turn_20261016'
+down_revision = 'inbound_message_20261016'
+branch_labels = None
+depends_on = None
+
+SESSION_SEPARATOR = '--- New Session ---'
+INSERT_BATCH_SIZE = 1000
+
+
+def split_history_blob(blob):
+    """
+    Split a legacy conversation_history blob into (role, content) turns.
+
+    Kept local to the migration so later changes to the application code
+    cannot alter what this revision does.
+    """
+    turns = []
+    for line in (blob or '').split('\n'):
+        if line.strip() == SESSION_SEPARATOR:
+            turns.append(['session', ''])
+        elif line.startswith('User: '):
+            turns.append(['user', line[len('User: '):]])
+        elif line.startswith('AI: '):
+            turns.append(['ai', line[len('AI: '):]])
+        elif turns and turns[-1][0] != 'session':
+            turns[-1][1] += '\n' + line
+    return [(role, content.strip('\n')) for role, content in turns]
+
+
+def upgrade():
+    # Create conversation_turn table
+    conversation_turn = op.create_table(
+        'conversation_turn',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('turn_no', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=10), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        # Also serves as the (user_id, turn_no) index for recent-window reads
+        sa.UniqueConstraint('user_id', 'turn_no', name='uq_conversation_turn_user_turn')
+    )
+
+    # Split existing transcript blobs into turns
+    bind = op.get_bind()
+    user_table = sa.table(
+        'user',
+        sa.column('id', sa.Integer),
+        sa.column('conversation_history', sa.Text),
+        sa.column('updated_at', sa.DateTime)
+    )
+    rows = bind.execute(
+        sa.select(user_table.c.id, user_table.c.conversation_history, user_table.c.updated_at)
+        .where(user_table.c.conversation_history.isnot(None))
+    )
+
+    batch = []
+    for user_id, blob, updated_at in rows:
+        for turn_no, (role, content) in enumerate(split_history_blob(blob), start=1):
+            batch.append({
+                'user_id': user_id,
+                'turn_no': turn_no,
+                'role': role,
+                'content': content,
+                'created_at': updated_at or datetime.utcnow()
+            })
+        if len(batch) >= INSERT_BATCH_SIZE:
+            op.bulk_insert(conversation_turn, batch)
+            batch = []
+
+    if batch:
+        op.bulk_insert(conversation_turn, batch)
+
+
+def downgrade():
+    # The legacy blob column is left untouched by upgrade, so dropping the table is enough
+    op.drop_table('conversation_turn')
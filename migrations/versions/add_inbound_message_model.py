@@ -0,0 +1,43 @@
+"""add inbound message model
+
+Revision ID: inbound_message_20261016
+Revises: check_in_model_20240525
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'inbound_message_20261016'
+down_revision = 'check_in_model_20240525'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create inbound_message table for acknowledge-then-process webhook mode
+    op.create_table(
+        'inbound_message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('message_sid', sa.String(length=64), nullable=True),
+        sa.Column('sender', sa.String(length=20), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index(op.f('ix_inbound_message_message_sid'), 'inbound_message', ['message_sid'], unique=False)
+    op.create_index(op.f('ix_inbound_message_sender'), 'inbound_message', ['sender'], unique=False)
+    op.create_index(op.f('ix_inbound_message_received_at'), 'inbound_message', ['received_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_inbound_message_received_at'), table_name='inbound_message')
+    op.drop_index(op.f('ix_inbound_message_sender'), table_name='inbound_message')
+    op.drop_index(op.f('ix_inbound_message_message_sid'), table_name='inbound_message')
+    op.drop_table('inbound_message')
@@ -0,0 +1,63 @@
+"""add keyword daily stat model
+
+Revision ID: keyword_daily_stat_20261016
+Revises: processed_webhook_20261016
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'keyword_daily_stat_20261016'
+down_revision = 'processed_webhook_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create keyword_daily_stat table
+    keyword_daily_stat = op.create_table(
+        'keyword_daily_stat',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('location', sa.String(length=50), nullable=False),
+        sa.Column('keyword', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'department', 'location', 'keyword', name='uq_keyword_daily_stat')
+    )
+
+    # Backfill the rollup from the per-user rows in one INSERT ... SELECT ... GROUP BY.
+    # Running it here means it happens exactly once, before the new code starts
+    # incrementing the rollup.
+    keyword_stat = sa.table(
+        'keyword_stat',
+        sa.column('department', sa.String),
+        sa.column('location', sa.String),
+        sa.column('keyword', sa.String),
+        sa.column('count', sa.Integer),
+        sa.column('timestamp', sa.DateTime)
+    )
+    day = sa.func.date(keyword_stat.c.timestamp)
+    department = sa.func.coalesce(keyword_stat.c.department, 'Unknown')
+    location = sa.func.coalesce(keyword_stat.c.location, 'Unknown')
+    aggregated = sa.select(
+        day, department, location, keyword_stat.c.keyword,
+        sa.func.coalesce(sa.func.sum(keyword_stat.c['count']), 0)
+    ).where(
+        keyword_stat.c.timestamp.isnot(None)
+    ).group_by(day, department, location, keyword_stat.c.keyword)
+
+    op.execute(
+        keyword_daily_stat.insert().from_select(
+            ['day', 'department', 'location', 'keyword', 'count'], aggregated
+        )
+    )
+
+
+def downgrade():
+    # The per-user rows are not touched by upgrade, so dropping the table is enough
+    op.drop_table('keyword_daily_stat')
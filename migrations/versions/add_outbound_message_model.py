@@ -0,0 +1,45 @@
+"""add outbound message model
+
+Revision ID: outbound_message_20261016
+Revises: broadcast_job_20261016
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'outbound_message_20261016'
+down_revision = 'broadcast_job_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create outbound_message table
+    op.create_table(
+        'outbound_message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sid', sa.String(length=64), nullable=False),
+        sa.Column('to_number', sa.String(length=20), nullable=False),
+        sa.Column('category', sa.String(length=20), nullable=False),
+        sa.Column('broadcast_job_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error_code', sa.String(length=10), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['broadcast_job_id'], ['broadcast_job.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbound_message_sid'), 'outbound_message', ['sid'], unique=True)
+    op.create_index(op.f('ix_outbound_message_broadcast_job_id'), 'outbound_message', ['broadcast_job_id'], unique=False)
+    op.create_index(op.f('ix_outbound_message_created_at'), 'outbound_message', ['created_at'], unique=False)
+
+
+def downgrade():
+    # Drop outbound_message table
+    op.drop_index(op.f('ix_outbound_message_created_at'), table_name='outbound_message')
+    op.drop_index(op.f('ix_outbound_message_broadcast_job_id'), table_name='outbound_message')
+    op.drop_index(op.f('ix_outbound_message_sid'), table_name='outbound_message')
+    op.drop_table('outbound_message')
@@ -0,0 +1,35 @@
+"""add processed webhook model
+
+Revision ID: processed_webhook_20261016
+Revises: conversation_summary_20261016
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'processed_webhook_20261016'
+down_revision = 'conversation_summary_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create processed_webhook table
+    op.create_table(
+        'processed_webhook',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('message_sid', sa.String(length=64), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('message_sid')
+    )
+    op.create_index(op.f('ix_processed_webhook_received_at'), 'processed_webhook', ['received_at'], unique=False)
+
+
+def downgrade():
+    # Drop processed_webhook table
+    op.drop_index(op.f('ix_processed_webhook_received_at'), table_name='processed_webhook')
+    op.drop_table('processed_webhook')
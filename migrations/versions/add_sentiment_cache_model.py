@@ -0,0 +1,37 @@
+"""add sentiment cache model
+
+Revision ID: sentiment_cache_20261016
+Revises: check_in_schedule_20261016
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'sentiment_cache_20261016'
+down_revision = 'check_in_schedule_20261016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create sentiment_cache_entry table
+    op.create_table(
+        'sentiment_cache_entry',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model_version', sa.String(length=50), nullable=False),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key')
+    )
+    op.create_index(op.f('ix_sentiment_cache_entry_created_at'), 'sentiment_cache_entry', ['created_at'], unique=False)
+
+
+def downgrade():
+    # Drop sentiment_cache_entry table
+    op.drop_index(op.f('ix_sentiment_cache_entry_created_at'), table_name='sentiment_cache_entry')
+    op.drop_table('sentiment_cache_entry')
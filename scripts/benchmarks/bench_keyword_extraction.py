@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Benchmark per-message keyword extraction: word_tokenize vs. the compiled-regex extractor
+
+Runs the original extract_keywords implementation (stopword set rebuilt and
+Punkt/Treebank tokenization on every call) and KeywordExtractor over the
+keyword corpus fixture, checks that both return the same keywords and prints
+the time per message for single-message and batch extraction.
+
+Usage:
+    python scripts/benchmarks/bench_keyword_extraction.py [--rounds 200]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+nltk.data.path.insert(0, str(PROJECT_ROOT / 'nltk_data'))
+
+from backend.src.services.keyword_extraction import KeywordExtractor, load_stopwords
+from tests.fixtures.data.keyword_corpus import KEYWORD_CORPUS
+
+
+def legacy_extract_keywords(text):
+    """The extract_keywords implementation the bot used before KeywordExtractor"""
+    tokens = word_tokenize(text.lower())
+    stop_words = set(stopwords.words('english'))
+    keywords = [word for word in tokens if word.isalpha() and word not in stop_words and len(word) > 3]
+    return list(set(keywords))
+
+
+def time_per_message(extract, messages, rounds):
+    """Best of three runs, in microseconds per message"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            extract(messages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (rounds * len(messages)) * 1e6
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark keyword extraction per message')
+    parser.add_argument('--rounds', type=int, default=200, help='Passes over the corpus per timing run')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    messages = [text for text, _ in KEYWORD_CORPUS]
+    extractor = KeywordExtractor(load_stopwords())
+
+    for text in messages:
+        assert set(legacy_extract_keywords(text)) == set(extractor.extract(text)), text
+
+    legacy = time_per_message(lambda batch: [legacy_extract_keywords(text) for text in batch],
+                              messages, max(1, args.rounds // 10))
+    single = time_per_message(lambda batch: [extractor.extract(text) for text in batch], messages, args.rounds)
+    batch = time_per_message(extractor.extract_batch, messages, args.rounds)
+
+    print(f"{len(messages)} messages, keywords identical")
+    print(f"{'implementation':<28}{'us/message':>12}{'speedup':>10}")
+    print(f"{'word_tokenize (legacy)':<28}{legacy:>12.1f}{1:>9.1f}x")
+    print(f"{'KeywordExtractor.extract':<28}{single:>12.1f}{legacy / single:>9.1f}x")
+    print(f"{'KeywordExtractor batch':<28}{batch:>12.1f}{legacy / batch:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Benchmark the dashboard top-keywords query on per-message rows vs. the daily rollup
+
+Generates synthetic keyword data for a number of messages into a temporary
+SQLite database, stored both as legacy KeywordStat rows (one per keyword
+per message) and as the KeywordDailyStat rollup, then times the top-20
+query against each.
+
+Usage:
+    python scripts/benchmarks/bench_keyword_stats.py [--messages 1000000] [--days 90]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from backend.src.models.models import db, KeywordStat, KeywordDailyStat
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'HR', 'Finance']
+LOCATIONS = ['New York', 'London', 'Delhi', 'Remote']
+KEYWORDS_PER_MESSAGE = 3
+INSERT_BATCH_SIZE = 50000
+
+
+def build_vocabulary(size):
+    """Keywords with a skewed (Zipf-like) frequency distribution"""
+    words = [f"word{i:05d}" for i in range(size)]
+    weights = [1.0 / (rank + 1) for rank in range(size)]
+    return words, weights
+
+
+def generate(engine, messages, days, vocabulary_size, seed=7):
+    """Insert legacy rows for `messages` messages and build the rollup from them"""
+    rng = random.Random(seed)
+    words, weights = build_vocabulary(vocabulary_size)
+    start = datetime.utcnow() - timedelta(days=days)
+    legacy = KeywordStat.__table__
+
+    with engine.begin() as connection:
+        batch = []
+        for n in range(messages):
+            timestamp = start + timedelta(seconds=rng.randrange(days * 86400))
+            department = rng.choice(DEPARTMENTS)
+            location = rng.choice(LOCATIONS)
+            for keyword in set(rng.choices(words, weights, k=KEYWORDS_PER_MESSAGE)):
+                batch.append({
+                    'user_id': n % 5000 + 1, 'department': department, 'location': location,
+                    'keyword': keyword, 'count': 1, 'timestamp': timestamp
+                })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                connection.execute(legacy.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(legacy.insert(), batch)
+
+        # Same aggregation the migration uses to backfill the rollup
+        day = sa.func.date(legacy.c.timestamp)
+        connection.execute(
+            KeywordDailyStat.__table__.insert().from_select(
+                ['day', 'department', 'location', 'keyword', 'count'],
+                sa.select(day, legacy.c.department, legacy.c.location, legacy.c.keyword,
+                          sa.func.sum(legacy.c['count']))
+                .group_by(day, legacy.c.department, legacy.c.location, legacy.c.keyword)
+            )
+        )
+
+
+def top_keywords(session, model, department=None):
+    query = session.query(model.keyword, sa.func.sum(model.count).label('total_count'))
+    if department:
+        query = query.filter(model.department == department)
+    return query.group_by(model.keyword).order_by(sa.desc('total_count')).limit(20).all()
+
+
+def time_query(session, model, department=None, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = top_keywords(session, model, department)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the top-keywords dashboard query')
+    parser.add_argument('--messages', type=int, default=1000000, help='Synthetic messages to generate')
+    parser.add_argument('--days', type=int, default=90, help='Days the messages are spread over')
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct keywords')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+
+    try:
+        engine = sa.create_engine(f'sqlite:///{path}')
+        db.metadata.create_all(engine, tables=[KeywordStat.__table__, KeywordDailyStat.__table__])
+
+        started = time.perf_counter()
+        generate(engine, args.messages, args.days, args.vocabulary)
+        print(f"Generated {args.messages} messages in {time.perf_counter() - started:.1f}s")
+
+        with Session(engine) as session:
+            legacy_rows = session.query(KeywordStat).count()
+            rollup_rows = session.query(KeywordDailyStat).count()
+            print(f"Rows: keyword_stat={legacy_rows} keyword_daily_stat={rollup_rows}")
+            print(f"{'query':<28}{'keyword_stat (s)':>18}{'rollup (s)':>12}")
+            for label, department in (('top 20, all', None), ('top 20, one department', 'Engineering')):
+                legacy_time, legacy_result = time_query(session, KeywordStat, department)
+                rollup_time, rollup_result = time_query(session, KeywordDailyStat, department)
+                assert [row[1] for row in legacy_result] == [row[1] for row in rollup_result]
+                print(f"{label:<28}{legacy_time:>18.3f}{rollup_time:>12.3f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
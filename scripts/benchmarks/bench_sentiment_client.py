@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Benchmark per-message overhead of the Hume sentiment client
+
+Runs the local Hume stand-in (scripts/loadtest/stand_ins.py), by default
+with no injected latency, so what is measured is the client's own overhead.
+The per-message path builds a new event loop and httpx.AsyncClient for every
+message (the old analyze_sentiment); the shared path sends every message on
+one long-lived SentimentService, first one at a time and then with all
+messages submitted at once (its mean is wall time per message). The batched
+mode submits all messages at once to a service that groups them into
+multi-text Hume jobs. Each mode also reports the Hume requests it made per
+message.
+
+With zero latency the stand-in and the client share one process and GIL,
+so the concurrent mode only pulls ahead once --hume adds realistic latency.
+
+Usage:
+    python scripts/benchmarks/bench_sentiment_client.py [--messages 500] [--hume median=0.05,p99=0.2] \
+        [--batch-size 20] [--batch-wait-ms 250]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts' / 'loadtest'))
+
+from backend.src.services.sentiment_analysis import HumeSentimentAnalyzer, SentimentService
+from stand_ins import LatencyProfile, StandInServer, StandInState
+
+TEXTS = [
+    "I had a rough day at work",
+    "Things are a bit better today",
+    "Honestly I'm exhausted",
+    "Thanks, that helps a little"
+]
+
+
+def bench_per_message(analyzer, count):
+    """New event loop and client per message, as analyze_sentiment used to do"""
+    timings = []
+    for n in range(count):
+        start = time.perf_counter()
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(analyzer.analyze_text(TEXTS[n % len(TEXTS)]))
+        finally:
+            loop.close()
+        timings.append(time.perf_counter() - start)
+        assert result['source'] == 'hume_api', result
+    return timings, sum(timings)
+
+
+def bench_shared_sequential(service, count):
+    """One message at a time on the shared service"""
+    timings = []
+    for n in range(count):
+        start = time.perf_counter()
+        result = service.analyze(TEXTS[n % len(TEXTS)])
+        timings.append(time.perf_counter() - start)
+        assert result['source'] == 'hume_api', result
+    return timings, sum(timings)
+
+
+def bench_shared_concurrent(service, count):
+    """All messages submitted at once on the shared service"""
+    start = time.perf_counter()
+    futures = [service.submit(TEXTS[n % len(TEXTS)]) for n in range(count)]
+    results = [future.result(timeout=60) for future in futures]
+    elapsed = time.perf_counter() - start
+    assert all(result['source'] == 'hume_api' for result in results)
+    return [elapsed / count] * count, elapsed
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the Hume sentiment client')
+    parser.add_argument('--messages', type=int, default=500, help='Messages per mode')
+    parser.add_argument('--hume', type=LatencyProfile.parse, default=LatencyProfile(),
+                        help='Stand-in latency, e.g. "median=0.05,p99=0.2" (default: none)')
+    parser.add_argument('--max-connections', type=int, default=20, help='Pooled connections')
+    parser.add_argument('--batch-size', type=int, default=20, help='Texts per Hume job in the batched mode')
+    parser.add_argument('--batch-wait-ms', type=int, default=250,
+                        help='Milliseconds a text waits for its batch in the batched mode')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    server = StandInServer(StandInState(profiles={'hume': args.hume}), port=0)
+    server.start()
+    analyzer = HumeSentimentAnalyzer(api_key='bench', api_url=f'{server.url}/v0/batch/jobs')
+    service = SentimentService(analyzer, max_connections=args.max_connections)
+    service.start()
+    batched = SentimentService(analyzer, max_connections=args.max_connections,
+                               batch_size=args.batch_size, batch_wait=args.batch_wait_ms / 1000)
+    batched.start()
+
+    # Warm up both paths so imports and the first connection are not counted
+    bench_per_message(analyzer, 5)
+    bench_shared_sequential(service, 5)
+
+    print(f"{args.messages} messages per mode, Hume stand-in {args.hume}")
+    print(f"{'mode':<22}{'mean ms':>10}{'p95 ms':>10}{'msgs/s':>10}{'calls/msg':>11}")
+    try:
+        for name, bench, target in (('per-message client', bench_per_message, analyzer),
+                                    ('shared, sequential', bench_shared_sequential, service),
+                                    ('shared, concurrent', bench_shared_concurrent, service),
+                                    ('batched, concurrent', bench_shared_concurrent, batched)):
+            calls_before = server.state.stats()['hume']['requests']
+            timings, total = bench(target, args.messages)
+            calls = server.state.stats()['hume']['requests'] - calls_before
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(set(timings)) > 1 else timings[0]
+            print(f"{name:<22}{statistics.mean(timings) * 1000:>10.2f}{p95 * 1000:>10.2f}"
+                  f"{args.messages / total:>10.0f}{calls / args.messages:>11.2f}")
+    finally:
+        batched.stop()
+        service.stop()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark waiting on Hume batch jobs: fixed polling vs. adaptive polling vs. callbacks
+
+Submits many texts at once, one Hume job each, to the local Hume stand-in
+(scripts/loadtest/stand_ins.py) with jobs that take --job-seconds to
+complete, and waits for them in three ways:
+
+    fixed      a poll every 2 seconds (the old _poll_for_results)
+    adaptive   first poll at the median recent job duration, then doubling
+    callback   jobs parked until the stand-in posts their completion
+
+and reports the mean and p95 time from submit to result, the Hume polls
+per job and the wall time for all jobs.
+
+Usage:
+    python scripts/benchmarks/bench_sentiment_jobs.py [--jobs 100] [--job-seconds 1.0]
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts' / 'loadtest'))
+
+from backend.src.services.sentiment_analysis import HumeSentimentAnalyzer, SentimentService
+from backend.src.utils.metrics import metrics
+from stand_ins import StandInServer, StandInState
+
+
+class CallbackReceiver(ThreadingHTTPServer):
+    daemon_threads = True
+    # Every job calls back at about the same moment
+    request_queue_size = 1024
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Forwards Hume completion callbacks to the service, like /api/v1/bot/hume-callback"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.service.complete_job(data['job_id'], data)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def run(service, count):
+    """Submit every text at once and time each one from submit to result"""
+    timings = []
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def on_done(submitted_at):
+        def record(_):
+            with lock:
+                timings.append(time.perf_counter() - submitted_at)
+                if len(timings) == count:
+                    done.set()
+        return record
+
+    start = time.perf_counter()
+    for n in range(count):
+        service.submit(f'message {n}').add_done_callback(on_done(time.perf_counter()))
+    done.wait(300)
+    return timings, time.perf_counter() - start
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark waiting on Hume batch jobs')
+    parser.add_argument('--jobs', type=int, default=100, help='Jobs submitted at once')
+    parser.add_argument('--job-seconds', type=float, default=1.0, help='Seconds a stand-in job takes')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    server = StandInServer(StandInState(hume_job_seconds=args.job_seconds), port=0)
+    server.start()
+    receiver = CallbackReceiver(('127.0.0.1', 0), CallbackHandler)
+    threading.Thread(target=receiver.serve_forever, daemon=True).start()
+    api_url = f'{server.url}/v0/batch/jobs'
+    callback_url = 'http://127.0.0.1:%d/hume-callback' % receiver.server_address[1]
+
+    analyzers = (
+        ('fixed', HumeSentimentAnalyzer('bench', api_url, poll_initial=2.0, poll_factor=1.0, poll_max=2.0,
+                                        poll_min_samples=10 ** 9)),
+        ('adaptive', HumeSentimentAnalyzer('bench', api_url)),
+        ('callback', HumeSentimentAnalyzer('bench', api_url, callback_url=callback_url))
+    )
+
+    print(f"{args.jobs} jobs of {args.job_seconds}s each, submitted at once")
+    print(f"{'mode':<12}{'mean s':>10}{'p95 s':>10}{'polls/job':>11}{'wall s':>10}")
+    try:
+        for name, analyzer in analyzers:
+            metrics.reset()
+            service = SentimentService(analyzer, max_connections=50)
+            receiver.service = service
+            service.start()
+            try:
+                if name == 'adaptive':
+                    # Let the first jobs seed the observed durations
+                    run(service, analyzer.poll_min_samples)
+                    polls_before = metrics.counter('sentiment.job_polls').value
+                else:
+                    polls_before = 0
+                timings, wall = run(service, args.jobs)
+                polls = metrics.counter('sentiment.job_polls').value - polls_before
+            finally:
+                service.stop()
+            print(f"{name:<12}{statistics.mean(timings):>10.2f}{statistics.quantiles(timings, n=20)[-1]:>10.2f}"
+                  f"{polls / args.jobs:>11.2f}{wall:>10.2f}")
+    finally:
+        receiver.shutdown()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
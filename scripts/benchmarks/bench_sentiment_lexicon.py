@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Benchmark the offline lexicon sentiment engine
+
+Scores a set of typical check-in answers and chat messages with the bundled
+lexicon (or --lexicon) and reports texts scored per second, and which share
+of the texts the hybrid engine would settle locally instead of sending them
+to Hume at the given --threshold.
+
+Usage:
+    python scripts/benchmarks/bench_sentiment_lexicon.py [--texts 100000] [--threshold 0.35] [--lexicon PATH]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.src.services.sentiment_lexicon import LexiconSentimentAnalyzer, load_lexicon
+
+TEXTS = [
+    "ok",
+    "tired",
+    "5",
+    "Feeling great today!",
+    "I had a rough day at work",
+    "Things are a bit better today",
+    "Honestly I'm exhausted",
+    "Thanks, that helps a little",
+    "Not bad, could be worse",
+    "So stressed about the deadline 😩",
+    "The new project is exciting but the hours are long",
+    "Can we talk about my schedule next week?",
+    "I don't feel supported by my manager",
+    "Loving the team lunch :)",
+    "meh",
+    "Everything is fine I guess"
+]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the lexicon sentiment engine')
+    parser.add_argument('--texts', type=int, default=100000, help='Texts to score')
+    parser.add_argument('--threshold', type=float, default=0.35, help='Hybrid pre-filter threshold')
+    parser.add_argument('--lexicon', help='Lexicon file (defaults to the bundled lexicon)')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+
+    start = time.perf_counter()
+    analyzer = LexiconSentimentAnalyzer(load_lexicon(args.lexicon), prefilter_threshold=args.threshold)
+    load_seconds = time.perf_counter() - start
+
+    texts = [TEXTS[n % len(TEXTS)] for n in range(args.texts)]
+    start = time.perf_counter()
+    results = analyzer.analyze_many(texts)
+    elapsed = time.perf_counter() - start
+    settled = sum(not analyzer.is_ambiguous(result) for result in results[:len(TEXTS)])
+
+    print(f"lexicon: {len(analyzer.lexicon)} tokens, loaded in {load_seconds * 1000:.1f} ms")
+    print(f"scored {args.texts} texts in {elapsed:.2f}s: {args.texts / elapsed:,.0f} texts/s, "
+          f"{elapsed / args.texts * 1e6:.1f} us/text")
+    print(f"hybrid at threshold {args.threshold}: {settled} of {len(TEXTS)} sample texts settled locally")
+    for text, result in zip(TEXTS, results):
+        verdict = 'hume' if analyzer.is_ambiguous(result) else 'local'
+        print(f"  {result['sentiment_score']:.2f}  {verdict:<6}{text}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Benchmark time-to-first-message for streamed vs. buffered Gemini replies
+
+A stubbed streaming model emits a long reply at a fixed token rate. The
+buffered path waits for the whole reply before splitting it into 1600-char
+WhatsApp messages; the streaming path flushes a chunk as soon as a sentence
+boundary near the limit is reached.
+
+Usage:
+    python scripts/benchmarks/bench_streaming_reply.py [--chars 4800] [--chars-per-second 600]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.src.services.reply_streaming import stream_reply, WHATSAPP_MESSAGE_LIMIT
+
+
+class StubStreamingModel:
+    """Streams a canned reply in small pieces at a fixed generation rate"""
+
+    def __init__(self, reply, chars_per_second, piece_size=40):
+        self.reply = reply
+        self.delay = piece_size / float(chars_per_second)
+        self.piece_size = piece_size
+
+    def stream(self):
+        for i in range(0, len(self.reply), self.piece_size):
+            time.sleep(self.delay)
+            yield self.reply[i:i + self.piece_size]
+
+    def generate(self):
+        return ''.join(self.stream())
+
+
+def build_reply(total_chars):
+    """Build a reply made of ordinary-length sentences"""
+    sentence = "It sounds like this week has asked a lot of you, and that is worth noticing. "
+    return (sentence * (total_chars // len(sentence) + 1))[:total_chars].rsplit('.', 1)[0] + '.'
+
+
+def split_message(message, limit=WHATSAPP_MESSAGE_LIMIT):
+    return [message[i:i + limit] for i in range(0, len(message), limit)]
+
+
+def bench_buffered(model):
+    start = time.monotonic()
+    chunks = split_message(model.generate())
+    first = time.monotonic() - start
+    return first, first, len(chunks)
+
+
+def bench_streaming(model):
+    start = time.monotonic()
+    sent = []
+
+    def on_chunk(chunk):
+        sent.append(time.monotonic() - start)
+
+    stream_reply(model.stream(), on_chunk)
+    return sent[0], time.monotonic() - start, len(sent)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark streamed reply delivery')
+    parser.add_argument('--chars', type=int, default=4800, help='Reply length in characters')
+    parser.add_argument('--chars-per-second', type=int, default=600, help='Stub generation rate')
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    reply = build_reply(args.chars)
+
+    print(f"Reply: {len(reply)} chars at {args.chars_per_second} chars/s")
+    print(f"{'mode':<12}{'first msg (s)':>16}{'total (s)':>12}{'messages':>10}")
+    for name, bench in (('buffered', bench_buffered), ('streaming', bench_streaming)):
+        first, total, count = bench(StubStreamingModel(reply, args.chars_per_second))
+        print(f"{name:<12}{first:>16.3f}{total:>12.3f}{count:>10}")
+
+
+if __name__ == '__main__':
+    main()
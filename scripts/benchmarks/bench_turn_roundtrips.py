@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Count database round-trips and commits per WhatsApp bot turn
+
+Runs process_incoming_message for an onboarded user against an in-memory
+SQLite database, with Gemini, Twilio and the background queues stubbed out,
+and counts the SQL statements and commits issued by each kind of turn.
+
+With --baseline REF the same benchmark first runs against the backend as
+of a git ref (exported to a temporary directory), so before and after
+numbers come from one command. Baseline before turns were committed in one
+transaction (--baseline 31aed91a^): chat 13.0 statements / 4 commits,
+check-in 11.2 statements / 4 commits.
+
+bot.py must be importable, which it currently is not: the API modules call
+audit_decorator("...", "...") (a TypeError at import time) and
+backend/src/api/__init__.py imports a `dashboard` name that dashboard.py
+does not define. Both have to be patched locally before running this.
+
+Usage:
+    python scripts/benchmarks/bench_turn_roundtrips.py [--turns 20] [--baseline REF]
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+# A baseline run imports the backend from the exported tree instead
+PROJECT_ROOT = Path(os.environ.get('BENCH_PROJECT_ROOT') or REPO_ROOT)
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from flask import Flask
+from sqlalchemy import event
+
+from backend.src.config import Config
+from backend.src.models.models import db, User
+from backend.src.api.v1 import bot
+
+AI_REPLY = "That sounds like a lot to carry. What part of it is weighing on you most today?"
+
+# Messages that walk through a complete structured check-in
+CHECK_IN_MESSAGES = [
+    'start check-in',
+    '3',
+    'A bit flat, nothing terrible',
+    '4',
+    'Deadlines and a difficult meeting',
+    'More time between meetings would help'
+]
+
+# Collaborators stubbed out of the turn; ones a baseline tree does not have yet are skipped
+STUBS = {
+    'get_response': {'return_value': AI_REPLY},
+    'send_whatsapp_message': {'return_value': ['SM0']},
+    'queue_sentiment_analysis': {},
+    'queue_conversation_summary': {}
+}
+
+
+class RoundTripCounter:
+    """Counts statements and commits on an engine"""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, 'before_cursor_execute', self._on_statement)
+        event.listen(engine, 'commit', self._on_commit)
+
+    def _on_statement(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def create_app():
+    app = Flask('bench')
+    for key in dir(Config):
+        if key.isupper():
+            app.config[key] = getattr(Config, key)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///:memory:', BOT_STREAMING_REPLIES=False)
+    db.init_app(app)
+    return app
+
+
+def create_user(phone_number):
+    user = User(
+        phone_number=phone_number,
+        access_code='BENCH123',
+        is_authenticated=True,
+        consent_given=True,
+        conversation_started=True,
+        department='Engineering',
+        location='Remote',
+        message_count=0
+    )
+    db.session.add(user)
+    db.session.commit()
+
+
+def run_turns(counter, phone_number, messages):
+    """Run messages through the bot and return (statements, commits) per turn"""
+    counter.reset()
+    for message in messages:
+        bot.process_incoming_message(phone_number, message)
+        db.session.remove()
+    return counter.statements / len(messages), counter.commits / len(messages)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Count DB round-trips per bot turn')
+    parser.add_argument('--turns', type=int, default=20, help='Conversation turns to run')
+    parser.add_argument('--baseline', metavar='REF', help='Also run against the backend at this git ref')
+    return parser.parse_args()
+
+
+def run_baseline(ref, turns):
+    """Run this benchmark against the backend as of a git ref"""
+    archive = subprocess.run(['git', 'archive', ref, 'backend'], cwd=REPO_ROOT,
+                             check=True, capture_output=True).stdout
+    with tempfile.TemporaryDirectory() as root:
+        tarfile.open(fileobj=io.BytesIO(archive)).extractall(root)
+        subprocess.run([sys.executable, __file__, '--turns', str(turns)],
+                       env={**os.environ, 'BENCH_PROJECT_ROOT': root}, check=True)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    if args.baseline:
+        print(f"baseline ({args.baseline}):")
+        run_baseline(args.baseline, args.turns)
+        print("\ncurrent tree:")
+
+    if not hasattr(bot, 'process_incoming_message'):
+        sys.exit(f"{PROJECT_ROOT} has no bot.process_incoming_message to benchmark")
+
+    app = create_app()
+    with app.app_context(), ExitStack() as stubs:
+        for name, options in STUBS.items():
+            if hasattr(bot, name):
+                stubs.enter_context(patch.object(bot, name, **options))
+        db.create_all()
+        counter = RoundTripCounter(db.engine)
+
+        create_user('+15550000001')
+        create_user('+15550000002')
+
+        results = [
+            ('chat', run_turns(counter, '+15550000001', ['I had a rough day at work'] * args.turns)),
+            ('check-in', run_turns(counter, '+15550000002', CHECK_IN_MESSAGES)),
+        ]
+
+    print(f"{'turn':<12}{'statements':>12}{'commits':>10}")
+    for name, (statements, commits) in results:
+        print(f"{name:<12}{statements:>12.1f}{commits:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+Load-test the WhatsApp webhook with synthetic senders
+
+Starts the Twilio, Gemini and Hume stand-ins (stand_ins.py) and replays
+thousands of synthetic senders against /api/v1/bot/bot. Each sender goes
+through onboarding (greeting, access code, consent, department and
+location), a structured check-in and a few free-chat turns, reading the
+bot's replies from the Twilio stand-in's outbox the way a phone would.
+
+A turn's latency runs from posting the webhook to the first reply reaching
+the Twilio stand-in, so it covers both the sync and the async processing
+modes. The report gives throughput and p50/p95/p99 per flow stage.
+
+Every onboarding and check-in reply is checked against the prompt that
+step should produce (welcome with access code, authentication, department
+prompt, each check-in question). A different reply is counted as
+unexpected_reply and that sender stops, so a broken flow does not pass as
+fast turns.
+
+Start the app pointed at the stand-ins, with limits that allow the load:
+
+    TWILIO_API_BASE_URL=http://127.0.0.1:8090 GEMINI_API_ENDPOINT=http://127.0.0.1:8090 \\
+    HUME_API_URL=http://127.0.0.1:8090/v0/batch/jobs \\
+    BOT_MESSAGES_PER_MINUTE=1000 MAX_DAILY_MESSAGES=1000 python backend/run.py
+
+Usage:
+    python scripts/loadtest/bot_load.py [--app-url http://127.0.0.1:5000] [--senders 2000] \\
+        [--concurrency 200] [--chat-turns 5] [--gemini median=0.8,p99=4,error_rate=0.01] [--json]
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from stand_ins import add_stand_in_arguments, create_server
+
+STAGES = ('onboarding', 'check_in', 'chat')
+
+DEPARTMENTS = ('Engineering', 'Sales', 'Support', 'Finance', 'Operations')
+LOCATIONS = ('Remote', 'London', 'Bangalore', 'New York')
+
+CONSENT = "I consent to Manobal using my anonymized conversation data for mental health insights."
+
+# Messages that walk through a complete structured check-in, with the reply each should get
+CHECK_IN_MESSAGES = [
+    ('start check-in', re.compile(r'rate your mood')),
+    ('3', re.compile(r'why you\'re feeling')),
+    ('A bit flat, nothing terrible', re.compile(r'rate your stress')),
+    ('4', re.compile(r'contributing to your stress')),
+    ('Deadlines and a difficult meeting', re.compile(r'anything specific you\'d like to share')),
+    ('More time between meetings would help', re.compile(r'completing today\'s check-in'))
+]
+
+CHAT_MESSAGES = [
+    "I had a rough day at work",
+    "My manager keeps moving the deadline",
+    "I'm sleeping badly this week",
+    "Honestly things are a bit better today",
+    "I don't know how to bring this up with my team",
+    "Thanks, that helps a little"
+]
+
+ACCESS_CODE = re.compile(r'access code is (\w+)')
+AUTHENTICATED = re.compile(r'Thank you for authenticating')
+DEPARTMENT_PROMPT = re.compile(r'share your department and location')
+ONBOARDED = re.compile(r'ready to chat')
+RATE_LIMITED = re.compile(r'too quickly|maximum number of messages')
+
+
+class TurnFailed(Exception):
+    """A turn got no usable reply; the sender's conversation cannot go on"""
+
+
+class Results:
+    """
+    Latencies and outcomes per flow stage, shared by the sender threads
+    """
+
+    def __init__(self):
+        self.reply_seconds: Dict[str, List[float]] = defaultdict(list)
+        self.webhook_seconds: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, outcome: str, reply: Optional[float] = None, webhook: Optional[float] = None):
+        with self._lock:
+            self.outcomes[stage][outcome] += 1
+            if reply is not None:
+                self.reply_seconds[stage].append(reply)
+            if webhook is not None:
+                self.webhook_seconds[stage].append(webhook)
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile over sorted samples"""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+
+class SyntheticSender:
+    """
+    One phone number walking through onboarding, a check-in and free chat
+    """
+
+    def __init__(self, number: str, args: argparse.Namespace, outbox, results: Results,
+                 session: requests.Session, rng: random.Random):
+        self.number = number
+        self.whatsapp = f'whatsapp:{number}'
+        self.args = args
+        self.outbox = outbox
+        self.results = results
+        self.session = session
+        self.rng = rng
+
+    def run(self):
+        try:
+            self.onboard()
+            if not self.args.skip_check_in:
+                for message, expected in CHECK_IN_MESSAGES:
+                    self.turn('check_in', message, expected)
+            for _ in range(self.args.chat_turns):
+                self.turn('chat', self.rng.choice(CHAT_MESSAGES))
+        except TurnFailed:
+            pass
+
+    def onboard(self):
+        welcome = self.turn('onboarding', 'Hi', ACCESS_CODE)
+        self.turn('onboarding', ACCESS_CODE.search(welcome).group(1), AUTHENTICATED)
+        self.turn('onboarding', CONSENT, DEPARTMENT_PROMPT)
+        self.turn('onboarding', f"Department: {self.rng.choice(DEPARTMENTS)}, "
+                                f"Location: {self.rng.choice(LOCATIONS)}", ONBOARDED)
+
+    def turn(self, stage: str, body: str, expected: Optional[re.Pattern] = None) -> str:
+        """
+        Post one message and wait for the first reply to it
+
+        With `expected`, a reply that does not match it (including a rate
+        limit notice) ends the sender's conversation.
+        """
+        if self.args.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.args.think_time))
+
+        sent = self.outbox.count(self.whatsapp)
+        start = time.monotonic()
+        try:
+            response = self.session.post(self.args.app_url.rstrip('/') + '/api/v1/bot/bot', data={
+                'Body': body,
+                'From': self.whatsapp,
+                'To': 'whatsapp:+14155238886',
+                'MessageSid': 'SM' + uuid.uuid4().hex
+            }, timeout=self.args.reply_timeout)
+        except requests.RequestException as e:
+            self.results.record(stage, 'connection_error')
+            raise TurnFailed(str(e))
+        webhook = time.monotonic() - start
+        if response.status_code >= 400:
+            self.results.record(stage, f'http_{response.status_code}', webhook=webhook)
+            raise TurnFailed(response.text)
+
+        replies = self.outbox.wait_for(self.whatsapp, sent + 1,
+                                       max(0.0, self.args.reply_timeout - (time.monotonic() - start)))
+        if replies is None:
+            self.results.record(stage, 'no_reply', webhook=webhook)
+            raise TurnFailed('no reply')
+        if RATE_LIMITED.search(replies[0]):
+            outcome = 'rate_limited'
+        elif expected is not None and not expected.search(replies[0]):
+            outcome = 'unexpected_reply'
+        else:
+            outcome = 'ok'
+        self.results.record(stage, outcome, reply=time.monotonic() - start, webhook=webhook)
+        if expected is not None and outcome != 'ok':
+            raise TurnFailed(replies[0])
+        return replies[0]
+
+
+def report(results: Results, elapsed: float, senders: int, as_json: bool):
+    """Print throughput and per-stage latency percentiles"""
+    stages = {}
+    for stage in STAGES:
+        replies = sorted(results.reply_seconds[stage])
+        webhooks = sorted(results.webhook_seconds[stage])
+        turns = sum(results.outcomes[stage].values())
+        if not turns:
+            continue
+        stages[stage] = {
+            'turns': turns,
+            'outcomes': dict(results.outcomes[stage]),
+            'turns_per_second': len(replies) / elapsed,
+            'reply_p50': percentile(replies, 50),
+            'reply_p95': percentile(replies, 95),
+            'reply_p99': percentile(replies, 99),
+            'webhook_p50': percentile(webhooks, 50),
+            'webhook_p95': percentile(webhooks, 95),
+            'webhook_p99': percentile(webhooks, 99)
+        }
+    answered = sum(len(samples) for samples in results.reply_seconds.values())
+    summary = {'senders': senders, 'seconds': elapsed, 'turns_per_second': answered / elapsed, 'stages': stages}
+
+    if as_json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    def ms(value):
+        return f"{value * 1000:.0f}" if value is not None else '-'
+
+    print(f"{senders} senders in {elapsed:.1f}s, {summary['turns_per_second']:.1f} answered turns/s")
+    print(f"{'stage':<12}{'turns':>7}{'turns/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'hook p95':>10}  outcomes")
+    for stage, row in stages.items():
+        outcomes = ', '.join(f"{name}={count}" for name, count in sorted(row['outcomes'].items()))
+        print(f"{stage:<12}{row['turns']:>7}{row['turns_per_second']:>9.1f}{ms(row['reply_p50']):>9}"
+              f"{ms(row['reply_p95']):>9}{ms(row['reply_p99']):>9}{ms(row['webhook_p95']):>10}  {outcomes}")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Load-test the WhatsApp webhook with synthetic senders')
+    parser.add_argument('--app-url', default='http://127.0.0.1:5000', help='Base URL of the running app')
+    parser.add_argument('--senders', type=int, default=1000, help='Synthetic senders to replay')
+    parser.add_argument('--concurrency', type=int, default=100, help='Senders in flight at once')
+    parser.add_argument('--chat-turns', type=int, default=5, help='Free-chat turns per sender')
+    parser.add_argument('--skip-check-in', action='store_true', help='Go straight from onboarding to chat')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean seconds a sender waits between turns')
+    parser.add_argument('--reply-timeout', type=float, default=60.0, help='Seconds to wait for each reply')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    add_stand_in_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    server = create_server(args)
+    server.start()
+    print(f"Stand-ins listening on {server.url}", file=sys.stderr)
+
+    results = Results()
+    local = threading.local()
+    # Numbers are unique per run, so every sender starts as a new user
+    run_prefix = random.Random().randrange(100, 999)
+    rng = random.Random(args.seed)
+
+    def run_sender(index):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        number = f'+1{run_prefix}{index:07d}'
+        SyntheticSender(number, args, server.state.outbox, results, local.session,
+                        random.Random(rng.random())).run()
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_sender, range(args.senders)))
+    elapsed = time.monotonic() - start
+
+    server.shutdown()
+    report(results, elapsed, args.senders, args.json)
+    print(f"Stand-in requests: {json.dumps(server.state.stats())}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+#!/usr/bin/env python
+"""
+Local stand-ins for the Twilio, Gemini and Hume APIs
+
+Serves the parts of the three APIs the WhatsApp bot uses from one local
+HTTP server, with a configurable latency distribution and error rate per
+service, so the bot can be load-tested without live accounts:
+
+    Twilio   POST /2010-04-01/Accounts/<sid>/Messages.json
+    Gemini   POST /v1beta/models/<model>:generateContent
+             POST /v1beta/models/<model>:streamGenerateContent
+             POST /v1beta/models/<model>:countTokens
+    Hume     POST /v0/batch/jobs, GET /v0/batch/jobs/<job_id>
+             (jobs submitted with a callback_url are posted there on completion)
+    Stats    GET  /_stand_ins/stats
+
+Latencies are lognormal, given by their median and p99 in seconds. Messages
+sent through the Twilio stand-in are kept in an outbox, which the load
+generator (bot_load.py) reads to follow each synthetic sender's conversation.
+
+Point the app at the stand-ins with:
+
+    TWILIO_API_BASE_URL=http://127.0.0.1:8090
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090
+    HUME_API_URL=http://127.0.0.1:8090/v0/batch/jobs
+
+Usage:
+    python scripts/loadtest/stand_ins.py [--port 8090] \\
+        [--gemini median=0.8,p99=4,error_rate=0.01] [--twilio median=0.15,p99=0.6]
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+SERVICES = ('twilio', 'gemini', 'hume')
+
+# Standard normal quantile of the 99th percentile
+Z_99 = 2.3263
+
+WORDS = (
+    "that sounds like a lot to carry and it makes sense you feel tired what part of the week "
+    "has been weighing on you most would it help to talk through one small step for tomorrow"
+).split()
+
+EMOTIONS = (
+    'joy', 'amusement', 'admiration', 'approval', 'gratitude', 'excitement', 'love',
+    'grief', 'anger', 'fear', 'disgust', 'disappointment', 'embarrassment', 'regret', 'calmness'
+)
+
+TWILIO_MESSAGES = re.compile(r'^/2010-04-01/Accounts/(\w+)/Messages\.json$')
+GEMINI_METHOD = re.compile(r'^/v1(?:beta)?/models/([^/:]+):(\w+)$')
+HUME_JOB = re.compile(r'^/v0/batch/jobs/([\w-]+)$')
+
+
+class LatencyProfile:
+    """
+    Lognormal latency given by its median and p99, plus an injected error rate
+    """
+
+    def __init__(self, median: float = 0.0, p99: Optional[float] = None,
+                 error_rate: float = 0.0, error_status: int = 503):
+        self.median = median
+        self.p99 = p99 if p99 is not None else median
+        self.error_rate = error_rate
+        self.error_status = error_status
+        if self.median > 0 and self.p99 < self.median:
+            raise ValueError("p99 latency cannot be below the median")
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyProfile':
+        """
+        Parse a profile from 'median=0.8,p99=4,error_rate=0.01,error_status=429'
+
+        Args:
+            spec: Comma-separated key=value pairs; missing keys keep their defaults
+
+        Returns:
+            LatencyProfile
+        """
+        options = {}
+        for item in filter(None, spec.split(',')):
+            key, _, value = item.partition('=')
+            key = key.strip()
+            if key not in ('median', 'p99', 'error_rate', 'error_status'):
+                raise argparse.ArgumentTypeError(f"Unknown latency profile key '{key}'")
+            options[key] = int(value) if key == 'error_status' else float(value)
+        return cls(**options)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds"""
+        if self.median <= 0:
+            return 0.0
+        sigma = math.log(self.p99 / self.median) / Z_99
+        return rng.lognormvariate(math.log(self.median), sigma)
+
+    def fails(self, rng: random.Random) -> bool:
+        """Draw whether this request gets an injected error"""
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+    def __repr__(self):
+        return (f"LatencyProfile(median={self.median}, p99={self.p99}, "
+                f"error_rate={self.error_rate}, error_status={self.error_status})")
+
+
+class Outbox:
+    """
+    Messages sent through the Twilio stand-in, per recipient
+    """
+
+    def __init__(self):
+        self._messages: Dict[str, List[str]] = defaultdict(list)
+        self._changed = threading.Condition()
+
+    def add(self, to: str, body: str):
+        with self._changed:
+            self._messages[to].append(body)
+            self._changed.notify_all()
+
+    def count(self, to: str) -> int:
+        with self._changed:
+            return len(self._messages.get(to, ()))
+
+    def wait_for(self, to: str, count: int, timeout: float) -> Optional[List[str]]:
+        """
+        Wait until a recipient has been sent at least `count` messages
+
+        Args:
+            to: Recipient, e.g. 'whatsapp:+15550000001'
+            count: Number of messages to wait for
+            timeout: Seconds to wait
+
+        Returns:
+            The recipient's messages from index count - 1 on, or None on timeout
+        """
+        with self._changed:
+            if not self._changed.wait_for(lambda: len(self._messages.get(to, ())) >= count, timeout):
+                return None
+            return list(self._messages[to][count - 1:])
+
+
+class StandInState:
+    """
+    Latency profiles, outbox, Hume jobs and request counts shared by the handlers
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, LatencyProfile]] = None,
+                 reply_words: int = 40, stream_chunks: int = 4, hume_job_seconds: float = 0.0,
+                 seed: Optional[int] = None):
+        self.profiles = {service: LatencyProfile() for service in SERVICES}
+        self.profiles.update(profiles or {})
+        self.reply_words = reply_words
+        self.stream_chunks = max(1, stream_chunks)
+        self.hume_job_seconds = hume_job_seconds
+        self.outbox = Outbox()
+        self.requests = Counter()
+        self.errors = Counter()
+        self._jobs: Dict[str, Tuple[float, int]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self, service: str):
+        """Count a request and draw its (latency, injected error status or None)"""
+        profile = self.profiles[service]
+        with self._lock:
+            self.requests[service] += 1
+            latency = profile.sample(self._rng)
+            failed = profile.fails(self._rng)
+            if failed:
+                self.errors[service] += 1
+        return latency, profile.error_status if failed else None
+
+    def reply_text(self) -> str:
+        with self._lock:
+            words = [self._rng.choice(WORDS) for _ in range(self.reply_words)]
+        return ' '.join(words).capitalize() + '?'
+
+    def emotions(self) -> List[Dict]:
+        with self._lock:
+            return [{'name': name, 'score': round(self._rng.random(), 4)} for name in EMOTIONS]
+
+    def create_job(self, texts: int = 1, callback_url: Optional[str] = None) -> str:
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[job_id] = (time.monotonic() + self.hume_job_seconds, texts)
+        if callback_url:
+            timer = threading.Timer(self.hume_job_seconds, self._send_callback, (job_id, callback_url))
+            timer.daemon = True
+            timer.start()
+        return job_id
+
+    def predictions(self, texts: int) -> Dict:
+        return {'language': {'predictions': [{'emotions': self.emotions()} for _ in range(texts)]}}
+
+    def _send_callback(self, job_id: str, callback_url: str):
+        # The job stays readable, as a fallback poll may still ask for it
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        payload = {'job_id': job_id, 'state': 'completed', 'results': self.predictions(job[1])}
+        request = urllib.request.Request(callback_url, data=json.dumps(payload).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except OSError:
+            with self._lock:
+                self.errors['hume'] += 1
+
+    def job_done(self, job_id: str) -> Optional[int]:
+        """Number of texts in a completed job, 0 while it runs, or None for an unknown job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            done_at, texts = job
+            if time.monotonic() < done_at:
+                return 0
+            del self._jobs[job_id]
+            return texts
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {service: {'requests': self.requests[service], 'errors': self.errors[service]}
+                    for service in SERVICES}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Routes requests to the Twilio, Gemini and Hume stand-ins"""
+
+    # Keep-alive, so the app's pooled HTTP sessions are exercised as in production
+    protocol_version = 'HTTP/1.1'
+    server_version = 'StandIn/1.0'
+    # Headers and body are separate writes; without this, Nagle's algorithm and
+    # delayed ACKs add ~40ms to every response on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self, service: str) -> Optional[int]:
+        latency, error_status = self.state.draw(service)
+        time.sleep(latency)
+        return error_status
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/_stand_ins/stats':
+            return self._send_json(200, self.state.stats())
+        match = HUME_JOB.match(path)
+        if match:
+            return self._hume_job(match.group(1))
+        self._send_json(404, {'message': f'No stand-in for GET {path}'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        match = TWILIO_MESSAGES.match(url.path)
+        if match:
+            return self._twilio_message(match.group(1), body)
+        match = GEMINI_METHOD.match(url.path)
+        if match:
+            return self._gemini(match.group(1), match.group(2), parse_qs(url.query), body)
+        if url.path == '/v0/batch/jobs':
+            return self._hume_start_job(body)
+        self._send_json(404, {'message': f'No stand-in for POST {url.path}'})
+
+    def _twilio_message(self, account_sid: str, body: bytes):
+        error_status = self._delay('twilio')
+        if error_status:
+            return self._send_json(error_status, {
+                'code': 20429 if error_status == 429 else 20500,
+                'message': 'Stand-in injected error',
+                'more_info': 'https://www.twilio.com/docs/errors',
+                'status': error_status
+            })
+
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        self.state.outbox.add(form.get('To', ''), form.get('Body', ''))
+        now = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        self._send_json(201, {
+            'sid': 'SM' + uuid.uuid4().hex,
+            'account_sid': account_sid,
+            'from': form.get('From'),
+            'to': form.get('To'),
+            'body': form.get('Body'),
+            'status': 'queued',
+            'num_segments': '1',
+            'direction': 'outbound-api',
+            'date_created': now,
+            'date_updated': now,
+            'uri': f'/2010-04-01/Accounts/{account_sid}/Messages.json'
+        })
+
+    def _gemini(self, model: str, method: str, query: Dict, body: bytes):
+        error_status = self._delay('gemini')
+        if error_status:
+            return self._send_json(error_status, {'error': {
+                'code': error_status, 'message': 'Stand-in injected error', 'status': 'UNAVAILABLE'
+            }})
+
+        request = json.loads(body or b'{}')
+        prompt_chars = sum(len(part.get('text', '')) for content in request.get('contents', [])
+                           for part in content.get('parts', []))
+        if method == 'countTokens':
+            return self._send_json(200, {'totalTokens': prompt_chars // 4 + 1})
+        if method == 'generateContent':
+            return self._send_json(200, self._gemini_response(self.state.reply_text(), prompt_chars))
+        if method == 'streamGenerateContent':
+            return self._gemini_stream(prompt_chars, query.get('alt', [''])[0] == 'sse')
+        self._send_json(404, {'error': {'code': 404, 'message': f'No stand-in for {method}', 'status': 'NOT_FOUND'}})
+
+    @staticmethod
+    def _gemini_response(text: str, prompt_chars: int) -> Dict:
+        return {
+            'candidates': [{
+                'content': {'parts': [{'text': text}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0
+            }],
+            'usageMetadata': {
+                'promptTokenCount': prompt_chars // 4 + 1,
+                'candidatesTokenCount': len(text) // 4 + 1,
+                'totalTokenCount': (prompt_chars + len(text)) // 4 + 2
+            }
+        }
+
+    def _gemini_stream(self, prompt_chars: int, sse: bool):
+        """Stream the reply in chunks, as a JSON array or as server-sent events"""
+        words = self.state.reply_text().split(' ')
+        size = math.ceil(len(words) / self.state.stream_chunks)
+        pieces = [' '.join(words[i:i + size]) + ' ' for i in range(0, len(words), size)]
+        pieces[-1] = pieces[-1].rstrip()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        # Later chunks arrive at a fraction of the first chunk's latency
+        gap = self.state.profiles['gemini'].median / (2 * len(pieces))
+        for index, piece in enumerate(pieces):
+            payload = json.dumps(self._gemini_response(piece, prompt_chars))
+            if sse:
+                data = f'data: {payload}\r\n\r\n'
+            else:
+                data = ('[' if index == 0 else ',\r\n') + payload + (']' if index == len(pieces) - 1 else '')
+            self._write_chunk(data.encode())
+            if index < len(pieces) - 1:
+                time.sleep(gap)
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _hume_start_job(self, body: bytes):
+        error_status = self._delay('hume')
+        if error_status:
+            return self._send_json(error_status, {'message': 'Stand-in injected error'})
+        try:
+            payload = json.loads(body)
+            texts = payload.get('data', {}).get('text', '')
+        except (ValueError, AttributeError):
+            return self._send_json(400, {'message': 'Invalid job payload'})
+        count = len(texts) if isinstance(texts, list) else 1
+        self._send_json(200, {'job_id': self.state.create_job(max(1, count), payload.get('callback_url'))})
+
+    def _hume_job(self, job_id: str):
+        error_status = self._delay('hume')
+        if error_status:
+            return self._send_json(error_status, {'message': 'Stand-in injected error'})
+
+        texts = self.state.job_done(job_id)
+        if texts is None:
+            return self._send_json(404, {'message': f'Unknown job {job_id}'})
+        if not texts:
+            return self._send_json(200, {'job_id': job_id, 'state': 'in_progress'})
+        self._send_json(200, {
+            'job_id': job_id,
+            'state': 'completed',
+            'results': self.state.predictions(texts)
+        })
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server for the stand-ins
+    """
+
+    daemon_threads = True
+    # Load generators open many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, state: StandInState, host: str = '127.0.0.1', port: int = 8090):
+        super().__init__((host, port), StandInHandler)
+        self.state = state
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name='stand-ins', daemon=True)
+        thread.start()
+        return thread
+
+    def app_environment(self) -> Dict[str, str]:
+        """Environment variables that point the app at these stand-ins"""
+        return {
+            'TWILIO_API_BASE_URL': self.url,
+            'GEMINI_API_ENDPOINT': self.url,
+            'HUME_API_URL': f'{self.url}/v0/batch/jobs'
+        }
+
+
+def add_stand_in_arguments(parser: argparse.ArgumentParser):
+    """Add the stand-in options shared with the load generator"""
+    parser.add_argument('--host', default='127.0.0.1', help='Interface the stand-ins listen on')
+    parser.add_argument('--port', type=int, default=8090, help='Port the stand-ins listen on')
+    for service, default in (('twilio', 'median=0.15,p99=0.6'), ('gemini', 'median=0.8,p99=4'),
+                             ('hume', 'median=0.2,p99=1')):
+        parser.add_argument(f'--{service}', type=LatencyProfile.parse, default=LatencyProfile.parse(default),
+                            help=f'{service.capitalize()} latency and errors, e.g. '
+                                 f'"{default},error_rate=0.01,error_status=503"')
+    parser.add_argument('--reply-words', type=int, default=40, help='Words per Gemini reply')
+    parser.add_argument('--stream-chunks', type=int, default=4, help='Chunks per streamed Gemini reply')
+    parser.add_argument('--hume-job-seconds', type=float, default=0.0,
+                        help='Seconds before a Hume job reports completed')
+    parser.add_argument('--seed', type=int, help='Random seed for latencies and replies')
+
+
+def create_server(args: argparse.Namespace) -> StandInServer:
+    """Create the stand-in server from parsed arguments"""
+    state = StandInState(
+        profiles={service: getattr(args, service) for service in SERVICES},
+        reply_words=args.reply_words,
+        stream_chunks=args.stream_chunks,
+        hume_job_seconds=args.hume_job_seconds,
+        seed=args.seed
+    )
+    return StandInServer(state, args.host, args.port)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run local Twilio, Gemini and Hume stand-ins')
+    add_stand_in_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    server = create_server(args)
+    print(f"Stand-ins listening on {server.url}; start the app with:")
+    for name, value in server.app_environment().items():
+        print(f"  {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.state.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Tests for the role-based access decorators
+
+This module checks that hr_required and admin_required reject requests
+without a token or with a token for the wrong role.
+"""
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+from backend.src.utils.auth import admin_required, hr_required
+from backend.src.utils.errors import init_error_handlers
+
+
+@pytest.fixture
+def client():
+    app = Flask('auth_test')
+    # Identities are dicts; PyJWT 2.8 (pinned) accepts them as the subject
+    app.config.update(TESTING=True, JWT_SECRET_KEY='test-secret-key-of-sufficient-length', JWT_VERIFY_SUB=False)
+    JWTManager(app)
+    init_error_handlers(app)
+
+    @app.route('/hr')
+    @jwt_required()
+    @hr_required
+    def hr_only():
+        return 'ok'
+
+    @app.route('/admin')
+    @jwt_required()
+    @admin_required
+    def admin_only():
+        return 'ok'
+
+    with app.app_context():
+        client = app.test_client()
+        client.tokens = {role: create_access_token(identity={'id': 1, 'role': role})
+                         for role in ('hr', 'admin', 'employee')}
+        yield client
+
+
+def get(client, path, role=None):
+    headers = {'Authorization': f'Bearer {client.tokens[role]}'} if role else {}
+    return client.get(path, headers=headers).status_code
+
+
+class TestRoleDecorators:
+    """Test suite for hr_required and admin_required."""
+
+    def test_hr_required(self, client):
+        """Test that HR and admin users pass and everyone else is refused."""
+        assert get(client, '/hr') == 401
+        assert get(client, '/hr', 'employee') == 403
+        assert get(client, '/hr', 'hr') == 200
+        assert get(client, '/hr', 'admin') == 200
+
+    def test_admin_required(self, client):
+        """Test that only admin users pass."""
+        assert get(client, '/admin', 'hr') == 403
+        assert get(client, '/admin', 'admin') == 200
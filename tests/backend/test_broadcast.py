@@ -0,0 +1,177 @@
+"""
+Tests for the Broadcast Service
+
+This module tests recipient resolution from a filter or an explicit list,
+skipping users who have not given consent, and running a job
+with a bounded number of sends in flight and its progress counters.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+from backend.src.models.models import BroadcastJob, Employee, User, db
+from backend.src.services.broadcast import (
+    BroadcastRunner,
+    consenting_recipients,
+    normalize_recipients,
+    recipient_parameters,
+    resolve_recipients
+)
+
+
+class FakeSender:
+    """Completes each send shortly afterwards; numbers in `failing` fail"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+        self.bodies = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, to, body, **kwargs):
+        future = Future()
+        with self.lock:
+            self.sent.append(to)
+            self.bodies.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        threading.Timer(0.005, self._complete, args=(future, to)).start()
+        return future
+
+    def _complete(self, future, to):
+        with self.lock:
+            self.in_flight -= 1
+        if to in self.failing:
+            future.set_exception(RuntimeError('undeliverable'))
+        else:
+            future.set_result(['SM1'])
+
+
+def add_user(phone_number, department=None, location=None, employee_department=None, status=None,
+             consent_given=True):
+    user = User(phone_number=phone_number, access_code='CODE1234', department=department, location=location,
+                consent_given=consent_given)
+    db.session.add(user)
+    db.session.flush()
+    if employee_department or status:
+        db.session.add(Employee(user_id=user.id, first_name='Test', last_name=phone_number,
+                                department=employee_department, status=status or 'active'))
+    return user
+
+
+def add_job(total):
+    job = BroadcastJob(status='queued', message='Check in?', total=total, sent=0, failed=0)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+class TestResolveRecipients:
+    """Test suite for resolving broadcast filters."""
+
+    def test_filter_by_department_location_and_status(self, app, db_session):
+        """Test that the filter matches the employee record, falling back to the onboarding department."""
+        add_user('whatsapp:+100', employee_department='Engineering', location='Remote', status='active')
+        add_user('whatsapp:+101', employee_department='Engineering', location='London', status='active')
+        add_user('whatsapp:+102', employee_department='Engineering', location='Remote', status='on_leave')
+        add_user('whatsapp:+103', department='Engineering', location='Remote')
+        add_user('whatsapp:+104', department='Engineering', employee_department='Sales', location='Remote')
+        db.session.commit()
+
+        assert resolve_recipients({'department': 'Engineering', 'location': 'Remote'}) == [
+            'whatsapp:+100', 'whatsapp:+102', 'whatsapp:+103'
+        ]
+        assert resolve_recipients({'department': 'Engineering', 'status': 'active'}) == [
+            'whatsapp:+100', 'whatsapp:+101'
+        ]
+
+    def test_filter_skips_users_without_consent(self, app, db_session):
+        """Test that a filter broadcast leaves out users who have not given consent."""
+        add_user('whatsapp:+100', department='Engineering')
+        add_user('whatsapp:+101', department='Engineering', consent_given=False)
+        db.session.commit()
+
+        assert resolve_recipients({'department': 'Engineering'}) == ['whatsapp:+100']
+
+    def test_explicit_recipients_without_consent_skipped(self, app, db_session):
+        """Test that explicit recipients without consent or a user record are dropped, keeping the order."""
+        add_user('+100')
+        add_user('whatsapp:+101', consent_given=False)
+        add_user('whatsapp:+102')
+        db.session.commit()
+
+        numbers = normalize_recipients(['+102', '+101', '+103', '+100'])
+        assert consenting_recipients(numbers) == ['whatsapp:+102', 'whatsapp:+100']
+
+    def test_recipient_parameters(self, app, db_session):
+        """Test that template parameters come from the employee record, skipping unknown values."""
+        add_user('whatsapp:+100', department='Sales', location='Remote', employee_department='Engineering')
+        add_user('whatsapp:+101', department='Sales')
+        db.session.commit()
+
+        assert recipient_parameters(['whatsapp:+100', 'whatsapp:+101', 'whatsapp:+102']) == {
+            'whatsapp:+100': {'name': 'Test', 'department': 'Engineering', 'location': 'Remote'},
+            'whatsapp:+101': {'department': 'Sales'}
+        }
+
+    def test_explicit_recipients_match_users(self, app, db_session):
+        """Test that explicit recipients, with or without the prefix, find users stored in either form."""
+        add_user('whatsapp:+100', department='Sales')
+        add_user('+101', department='Engineering')
+        db.session.commit()
+
+        numbers = normalize_recipients(['+100', 'whatsapp:+101'])
+        assert recipient_parameters(numbers) == {
+            'whatsapp:+100': {'department': 'Sales'},
+            'whatsapp:+101': {'department': 'Engineering'}
+        }
+
+    def test_recipient_list_normalized(self):
+        """Test that explicit recipients get the whatsapp: prefix and lose duplicates."""
+        assert normalize_recipients(['whatsapp:+100', '+101', '+100', ' ']) == ['whatsapp:+100', 'whatsapp:+101']
+
+
+class TestBroadcastRunner:
+    """Test suite for running broadcast jobs."""
+
+    def test_sends_bounded_and_progress_recorded(self, app, db_session):
+        """Test that no more than max_in_flight sends are outstanding and the counters add up."""
+        recipients = [f'+1{n:04d}' for n in range(60)]
+        sender = FakeSender(failing={'+10007', '+10042'})
+        job_id = add_job(len(recipients))
+
+        BroadcastRunner(app, sender, max_in_flight=5, progress_interval=0.01).run(job_id, recipients, 'Check in?')
+
+        job = db.session.get(BroadcastJob, job_id)
+        db.session.refresh(job)
+        assert sender.sent == recipients
+        assert sender.max_in_flight <= 5
+        assert job.to_dict()['status'] == 'completed'
+        assert (job.sent, job.failed, job.to_dict()['pending']) == (58, 2, 0)
+
+    def test_per_recipient_messages(self, app, db_session):
+        """Test that a list of messages is sent one per recipient, in order."""
+        sender = FakeSender()
+        job_id = add_job(2)
+
+        BroadcastRunner(app, sender, max_in_flight=2).run(job_id, ['+1', '+2'], ['Hi A', 'Hi B'])
+
+        assert sender.bodies == ['Hi A', 'Hi B']
+
+    def test_runner_thread_processes_queued_jobs(self, app, db_session):
+        """Test that a submitted job is picked up and completed in the background."""
+        job_id = add_job(3)
+        runner = BroadcastRunner(app, FakeSender(), max_in_flight=2)
+        runner.start()
+        runner.submit(job_id, ['+1', '+2', '+3'], 'Check in?')
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            if db.session.get(BroadcastJob, job_id).status == 'completed':
+                break
+            time.sleep(0.01)
+        assert db.session.get(BroadcastJob, job_id).sent == 3
@@ -0,0 +1,204 @@
+"""
+Tests for the Call Resilience Service
+
+This module tests call deadlines, circuit breaker state transitions,
+hedging of slow calls, rejection while the pool is full, and the Gemini
+client's use of the caller.
+"""
+
+import threading
+import time
+
+import pytest
+
+from backend.src.services.call_resilience import (
+    CallRejectedError,
+    CallTimeoutError,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    circuit_breaker_snapshot
+)
+from backend.src.services.conversation_context import ConversationContext
+from backend.src.services.gemini_client import GeminiClient
+from backend.src.utils.metrics import metrics
+
+
+EMPTY = ConversationContext(summary='', turns=[], last_turn_no=0)
+
+
+def fail():
+    raise ValueError('boom')
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+
+
+class TestCircuitBreaker:
+    """Test suite for circuit breaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the threshold and refuses calls."""
+        breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert metrics.counter('test.circuit.closed_to_open').value == 1
+        assert metrics.gauge('test.circuit.open').value == 1
+
+    def test_half_open_probe(self):
+        """Test that a single probe is let through after the reset timeout and decides the state."""
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        transitions = [(t['from'], t['to']) for t in circuit_breaker_snapshot()['test']['transitions']]
+        assert transitions == [
+            ('closed', 'open'), ('open', 'half_open'), ('half_open', 'open'),
+            ('open', 'half_open'), ('half_open', 'closed')
+        ]
+
+
+class TestResilientCaller:
+    """Test suite for deadlines, short-circuiting and hedging."""
+
+    def test_deadline(self):
+        """Test that a hung call is given up on at the deadline."""
+        release = threading.Event()
+        caller = ResilientCaller('test', deadline=0.05)
+        start = time.monotonic()
+        with pytest.raises(CallTimeoutError):
+            caller.call(release.wait)
+        assert time.monotonic() - start < 1
+        assert metrics.counter('test.timeouts').value == 1
+        release.set()
+
+    def test_short_circuits_when_open(self):
+        """Test that no call is made while the circuit is open."""
+        caller = ResilientCaller('test', breaker=CircuitBreaker('test', failure_threshold=2))
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                caller.call(fail)
+
+        calls = []
+        with pytest.raises(CircuitOpenError):
+            caller.call(lambda: calls.append(1))
+        assert calls == []
+        assert metrics.counter('test.short_circuited').value == 1
+
+    def test_hedge_wins_when_first_attempt_is_slow(self):
+        """Test that a slow call is hedged after the p95 delay and the faster attempt wins."""
+        release = threading.Event()
+        caller = ResilientCaller('test', deadline=5, hedge=True, hedge_min_delay=0.01, hedge_min_samples=3)
+        for _ in range(3):
+            caller.call(lambda: 'warm')
+        assert caller.hedge_delay() == pytest.approx(0.01)
+
+        assert caller.call(lambda: release.wait() and 'first', lambda: 'hedge') == 'hedge'
+        assert metrics.counter('test.hedged').value == 1
+        assert metrics.counter('test.hedge_wins').value == 1
+        release.set()
+
+    def test_rejects_while_pool_is_full(self):
+        """Test that a call is refused while every worker is busy, without counting against the breaker."""
+        release = threading.Event()
+        caller = ResilientCaller('test', deadline=0.05, max_workers=1)
+        with pytest.raises(CallTimeoutError):
+            caller.call(release.wait)
+
+        calls = []
+        with pytest.raises(CallRejectedError):
+            caller.call(lambda: calls.append(1))
+        assert calls == []
+        assert metrics.counter('test.rejected').value == 1
+        assert caller.breaker.snapshot()['consecutive_failures'] == 1
+
+        release.set()
+        for _ in range(100):
+            try:
+                assert caller.call(lambda: 'ok') == 'ok'
+                break
+            except CallRejectedError:
+                time.sleep(0.01)
+        else:
+            pytest.fail("worker was never given back")
+
+    def test_hedge_skipped_while_pool_is_full(self):
+        """Test that a slow call is not hedged when no worker is free, and still completes."""
+        caller = ResilientCaller('test', deadline=5, hedge=True, hedge_min_delay=0.01, hedge_min_samples=0,
+                                 max_workers=1)
+        assert caller.call(lambda: time.sleep(0.05) or 'first', lambda: 'hedge') == 'first'
+        assert metrics.counter('test.hedged').value == 0
+
+    def test_no_hedge_without_samples(self):
+        """Test that calls are not hedged until enough latencies have been observed."""
+        caller = ResilientCaller('test', hedge=True, hedge_min_delay=0.01)
+        assert caller.hedge_delay() is None
+        assert caller.call(lambda: time.sleep(0.05) or 'first', lambda: 'hedge') == 'first'
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowChat:
+    def __init__(self, history, delay):
+        self.history = history
+        self.delay = delay
+
+    def send_message(self, content, stream=False):
+        time.sleep(self.delay)
+        return FakeResponse('slow' if self.delay else 'fast')
+
+
+class FakeModel:
+    """Hands out a slow chat first and fast chats afterwards"""
+
+    def __init__(self, name):
+        self.chats = []
+
+    def start_chat(self, history):
+        chat = SlowChat(history, 0.5 if not self.chats else 0)
+        self.chats.append(chat)
+        return chat
+
+
+class TestGeminiClientResilience:
+    """Test suite for the Gemini client's calls through the caller."""
+
+    def test_winning_hedge_replaces_session_chat(self):
+        """Test that the session carries on with the chat of the attempt that won."""
+        caller = ResilientCaller('gemini', deadline=5, hedge=True, hedge_min_delay=0.01, hedge_min_samples=0)
+        client = GeminiClient(model_factory=FakeModel, caller=caller)
+
+        assert client.reply(1, EMPTY, 'Hi') == 'fast'
+        model = client.generative_model()
+        assert client._sessions[1].chat is model.chats[1]
+
+    def test_open_circuit_keeps_session(self):
+        """Test that a short-circuited reply raises without dropping the user's session."""
+        caller = ResilientCaller('gemini', breaker=CircuitBreaker('gemini', failure_threshold=1, reset_timeout=60))
+        client = GeminiClient(model_factory=FakeModel, caller=caller)
+        client.reply(1, EMPTY, 'Hi')
+        caller.breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            client.reply(1, EMPTY, 'Again')
+        assert 1 in client._sessions
@@ -0,0 +1,117 @@
+"""
+Tests for the Check-in Scheduler Service
+
+This module tests jittered fire times inside local-time windows, spreading
+new schedules over the first cadence period, and ticks that create check-ins
+in bulk and invite only due, consenting users without an open check-in.
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from backend.src.models.models import CheckIn, CheckInSchedule, Employee, User, db
+from backend.src.services.check_in_scheduler import (
+    INVITATION,
+    CheckInScheduler,
+    fire_time_in_window,
+    next_fire_at,
+    schedule_check_ins
+)
+
+
+class FakeSender:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, to, body, **kwargs):
+        self.sent.append((to, body, kwargs.get('category')))
+
+
+def add_user(phone_number, consent=True):
+    user = User(phone_number=phone_number, access_code='CODE1234', consent_given=consent)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+class TestFireTimes:
+    """Test suite for computing fire times."""
+
+    def test_fire_time_within_local_window(self):
+        """Test that fire times fall inside the window converted from local time to UTC."""
+        rng = random.Random(1)
+        times = [fire_time_in_window(date(2026, 1, 5), 'Asia/Kolkata', time(10, 0), time(16, 0), rng)
+                 for _ in range(500)]
+
+        # 10:00-16:00 IST is 04:30-10:30 UTC
+        assert min(times) >= datetime(2026, 1, 5, 4, 30)
+        assert max(times) <= datetime(2026, 1, 5, 10, 30)
+        # Spread across the window rather than bunched at its start
+        assert sum(1 for t in times if t < datetime(2026, 1, 5, 7, 30)) in range(200, 300)
+
+    def test_window_past_midnight(self):
+        """Test that a window ending before it starts runs into the next day."""
+        fired = fire_time_in_window(date(2026, 1, 5), 'UTC', time(22, 0), time(2, 0), random.Random(2))
+        assert datetime(2026, 1, 5, 22, 0) <= fired <= datetime(2026, 1, 6, 2, 0)
+
+    def test_first_fire_spread_over_cadence(self):
+        """Test that new schedules land on every day of the first period, and later ones a cadence apart."""
+        schedule = {'cadence_days': 7, 'timezone': 'UTC', 'window_start': time(9, 0), 'window_end': time(17, 0)}
+        after = datetime(2026, 1, 5, 12, 0)
+        rng = random.Random(3)
+
+        days = {next_fire_at(schedule, after, rng, first=True).date() for _ in range(200)}
+        assert days == {date(2026, 1, 5) + timedelta(days=n) for n in range(1, 8)}
+        assert next_fire_at(schedule, after, rng).date() == date(2026, 1, 12)
+
+
+class TestCheckInScheduler:
+    """Test suite for scheduler ticks."""
+
+    def test_schedule_check_ins_upserts(self, app, db_session):
+        """Test that scheduling inserts new schedules and replaces existing ones."""
+        users = [add_user(f'+10{n}') for n in range(3)]
+        db.session.commit()
+
+        assert schedule_check_ins([users[0].id, users[1].id], cadence_days=14) == 2
+        assert schedule_check_ins([users[1].id, users[2].id], cadence_days=7, timezone='Europe/London') == 2
+
+        schedules = {s.user_id: s for s in CheckInSchedule.query.all()}
+        assert len(schedules) == 3
+        assert schedules[users[0].id].cadence_days == 14
+        assert (schedules[users[1].id].cadence_days, schedules[users[1].id].timezone) == (7, 'Europe/London')
+
+    def test_tick_invites_due_users_in_bulk(self, app, db_session):
+        """Test that a tick invites due users and moves every due schedule on."""
+        now = datetime(2026, 1, 5, 12, 0)
+        due, no_consent, busy, later = (add_user('+100'), add_user('+101', consent=False),
+                                        add_user('+102'), add_user('+103'))
+        db.session.add(Employee(user_id=due.id, first_name='Due', last_name='User'))
+        db.session.add(CheckIn(user_id=busy.id, state='mood_captured', is_completed=False, is_expired=False,
+                               expires_at=now + timedelta(minutes=10)))
+        for user, fire_at in ((due, now - timedelta(minutes=5)), (no_consent, now), (busy, now),
+                              (later, now + timedelta(hours=1))):
+            db.session.add(CheckInSchedule(user_id=user.id, cadence_days=7, timezone='UTC',
+                                           window_start=time(10, 0), window_end=time(16, 0),
+                                           next_fire_at=fire_at))
+        db.session.commit()
+
+        sender = FakeSender()
+        result = CheckInScheduler(app, sender, batch_size=2, rng=random.Random(4)).run_due(now)
+
+        assert result == {'due': 3, 'invited': 1, 'skipped': 2}
+        assert sender.sent == [('+100', INVITATION, 'check_in')]
+        check_in = CheckIn.query.filter_by(user_id=due.id).one()
+        assert check_in.state == 'initiated'
+        assert check_in.employee_id is not None
+        assert check_in.expires_at == now + timedelta(hours=12)
+
+        db.session.expire_all()
+        schedules = {s.user_id: s for s in CheckInSchedule.query.all()}
+        for user in (due, no_consent, busy):
+            assert schedules[user.id].last_fired_at == now
+            assert schedules[user.id].next_fire_at.date() == date(2026, 1, 12)
+        assert schedules[later.id].last_fired_at is None
+
+        # Nothing left to do until next week
+        assert CheckInScheduler(app, sender).tick(now)['due'] == 0
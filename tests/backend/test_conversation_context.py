@@ -0,0 +1,113 @@
+"""
+Tests for the Conversation Context Service
+
+This module tests token budgeting of the prompt context and folding of
+older turns into the running conversation summary.
+"""
+
+from backend.src.services import conversation_context, gemini_client
+from backend.src.services.conversation_context import (
+    build_conversation_context,
+    refresh_conversation_summary,
+    estimate_tokens
+)
+from backend.src.services.conversation_store import append_turns, ROLE_USER, ROLE_AI
+from backend.src.models.models import User, ConversationSummary, db
+
+
+def create_user_with_turns(exchanges, content_size=40):
+    user = User(phone_number='+1234567890', access_code='TEST1234')
+    db.session.add(user)
+    db.session.commit()
+
+    last_turn_no = 0
+    for i in range(exchanges):
+        last_turn_no = append_turns(user.id, last_turn_no, [
+            (ROLE_USER, f'q{i} '.ljust(content_size, 'x')),
+            (ROLE_AI, f'a{i} '.ljust(content_size, 'y'))
+        ])
+    db.session.commit()
+    return user
+
+
+def fake_summarize(summary, turns):
+    return (summary + ' ' if summary else '') + ','.join(content.split()[0] for _, content in turns)
+
+
+class TestConversationContext:
+    """Test suite for building the prompt context."""
+
+    def test_short_conversation_fits_without_folding(self, app, db_session):
+        """Test that a conversation under budget is sent verbatim."""
+        user = create_user_with_turns(3)
+
+        context = build_conversation_context(user.id, token_budget=1500)
+
+        assert context.last_turn_no == 6
+        assert len(context.turns) == 6
+        assert context.fold_through_turn_no is None
+        assert context.render().startswith('User: q0')
+
+    def test_budget_limits_turns_and_requests_fold(self, app, db_session):
+        """Test that turns over the budget are left out and marked for folding."""
+        user = create_user_with_turns(10, content_size=400)
+
+        context = build_conversation_context(user.id, token_budget=1000)
+
+        # Each 400-char turn is ~101 tokens, so 9 of the 20 turns fit
+        assert len(context.turns) == 9
+        assert context.last_turn_no == 20
+        assert context.fold_through_turn_no == 11
+        assert sum(estimate_tokens(content) for _, content in context.turns) <= 1000
+
+    def test_newest_turn_is_always_kept(self, app, db_session):
+        """Test that a single turn larger than the budget is still included."""
+        user = create_user_with_turns(1, content_size=8000)
+
+        context = build_conversation_context(user.id, token_budget=100)
+
+        assert [role for role, _ in context.turns] == [ROLE_AI]
+
+    def test_summary_replaces_folded_turns(self, app, db_session):
+        """Test that after a refresh the prompt starts from the summary."""
+        user = create_user_with_turns(10, content_size=400)
+        context = build_conversation_context(user.id, token_budget=1000)
+
+        assert refresh_conversation_summary(user.id, context.fold_through_turn_no, summarize=fake_summarize)
+
+        summary = ConversationSummary.query.filter_by(user_id=user.id).one()
+        assert summary.summarized_through_turn_no == 11
+        assert summary.summary.startswith('q0,a0,q1')
+
+        context = build_conversation_context(user.id, token_budget=1000)
+        assert context.render().startswith('Summary of the earlier conversation: q0,a0')
+        assert context.last_turn_no == 20
+        assert context.fold_through_turn_no is None
+
+    def test_refresh_is_incremental(self, app, db_session):
+        """Test that a second refresh only folds the new turns into the existing summary."""
+        user = create_user_with_turns(5)
+        seen = []
+
+        def recording_summarize(summary, turns):
+            seen.append(len(turns))
+            return fake_summarize(summary, turns)
+
+        refresh_conversation_summary(user.id, 4, summarize=recording_summarize)
+        refresh_conversation_summary(user.id, 8, summarize=recording_summarize)
+        assert not refresh_conversation_summary(user.id, 8, summarize=recording_summarize)
+
+        summary = ConversationSummary.query.filter_by(user_id=user.id).one()
+        assert seen == [4, 4]
+        assert summary.summary == 'q0,a0,q1,a1 q2,a2,q3,a3'
+
+    def test_summary_model_from_config(self, app, monkeypatch):
+        """Test that summaries use GEMINI_SUMMARY_MODEL."""
+        class Client:
+            def generative_model(self, model_name=None):
+                return model_name
+
+        monkeypatch.setattr(gemini_client, 'get_gemini_client', lambda app: Client())
+        monkeypatch.setitem(app.config, 'GEMINI_SUMMARY_MODEL', 'gemini-summary')
+
+        assert conversation_context._get_summary_model() == 'gemini-summary'
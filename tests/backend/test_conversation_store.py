@@ -0,0 +1,97 @@
+"""
+Tests for the Conversation Store Service
+
+This module tests the append-only conversation turn store that replaced
+the User.conversation_history text blob.
+"""
+
+from backend.src.services.conversation_store import (
+    get_recent_turns,
+    append_turns,
+    format_turns,
+    split_history_blob,
+    ROLE_USER,
+    ROLE_AI,
+    ROLE_SESSION
+)
+from backend.src.models.models import User, ConversationTurn, db
+
+
+LEGACY_BLOB = (
+    "User: hi\n"
+    "AI: Hello! How are you?\n"
+    "User: tired\n"
+    "AI: I'm sorry to hear that.\n"
+    "Would you like to talk about it?"
+    "\n\n--- New Session ---\n\n"
+    "\nUser: back again\n"
+    "AI: Welcome back."
+)
+
+
+def create_user(phone_number='+1234567890'):
+    user = User(phone_number=phone_number, access_code='TEST1234')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+class TestSplitHistoryBlob:
+    """Test suite for parsing legacy transcript blobs."""
+
+    def test_splits_turns_and_session_markers(self):
+        """Test that each prefixed line becomes a turn and separators become markers."""
+        assert split_history_blob(LEGACY_BLOB) == [
+            (ROLE_USER, 'hi'),
+            (ROLE_AI, 'Hello! How are you?'),
+            (ROLE_USER, 'tired'),
+            (ROLE_AI, "I'm sorry to hear that.\nWould you like to talk about it?"),
+            (ROLE_SESSION, ''),
+            (ROLE_USER, 'back again'),
+            (ROLE_AI, 'Welcome back.')
+        ]
+
+    def test_empty_blob(self):
+        """Test that an empty or missing blob yields no turns."""
+        assert split_history_blob('') == []
+        assert split_history_blob(None) == []
+
+    def test_format_round_trip(self):
+        """Test that formatting parsed turns reproduces the prompt transcript."""
+        formatted = format_turns(split_history_blob(LEGACY_BLOB))
+        assert formatted.startswith("User: hi\nAI: Hello! How are you?")
+        assert "\n\n--- New Session ---\n\nUser: back again" in formatted
+
+
+class TestConversationStore:
+    """Test suite for appending and reading conversation turns."""
+
+    def test_append_and_read_recent_window(self, app, db_session):
+        """Test that only the most recent exchanges are read back, oldest first."""
+        user = create_user()
+
+        last_turn_no = 0
+        for i in range(30):
+            last_turn_no = append_turns(user.id, last_turn_no, [(ROLE_USER, f'q{i}'), (ROLE_AI, f'a{i}')])
+        db.session.commit()
+
+        turns = get_recent_turns(user.id, max_exchanges=10)
+
+        assert last_turn_no == 60
+        assert len(turns) == 20
+        assert [t.turn_no for t in turns] == list(range(41, 61))
+        assert turns[0].content == 'q20'
+        assert turns[-1].content == 'a29'
+
+    def test_append_continues_from_window(self, app, db_session):
+        """Test that the window's last turn number is the next append's base."""
+        user = create_user()
+        append_turns(user.id, 0, [(ROLE_USER, 'hello'), (ROLE_AI, 'hi')])
+        db.session.commit()
+
+        window = get_recent_turns(user.id)
+        append_turns(user.id, window[-1].turn_no, [(ROLE_USER, 'again')])
+        db.session.commit()
+
+        turns = ConversationTurn.query.filter_by(user_id=user.id).order_by(ConversationTurn.turn_no).all()
+        assert [(t.turn_no, t.content) for t in turns] == [(1, 'hello'), (2, 'hi'), (3, 'again')]
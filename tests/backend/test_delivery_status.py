@@ -0,0 +1,157 @@
+"""
+Tests for the Delivery Status Service
+
+This module tests batching sent messages and status callbacks into the
+outbound message table, keeping statuses from moving backwards, the
+delivery rates reported for the dashboard, and the retention period.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.src.models.models import OutboundMessage, db
+from backend.src.services.delivery_status import (
+    MAX_FAILED_FLUSHES,
+    DeliveryStatusRecorder,
+    get_delivery_stats,
+    prune_outbound_messages
+)
+from backend.src.utils.metrics import metrics
+
+
+def statuses():
+    db.session.expire_all()
+    return {message.sid: message.status for message in OutboundMessage.query.all()}
+
+
+class TestDeliveryStatusRecorder:
+    """Test suite for buffering and applying delivery statuses."""
+
+    def test_flush_inserts_sent_and_applies_callbacks(self, app, db_session):
+        """Test that one flush records sends and applies callbacks in batches."""
+        metrics.reset()
+        recorder = DeliveryStatusRecorder(app)
+        for n in range(5):
+            recorder.record_sent(f'SM{n}', f'whatsapp:+10{n}', category='broadcast')
+        recorder.flush()
+
+        for n in range(4):
+            recorder.record_status(f'SM{n}', 'sent')
+            recorder.record_status(f'SM{n}', 'delivered' if n < 3 else 'failed')
+        recorder.record_status('SM3', 'failed', error_code='63016')
+        recorder.flush()
+
+        assert statuses() == {'SM0': 'delivered', 'SM1': 'delivered', 'SM2': 'delivered',
+                              'SM3': 'failed', 'SM4': 'queued'}
+        message = OutboundMessage.query.filter_by(sid='SM3').one()
+        assert (message.to_number, message.category, message.error_code) == ('+103', 'broadcast', '63016')
+        assert metrics.histogram('delivery.flush_size').count == 2
+
+    def test_out_of_order_callback_does_not_regress(self, app, db_session):
+        """Test that a late 'sent' callback leaves a delivered message delivered."""
+        recorder = DeliveryStatusRecorder(app)
+        recorder.record_sent('SM1', '+100')
+        recorder.record_status('SM1', 'read')
+        recorder.flush()
+
+        recorder.record_status('SM1', 'sent')
+        recorder.record_status('SM1', 'delivered')
+        recorder.flush()
+
+        assert statuses() == {'SM1': 'read'}
+
+    def test_callback_before_send_is_retried(self, app, db_session):
+        """Test that a callback for a SID not recorded yet is applied once the send is."""
+        recorder = DeliveryStatusRecorder(app)
+        recorder.record_status('SM1', 'delivered')
+        recorder.record_status('SM2', 'bogus')
+        recorder.flush()
+        assert statuses() == {}
+
+        recorder.record_sent('SM1', '+100')
+        recorder.flush()
+        assert statuses() == {'SM1': 'delivered'}
+
+    def test_background_thread_flushes(self, app, db_session):
+        """Test that the flush thread writes buffered entries without an explicit flush."""
+        recorder = DeliveryStatusRecorder(app, flush_interval=0.01)
+        recorder.start()
+        try:
+            recorder.record_sent('SM1', '+100')
+            recorder.record_status('SM1', 'delivered')
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and statuses() != {'SM1': 'delivered'}:
+                time.sleep(0.01)
+        finally:
+            recorder.stop()
+        assert statuses() == {'SM1': 'delivered'}
+
+    def test_bad_row_does_not_block_batch(self, app, db_session):
+        """Test that a duplicate SID is retried alone and dropped while the rest of its batch is recorded."""
+        metrics.reset()
+        recorder = DeliveryStatusRecorder(app)
+        recorder.record_sent('SM1', '+100')
+        recorder.record_sent('SM1', '+100')
+        recorder.record_sent('SM2', '+100')
+        recorder.record_status('SM2', 'delivered')
+        with pytest.raises(Exception):
+            recorder.flush()
+        assert statuses() == {'SM1': 'queued', 'SM2': 'delivered'}
+
+        for _ in range(MAX_FAILED_FLUSHES - 1):
+            with pytest.raises(Exception):
+                recorder.flush()
+        assert recorder._pending() == 0
+        assert metrics.counter('delivery.failed_dropped').value == 1
+
+    def test_background_thread_backs_off(self, app, db_session, monkeypatch):
+        """Test that the flush thread waits between failed flushes even with a full buffer."""
+        recorder = DeliveryStatusRecorder(app, flush_interval=0.01, max_batch=1)
+        calls = []
+
+        def failing_flush():
+            calls.append(time.monotonic())
+            raise RuntimeError('database unavailable')
+        monkeypatch.setattr(recorder, 'flush', failing_flush)
+
+        recorder.record_sent('SM1', '+100')
+        recorder.start()
+        time.sleep(0.3)
+        recorder.stop()
+        assert 2 <= len(calls) < 10
+
+
+class TestDeliveryStats:
+    """Test suite for delivery rates."""
+
+    def test_rates_by_category(self, app, db_session):
+        """Test that rates count delivered/read and failed/undelivered messages."""
+        recorder = DeliveryStatusRecorder(app)
+        for n, status in enumerate(['delivered', 'read', 'failed', 'undelivered', 'sent']):
+            recorder.record_sent(f'SB{n}', '+100', category='broadcast')
+            recorder.record_status(f'SB{n}', status)
+        recorder.record_sent('SR1', '+100')
+        recorder.flush()
+
+        stats = get_delivery_stats(category='broadcast')
+        assert stats['total'] == 5
+        assert stats['by_status']['undelivered'] == 1
+        assert (stats['delivery_rate'], stats['failure_rate']) == (0.4, 0.4)
+        assert get_delivery_stats(category='template')['delivery_rate'] is None
+
+
+class TestPruneOutboundMessages:
+    """Test suite for the outbound message retention period."""
+
+    def test_old_records_are_deleted(self, app, db_session):
+        """Test that only records past the retention period are deleted."""
+        db.session.add_all([
+            OutboundMessage(sid='SM1', to_number='+100', created_at=datetime.utcnow() - timedelta(days=91)),
+            OutboundMessage(sid='SM2', to_number='+100')
+        ])
+        db.session.commit()
+
+        assert prune_outbound_messages(90) == 1
+        assert [message.sid for message in OutboundMessage.query] == ['SM2']
@@ -0,0 +1,112 @@
+"""
+Tests for the GDPR utilities
+
+This module checks that anonymizing, exporting and deleting a user's data
+cover the conversation transcript, the summary derived from it, the
+messages stored by the async webhook and the delivery records of messages
+sent to the user, and that erasing a user also removes their check-in
+schedule and cached state.
+"""
+
+from datetime import datetime, time
+
+import pytest
+from sqlalchemy import text
+
+from backend.src.models.models import (
+    AuthUser, CheckInSchedule, ConversationSummary, ConversationTurn, InboundMessage, OutboundMessage, User, db
+)
+from backend.src.services.user_state_cache import UserStateCache
+from backend.src.utils.gdpr import anonymize_user_data, delete_user_data, export_user_data
+
+
+@pytest.fixture
+def user(app, db_session):
+    """A bot user with a transcript, summary, inbound and outbound messages and check-in schedule, and the matching auth user"""
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    user = User(phone_number='whatsapp:+100', access_code='CODE1234')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(AuthUser(id=user.id, email='user@example.com', name='User', password_hash='x', role='bot'))
+    db.session.add_all([
+        ConversationTurn(user_id=user.id, turn_no=1, role='user', content='I have been anxious at work'),
+        ConversationTurn(user_id=user.id, turn_no=2, role='ai', content='That sounds hard'),
+        ConversationSummary(user_id=user.id, summary='Anxious about work', summarized_through_turn_no=2),
+        CheckInSchedule(user_id=user.id, window_start=time(10), window_end=time(16), next_fire_at=datetime.utcnow()),
+        # The webhook stores senders without the whatsapp: prefix
+        InboundMessage(sender='+100', body='I have been anxious at work', status='processed'),
+        InboundMessage(sender='+101', body='Someone else', status='processed'),
+        OutboundMessage(sid='SM1', to_number='+100', category='reply', status='delivered'),
+        OutboundMessage(sid='SM2', to_number='+101', category='reply', status='delivered')
+    ])
+    db.session.commit()
+    return user
+
+
+class TestConversationData:
+    """Test suite for conversation turns and summaries."""
+
+    def test_anonymize_removes_transcript_and_summary(self, user):
+        """Test that no conversation content survives anonymization."""
+        assert anonymize_user_data(user.id)
+
+        assert {turn.content for turn in ConversationTurn.query.filter_by(user_id=user.id)} == {'[Content Removed]'}
+        assert ConversationSummary.query.filter_by(user_id=user.id).count() == 0
+        assert {inbound.body for inbound in InboundMessage.query.filter_by(sender='+100')} == {'[Content Removed]'}
+        assert InboundMessage.query.filter_by(sender='+101').one().body == 'Someone else'
+        assert [outbound.to_number for outbound in OutboundMessage.query.order_by(OutboundMessage.id)] == [
+            '[removed]', '+101'
+        ]
+
+    def test_export_includes_summary(self, user):
+        """Test that the summary and the user's inbound and outbound messages are part of the export."""
+        data = export_user_data(user.id)
+
+        assert data['conversation_summary']['summary'] == 'Anxious about work'
+        assert [inbound['body'] for inbound in data['inbound_messages']] == ['I have been anxious at work']
+        assert [(outbound['category'], outbound['status']) for outbound in data['outbound_messages']] == [
+            ('reply', 'delivered')
+        ]
+
+    def test_delete_removes_transcript_and_summary(self, user):
+        """Test that deletion removes every conversation row."""
+        assert delete_user_data(user.id)
+
+        assert ConversationTurn.query.filter_by(user_id=user.id).count() == 0
+        assert ConversationSummary.query.filter_by(user_id=user.id).count() == 0
+        assert [inbound.sender for inbound in InboundMessage.query] == ['+101']
+        assert [outbound.to_number for outbound in OutboundMessage.query] == ['+101']
+
+
+class TestCheckInSchedules:
+    """Test suite for proactive check-in schedules."""
+
+    def test_anonymize_stops_scheduling(self, user):
+        """Test that an anonymized user is no longer invited."""
+        assert anonymize_user_data(user.id)
+
+        assert CheckInSchedule.query.filter_by(user_id=user.id).count() == 0
+
+    def test_delete_scheduled_user(self, user):
+        """Test that a scheduled user can be erased with foreign keys enforced."""
+        user_id = user.id
+        assert delete_user_data(user_id)
+
+        assert CheckInSchedule.query.filter_by(user_id=user_id).count() == 0
+        assert db.session.get(User, user_id) is None
+
+
+class TestUserStateCache:
+    """Test suite for the in-process user state cache."""
+
+    def test_delete_drops_cached_state(self, user):
+        """Test that an erased user is no longer served from the user state cache."""
+        cache = UserStateCache()
+        user.is_authenticated, user.consent_given = True, True
+        user.department, user.location = 'Engineering', 'Remote'
+        db.session.commit()
+        cache.put_user(user)
+
+        assert delete_user_data(user.id)
+
+        assert cache.get('whatsapp:+100') is None
@@ -0,0 +1,141 @@
+"""
+Tests for the Gemini Client Service
+
+This module tests native chat history building, reuse and rebuilding of
+per-user chat sessions, the session LRU bounds and call instrumentation,
+using a fake model in place of the Gemini SDK.
+"""
+
+import pytest
+
+from backend.src.services.conversation_context import ConversationContext
+from backend.src.services.conversation_store import ROLE_AI, ROLE_SESSION, ROLE_USER
+from backend.src.services.gemini_client import GeminiClient, build_history, SUMMARY_PREFIX
+from backend.src.utils.metrics import metrics
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChat:
+    """Records the history it was started with and the messages sent"""
+
+    def __init__(self, history):
+        self.history = history
+        self.sent = []
+
+    def send_message(self, content, stream=False):
+        self.sent.append(content)
+        reply = f"reply {len(self.sent)}"
+        if stream:
+            return iter([FakeResponse(reply[:3]), FakeResponse(reply[3:])])
+        return FakeResponse(reply)
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.chats = []
+
+    def start_chat(self, history):
+        chat = FakeChat(history)
+        self.chats.append(chat)
+        return chat
+
+
+@pytest.fixture
+def client():
+    metrics.reset()
+    return GeminiClient(model_factory=FakeModel)
+
+
+def context(turns, summary=''):
+    return ConversationContext(summary=summary, turns=turns, last_turn_no=len(turns))
+
+
+class TestBuildHistory:
+    """Test suite for native history building."""
+
+    def test_summary_opens_history(self):
+        """Test that the running summary is handed over as an opening exchange."""
+        history = build_history(context([(ROLE_USER, 'Hi'), (ROLE_AI, 'Hello')], summary='Busy week'))
+        assert [content['role'] for content in history] == ['user', 'model', 'user', 'model']
+        assert history[0]['parts'] == [SUMMARY_PREFIX + 'Busy week']
+
+    def test_markers_dropped_and_roles_alternate(self):
+        """Test that session markers are dropped, leading model turns skipped and same-role turns merged."""
+        history = build_history(context([
+            (ROLE_AI, 'orphaned reply'), (ROLE_USER, 'one'), (ROLE_SESSION, ''),
+            (ROLE_USER, 'two'), (ROLE_AI, 'answer')
+        ]))
+        assert history == [
+            {'role': 'user', 'parts': ['one\ntwo']},
+            {'role': 'model', 'parts': ['answer']}
+        ]
+
+
+class TestGeminiClient:
+    """Test suite for per-user chat sessions."""
+
+    def test_session_reused_across_turns(self, client):
+        """Test that the next turn reuses the session when the stored context matches it."""
+        turns = [(ROLE_USER, 'Hi'), (ROLE_AI, 'Hello')]
+        assert client.reply(1, context(turns), 'How are you?') == 'reply 1'
+
+        turns += [(ROLE_USER, 'How are you?'), (ROLE_AI, 'reply 1')]
+        assert client.reply(1, context(turns), 'Tired') == 'reply 2'
+
+        model = client.generative_model()
+        assert len(model.chats) == 1
+        assert model.chats[0].sent == ['How are you?', 'Tired']
+        assert metrics.counter('gemini.sessions.misses').value == 1
+        assert metrics.counter('gemini.sessions.hits').value == 1
+
+    def test_session_rebuilt_when_context_moves_on(self, client):
+        """Test that a new summary replaces the session's history instead of extending it."""
+        client.reply(1, context([(ROLE_USER, 'Hi'), (ROLE_AI, 'Hello')]), 'Anything')
+        client.reply(1, context([(ROLE_USER, 'Later'), (ROLE_AI, 'Sure')], summary='Said hi'), 'More')
+
+        chat = client.generative_model().chats[0]
+        assert chat.history[0]['parts'] == [SUMMARY_PREFIX + 'Said hi']
+        assert metrics.counter('gemini.sessions.rebuilds').value == 1
+
+    def test_sessions_bounded_by_count_and_size(self):
+        """Test that the least recently used sessions are dropped past either bound."""
+        client = GeminiClient(model_factory=FakeModel, max_sessions=2, max_history_chars=50)
+        for user_id in (1, 2, 3):
+            client.reply(user_id, context([]), 'Hi')
+        assert list(client._sessions) == [2, 3]
+
+        client.reply(4, context([(ROLE_USER, 'x' * 35), (ROLE_AI, 'ok')]), 'Hi')
+        assert list(client._sessions) == [4]
+
+    def test_idle_sessions_dropped(self):
+        """Test that sessions unused for longer than the idle timeout are dropped."""
+        client = GeminiClient(model_factory=FakeModel, idle_timeout=0)
+        client.reply(1, context([]), 'Hi')
+        client.reply(2, context([]), 'Hi')
+        assert list(client._sessions) == [2]
+
+    def test_stream_records_exchange(self, client):
+        """Test that a completed stream keeps the session and instruments the call."""
+        chunks = list(client.reply_stream(1, context([]), 'Hi'))
+        assert ''.join(chunks) == 'reply 1'
+
+        client.reply(1, context([(ROLE_USER, 'Hi'), (ROLE_AI, 'reply 1')]), 'Again')
+        assert metrics.counter('gemini.sessions.hits').value == 1
+        assert metrics.histogram('gemini.first_chunk_seconds').count == 1
+        assert metrics.histogram('gemini.chat_seconds').count == 2
+        assert metrics.histogram('gemini.output_tokens').count == 2
+
+    def test_failed_call_drops_session(self, client):
+        """Test that a failed call does not leave a session with a half-written history."""
+        client.reply(1, context([]), 'Hi')
+        client.generative_model().chats[0].send_message = lambda content, stream=False: 1 / 0
+
+        with pytest.raises(ZeroDivisionError):
+            client.reply(1, context([(ROLE_USER, 'Hi'), (ROLE_AI, 'reply 1')]), 'Again')
+        assert 1 not in client._sessions
+        assert metrics.counter('gemini.errors').value == 1
@@ -0,0 +1,61 @@
+"""
+Tests for the Webhook Idempotency Service
+
+This module tests that Twilio webhook deliveries are claimed once per
+MessageSid, both from the in-memory cache and from the unique table.
+"""
+
+from datetime import datetime, timedelta
+
+from backend.src.services.idempotency import IdempotencyGuard, prune_processed_webhooks
+from backend.src.models.models import ProcessedWebhook, db
+from backend.src.utils.metrics import metrics
+
+
+class TestIdempotencyGuard:
+    """Test suite for IdempotencyGuard."""
+
+    def test_duplicate_delivery_is_rejected(self, app, db_session):
+        """Test that a second delivery of the same MessageSid is a duplicate."""
+        metrics.reset()
+        guard = IdempotencyGuard()
+
+        assert guard.claim('SM1')
+        assert not guard.claim('SM1')
+        assert guard.claim('SM2')
+
+        assert ProcessedWebhook.query.count() == 2
+        assert metrics.counter('bot.webhook_duplicates').value == 1
+
+    def test_table_catches_duplicates_missing_from_memory(self, app, db_session):
+        """Test that a delivery claimed elsewhere is rejected via the unique index."""
+        assert IdempotencyGuard().claim('SM1')
+
+        # A fresh guard stands in for another process, or an evicted cache entry
+        assert not IdempotencyGuard().claim('SM1')
+
+    def test_cache_is_bounded(self, app, db_session):
+        """Test that the in-memory cache evicts the least recently used MessageSid."""
+        guard = IdempotencyGuard(capacity=2)
+        for sid in ('SM1', 'SM2', 'SM3'):
+            guard.claim(sid)
+
+        assert list(guard._seen) == ['SM2', 'SM3']
+        assert not guard.claim('SM1')
+
+    def test_release_allows_reprocessing(self, app, db_session):
+        """Test that a released delivery can be claimed again."""
+        guard = IdempotencyGuard()
+        guard.claim('SM1')
+        guard.release('SM1')
+
+        assert guard.claim('SM1')
+
+    def test_prune_removes_old_records(self, app, db_session):
+        """Test that records older than the retry window are pruned."""
+        db.session.add(ProcessedWebhook(message_sid='SMold', received_at=datetime.utcnow() - timedelta(days=3)))
+        db.session.add(ProcessedWebhook(message_sid='SMnew'))
+        db.session.commit()
+
+        assert prune_processed_webhooks() == 1
+        assert [w.message_sid for w in ProcessedWebhook.query.all()] == ['SMnew']
@@ -0,0 +1,168 @@
+"""
+Tests for the Inbound Message Worker Service
+
+This module tests the acknowledge-then-process worker pool used by the
+WhatsApp webhook in async mode.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from backend.src.services.inbound_worker import InboundWorkerPool, prune_inbound_messages
+from backend.src.models.models import InboundMessage, db
+from backend.src.utils.metrics import metrics
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def store_inbound(sender, body, status='queued', received_at=None):
+    inbound = InboundMessage(sender=sender, body=body, status=status, received_at=received_at or datetime.utcnow())
+    db.session.add(inbound)
+    db.session.commit()
+    return inbound.id
+
+
+class TestInboundWorkerPool:
+    """Test suite for InboundWorkerPool."""
+
+    def test_messages_from_one_sender_are_processed_in_order(self, app, db_session):
+        """Test that a sender's messages are handled in acknowledgement order."""
+        processed = []
+        lock = threading.Lock()
+
+        def handler(sender, body):
+            time.sleep(0.005)
+            with lock:
+                processed.append((sender, body))
+            return {"status": "success"}
+
+        pool = InboundWorkerPool(app, handler, num_workers=4)
+        with patch.object(InboundWorkerPool, '_claim', return_value=True), \
+                patch.object(InboundWorkerPool, '_record_outcome'):
+            pool.start()
+            try:
+                for i in range(20):
+                    for sender in ('+111', '+222', '+333'):
+                        pool.submit(i, sender, str(i))
+
+                assert wait_for(lambda: len(processed) == 60)
+            finally:
+                pool.stop()
+
+        for sender in ('+111', '+222', '+333'):
+            bodies = [body for s, body in processed if s == sender]
+            assert bodies == [str(i) for i in range(20)]
+
+    def test_outcome_is_recorded_on_the_inbound_row(self, app, db_session):
+        """Test that processed and failed messages are marked accordingly."""
+        def handler(sender, body):
+            if body == 'boom':
+                raise ValueError("pipeline failed")
+            return {"status": "success"}
+
+        ok_id = store_inbound('+111', 'hello')
+        failed_id = store_inbound('+222', 'boom')
+
+        pool = InboundWorkerPool(app, handler, num_workers=2)
+        pool.start()
+        try:
+            pool.submit(ok_id, '+111', 'hello')
+            pool.submit(failed_id, '+222', 'boom')
+
+            def both_done():
+                db.session.expire_all()
+                rows = InboundMessage.query.filter(InboundMessage.status.in_(('processed', 'failed'))).all()
+                return len(rows) == 2
+
+            assert wait_for(both_done)
+        finally:
+            pool.stop()
+
+        assert db.session.get(InboundMessage, ok_id).status == 'processed'
+        failed = db.session.get(InboundMessage, failed_id)
+        assert failed.status == 'failed'
+        assert 'pipeline failed' in failed.error
+
+    def test_ack_to_reply_latency_is_recorded(self, app, db_session):
+        """Test that the ack-to-reply histogram receives one sample per message."""
+        before = metrics.histogram('bot.ack_to_reply_seconds').count
+        done = threading.Event()
+
+        def handler(sender, body):
+            done.set()
+            return {"status": "success"}
+
+        pool = InboundWorkerPool(app, handler, num_workers=1)
+        pool.start()
+        try:
+            pool.submit(store_inbound('+111', 'hi'), '+111', 'hi')
+            assert done.wait(5.0)
+            assert wait_for(lambda: metrics.histogram('bot.ack_to_reply_seconds').count == before + 1)
+        finally:
+            pool.stop()
+
+    def test_unprocessed_messages_are_replayed_once(self, app, db_session):
+        """Test that queued and failed messages are resubmitted, skipping processed and stale ones."""
+        now = datetime.utcnow()
+        queued_id = store_inbound('+111', 'queued', received_at=now - timedelta(minutes=5))
+        failed_id = store_inbound('+222', 'failed', status='failed', received_at=now - timedelta(minutes=5))
+        store_inbound('+333', 'processed', status='processed', received_at=now - timedelta(minutes=5))
+        store_inbound('+444', 'stale', received_at=now - timedelta(days=1))
+        store_inbound('+555', 'fresh')
+
+        pool = InboundWorkerPool(app, lambda sender, body: {"status": "success"}, num_workers=1)
+        with patch.object(InboundWorkerPool, 'submit') as submit:
+            assert pool.replay(min_age=60, max_age=3600) == 2
+            assert pool.replay(min_age=60, max_age=3600) == 0
+
+        assert [call.args for call in submit.call_args_list] == [
+            (queued_id, '+111', 'queued'), (failed_id, '+222', 'failed')
+        ]
+        assert all(call.kwargs == {'status': 'replayed'} for call in submit.call_args_list)
+        assert db.session.get(InboundMessage, queued_id).status == 'replayed'
+
+    def test_message_claimed_elsewhere_is_skipped(self, app, db_session):
+        """Test that a live worker skips a message a replay has already claimed."""
+        inbound_id = store_inbound('+111', 'hello', received_at=datetime.utcnow() - timedelta(minutes=5))
+        handled = []
+
+        def handler(sender, body):
+            handled.append(body)
+            return {"status": "success"}
+
+        pool = InboundWorkerPool(app, handler, num_workers=1)
+        with patch.object(InboundWorkerPool, 'submit') as submit:
+            assert pool.replay(min_age=60, max_age=3600) == 1
+
+        live = {'inbound_id': inbound_id, 'sender': '+111', 'body': 'hello',
+                'acked_at': time.monotonic(), 'status': 'queued'}
+        pool._process(live)
+        assert handled == []
+
+        pool._process({**live, 'status': submit.call_args.kwargs['status']})
+        pool._process({**live, 'status': submit.call_args.kwargs['status']})
+        assert handled == ['hello']
+        db.session.expire_all()
+        assert db.session.get(InboundMessage, inbound_id).status == 'processed'
+
+
+class TestPruneInboundMessages:
+    """Test suite for the inbound message retention period."""
+
+    def test_old_messages_are_deleted(self, app, db_session):
+        """Test that only messages past the retention period are deleted."""
+        store_inbound('+111', 'old', status='processed', received_at=datetime.utcnow() - timedelta(days=31))
+        store_inbound('+111', 'recent', status='processed')
+
+        assert prune_inbound_messages(30) == 1
+        assert [inbound.body for inbound in InboundMessage.query] == ['recent']
@@ -0,0 +1,129 @@
+"""
+Tests for the Keyword Extraction Service
+
+This module checks that the regex-based extractor returns the same keywords
+as the original word_tokenize-based function on the corpus fixture, and
+tests the batch API, the optional normalizers and the background task that
+writes keyword counts for batches of messages.
+"""
+
+import os
+import queue
+from datetime import date
+
+import nltk
+import pytest
+
+from backend.src.services import async_worker
+from backend.src.services.keyword_extraction import KeywordExtractor, load_stopwords
+from backend.src.services.keyword_rollup import get_top_keywords
+from tests.fixtures.data.keyword_corpus import KEYWORD_CORPUS
+
+NLTK_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'nltk_data'))
+
+
+@pytest.fixture(scope='module')
+def stop_words():
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return load_stopwords()
+
+
+@pytest.fixture(scope='module')
+def extractor(stop_words):
+    return KeywordExtractor(stop_words)
+
+
+class TestKeywordExtractor:
+    """Test suite for the keyword extractor."""
+
+    @pytest.mark.parametrize('text,expected', KEYWORD_CORPUS)
+    def test_matches_word_tokenize_results(self, extractor, text, expected):
+        """Test that the corpus keywords match the original function's output."""
+        keywords = extractor.extract(text)
+        assert sorted(keywords) == expected
+        assert len(keywords) == len(set(keywords))
+
+    def test_token_boundaries(self, extractor):
+        """Test contractions, hyphenated words and words joined to digits or periods."""
+        assert extractor.extract("I couldn't sleep") == ['could', 'sleep']
+        assert extractor.extract('well-being matters') == ['matters']
+        assert extractor.extract('tired--really tired...') == ['tired', 'really']
+        assert extractor.extract('abc123 e.g. o\'clock x/y stress.') == ['stress']
+        assert extractor.extract('gonna quit, cannot cope') == ['quit', 'cope']
+
+    def test_keywords_in_first_occurrence_order(self, extractor):
+        """Test that repeated words are returned once, in order of first occurrence."""
+        assert extractor.extract('Deadlines, stress, DEADLINES and more stress') == ['deadlines', 'stress']
+
+    def test_extract_batch(self, extractor):
+        """Test that the batch API returns one keyword list per message, in order."""
+        texts = [text for text, _ in KEYWORD_CORPUS]
+        assert extractor.extract_batch(texts) == [extractor.extract(text) for text in texts]
+        assert extractor.extract_batch([]) == []
+
+    def test_stop_words_are_frozen(self, extractor):
+        """Test that the stopword set cannot be modified after construction."""
+        assert isinstance(extractor.stop_words, frozenset)
+        assert 'about' in extractor.stop_words
+
+    def test_stemming(self, stop_words):
+        """Test that the stem normalizer maps inflections to one keyword."""
+        extractor = KeywordExtractor(stop_words, normalizer='stem')
+        assert extractor.extract('meetings, meeting and more meetings') == ['meet']
+
+    def test_unknown_normalizer(self, stop_words):
+        """Test that an unknown normalizer is rejected."""
+        with pytest.raises(ValueError):
+            KeywordExtractor(stop_words, normalizer='soundex')
+
+
+@pytest.fixture
+def task_queue(monkeypatch, stop_words):
+    """Isolated task queue and pending buffer, so the running worker does not pick up tasks"""
+    tasks = queue.Queue()
+    monkeypatch.setattr(async_worker, 'task_queue', tasks)
+    monkeypatch.setattr(async_worker, '_pending_keywords', [])
+    return tasks
+
+
+class TestKeywordExtractionTask:
+    """Test suite for background keyword extraction."""
+
+    def test_pending_messages_share_one_task(self, task_queue):
+        """Test that messages queued before the task runs are handled by a single task."""
+        assert async_worker.queue_keyword_extraction('Stressed about the deadline', 'Engineering', 'Remote')
+        assert not async_worker.queue_keyword_extraction('Another deadline', 'Sales', 'London')
+        assert task_queue.qsize() == 1
+
+    def test_batch_is_written_to_rollup(self, app, db_session, task_queue, monkeypatch):
+        """Test that a task writes the keyword counts of every pending message."""
+        monkeypatch.setitem(app.config, 'KEYWORD_BATCH_SIZE', 2)
+        day = date(2026, 10, 16)
+        async_worker.queue_keyword_extraction('Stressed about the deadline', 'Engineering', 'Remote', day=day)
+        async_worker.queue_keyword_extraction('The deadline moved again', 'Engineering', 'Remote', day=day)
+        async_worker.queue_keyword_extraction('Deadline stress, deadline stress', 'Sales', 'London', day=day)
+
+        async_worker.process_keyword_extraction(task_queue.get_nowait())
+
+        assert get_top_keywords(limit=1) == [('deadline', 3)]
+        assert sorted(get_top_keywords(department='Engineering')) == [
+            ('deadline', 2), ('moved', 1), ('stressed', 1)
+        ]
+        assert sorted(get_top_keywords(department='Sales')) == [('deadline', 1), ('stress', 1)]
+        assert async_worker._pending_keywords == []
+
+        # The next message queues a new task
+        assert async_worker.queue_keyword_extraction('Quiet week', 'Engineering', 'Remote', day=day)
+
+    def test_extractor_failure_does_not_stall_the_buffer(self, app, db_session, task_queue, monkeypatch):
+        """Test that a task whose extractor cannot be loaded still empties the buffer."""
+        def broken_extractor(app):
+            raise LookupError('stopwords not found')
+        monkeypatch.setattr(async_worker, 'get_keyword_extractor', broken_extractor)
+        async_worker.queue_keyword_extraction('Stressed about the deadline', 'Engineering', 'Remote')
+
+        async_worker.process_keyword_extraction(task_queue.get_nowait())
+
+        assert async_worker._pending_keywords == []
+        assert async_worker.queue_keyword_extraction('Quiet week', 'Engineering', 'Remote')
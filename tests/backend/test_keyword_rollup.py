@@ -0,0 +1,63 @@
+"""
+Tests for the Keyword Rollup Service
+
+This module tests the upsert-based daily keyword rollup, the top keywords
+query and pruning of legacy per-user keyword rows.
+"""
+
+from datetime import date, datetime, timedelta
+
+from backend.src.services.keyword_rollup import (
+    count_keywords,
+    increment_keyword_counts,
+    get_top_keywords,
+    prune_keyword_stats
+)
+from backend.src.models.models import User, KeywordStat, KeywordDailyStat, db
+
+DAY = date(2026, 10, 16)
+
+
+class TestKeywordRollup:
+    """Test suite for the daily keyword rollup."""
+
+    def test_count_keywords_defaults_unknown(self):
+        """Test that missing department and location are counted as Unknown."""
+        assert count_keywords(['stress', 'deadline', 'stress'], None, 'Remote', day=DAY) == {
+            (DAY, 'Unknown', 'Remote', 'stress'): 2,
+            (DAY, 'Unknown', 'Remote', 'deadline'): 1
+        }
+
+    def test_increments_accumulate_in_one_row(self, app, db_session):
+        """Test that repeated increments update the existing row instead of adding rows."""
+        for _ in range(3):
+            increment_keyword_counts(count_keywords(['stress', 'workload'], 'Engineering', 'Remote', day=DAY))
+        db.session.commit()
+
+        rows = KeywordDailyStat.query.order_by(KeywordDailyStat.keyword).all()
+        assert [(row.keyword, row.count) for row in rows] == [('stress', 3), ('workload', 3)]
+
+    def test_top_keywords_filters(self, app, db_session):
+        """Test that the top keywords query sums across days and honours filters."""
+        increment_keyword_counts(count_keywords(['stress'] * 5 + ['meetings'], 'Engineering', 'Remote', day=DAY))
+        increment_keyword_counts(count_keywords(['meetings'] * 3, 'Sales', 'London', day=DAY))
+        increment_keyword_counts(count_keywords(['meetings'] * 4, 'Sales', 'London', day=DAY - timedelta(days=1)))
+        db.session.commit()
+
+        assert get_top_keywords() == [('meetings', 8), ('stress', 5)]
+        assert get_top_keywords(department='Sales') == [('meetings', 7)]
+        assert get_top_keywords(location='London', start_date=DAY) == [('meetings', 3)]
+        assert get_top_keywords(limit=1) == [('meetings', 8)]
+
+    def test_prune_removes_only_expired_rows(self, app, db_session):
+        """Test that legacy per-user rows past the retention period are deleted."""
+        user = User(phone_number='+1234567890', access_code='TEST1234')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(KeywordStat(user_id=user.id, keyword='old', count=1,
+                                   timestamp=datetime.utcnow() - timedelta(days=40)))
+        db.session.add(KeywordStat(user_id=user.id, keyword='recent', count=1))
+        db.session.commit()
+
+        assert prune_keyword_stats(retention_days=30) == 1
+        assert [row.keyword for row in KeywordStat.query.all()] == ['recent']
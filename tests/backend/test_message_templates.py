@@ -0,0 +1,100 @@
+"""
+Tests for the Message Template Service
+
+This module tests load-time validation of templates against their declared
+parameters, rendering with defaults, cached parameter-free templates, batch
+rendering, and the bundled template files.
+"""
+
+import json
+import time
+
+import pytest
+
+from backend.src.services.message_templates import (
+    DEFAULT_TEMPLATES_DIR,
+    CompiledTemplate,
+    TemplateError,
+    TemplateNotFoundError,
+    TemplateParameterError,
+    TemplateRegistry
+)
+
+
+class TestCompiledTemplate:
+    """Test suite for compiling and rendering a template."""
+
+    def test_render_with_defaults(self):
+        """Test that parameters are filled in and defaults cover missing ones."""
+        template = CompiledTemplate('reminder', 'Hi {name}, see you at {time}. {{not a field}}',
+                                    ['name', 'time'], defaults={'name': 'there'})
+
+        assert template.render({'name': 'Asha', 'time': '3 PM', 'extra': 1}) == 'Hi Asha, see you at 3 PM. {not a field}'
+        assert template.render({'time': '3 PM'}) == 'Hi there, see you at 3 PM. {not a field}'
+        with pytest.raises(TemplateParameterError, match='time'):
+            template.render({'name': 'Asha'})
+
+    @pytest.mark.parametrize('body, parameters', [
+        ('Hi {name} at {time}', ['name']),      # undeclared parameter
+        ('Hi there', ['name']),                 # unused declaration
+        ('Hi {0}', []),                         # positional field
+        ('Hi {user.name}', ['user']),           # attribute access
+        ('Hi {name', ['name']),                 # unbalanced brace
+    ])
+    def test_invalid_templates_rejected(self, body, parameters):
+        """Test that templates not matching their declared parameters fail to compile."""
+        with pytest.raises(TemplateError):
+            CompiledTemplate('broken', body, parameters)
+
+    def test_parameter_free_template_rendered_once(self):
+        """Test that a template without parameters is rendered at load time."""
+        template = CompiledTemplate('static', 'Use {{braces}} freely')
+
+        assert template.static_text == 'Use {braces} freely'
+        assert template.render({'ignored': 1}) is template.static_text
+        assert template.render_many([{}, {}]) == ['Use {braces} freely'] * 2
+
+    def test_render_many_is_fast(self):
+        """Test that 10k personalized messages render in well under a second."""
+        template = CompiledTemplate('invite', 'Hi {name}, your {department} check-in is open.',
+                                    ['name', 'department'], defaults={'department': 'team'})
+        parameter_sets = [{'name': f'Employee {n}'} for n in range(10000)]
+
+        start = time.perf_counter()
+        messages = template.render_many(parameter_sets)
+        elapsed = time.perf_counter() - start
+
+        assert messages[42] == 'Hi Employee 42, your team check-in is open.'
+        assert elapsed < 0.5
+
+
+class TestTemplateRegistry:
+    """Test suite for loading templates."""
+
+    def test_load_file_and_render(self, tmp_path):
+        """Test that templates load from JSON files and render by name."""
+        (tmp_path / 'a.json').write_text(json.dumps({
+            'greeting': {'body': 'Hello {name}', 'parameters': ['name']}
+        }))
+        registry = TemplateRegistry()
+
+        assert registry.load_directory(str(tmp_path)) == 1
+        assert registry.render('greeting', {'name': 'Ravi'}) == 'Hello Ravi'
+        assert registry.render_many('greeting', [{'name': 'A'}, {'name': 'B'}]) == ['Hello A', 'Hello B']
+        with pytest.raises(TemplateNotFoundError):
+            registry.render('missing')
+
+    def test_invalid_file_fails_at_load(self, tmp_path):
+        """Test that a file with a broken template is rejected when loaded."""
+        path = tmp_path / 'bad.json'
+        path.write_text(json.dumps({'bad': {'body': 'Hi {name}', 'parameters': []}}))
+
+        with pytest.raises(TemplateError):
+            TemplateRegistry().load_file(str(path))
+
+    def test_bundled_templates_are_valid(self):
+        """Test that the templates shipped with the app compile."""
+        registry = TemplateRegistry()
+
+        assert registry.load_directory(DEFAULT_TEMPLATES_DIR) > 0
+        assert 'check_in_invitation' in registry
@@ -0,0 +1,171 @@
+"""
+Tests for the Outbound WhatsApp Sender Service
+
+This module tests chunk ordering, retry behaviour and rate shaping of the
+pooled Twilio sender using a fake Twilio client, and redirecting the Twilio
+API to a local stand-in.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from twilio.base.exceptions import TwilioRestException
+
+from backend.src.services.outbound_sender import OutboundSender, RedirectingTwilioHttpClient, TokenBucket
+
+
+class FakeMessages:
+    """Records created messages and optionally fails the first attempts"""
+
+    def __init__(self, failures=None):
+        self.sent = []
+        self.failures = list(failures or [])
+        self.lock = threading.Lock()
+
+    def create(self, from_, body, to):
+        with self.lock:
+            if self.failures:
+                raise self.failures.pop(0)
+            self.sent.append((to, body))
+            return MagicMock(sid=f"SM{len(self.sent)}")
+
+
+def make_sender(messages, **kwargs):
+    client = MagicMock()
+    client.messages = messages
+    options = dict(num_workers=4, rate_per_second=10000, backoff_base=0.001, backoff_cap=0.01)
+    options.update(kwargs)
+    sender = OutboundSender(lambda: client, from_number='+10000000000', **options)
+    sender.start()
+    return sender
+
+
+class TestOutboundSender:
+    """Test suite for OutboundSender."""
+
+    def test_chunks_are_delivered_in_order_per_recipient(self):
+        """Test that chunk order is preserved for each recipient."""
+        messages = FakeMessages()
+        sender = make_sender(messages)
+        try:
+            futures = []
+            for n in range(10):
+                for recipient in ('+111', '+222', '+333'):
+                    futures.append(sender.send(recipient, [f'{n}-a', f'{n}-b']))
+            for future in futures:
+                assert len(future.result(timeout=5)) == 2
+        finally:
+            sender.stop()
+
+        for recipient in ('+111', '+222', '+333'):
+            bodies = [body for to, body in messages.sent if to == f'whatsapp:{recipient}']
+            assert bodies == [f'{n}-{part}' for n in range(10) for part in ('a', 'b')]
+
+    def test_throttled_send_is_retried(self):
+        """Test that 429 and 5xx responses are retried until success."""
+        messages = FakeMessages(failures=[
+            TwilioRestException(429, '/Messages', 'Too Many Requests'),
+            TwilioRestException(503, '/Messages', 'Unavailable'),
+        ])
+        sender = make_sender(messages)
+        try:
+            sids = sender.send('+111', 'hello').result(timeout=5)
+        finally:
+            sender.stop()
+
+        assert sids == ['SM1']
+        assert messages.sent == [('whatsapp:+111', 'hello')]
+
+    def test_client_error_is_not_retried(self):
+        """Test that 4xx errors other than 429 fail immediately."""
+        messages = FakeMessages(failures=[
+            TwilioRestException(400, '/Messages', 'Invalid To number'),
+        ])
+        sender = make_sender(messages)
+        try:
+            with pytest.raises(TwilioRestException):
+                sender.send('+111', 'hello').result(timeout=5)
+        finally:
+            sender.stop()
+
+        assert messages.sent == []
+
+    def test_only_connection_failures_are_retried(self):
+        """Test that a failed connect is retried but a read timeout, which may have been delivered, is not."""
+        messages = FakeMessages(failures=[
+            requests.exceptions.ConnectTimeout('connect timed out'),
+            requests.exceptions.ConnectionError('connection refused'),
+            requests.exceptions.ReadTimeout('read timed out'),
+        ])
+        sender = make_sender(messages)
+        try:
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                sender.send('+111', 'hello').result(timeout=5)
+        finally:
+            sender.stop()
+
+        assert messages.failures == []
+        assert messages.sent == []
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that retries stop after max_attempts."""
+        messages = FakeMessages(failures=[
+            TwilioRestException(500, '/Messages', 'Error') for _ in range(5)
+        ])
+        sender = make_sender(messages, max_attempts=3)
+        try:
+            with pytest.raises(TwilioRestException):
+                sender.send('+111', 'hello').result(timeout=5)
+        finally:
+            sender.stop()
+
+        assert len(messages.failures) == 2
+
+    def test_sent_chunks_reported_with_category(self):
+        """Test that on_sent gets each chunk's SID with the message category."""
+        recorded = []
+        sender = make_sender(FakeMessages(), on_sent=lambda *args: recorded.append(args))
+        try:
+            sender.send('+111', ['a', 'b'], category='broadcast', broadcast_job_id=7).result(timeout=5)
+        finally:
+            sender.stop()
+
+        assert recorded == [('SM1', 'whatsapp:+111', 'broadcast', 7), ('SM2', 'whatsapp:+111', 'broadcast', 7)]
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket."""
+
+    def test_burst_then_refill_rate(self):
+        """Test that the bucket allows a burst and then paces at its rate."""
+        bucket = TokenBucket(rate=50, capacity=5)
+        for _ in range(5):
+            assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() > 0
+
+        start = time.monotonic()
+        for _ in range(10):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # Ten tokens at 50/s take about 0.2 seconds
+        assert elapsed >= 0.15
+
+
+class TestRedirectingTwilioHttpClient:
+    """Test suite for RedirectingTwilioHttpClient."""
+
+    def test_api_requests_go_to_base_url(self, monkeypatch):
+        """Test that Twilio API URLs are rewritten to the configured base URL."""
+        requested = []
+        monkeypatch.setattr(
+            'twilio.http.http_client.TwilioHttpClient.request',
+            lambda self, method, url, *args, **kwargs: requested.append(url)
+        )
+        client = RedirectingTwilioHttpClient('http://127.0.0.1:8090/')
+        client.request('POST', 'https://api.twilio.com/2010-04-01/Accounts/AC1/Messages.json')
+
+        assert requested == ['http://127.0.0.1:8090/2010-04-01/Accounts/AC1/Messages.json']
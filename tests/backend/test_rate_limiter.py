@@ -0,0 +1,120 @@
+"""
+Tests for the Rate Limiter Service
+
+This module tests the GCRA limits, checking several limits together and
+sharing state between processes through the SQLite backend.
+"""
+
+import multiprocessing
+
+import pytest
+
+from backend.src.services.rate_limiter import (
+    RateLimit,
+    RateLimiter,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    SQLiteRateLimitBackend,
+    create_backend
+)
+
+DAY = RateLimit('day', 50, 86400)
+MINUTE = RateLimit('minute', 5, 60)
+
+
+def _hit_shared(path, attempts, results):
+    limiter = RateLimiter([RateLimit('day', 50, 86400)], SQLiteRateLimitBackend(path))
+    results.put(sum(1 for _ in range(attempts) if limiter.hit('user-1', now=1000.0)))
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteRateLimitBackend(str(tmp_path / 'rate_limits.db'))
+    return MemoryRateLimitBackend()
+
+
+class TestRateLimiter:
+    """Test suite for the rate limiter and its backends."""
+
+    def test_burst_up_to_limit(self, backend):
+        """Test that a full allowance can be used at once and the next hit is rejected."""
+        limiter = RateLimiter([MINUTE], backend)
+        assert all(limiter.hit(1, now=0.0) for _ in range(5))
+
+        result = limiter.hit(1, now=0.0)
+        assert not result.allowed
+        assert result.limit is MINUTE
+        assert result.retry_after == pytest.approx(12.0)
+
+    def test_steady_sender_is_never_locked_out(self, backend):
+        """Test that a sender within the average rate keeps getting through."""
+        limiter = RateLimiter([DAY], backend)
+        now = 0.0
+        for _ in range(200):
+            assert limiter.hit(1, now=now)
+            now += 1800.0
+
+    def test_allowance_refills_continuously(self, backend):
+        """Test that allowance comes back one hit per interval after a burst."""
+        limiter = RateLimiter([DAY], backend)
+        for _ in range(50):
+            assert limiter.hit(1, now=0.0)
+        assert not limiter.hit(1, now=0.0)
+
+        now = 5 * DAY.interval
+        assert sum(1 for _ in range(10) if limiter.hit(1, now=now)) == 5
+
+    def test_rejected_hit_is_not_counted(self, backend):
+        """Test that a hit rejected by one limit does not use up the others."""
+        limiter = RateLimiter([DAY, MINUTE], backend)
+        for _ in range(5):
+            assert limiter.hit(1, now=0.0)
+        for _ in range(20):
+            assert limiter.hit(1, now=0.0).limit is MINUTE
+
+        # Only the 5 allowed hits count towards the daily limit
+        now = 60.0
+        for _ in range(9):
+            for _ in range(5):
+                assert limiter.hit(1, now=now)
+            now += 60.0
+        assert limiter.hit(1, now=now).limit is DAY
+
+    def test_keys_are_independent(self, backend):
+        """Test that each user has an allowance of their own."""
+        limiter = RateLimiter([MINUTE], backend)
+        for _ in range(5):
+            limiter.hit(1, now=0.0)
+        assert not limiter.hit(1, now=0.0)
+        assert limiter.hit(2, now=0.0)
+
+        limiter.reset(1)
+        assert limiter.hit(1, now=0.0)
+
+    def test_sqlite_backend_is_shared_between_processes(self, tmp_path):
+        """Test that workers in separate processes draw from one allowance."""
+        path = str(tmp_path / 'rate_limits.db')
+        SQLiteRateLimitBackend(path)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_hit_shared, args=(path, 30, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+
+        assert sum(results.get(timeout=5) for _ in workers) == 50
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            create_backend('redis')
+
+    def test_backend_must_implement_hit_and_reset(self):
+        """Test that a backend missing reset() cannot be created."""
+        class HitOnlyBackend(RateLimitBackend):
+            def hit(self, key, limits, cost=1, now=None):
+                return None
+
+        with pytest.raises(TypeError):
+            HitOnlyBackend()
@@ -0,0 +1,84 @@
+"""
+Tests for the Reply Streaming Service
+
+This module tests sentence-aligned chunking of streamed model replies.
+"""
+
+from backend.src.services.reply_streaming import StreamingChunker, stream_reply
+
+
+def sentences(count, length=100):
+    """Build text made of sentences of roughly the given length"""
+    return ''.join(f"Sentence {i} " + 'x' * (length - 14) + '. ' for i in range(count))
+
+
+def feed_in_pieces(chunker, text, size=7):
+    chunks = []
+    for i in range(0, len(text), size):
+        chunks.extend(chunker.feed(text[i:i + size]))
+    chunks.extend(chunker.finish())
+    return chunks
+
+
+class TestStreamingChunker:
+    """Test suite for StreamingChunker."""
+
+    def test_short_reply_is_flushed_on_finish(self):
+        """Test that a reply under the threshold is sent as one chunk at the end."""
+        chunker = StreamingChunker(limit=1600)
+        assert chunker.feed("Hello there. How are you feeling today?") == []
+        assert chunker.finish() == ["Hello there. How are you feeling today?"]
+
+    def test_chunk_is_flushed_before_stream_ends(self):
+        """Test that a chunk is emitted as soon as a boundary near the limit arrives."""
+        chunker = StreamingChunker(limit=1600)
+        text = sentences(20)
+
+        emitted = []
+        for i in range(0, len(text), 10):
+            emitted.extend(chunker.feed(text[i:i + 10]))
+            if emitted:
+                break
+
+        assert emitted
+        assert 1200 <= len(emitted[0]) <= 1600
+        assert emitted[0].endswith('.')
+
+    def test_chunks_respect_limit_and_preserve_text(self):
+        """Test that all chunks fit the limit and together reproduce the reply."""
+        text = sentences(60, length=137)
+        chunks = feed_in_pieces(StreamingChunker(limit=1600), text)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 1600 for chunk in chunks)
+        assert ' '.join(chunks) == text.strip()
+        assert all(chunk.endswith('.') for chunk in chunks)
+
+    def test_text_without_boundaries_is_split_on_whitespace(self):
+        """Test the fallback when no sentence boundary fits in the limit."""
+        text = ' '.join(['word'] * 1000)
+        chunks = feed_in_pieces(StreamingChunker(limit=1600), text)
+
+        assert all(len(chunk) <= 1600 for chunk in chunks)
+        assert ' '.join(chunks) == text
+
+    def test_text_without_whitespace_is_hard_cut(self):
+        """Test the last-resort hard cut at the limit."""
+        text = 'x' * 4000
+        chunks = feed_in_pieces(StreamingChunker(limit=1600), text)
+
+        assert [len(chunk) for chunk in chunks] == [1600, 1600, 800]
+
+
+class TestStreamReply:
+    """Test suite for stream_reply."""
+
+    def test_returns_full_text_and_delivers_chunks(self):
+        """Test that chunks are delivered in order and the full text is returned."""
+        text = sentences(40)
+        delivered = []
+
+        result = stream_reply((text[i:i + 50] for i in range(0, len(text), 50)), delivered.append)
+
+        assert result == text
+        assert ' '.join(delivered) == text.strip()
@@ -0,0 +1,158 @@
+"""
+Tests for the Sender Dispatcher Service
+
+This module tests per-sender ordering and parallelism of the sharded
+dispatcher, including a stress test with 100 concurrent senders doing
+racy read-modify-write appends to their conversation history, and the
+per-sender locks used by the synchronous webhook.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.src.services.sender_dispatcher import SenderDispatcher, SenderLocks
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = SenderDispatcher(num_workers=8, name='test.dispatcher')
+    dispatcher.start()
+    yield dispatcher
+    dispatcher.stop()
+
+
+class RacyHistoryStore:
+    """
+    In-memory stand-in for User.conversation_history
+
+    append() reads, yields the GIL, then writes back, mirroring the
+    read-change-commit cycle in bot(). Concurrent appends for the same
+    sender lose updates unless they are serialized.
+    """
+
+    def __init__(self):
+        self.history = {}
+
+    def append(self, sender, text):
+        current = self.history.get(sender, [])
+        time.sleep(0)
+        self.history[sender] = current + [text]
+
+
+class TestSenderDispatcher:
+    """Test suite for SenderDispatcher."""
+
+    def test_submit_returns_result(self, dispatcher):
+        """Test that the future resolves with the callable's result."""
+        future = dispatcher.submit('+111', lambda a, b: a + b, 2, 3)
+        assert future.result(timeout=5) == 5
+
+    def test_submit_propagates_exceptions(self, dispatcher):
+        """Test that exceptions are raised from the future."""
+        def fail():
+            raise ValueError("boom")
+
+        future = dispatcher.submit('+111', fail)
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+        # The shard keeps working after a failure
+        assert dispatcher.submit('+111', lambda: 'ok').result(timeout=5) == 'ok'
+
+    def test_same_sender_never_runs_concurrently(self, dispatcher):
+        """Test that work for one key is serialized."""
+        active = []
+        overlaps = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                active.append(1)
+                if len(active) > 1:
+                    overlaps.append(True)
+            time.sleep(0.001)
+            with lock:
+                active.pop()
+
+        futures = [dispatcher.submit('+111', work) for _ in range(50)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert not overlaps
+
+    def test_different_senders_run_in_parallel(self, dispatcher):
+        """Test that senders on different shards proceed concurrently."""
+        senders = []
+        shards = set()
+        i = 0
+        while len(senders) < 4:
+            sender = f'+9{i}'
+            if dispatcher.shard_for(sender) not in shards:
+                shards.add(dispatcher.shard_for(sender))
+                senders.append(sender)
+            i += 1
+
+        barrier = threading.Barrier(len(senders), timeout=5)
+        futures = [dispatcher.submit(sender, barrier.wait) for sender in senders]
+
+        # Would time out with BrokenBarrierError if the senders were serialized
+        for future in futures:
+            future.result(timeout=10)
+
+    def test_no_lost_history_appends_under_100_concurrent_senders(self, dispatcher):
+        """Stress test: every append survives and stays in order per sender."""
+        store = RacyHistoryStore()
+        senders = [f'+1555000{i:04d}' for i in range(100)]
+        messages_per_sender = 30
+
+        def send_all(sender):
+            futures = [
+                dispatcher.submit(sender, store.append, sender, f'{sender}-{n}')
+                for n in range(messages_per_sender)
+            ]
+            return futures
+
+        # Each sender submits from its own thread, all senders concurrently
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            all_futures = [f for futures in pool.map(send_all, senders) for f in futures]
+
+        for future in all_futures:
+            future.result(timeout=30)
+
+        for sender in senders:
+            assert store.history[sender] == [f'{sender}-{n}' for n in range(messages_per_sender)]
+
+
+class TestSenderLocks:
+    """Test suite for SenderLocks."""
+
+    def test_same_sender_never_runs_concurrently(self):
+        """Test that threads holding one key are serialized and the lock is dropped afterwards."""
+        locks = SenderLocks()
+        store = RacyHistoryStore()
+
+        def append(n):
+            with locks.hold('+111'):
+                store.append('+111', n)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(append, range(200)))
+
+        assert sorted(store.history['+111']) == list(range(200))
+        assert len(locks) == 0
+
+    def test_different_senders_run_in_parallel(self):
+        """Test that more senders than dispatcher shards proceed at once."""
+        locks = SenderLocks()
+        barrier = threading.Barrier(16, timeout=5)
+
+        def wait(n):
+            with locks.hold(f'+9{n}'):
+                barrier.wait()
+
+        # Would time out with BrokenBarrierError if the senders were serialized
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(wait, range(16)))
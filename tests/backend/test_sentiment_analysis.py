@@ -1 +1,395 @@
- 
\ No newline at end of file
+"""
+Tests for the Sentiment Analysis Service
+
+This module tests the long-lived SentimentService: analyses run on one
+event loop thread and share one pooled client, results come back through
+futures, queued texts are micro-batched into multi-text Hume jobs whose
+predictions fan back out in order, jobs are polled adaptively or parked
+until their completion callback, and failures fall back to a neutral
+sentiment. It also tests the worker tasks that submit texts and store the
+scores.
+"""
+
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from concurrent.futures import Future
+
+import httpx
+import pytest
+
+from backend.src.models.models import Message, SentimentLog, User, db
+from backend.src.services import async_worker, sentiment_analysis, sentiment_lexicon
+from backend.src.services.sentiment_analysis import HumeSentimentAnalyzer, SentimentService
+from backend.src.services.sentiment_cache import SentimentCache
+from backend.src.utils.metrics import metrics
+
+
+def prediction(text):
+    """Joy grows with the text length, so each text gets a distinct score"""
+    return {'emotions': [{'name': 'joy', 'score': 0.1 * len(text)}, {'name': 'grief', 'score': 0.2}]}
+
+
+def results_for(texts):
+    return {'language': {'predictions': [prediction(text) for text in texts]}}
+
+
+@pytest.fixture
+def hume(monkeypatch):
+    """Route every AsyncClient the service opens to an in-process Hume API"""
+    state = {'clients': 0, 'threads': set(), 'fail': False, 'jobs': [], 'payloads': [],
+             'polls': 0, 'in_progress_polls': 0}
+
+    def handler(request):
+        state['threads'].add(threading.get_ident())
+        if state['fail']:
+            return httpx.Response(500, text='boom')
+        if request.method == 'POST':
+            payload = json.loads(request.content)
+            state['payloads'].append(payload)
+            state['jobs'].append(payload['data']['text'])
+            return httpx.Response(200, json={'job_id': str(len(state['jobs']) - 1)})
+        state['polls'] += 1
+        if state['polls'] <= state['in_progress_polls']:
+            return httpx.Response(200, json={'state': 'in_progress'})
+        texts = state['jobs'][int(request.url.path.rsplit('/', 1)[1])]
+        return httpx.Response(200, json={'state': 'completed', 'results': results_for(texts)})
+
+    class Client(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            state['clients'] += 1
+            kwargs.pop('http2', None)
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(sentiment_analysis.httpx, 'AsyncClient', Client)
+    return state
+
+
+@pytest.fixture
+def service(hume):
+    service = SentimentService(HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs'))
+    yield service
+    service.stop()
+
+
+class TestSentimentService:
+    """Test suite for the shared sentiment client."""
+
+    def test_analyses_share_one_client_and_loop(self, service, hume):
+        """Test that concurrent analyses reuse the service's client on its loop thread."""
+        metrics.reset()
+        futures = [service.submit(f'message {n}') for n in range(20)]
+        results = [future.result(timeout=5) for future in futures]
+
+        assert all(result['source'] == 'hume_api' for result in results)
+        assert results[0]['sentiment_score'] == pytest.approx(0.9 / 1.1)
+        assert hume['clients'] == 1
+        assert hume['threads'] == {service._thread.ident}
+        assert metrics.counter('sentiment.source.hume_api').value == 20
+
+    def test_api_error_falls_back(self, service, hume):
+        """Test that an API error resolves to the neutral fallback."""
+        hume['fail'] = True
+
+        result = service.analyze('anything')
+
+        assert result['source'] == 'fallback'
+        assert result['sentiment_score'] == 0.5
+
+    def test_restart_after_stop(self, service, hume):
+        """Test that submitting after stop starts a new loop and client."""
+        service.analyze('first')
+        service.stop()
+
+        assert service.analyze('second')['source'] == 'hume_api'
+        assert hume['clients'] == 2
+
+    def test_analyze_text_without_client(self, hume):
+        """Test that the analyzer still works standalone with a one-off client."""
+        analyzer = HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs')
+        result = asyncio.run(analyzer.analyze_text('hello'))
+
+        assert result['source'] == 'hume_api'
+        assert hume['clients'] == 1
+
+
+class TestMicroBatching:
+    """Test suite for grouping texts into Hume batch jobs."""
+
+    def test_full_batches_fan_out_in_order(self, hume):
+        """Test that texts go out batch_size at a time and each gets its own prediction."""
+        service = SentimentService(HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs'),
+                                   batch_size=4, batch_wait=5.0)
+        try:
+            texts = ['x' * n for n in range(1, 9)]
+            results = [future.result(timeout=2) for future in service.submit_many(texts)]
+        finally:
+            service.stop()
+
+        assert hume['jobs'] == [texts[:4], texts[4:]]
+        for text, result in zip(texts, results):
+            assert result['emotions']['joy'] == pytest.approx(0.1 * len(text))
+
+    def test_partial_batch_sent_after_wait(self, hume):
+        """Test that a batch that does not fill is sent once its wait is over."""
+        service = SentimentService(HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs'),
+                                   batch_size=50, batch_wait=0.05)
+        try:
+            futures = [service.submit('a'), service.submit('bb')]
+            results = [future.result(timeout=2) for future in futures]
+        finally:
+            service.stop()
+
+        assert hume['jobs'] == [['a', 'bb']]
+        assert [result['source'] for result in results] == ['hume_api', 'hume_api']
+
+    def test_missing_predictions_fall_back(self):
+        """Test that texts the job returned no prediction for get the neutral fallback."""
+        analyzer = HumeSentimentAnalyzer(api_key='test')
+        results = analyzer._process_results({'language': {'predictions': [prediction('abc')]}}, ['abc', 'de', 'f'])
+
+        assert [result['source'] for result in results] == ['hume_api', 'fallback', 'fallback']
+
+
+class TestJobWaiting:
+    """Test suite for adaptive polling and completion callbacks."""
+
+    def test_poll_delays_seeded_from_job_durations(self):
+        """Test that polls back off exponentially, starting at the median recent job duration."""
+        metrics.reset()
+        analyzer = HumeSentimentAnalyzer(api_key='test', poll_initial=0.25, poll_max=4.0, poll_min_samples=5)
+
+        assert list(itertools.islice(analyzer.poll_delays(), 6)) == [0.25, 0.5, 1.0, 2.0, 4.0, 4.0]
+
+        for duration in (0.8, 1.5, 1.5, 1.5, 9.0):
+            metrics.histogram('sentiment.job_seconds').observe(duration)
+        assert list(itertools.islice(analyzer.poll_delays(), 3)) == [1.5, 3.0, 4.0]
+
+    def test_polls_until_completed(self, hume):
+        """Test that a job is polled until it completes and its duration is recorded."""
+        metrics.reset()
+        hume['in_progress_polls'] = 2
+        analyzer = HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs', poll_initial=0.01)
+
+        result = asyncio.run(analyzer.analyze_text('hello'))
+
+        assert result['source'] == 'hume_api'
+        assert hume['polls'] == 3
+        assert metrics.histogram('sentiment.job_seconds').count == 1
+
+    def test_poll_deadline(self, hume):
+        """Test that a job still running at its deadline falls back."""
+        hume['in_progress_polls'] = 10 ** 6
+        analyzer = HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs',
+                                         poll_initial=0.01, poll_deadline=0.1)
+
+        assert asyncio.run(analyzer.analyze_text('hello'))['source'] == 'fallback'
+
+    def callback_service(self, **kwargs):
+        analyzer = HumeSentimentAnalyzer(api_key='test', api_url='http://hume.test/jobs',
+                                         callback_url='https://bot.test/api/v1/bot/hume-callback', **kwargs)
+        service = SentimentService(analyzer)
+        service.start()
+        return service
+
+    def test_parked_job_woken_by_callback(self, hume):
+        """Test that a parked job completes from its callback without polling."""
+        metrics.reset()
+        service = self.callback_service()
+        try:
+            future = service.submit('hello')
+            for _ in range(200):
+                if metrics.gauge('sentiment.jobs_parked').value == 1:
+                    break
+                threading.Event().wait(0.01)
+
+            assert service.complete_job('0', {'job_id': '0', 'state': 'completed',
+                                              'results': results_for(['hello'])})
+            assert future.result(timeout=2)['emotions']['joy'] == pytest.approx(0.5)
+        finally:
+            service.stop()
+
+        assert hume['payloads'][0]['callback_url'] == 'https://bot.test/api/v1/bot/hume-callback'
+        assert hume['polls'] == 0
+        assert metrics.gauge('sentiment.jobs_parked').value == 0
+
+    def test_callback_before_parking(self, hume):
+        """Test that a callback racing ahead of the submit response is not lost."""
+        service = self.callback_service()
+        try:
+            assert not service.complete_job('0', {'job_id': '0', 'status': 'COMPLETED'})
+            result = service.analyze('hello', timeout=2)
+        finally:
+            service.stop()
+
+        # A notification without results costs one poll
+        assert result['source'] == 'hume_api'
+        assert hume['polls'] == 1
+
+    def test_missing_callback_falls_back_to_polling(self, hume):
+        """Test that a job whose callback never arrives is polled after the timeout."""
+        service = self.callback_service(callback_timeout=0.05, poll_initial=0.01)
+        try:
+            assert service.analyze('hello', timeout=2)['source'] == 'hume_api'
+        finally:
+            service.stop()
+
+        assert hume['polls'] == 1
+
+
+class FakeSentimentService:
+    def __init__(self):
+        self.texts = []
+        self.futures = []
+
+    def submit_many(self, texts):
+        self.texts.extend(texts)
+        futures = [Future() for _ in texts]
+        self.futures.extend(futures)
+        return futures
+
+    def resolve(self):
+        for text, future in zip(self.texts, self.futures):
+            future.set_result({'sentiment_score': 0.1 * len(text)})
+
+
+class TestSentimentTask:
+    """Test suite for background sentiment analysis."""
+
+    def test_pending_messages_scored_in_one_task(self, app, db_session, monkeypatch):
+        """Test that queued messages are submitted together and their scores stored together."""
+        tasks = queue.Queue()
+        monkeypatch.setattr(async_worker, 'task_queue', tasks)
+        monkeypatch.setattr(async_worker, '_pending_sentiment', [])
+        service = FakeSentimentService()
+        monkeypatch.setattr(async_worker, 'get_sentiment_service', lambda app: service)
+        monkeypatch.setattr(async_worker, 'get_sentiment_cache', lambda app: SentimentCache(persistent=False))
+
+        user = User(phone_number='+100', access_code='CODE1234', department='Sales', location='London')
+        db.session.add(user)
+        db.session.flush()
+        first = Message(user_id=user.id, content='tired', is_from_user=True)
+        second = Message(user_id=user.id, content='ok', is_from_user=True)
+        db.session.add_all([first, second])
+        db.session.commit()
+
+        assert async_worker.queue_sentiment_analysis(first.id, user.id)
+        assert not async_worker.queue_sentiment_analysis(second.id, user.id, 'my check-in answers')
+        assert not async_worker.queue_sentiment_analysis(9999, user.id)
+        assert tasks.qsize() == 1
+
+        # The task returns without waiting for the analyses
+        async_worker.process_sentiment_analysis(tasks.get_nowait())
+        assert service.texts == ['tired', 'my check-in answers']
+        assert async_worker._pending_sentiment == []
+        assert tasks.empty()
+
+        # Once every result is in, one task stores them all
+        service.resolve()
+        results_task = tasks.get_nowait()
+        assert results_task['type'] == 'sentiment_results'
+        async_worker.process_sentiment_results(results_task)
+
+        db.session.expire_all()
+        assert db.session.get(Message, first.id).sentiment_score == pytest.approx(0.5)
+        assert db.session.get(Message, second.id).sentiment_score == pytest.approx(1.9)
+        logs = SentimentLog.query.order_by(SentimentLog.message_id).all()
+        assert [(log.message_id, log.department) for log in logs] == [(first.id, 'Sales'), (second.id, 'Sales')]
+
+    def test_cached_and_repeated_texts_not_resubmitted(self, app, db_session, monkeypatch):
+        """Test that cached texts skip analysis and identical texts are analyzed once."""
+        tasks = queue.Queue()
+        monkeypatch.setattr(async_worker, 'task_queue', tasks)
+        monkeypatch.setattr(async_worker, '_pending_sentiment', [])
+        service = FakeSentimentService()
+        monkeypatch.setattr(async_worker, 'get_sentiment_service', lambda app: service)
+        cache = SentimentCache(persistent=False)
+        cache.put('tired', {'sentiment_score': 0.2, 'source': 'hume_api'})
+        monkeypatch.setattr(async_worker, 'get_sentiment_cache', lambda app: cache)
+
+        user = User(phone_number='+100', access_code='CODE1234', department='Sales', location='London')
+        db.session.add(user)
+        db.session.flush()
+        messages = [Message(user_id=user.id, content=content, is_from_user=True)
+                    for content in ('Tired', 'ok', 'OK ', 'tired')]
+        db.session.add_all(messages)
+        db.session.commit()
+        for message in messages:
+            async_worker.queue_sentiment_analysis(message.id, user.id)
+
+        async_worker.process_sentiment_analysis(tasks.get_nowait())
+        assert service.texts == ['ok']
+
+        service.resolve()
+        results_task = tasks.get_nowait()
+        assert [score for *_, score in results_task['results']] == [0.2, 0.2, 0.2, 0.2]
+        assert results_task['fresh'] == [('ok', {'sentiment_score': 0.2})]
+
+    def test_hybrid_engine_sends_only_ambiguous_texts(self, app, db_session, monkeypatch):
+        """Test that texts the lexicon scores clearly are stored without a Hume job."""
+        tasks = queue.Queue()
+        monkeypatch.setattr(async_worker, 'task_queue', tasks)
+        monkeypatch.setattr(async_worker, '_pending_sentiment', [])
+        service = FakeSentimentService()
+        monkeypatch.setattr(async_worker, 'get_sentiment_service', lambda app: service)
+        monkeypatch.setattr(async_worker, 'get_sentiment_cache', lambda app: SentimentCache(persistent=False))
+        monkeypatch.setattr(sentiment_lexicon, '_analyzer', None)
+        monkeypatch.setitem(app.config, 'SENTIMENT_ENGINE', 'hybrid')
+
+        user = User(phone_number='+100', access_code='CODE1234', department='Sales', location='London')
+        db.session.add(user)
+        db.session.flush()
+        messages = [Message(user_id=user.id, content=content, is_from_user=True)
+                    for content in ('Really exhausted today', 'meeting moved to 5')]
+        db.session.add_all(messages)
+        db.session.commit()
+        for message in messages:
+            async_worker.queue_sentiment_analysis(message.id, user.id)
+
+        async_worker.process_sentiment_analysis(tasks.get_nowait())
+        assert service.texts == ['meeting moved to 5']
+
+        service.resolve()
+        scores = [score for *_, score in tasks.get_nowait()['results']]
+        assert scores[0] < 0.3
+        assert scores[1] == pytest.approx(1.8)
+
+    def test_failed_batch_is_requeued(self, app, db_session, monkeypatch):
+        """Test that a batch that fails before submission goes back to the buffer, up to the attempt limit."""
+        tasks = queue.Queue()
+        monkeypatch.setattr(async_worker, 'task_queue', tasks)
+        monkeypatch.setattr(async_worker, '_pending_sentiment', [])
+        service = FakeSentimentService()
+        monkeypatch.setattr(async_worker, 'get_sentiment_service', lambda app: service)
+        monkeypatch.setattr(async_worker, 'get_sentiment_cache', lambda app: SentimentCache(persistent=False))
+
+        def unavailable(texts, app):
+            raise RuntimeError('lexicon unavailable')
+
+        monkeypatch.setattr(async_worker, 'score_locally', unavailable)
+
+        user = User(phone_number='+100', access_code='CODE1234', department='Sales', location='London')
+        db.session.add(user)
+        db.session.flush()
+        message = Message(user_id=user.id, content='tired', is_from_user=True)
+        db.session.add(message)
+        db.session.commit()
+        async_worker.queue_sentiment_analysis(message.id, user.id)
+
+        async_worker.process_sentiment_analysis(tasks.get_nowait())
+        assert async_worker._pending_sentiment == [(message.id, user.id, None)]
+        retry = tasks.get_nowait()
+        assert retry['attempt'] == 2
+
+        # Messages queued before the retry runs are retried with it
+        assert not async_worker.queue_sentiment_analysis(message.id, user.id, 'again')
+        async_worker.process_sentiment_analysis(retry)
+        assert len(async_worker._pending_sentiment) == 2
+        assert tasks.qsize() == 1
+
+        async_worker.process_sentiment_analysis({**tasks.get_nowait(), 'attempt': 3})
+        assert async_worker._pending_sentiment == []
+        assert tasks.empty()
+        assert service.texts == []
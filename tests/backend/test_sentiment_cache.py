@@ -0,0 +1,113 @@
+"""
+Tests for the Sentiment Cache Service
+
+This module tests content-addressed keys, the in-memory LRU and the
+persistent table tier, TTL expiry, size-bounded pruning of the table and
+the reported hit rate.
+"""
+
+from datetime import datetime, timedelta
+
+from backend.src.models.models import SentimentCacheEntry, db
+from backend.src.services.sentiment_cache import SentimentCache, normalize_text, prune_sentiment_cache
+from backend.src.utils.metrics import metrics
+
+RESULT = {'sentiment_score': 0.8, 'emotions': {'joy': 0.8}, 'source': 'hume_api'}
+
+
+class TestCacheKeys:
+    """Test suite for normalizing texts into cache keys."""
+
+    def test_normalized_texts_share_a_key(self):
+        """Test that case, spacing and Unicode compatibility forms do not change the key."""
+        cache = SentimentCache(persistent=False)
+
+        assert normalize_text('  Feeling   OK\n') == 'feeling ok'
+        assert cache.key('Feeling OK') == cache.key(' feeling\tok ') == cache.key('Ｆｅｅｌｉｎｇ ＯＫ')
+        assert cache.key('feeling ok') != cache.key('feeling okay')
+
+    def test_model_version_is_part_of_the_key(self):
+        """Test that a new model version does not reuse old results."""
+        assert SentimentCache(model_version='v1').key('ok') != SentimentCache(model_version='v2').key('ok')
+
+    def test_uncacheable_texts(self):
+        """Test that empty and long texts get no key."""
+        cache = SentimentCache(persistent=False, max_text_length=10)
+
+        assert cache.key('   ') is None
+        assert cache.key('x' * 11) is None
+        assert cache.key('x' * 10) is not None
+
+
+class TestSentimentCache:
+    """Test suite for cache lookups and writes."""
+
+    def test_memory_tier_lru_and_ttl(self):
+        """Test that the memory tier evicts the least recently used entry and expires old ones."""
+        cache = SentimentCache(persistent=False, max_entries=2)
+        cache.put_many([('a', RESULT), ('b', RESULT)])
+        cache.get('a')
+        cache.put('c', RESULT)
+
+        assert cache.get_many(['a', 'b', 'c']) == [RESULT, None, RESULT]
+
+        expired = SentimentCache(persistent=False, ttl=timedelta(seconds=-1))
+        expired.put('a', RESULT)
+        assert expired.get('a') is None
+
+    def test_fallbacks_not_cached(self):
+        """Test that only API results are cached."""
+        cache = SentimentCache(persistent=False)
+
+        assert cache.put_many([('ok', dict(RESULT, source='fallback')), ('fine', RESULT)]) == 1
+        assert cache.get('ok') is None
+
+    def test_table_tier_shared_between_caches(self, app, db_session):
+        """Test that results written by one process are found by another."""
+        SentimentCache().put_many([('Tired', RESULT), ('ok', RESULT)])
+        assert SentimentCacheEntry.query.count() == 2
+
+        metrics.reset()
+        other = SentimentCache()
+        assert other.get_many(['tired', 'new text', 'OK']) == [RESULT, None, RESULT]
+        assert other.get('tired') == RESULT
+
+        stats = other.stats()
+        assert (stats['memory_hits'], stats['table_hits'], stats['misses']) == (1, 2, 1)
+        assert stats['hit_rate'] == 0.75
+        assert metrics.gauge('sentiment.cache.hit_rate').value == 0.75
+
+    def test_expired_rows_ignored_and_replaced(self, app, db_session):
+        """Test that an expired row is not used and is refreshed on the next write."""
+        cache = SentimentCache(ttl=timedelta(days=1))
+        db.session.add(SentimentCacheEntry(key=cache.key('ok'), model_version=cache.model_version,
+                                           result='{"sentiment_score": 0.1, "source": "hume_api"}',
+                                           created_at=datetime.utcnow() - timedelta(days=2)))
+        db.session.commit()
+
+        assert cache.get('ok') is None
+        cache.put('ok', RESULT)
+        assert SentimentCacheEntry.query.count() == 1
+        assert SentimentCache(ttl=timedelta(days=1)).get('ok') == RESULT
+
+    def test_disabled_cache(self):
+        """Test that a disabled cache never hits."""
+        cache = SentimentCache(enabled=False)
+        cache.put('ok', RESULT)
+
+        assert cache.get('ok') is None
+
+
+class TestPruneSentimentCache:
+    """Test suite for evicting table rows."""
+
+    def test_prune_expired_then_oldest(self, app, db_session):
+        """Test that expired rows go first, then the oldest rows beyond the limit."""
+        now = datetime.utcnow()
+        for n, age in enumerate([10, 5, 4, 3, 2, 1]):
+            db.session.add(SentimentCacheEntry(key=f'key{n}', model_version='v1', result='{}',
+                                               created_at=now - timedelta(hours=age)))
+        db.session.commit()
+
+        assert prune_sentiment_cache(ttl=timedelta(hours=6), max_rows=3) == 3
+        assert sorted(key for (key,) in db.session.query(SentimentCacheEntry.key)) == ['key3', 'key4', 'key5']
@@ -0,0 +1,156 @@
+"""
+Tests for the Lexicon Sentiment Service
+
+This module tests loading lexicon files, the VADER-style scoring rules,
+the ambiguity test used by the hybrid pre-filter, engine selection in
+analyze_sentiment and the lexicon fallback of the Hume analyzer.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.src.services import sentiment_analysis, sentiment_lexicon
+from backend.src.services.sentiment_analysis import HumeSentimentAnalyzer
+from backend.src.services.sentiment_cache import SentimentCache
+from backend.src.services.sentiment_lexicon import LexiconSentimentAnalyzer, load_lexicon, score_locally
+
+LEXICON = {'good': 1.9, 'happy': 2.7, 'tired': -1.9, 'bad': -2.5, 'ok': 0.9, ':)': 2.0, '😞': -2.0, 'so': 1.0}
+
+
+@pytest.fixture
+def analyzer():
+    return LexiconSentimentAnalyzer(LEXICON)
+
+
+@pytest.fixture
+def engine(app, monkeypatch):
+    """Select a sentiment engine with a fresh process-wide lexicon analyzer"""
+    monkeypatch.setattr(sentiment_lexicon, '_analyzer', None)
+
+    def select(name):
+        monkeypatch.setitem(app.config, 'SENTIMENT_ENGINE', name)
+    return select
+
+
+class TestLoadLexicon:
+    """Test suite for reading lexicon files."""
+
+    def test_bundled_lexicon(self):
+        """Test that the bundled lexicon loads with lowercased tokens."""
+        lexicon = load_lexicon()
+
+        assert len(lexicon) > 200
+        assert lexicon['tired'] < 0 < lexicon['great']
+        assert ':d' in lexicon and '❤️' in lexicon
+
+    def test_vader_format_and_comments(self, tmp_path):
+        """Test that extra columns and comment lines are ignored."""
+        path = tmp_path / 'lexicon.txt'
+        path.write_text('# comment\n\nGood\t1.9\t0.9\t[2, 2]\n#-)\t1.1\n', encoding='utf-8')
+
+        assert load_lexicon(str(path)) == {'good': 1.9, '#-)': 1.1}
+
+    def test_malformed_line(self, tmp_path):
+        """Test that a line without a valence names the file and line."""
+        path = tmp_path / 'lexicon.txt'
+        path.write_text('good\t1.9\nbad\n', encoding='utf-8')
+
+        with pytest.raises(ValueError, match='lexicon.txt:2'):
+            load_lexicon(str(path))
+
+
+class TestLexiconSentimentAnalyzer:
+    """Test suite for the scoring rules."""
+
+    def test_polarity_and_scale(self, analyzer):
+        """Test that sentiment words move the 0-1 score away from neutral."""
+        assert analyzer.analyze('I am happy')['sentiment_score'] > 0.75
+        assert analyzer.analyze('so tired')['sentiment_score'] < 0.3
+        assert analyzer.analyze('the meeting is at 5')['sentiment_score'] == 0.5
+
+    def test_negation(self, analyzer):
+        """Test that negations flip the next sentiment word in their clause only."""
+        assert analyzer.polarity('not happy')[0] < 0
+        assert analyzer.polarity('I don’t feel good')[0] < 0
+        assert analyzer.polarity("wasn't bad")[0] > 0
+        assert analyzer.polarity('not, happy')[0] > 0
+        assert analyzer.polarity("don't feel good 😞")[1] == 0
+
+    def test_intensity_rules(self, analyzer):
+        """Test boosters, capitals, exclamation marks and a contrasting but."""
+        happy = analyzer.polarity('happy')[0]
+        assert analyzer.polarity('very happy')[0] > happy
+        assert analyzer.polarity('slightly happy')[0] < happy
+        assert analyzer.polarity('so happy')[3] == 1
+        assert analyzer.polarity('I am HAPPY')[0] > happy
+        assert analyzer.polarity('HAPPY')[0] == happy
+        assert analyzer.polarity('happy!!')[0] > happy
+        assert analyzer.polarity('happy but tired')[0] < 0
+
+    def test_emoticons_and_emoji(self, analyzer):
+        """Test that emoticons and emoji are tokens, but URLs are not emoticons."""
+        assert analyzer.polarity('ok :)')[3] == 2
+        assert analyzer.polarity('ok 😞')[0] < 0
+        assert analyzer.polarity('see https://example.com/x')[3] == 0
+
+    def test_ambiguous_results(self, analyzer):
+        """Test that unmatched, mixed and weak results are ambiguous."""
+        assert not analyzer.is_ambiguous(analyzer.analyze('so tired'))
+        assert analyzer.is_ambiguous(analyzer.analyze('5'))
+        assert analyzer.is_ambiguous(analyzer.analyze('good but tired'))
+        assert analyzer.is_ambiguous(analyzer.analyze('ok'))
+        assert not LexiconSentimentAnalyzer(LEXICON, prefilter_threshold=0.2).is_ambiguous(analyzer.analyze('ok'))
+
+
+class TestSentimentEngines:
+    """Test suite for choosing the engine that scores a text."""
+
+    def test_score_locally(self, app, engine):
+        """Test which texts each engine settles without Hume."""
+        texts = ['so tired', 'the meeting is at 5']
+
+        engine('hume')
+        assert score_locally(texts, app) == [None, None]
+        engine('lexicon')
+        assert [result['source'] for result in score_locally(texts, app)] == ['lexicon', 'lexicon']
+        engine('hybrid')
+        settled, forwarded = score_locally(texts, app)
+        assert settled['sentiment_score'] < 0.3 and forwarded is None
+
+        engine('vader')
+        with pytest.raises(ValueError, match='vader'):
+            score_locally(texts, app)
+
+    def test_analyze_sentiment_engine(self, app, engine, monkeypatch):
+        """Test that only texts the engine does not settle reach the sentiment service."""
+        class Service:
+            texts = []
+
+            def analyze(self, text):
+                self.texts.append(text)
+                return {'sentiment_score': 0.9, 'source': 'hume_api'}
+
+        service = Service()
+        monkeypatch.setattr(sentiment_analysis, 'get_sentiment_service', lambda app: service)
+        monkeypatch.setattr(sentiment_analysis, 'get_sentiment_cache', lambda app: SentimentCache(enabled=False))
+
+        engine('hybrid')
+        assert sentiment_analysis.analyze_sentiment('really tired')['source'] == 'lexicon'
+        assert sentiment_analysis.analyze_sentiment('the meeting is at 5')['sentiment_score'] == 0.9
+        assert service.texts == ['the meeting is at 5']
+
+
+class TestLexiconFallback:
+    """Test suite for scoring texts Hume could not."""
+
+    def test_fallback_scores_text(self, monkeypatch):
+        """Test that without an API key the lexicon scores each text."""
+        monkeypatch.delenv('HUME_API_KEY', raising=False)
+        analyzer = HumeSentimentAnalyzer(fallback=LexiconSentimentAnalyzer(LEXICON))
+
+        results = asyncio.run(analyzer.analyze_texts(['so tired', 'the meeting is at 5']))
+
+        assert [result['source'] for result in results] == ['fallback', 'fallback']
+        assert results[0]['sentiment_score'] < 0.3
+        assert results[1]['sentiment_score'] == 0.5
@@ -0,0 +1,124 @@
+"""
+Tests for the User State Cache Service
+
+This module tests caching of onboarded users' state, invalidation on
+writes and the write-behind of message counters.
+"""
+
+from datetime import datetime
+
+from backend.src.services.user_state_cache import UserStateCache
+from backend.src.models.models import User, db
+
+
+def create_user(phone_number='+1234567890', onboarded=True):
+    user = User(
+        phone_number=phone_number,
+        access_code='TEST1234',
+        is_authenticated=True,
+        consent_given=onboarded,
+        department='Engineering' if onboarded else None,
+        location='Remote' if onboarded else None,
+        message_count=3
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+class TestUserStateCache:
+    """Test suite for UserStateCache."""
+
+    def test_onboarded_user_is_served_from_cache(self, app, db_session):
+        """Test that an onboarded user's state is cached by phone number."""
+        cache = UserStateCache()
+        user = create_user()
+
+        state = cache.put_user(user)
+
+        assert cache.get('+1234567890') is state
+        assert state.id == user.id
+        assert state.department == 'Engineering'
+
+    def test_user_still_onboarding_is_not_cached(self, app, db_session):
+        """Test that users who have not finished onboarding always hit the database."""
+        cache = UserStateCache()
+        cache.put_user(create_user(onboarded=False))
+
+        assert cache.get('+1234567890') is None
+
+    def test_entries_expire(self, app, db_session):
+        """Test that cached state is dropped after the TTL."""
+        cache = UserStateCache(ttl=0)
+        cache.put_user(create_user())
+
+        assert cache.get('+1234567890') is None
+
+    def test_write_to_user_invalidates(self, app, db_session):
+        """Test that an ORM update of the User row drops the cached state."""
+        cache = UserStateCache()
+        user = create_user()
+        cache.put_user(user)
+
+        user.department = 'Sales'
+        db.session.commit()
+
+        assert cache.get('+1234567890') is None
+
+    def test_counters_are_written_behind_in_one_batch(self, app, db_session):
+        """Test that recorded counters reach the database on flush."""
+        cache = UserStateCache()
+        users = [create_user(f'+100000000{i}') for i in range(3)]
+        now = datetime.utcnow()
+
+        for user in users:
+            state = cache.put_user(user)
+            state.message_count += 1
+            state.last_message_time = now
+            cache.record_message(state)
+
+        assert cache.flush() == 3
+        assert cache.flush() == 0
+
+        db.session.expire_all()
+        assert [u.message_count for u in User.query.order_by(User.id)] == [4, 4, 4]
+        assert User.query.first().last_message_time == now
+
+    def test_reload_prefers_pending_counters(self, app, db_session):
+        """Test that a reloaded row picks up counters not yet written behind."""
+        cache = UserStateCache(ttl=0)
+        user = create_user()
+
+        state = cache.put_user(user)
+        state.message_count = 10
+        cache.record_message(state)
+
+        assert cache.put_user(user).message_count == 10
+
+    def test_flush_skips_deleted_users(self, app, db_session):
+        """Test that counters of a user deleted before the flush do not block the others."""
+        cache = UserStateCache()
+        users = [create_user(f'+100000000{i}') for i in range(2)]
+        for user in users:
+            state = cache.put_user(user)
+            state.message_count += 1
+            cache.record_message(state)
+
+        User.query.filter_by(id=users[0].id).delete()
+        db.session.commit()
+
+        assert cache.flush() == 2
+        assert cache.flush() == 0
+        db.session.expire_all()
+        assert [u.message_count for u in User.query] == [4]
+
+    def test_delete_invalidates(self, app, db_session):
+        """Test that an ORM delete of the User row drops the cached state."""
+        cache = UserStateCache()
+        user = create_user()
+        cache.put_user(user)
+
+        db.session.delete(user)
+        db.session.commit()
+
+        assert cache.get('+1234567890') is None
@@ -0,0 +1,249 @@
+"""
+Keyword extraction corpus fixture.
+
+Employee check-in style messages paired with the keywords the original
+word_tokenize-based extract_keywords returned for them (sorted).
+"""
+
+KEYWORD_CORPUS = [
+    (
+        "I've been feeling really stressed about the deadline this week.",
+        ['deadline', 'feeling', 'really', 'stressed', 'week']
+    ),
+    (
+        "My manager keeps adding tasks and I can't keep up with the workload!",
+        ['adding', 'keep', 'keeps', 'manager', 'tasks', 'workload']
+    ),
+    (
+        "Honestly, I'm exhausted. I couldn't sleep last night because of anxiety.",
+        ['anxiety', 'could', 'exhausted', 'honestly', 'last', 'night', 'sleep']
+    ),
+    (
+        'Things are okay, just a bit tired after the long meetings.',
+        ['long', 'meetings', 'okay', 'things', 'tired']
+    ),
+    (
+        "I don't know... everything feels overwhelming lately.",
+        ['everything', 'feels', 'know', 'lately', 'overwhelming']
+    ),
+    (
+        'The team-building event was fun, but work-life balance is still a problem.',
+        ['balance', 'event', 'problem', 'still']
+    ),
+    (
+        'We had 3 outages in 2 days -- nobody is getting any rest.',
+        ['days', 'getting', 'nobody', 'outages', 'rest']
+    ),
+    (
+        "It's 11pm and I'm still answering emails. This isn't sustainable.",
+        ['answering', 'emails', 'still', 'sustainable']
+    ),
+    (
+        'Feeling great today! Finished the project ahead of schedule :)',
+        ['ahead', 'feeling', 'finished', 'great', 'project', 'schedule', 'today']
+    ),
+    (
+        "My colleague's comments in the review hurt more than I expected.",
+        ['colleague', 'comments', 'expected', 'hurt', 'review']
+    ),
+    (
+        "Can we talk about burnout? I think I'm heading there.",
+        ['burnout', 'heading', 'talk', 'think']
+    ),
+    (
+        "I wanna quit, I'm gonna tell HR tomorrow. I cannot do this anymore.",
+        ['anymore', 'quit', 'tell', 'tomorrow']
+    ),
+    (
+        'Remote work is lonely sometimes; I miss the office banter.',
+        ['banter', 'lonely', 'miss', 'office', 'remote', 'sometimes', 'work']
+    ),
+    (
+        'Got a promotion!!! Celebrating with family tonight.',
+        ['celebrating', 'family', 'promotion', 'tonight']
+    ),
+    (
+        'The new policy (effective Jan 1st) changes our on-call rotation.',
+        ['changes', 'effective', 'policy', 'rotation']
+    ),
+    (
+        "Payroll was late again, that's stressful when rent is due.",
+        ['late', 'payroll', 'rent', 'stressful']
+    ),
+    (
+        'Dr. Smith said I should take a break, approx. two weeks off.',
+        ['approx', 'break', 'said', 'smith', 'take', 'weeks']
+    ),
+    (
+        "E.g. yesterday's standup ran 45 minutes instead of 15.",
+        ['instead', 'minutes', 'standup', 'yesterday']
+    ),
+    (
+        'Worried about layoffs. Rumours everywhere on Slack/Teams.',
+        ['everywhere', 'layoffs', 'rumours', 'worried']
+    ),
+    (
+        "i feel anxious and can't focus on anything at work",
+        ['anxious', 'anything', 'feel', 'focus', 'work']
+    ),
+    (
+        'My 1:1 with the lead went well, she listened to my concerns.',
+        ['concerns', 'lead', 'listened', 'well', 'went']
+    ),
+    (
+        "I'm fine. Really. Just busy.",
+        ['busy', 'fine', 'really']
+    ),
+    (
+        'Deadlines, deadlines, deadlines... when does it end?',
+        ['deadlines']
+    ),
+    (
+        "Our department's morale is low after the reorg.",
+        ['department', 'morale', 'reorg']
+    ),
+    (
+        "Commute takes 2 hrs each way; I'm drained before I even start.",
+        ['commute', 'drained', 'even', 'start', 'takes']
+    ),
+    (
+        'The workshop on mindfulness was surprisingly helpful!',
+        ['helpful', 'mindfulness', 'surprisingly', 'workshop']
+    ),
+    (
+        'Someone took credit for my work in the all-hands meeting.',
+        ['credit', 'meeting', 'someone', 'took', 'work']
+    ),
+    (
+        'Sleep schedule is a mess because of the overseas clients.',
+        ['clients', 'mess', 'overseas', 'schedule', 'sleep']
+    ),
+    (
+        "I'd like to learn more about the wellness programme.",
+        ['learn', 'like', 'programme', 'wellness']
+    ),
+    (
+        'Too many Zoom calls, not enough focus time.',
+        ['calls', 'enough', 'focus', 'many', 'time', 'zoom']
+    ),
+    (
+        'Je suis fatigué, le travail est difficile en ce moment.',
+        ['difficile', 'fatigué', 'moment', 'suis', 'travail']
+    ),
+    (
+        'Naïve question: is therapy covered by our insurance?',
+        ['covered', 'insurance', 'naïve', 'question', 'therapy']
+    ),
+    (
+        '"Just push through" is what everyone says. It doesn\'t help.',
+        ['everyone', 'help', 'push', 'says']
+    ),
+    (
+        "My kid's been sick so I'm juggling childcare and sprints.",
+        ['childcare', 'juggling', 'sick', 'sprints']
+    ),
+    (
+        'Feedback from the client was harsh but fair.',
+        ['client', 'fair', 'feedback', 'harsh']
+    ),
+    (
+        "It's o'clock somewhere, right? Need coffee.",
+        ['coffee', 'need', 'right', 'somewhere']
+    ),
+    (
+        'Overtime again this weekend #tired #overworked',
+        ['overtime', 'overworked', 'tired', 'weekend']
+    ),
+    (
+        'Email me at someone@example.com if you need the report.',
+        ['email', 'need', 'report', 'someone']
+    ),
+    (
+        'The on-call pager went off 7 times last night.',
+        ['last', 'night', 'pager', 'times', 'went']
+    ),
+    (
+        "We'll see how the quarter goes, I'm cautiously optimistic.",
+        ['cautiously', 'goes', 'optimistic', 'quarter']
+    ),
+    (
+        "They're restructuring the sales team; people are nervous.",
+        ['nervous', 'people', 'restructuring', 'sales', 'team']
+    ),
+    (
+        "I've got imposter syndrome after joining the new squad.",
+        ['imposter', 'joining', 'squad', 'syndrome']
+    ),
+    (
+        'Lunch breaks? What lunch breaks. Eating at my desk daily.',
+        ['breaks', 'daily', 'desk', 'eating', 'lunch']
+    ),
+    (
+        "Grateful for my teammates, they've been super supportive.",
+        ['grateful', 'super', 'supportive', 'teammates']
+    ),
+    (
+        "Performance review next week and I'm dreading it.",
+        ['dreading', 'next', 'performance', 'review', 'week']
+    ),
+    (
+        'Headaches every afternoon, probably screen time.',
+        ['afternoon', 'every', 'headaches', 'probably', 'screen', 'time']
+    ),
+    (
+        'The budget cuts mean no training this year :(',
+        ['budget', 'cuts', 'mean', 'training', 'year']
+    ),
+    (
+        "Everything's fine, thanks for checking in!",
+        ['checking', 'everything', 'fine', 'thanks']
+    ),
+    (
+        'Conflict with a peer is affecting my motivation.',
+        ['affecting', 'conflict', 'motivation', 'peer']
+    ),
+    (
+        'Anxiety, insomnia, irritability - the usual trifecta.',
+        ['anxiety', 'insomnia', 'irritability', 'trifecta', 'usual']
+    ),
+    (
+        'Hmm... not sure how to describe it. Numb, maybe?',
+        ['describe', 'maybe', 'numb', 'sure']
+    ),
+    (
+        'Hybrid schedule works for me; fewer distractions at home.',
+        ['distractions', 'fewer', 'home', 'hybrid', 'schedule', 'works']
+    ),
+    (
+        'Recognition matters. Nobody noticed the extra hours.',
+        ['extra', 'hours', 'matters', 'nobody', 'noticed', 'recognition']
+    ),
+    (
+        'Onboarding was chaotic, documentation is outdated.',
+        ['chaotic', 'documentation', 'onboarding', 'outdated']
+    ),
+    (
+        'Took a mental health day and feel much better now.',
+        ['better', 'feel', 'health', 'mental', 'much', 'took']
+    ),
+    (
+        '   ',
+        []
+    ),
+    (
+        '',
+        []
+    ),
+    (
+        'OK',
+        []
+    ),
+    (
+        'STRESSED!!! DEADLINE TOMORROW!!!',
+        ['deadline', 'stressed', 'tomorrow']
+    ),
+    (
+        "Worklife... balance?? what's that lol",
+        ['balance', 'worklife']
+    ),
+]